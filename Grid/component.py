@@ -7,8 +7,10 @@
 """The code aims to calculate the network state in every epoch and publish the voltage and current values to the relevant topics."""
 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import logging
 from socket import CAN_ISOTP
-from typing import Any, cast, Set, Union
+from typing import Any, cast, List, Optional, Set, Tuple, Union
 
 from tools.components import AbstractSimulationComponent
 from tools.exceptions.messages import MessageError
@@ -23,10 +25,16 @@ import numpy
 # import all the required message classes
 from Grid.network_state_message_voltage import NetworkStateMessageVoltage
 from Grid.network_state_message_current import NetworkStateMessageCurrent
+from Grid.epoch_timing import EpochTimer, EpochTimingStatusMessage
+from Grid.power_flow_cache import PowerFlowCache
+from Grid.linear_power_flow import LinearPowerFlow
+from Grid.network_sensitivities import NetworkSensitivities
+from Grid.offer_evaluation import OfferEvaluator
 from domain_messages.NIS.NISBusMessage import NISBusMessage
 from domain_messages.NIS.NISComponentMessage import NISComponentMessage
 from domain_messages.CIS.CISCustomerMessage import CISCustomerMessage
 from domain_messages.resource.resource_state import ResourceStateMessage
+from domain_messages.Offer.offer import OfferMessage
 
 
 # initialize logging object for the module
@@ -52,9 +60,49 @@ STORAGE_RESOURCE_LIST = "STORAGE_RESOURCE_LIST"
 # Grid id
 GRID_ID = "GRID_ID" # name of the grid 
 
+# Per-epoch instrumentation
+EPOCH_TIMING_FILE = "EPOCH_TIMING_FILE" # JSON-lines file for the per-epoch timing records, empty to disable
+EPOCH_TIMING_IN_STATUS = "EPOCH_TIMING_IN_STATUS" # whether the timing record is added to the status ready message
+
+# Power flow execution
+POWER_FLOW_IN_THREAD = "POWER_FLOW_IN_THREAD" # whether the power flow is calculated outside the event loop thread
+
+# Power flow solver
+POWER_FLOW_SOLVER = "POWER_FLOW_SOLVER" # the power flow solver: "sweep" for the backward-forward sweep, "linear" for the linearized power flow, "multirate" for both
+SWEEP_SOLVER = "sweep"
+LINEAR_SOLVER = "linear"
+MULTI_RATE_SOLVER = "multirate"
+MULTI_RATE_INTERVAL = "MULTI_RATE_INTERVAL" # in the multi-rate mode, the maximum number of epochs between the exact power flows
+MULTI_RATE_THRESHOLD = "MULTI_RATE_THRESHOLD" # in the multi-rate mode, the per unit injection change that triggers an exact power flow, 0 to disable
+
+# Speculative power flow
+SPECULATIVE_POWER_FLOW = "SPECULATIVE_POWER_FLOW" # whether a power flow with the previous injections is started when the epoch message arrives
+
+# Power flow result cache
+POWER_FLOW_CACHE_SIZE = "POWER_FLOW_CACHE_SIZE" # the maximum number of cached power flow results, 0 to disable the cache
+POWER_FLOW_CACHE_RESOLUTION = "POWER_FLOW_CACHE_RESOLUTION" # the per unit resolution of the injections in the cache keys
+
+# Network sensitivities
+SENSITIVITY_BUSES = "SENSITIVITY_BUSES" # comma separated names of the buses whose voltage sensitivities are calculated, "all" for all the buses
+SENSITIVITY_BRANCHES = "SENSITIVITY_BRANCHES" # comma separated device ids of the branches whose current sensitivities are calculated, "all" for all the branches
+ALL_SELECTED = "all"
+
+# Offer evaluation
+VOLTAGE_LOWER_LIMIT = "VOLTAGE_LOWER_LIMIT" # the per unit lower limit of the phase voltages in the offer evaluation
+VOLTAGE_UPPER_LIMIT = "VOLTAGE_UPPER_LIMIT" # the per unit upper limit of the phase voltages in the offer evaluation
+UPREGULATION = "upregulation"
+
+# Epoch deadline
+EPOCH_DEADLINE = "EPOCH_DEADLINE" # seconds after the epoch message after which the missing resource states are replaced, 0 to disable
+STALE_RESOURCE_WARNING = "warning.input-unreliable.stale" # result message warning prefix for the replaced resource states
+
 # time interval in seconds on how often to check whether the component is still running
 TIMEOUT = 0.5
 
+# only every nth message is logged for the high-frequency per-message events
+RESOURCE_STATE_LOG_INTERVAL = 100
+VOLTAGE_CURRENT_LOG_INTERVAL = 100
+
 # ready made lists for further use in the code
 voltage_new_node = ["voltage_new_node_1","voltage_new_node_2","voltage_new_node_3","voltage_new_node_neutral"]
 voltage_old_node = ["voltage_old_node_1","voltage_old_node_2","voltage_old_node_3","voltage_old_node_neutral"]
@@ -64,7 +112,6 @@ admittance_node = ["admittance_node_1","admittance_node_2","admittance_node_3","
 delta_v_phase = ["delta_v_phase_1","delta_v_phase_2","delta_v_phase_3","delta_v_phase_neutral"]
 current_phase = ["current_phase_1","current_phase_2","current_phase_3","current_phase_neutral"]
 
-
 class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSeriesBlock,ValueArrayBlock,AbstractMessage): # the NetworkStatePredictor class inherits from AbstractSimulationComponent class
     """
     The Grid component is initialized in the beginning of the simulation by the platform manager.
@@ -80,7 +127,6 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
     The JSON structure for publishing the voltage values:
     https://simcesplatform.github.io/energy_msg-networkstate-voltage/
     """
-    LOGGER.info("5")
     # Constructor
     def __init__(self):
         """
@@ -88,7 +134,6 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
         and in every epoch, it calculates and publishes the distribution network state (i.e., voltages and currents).
         """
         super().__init__()
-        LOGGER.info("6")
         # Load environmental variables for those parameters that were not given to the constructor.
 
         try:
@@ -100,7 +145,21 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
                 (NUM_OF_RESOURCES,int),
                 (GRID_ID,str),
                 (RESOURCE_CATEGORIES,str),
-                (STORAGE_RESOURCE_LIST,str,"empty"))
+                (STORAGE_RESOURCE_LIST,str,"empty"),
+                (EPOCH_TIMING_FILE,str,""),
+                (EPOCH_TIMING_IN_STATUS,bool,False),
+                (POWER_FLOW_IN_THREAD,bool,True),
+                (EPOCH_DEADLINE,float,0.0),
+                (SPECULATIVE_POWER_FLOW,bool,False),
+                (POWER_FLOW_CACHE_SIZE,int,0),
+                (POWER_FLOW_CACHE_RESOLUTION,float,0.000001),
+                (POWER_FLOW_SOLVER,str,SWEEP_SOLVER),
+                (MULTI_RATE_INTERVAL,int,10),
+                (MULTI_RATE_THRESHOLD,float,0.0),
+                (SENSITIVITY_BUSES,str,""),
+                (SENSITIVITY_BRANCHES,str,""),
+                (VOLTAGE_LOWER_LIMIT,float,0.95),
+                (VOLTAGE_UPPER_LIMIT,float,1.05))
             
         except (ValueError, TypeError, MessageError) as message_error:
                 LOGGER.error(f"{type(message_error).__name__}: {message_error}")
@@ -113,12 +172,47 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
         self._grid_id = environment[GRID_ID]
         self._resource_categories = environment[RESOURCE_CATEGORIES].split(",")
         self._storage_resource_list = environment[STORAGE_RESOURCE_LIST].split(",")
+        self._epoch_timing_file = environment[EPOCH_TIMING_FILE]
+        self._epoch_timing_in_status = environment[EPOCH_TIMING_IN_STATUS]
+        # a single worker thread for the power flow calculations, None to calculate in the event loop thread
+        self._power_flow_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="PowerFlow")
+            if environment[POWER_FLOW_IN_THREAD] else None)
+        self._epoch_deadline = environment[EPOCH_DEADLINE]
+        self._power_flow_solver = environment[POWER_FLOW_SOLVER].lower()
+        if self._power_flow_solver not in (SWEEP_SOLVER, LINEAR_SOLVER, MULTI_RATE_SOLVER):
+            LOGGER.warning("Unknown power flow solver '%s', using '%s'", self._power_flow_solver, SWEEP_SOLVER)
+            self._power_flow_solver = SWEEP_SOLVER
+        self._linear_power_flow = None  # the linearized power flow, created when first needed
+        self._multi_rate_interval = max(environment[MULTI_RATE_INTERVAL], 1)
+        self._multi_rate_threshold = environment[MULTI_RATE_THRESHOLD]
+        # (epoch number, injections, voltages, branch currents, current sensitivities, nodal currents)
+        # of the latest exact power flow
+        self._exact_operating_point = None
+        self._sensitivity_buses = [bus_name.strip() for bus_name in environment[SENSITIVITY_BUSES].split(",") if bus_name.strip()]
+        self._sensitivity_branches = [device_id.strip() for device_id in environment[SENSITIVITY_BRANCHES].split(",") if device_id.strip()]
+        self._monitored_indexes = None  # (bus indexes, branch indexes) for the sensitivities, resolved when first needed
+        self._network_sensitivities = None  # the sensitivities at the operating point of the latest exact power flow
+        self._voltage_limits = (environment[VOLTAGE_LOWER_LIMIT], environment[VOLTAGE_UPPER_LIMIT])
+        self._speculative_mode = environment[SPECULATIVE_POWER_FLOW]
+        self._power_flow_cache = None  # the cache for the power flow results, None if the cache is disabled
+        if environment[POWER_FLOW_CACHE_SIZE] > 0:
+            try:
+                self._power_flow_cache = PowerFlowCache(
+                    environment[POWER_FLOW_CACHE_SIZE], environment[POWER_FLOW_CACHE_RESOLUTION])
+            except ValueError as cache_error:
+                LOGGER.warning("The power flow cache is disabled: %s", cache_error)
+        if self._speculative_mode and self._power_flow_executor is None:
+            LOGGER.warning("The speculative power flow requires POWER_FLOW_IN_THREAD, it is disabled")
+            self._speculative_mode = False
+        if self._speculative_mode and self._power_flow_solver == LINEAR_SOLVER:
+            LOGGER.warning("The speculative power flow requires the sweep, it is disabled with the linear solver")
+            self._speculative_mode = False
 
         # publishing to topics
 
         self._voltage_state_topic = "NetworkState." + self._grid_id + ".Voltage."  # according to documentation: https://simcesplatform.github.io/energy_topics/
         self._current_state_topic = "NetworkState." + self._grid_id + ".Current." # according to documentation: https://simcesplatform.github.io/energy_topics/
-        LOGGER.info("8")
 
 
         # Listening to the required topics
@@ -136,26 +230,30 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
             self._storage_resource_existance = "True"
             self._storage_resource_numbers = len(self._storage_resource_list)
             self._storage_resource_message_counter = 0
-            LOGGER.info("the storage resource list is {}".format(self._storage_resource_list))
-            LOGGER.info("we are here")
+            LOGGER.info("the storage resource list is %s", self._storage_resource_list)
         else:
             self._storage_resource_numbers = 0
 
-        LOGGER.info("9")
-
         # for incoming messages
         self._nis_bus_data = {}       # Dict for NIS data
         self._nis_component_data = {}  # Dict for NIS data
         self._cis_customer_data = {}   # Dict for CIS data
-        self._resources = [] # List for state of the resources
-        self._storage_resources = [] # List for state of storage resources when flexibility is activated
-        #self._resources["CustomerId"] = [0 for i in range(self._num_resources + 1)]
-        #self._resources["Node"] = [0 for i in range(self._num_resources + 1)]
-        #self._resources["ResourceId"] = [0 for i in range(self._num_resources + 1)]
-        #self._resource_id_logger = [0 for i in range(self._num_resources + 1)]   ######################## Is this needed?
-        #self._resources["RealPower"] = [0 for i in range(self._num_resources + 1)]
-        #self._resources["ReactivePower"] = [0 for i in range(self._num_resources + 1)]
-        LOGGER.info("10")
+        # the received resource states are buffered by their epoch number, so that the states for the next epoch
+        # can be received already while the current epoch is being processed. The powers of the resources are added
+        # to the nodal power injections of their epoch when the messages arrive and the messages are not stored.
+        self._resource_state_buffers = {}          # epoch number -> {resource id -> [customer id, bus index, node, per unit power]}
+        self._storage_resource_state_buffers = {}  # epoch number -> {source process id -> [customer id, real power]}
+        self._injection_buffers = {}               # epoch number -> per unit power injections for nodes 1, 2 and 3 of each bus
+        self._pending_resource_states = {}         # epoch number -> {resource id -> (customer id, node, real power)} received before NIS and CIS data
+        self._storage_power_buffers = {}           # epoch number -> {customer id -> real power of the storage resource}
+        self._customer_resource_buffers = {}       # epoch number -> {customer id -> [resource id]} for the added resource states
+        self._received_message_ids = {}           # epoch number -> {message id} for the received resource states
+        self._resource_bus_indexes = None          # resource id -> bus index, created from the NIS and CIS data when first needed
+        self._injections = []                      # the per unit power injections for the current epoch
+        self._latest_resource_states = {}          # resource id -> (customer id, node, real power) from the latest received state
+        self._latest_storage_resource_states = {}  # source process id -> (customer id, real power) from the latest received state
+        self._stale_resources = []                 # the resources for which a stale state is used in the current epoch
+        self._epoch_deadline_task = None           # the task that waits for the deadline of the current epoch
 
         # for outgoing messages
         self._voltage_state = []  # list for voltage forecasts
@@ -167,7 +265,6 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
         self._branch = {}  # Dict for branches
         self._power = {}  # Dict for power
         self._impedance = {} # Dict for components' impedances 
-        LOGGER.info("11")
 
         self._resource_state_msg_counter = 0
         self._nis_bus_data_received = False
@@ -178,26 +275,39 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
         self._epoch_internal = []
         self._sending_to_receiving = {}       # to store a concatenation of sending end bus and receving end bus into one dict
         self._paths = {}   # to store the shortest path between the source bus and the bus nth. this is used to reduce the number of calling the shortest_path function.
-        LOGGER.info("12")
+        self._power_flow_iterations = 0   # the number of sweeps in the latest power flow
+        self._power_flow_error = None     # the maximum voltage error of node 1 after the latest power flow
+        self._epoch_timer = EpochTimer()  # per-stage timing of the epoch processing
+        self._speculative_timer = EpochTimer()  # timing of the speculative power flow
+        self._warm_start_voltages = None  # (epoch number, voltages for each node) from the speculative power flow
 
     def clear_epoch_variables(self) -> None:
         """Clears all the variables that are used to store information about the received input within the
            current epoch. This method is called automatically after receiving an epoch message for a new epoch.
+           The resource states that were received for the new epoch before the epoch message are kept and
+           the buffers for the earlier epochs are removed.
         """
         if self._epoch_internal == [] or self._epoch_internal < self._latest_epoch_message.epoch_number: # the if statement is there to only reset the values when a new epoch arrives
+            previous_injections = self._injections
             self._resource_state_msg_counter = 0 # clearing the counter of resource state messages in the beginning of the current epoch
             self._storage_resource_message_counter = 0
             self._input_data_ready = False
             self._calculation_completed = False
-            self._resource_id_logger = [0 for i in range(self._num_resources + 1)] # clearing the resource id logger in the beginning of the current epoch 
-            self._resources = []
-            self._storage_resources = []
+            self._injections = []
+            self._stale_resources = []
             self._voltage_state = []
             self._current_state = []
             self._epoch_internal = self._latest_epoch_message.epoch_number
-            LOGGER.info("Input parameters cleared for epoch {:d}".format(self._latest_epoch_message.epoch_number))
-        
+            self._remove_old_resource_state_buffers(self._epoch_internal)
+            LOGGER.info("Input parameters cleared for epoch %d", self._latest_epoch_message.epoch_number)
 
+            # all the resource states for the new epoch might have been received before the epoch message
+            if not self._check_input_data_ready():
+                if self._epoch_deadline > 0:
+                    self._start_epoch_deadline(self._epoch_internal)
+                if self._speculative_mode and previous_injections and \
+                        self._sweep_expected(self._epoch_internal, previous_injections):
+                    self._start_speculative_power_flow(self._epoch_internal, previous_injections)
 
     async def process_epoch(self) -> bool:
         """
@@ -210,398 +320,21 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
             LOGGER.info("calculations have already been completed!")
             return True
 
-        LOGGER.info("13")
         if self._input_data_ready == True:
-            if self._latest_epoch == 1: # the calculation of this section is only needed once in Epoch 1 unless the networks topology changes (we assume it doesnot)
-                
-                # setting up per unit dictionary
-
-                self._per_unit["voltage_base"] = self._nis_bus_data.bus_voltage_base.values
-                self._per_unit["s_base"] = [self._apparent_power_base for i in range(self._num_buses)]
-                self._per_unit["i_base"] = abs(numpy.divide(self._per_unit["s_base"],(numpy.array(self._per_unit["voltage_base"]))*cmath.sqrt(3))) # since we have line to line voltages sqrt(3) is needed
-                self._per_unit["z_base"] = [i / j for i, j in zip((1000*self._per_unit["voltage_base"]),self._per_unit["i_base"])]
-
-                LOGGER.info("14")
-                # creating a graph according to the network topology of NIS data
-
-                edges=[]
-                for i in range (self._num_branches):
-                    list_1 = [self._nis_component_data.sending_end_bus[i],self._nis_component_data.receiving_end_bus[i]]
-                    edges.append(list_1)
-                graph = defaultdict(list)
-                for edge in edges:
-                    a, b = edge[0], edge[1]
-                    graph[a].append(b)
-                    graph[b].append(a)
-                self._graph = graph
-
-                LOGGER.info("self._graph is {}".format(self._graph))
-                LOGGER.info("15")
-                # impedances
-                    # The network assumed to be symmetric. The neutral wire assumes to have a same characteristics than phase wires.
-
-                self._branch["impedance"]=[0 for i in range(self._num_branches)]
-                self._branch["impedance_angle_polar"]=[0 for i in range(self._num_branches)] 
-                for i in range (self._num_branches):   
-                    self._branch["impedance"][i]=complex(self._nis_component_data.resistance.values[i],self._nis_component_data.reactance.values[i])
-
-                # Nodal admittances
-                for i in range(4):
-                    self._bus[admittance_node[i]] = [0 for i in range(self._num_buses)]
-
-                merged_list=list(zip(self._nis_component_data.sending_end_bus,self._nis_component_data.receiving_end_bus))
-                for bus in range (self._num_buses):
-                    bus_name=self._nis_bus_data.bus_name[bus]
-                    nearby_buses=self._graph[bus_name]
-                    length=len(nearby_buses)
-                    for n in range(length):
-                        to_bus=nearby_buses[n]
-                        c=[bus_name,to_bus]
-                        c1=[to_bus,bus_name]
-                        for k in range(self._num_branches):
-                            if c==list(merged_list[k]) or c1==list(merged_list[k]):
-                                self._bus["admittance_node_1"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
-                                self._bus["admittance_node_2"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
-                                self._bus["admittance_node_3"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
-                                self._bus["admittance_node_neutral"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
-
-            #    LOGGER.info("nodal admittance for node 1 is {}".format(self._bus["admittance_node_1"]))
-                                # sending end and receiving end bus concatenation
-                for i in range (self._num_branches):
-                    self._sending_to_receiving[i] = [self._nis_component_data.sending_end_bus[i],self._nis_component_data.receiving_end_bus[i]]
-                #LOGGER.info("sending to receiving bus concatenation is {}".format(self._sending_to_receiving))
-
-                # creation of a dictionary for the shortest paths
-                for i in range (self._num_buses):
-                    if self._nis_bus_data.bus_name[i] != self._root_bus_name:
-                        self._paths[i]=self._shortest_path(self._root_bus_name,self._nis_bus_data.bus_name[i])  # in self._paths[key], the key is the index of the buses in self._nis_bus_data.bus_name 
-            
-            # preparing voltage and current state messages templates   
-
-            LOGGER.info("16")
-
-            for bus in range (self._num_buses): # making a list of dictionaries
-                for node in range(4):  # Each bus has three nodes + neutral node
-                    a = {}
-                    a = {'Magnitude': {'UnitOfMeasure': 'kV', 'Value': 0},\
-                    'Angle': {'UnitOfMeasure': 'deg', 'Value': 0},\
-                    'Bus': 'load', 'Node': 1}
-                    self._voltage_state.append(a) 
-            
-            for branch in range (self._num_branches): # making a list of dictionaries
-                for phase in range (4): # each branch has three phases + neutral phase
-                    a = {}
-                    a = {"MagnitudeSendingEnd" :{"UnitOfMeasure" : "A","Value" :0},\
-                    "MagnitudeReceivingEnd" :{"UnitOfMeasure" : "A","Value" :0},\
-                    "AngleSendingEnd" :{"UnitOfMeasure" : "deg","Value" :0},\
-                    "AngleReceivingEnd" :{"UnitOfMeasure" : "deg","Values" :0},\
-                    "DeviceId" : "XYZ","Phase" : 1}
-                    self._current_state.append(a) 
-
-            # setting up node dictionary for all four nodes and branches
-            LOGGER.info("17")
-            self._resetting_lists()
-
-            # Replcing static time series resource powers with storage resource powers
-            for i in range (self._storage_resource_numbers):
-                customer_id=self._storage_resources[i].customerid
-                LOGGER.info("customerid is {}".format(customer_id))
-                for j in range (self._resource_state_msg_counter):
-                    if customer_id == self._resources[j].customerid:
-                        LOGGER.info("customerid is {}".format(customer_id))
-                        LOGGER.info("realpower is {}".format(self._resources[j].real_power.value))
-                        self._resources[j].real_power.value = self._storage_resources[i].real_power.value
-                        LOGGER.info("the new realpower is {}".format(self._resources[j].real_power.value))
-            
-            # calculating nodal powers based on the resource powers
-
-            for i in range (self._resource_state_msg_counter):
-               # LOGGER.info("18")
-
-                # finding its power
-                try:
-                    temp_power = self._resources[i].real_power.value
-                #    LOGGER.info("temp_power is {}".format(temp_power))
-                    power_per_unit = -(temp_power/self._apparent_power_base) # Per unit power. 
-                #    LOGGER.info("power per unit is {}".format(power_per_unit))
-                except BaseException as err:
-                    LOGGER.info(f"Unexpected {err=}, {type(err)=}")
-                
-                # Finding the customerId
-                temp_customer_id = self._resources[i].customerid
-                #LOGGER.info("temp_customer_id {:s}".format(temp_customer_id))
-
-                # finding the node that it is connected to
-                Connected_node = self._resources[i].node
-                #LOGGER.info("connected node is {}".format(Connected_node))
-
-                # finding the resourceId
-                temp_resource_id = self._resources[i].resource_id
-                #LOGGER.info("the resourceid is {}".format(temp_resource_id))
-
-                # finding the bus where the power should be added to
-                try:
-                    temp_index = self._cis_customer_data.resource_id.index(temp_resource_id)
-                except:
-                    LOGGER.warning("Resource state message has a resource id that doesnot exist in the CIS data")
-
-                temp_bus_name = self._cis_customer_data.bus_name[temp_index]
-                temp_row = self._nis_bus_data.bus_name.index(temp_bus_name)
-
-            #    LOGGER.info("bus name is {}".format(temp_bus_name))
-
-                if Connected_node == 1:
-                    self._bus["power_node_1"][temp_row] = power_per_unit + self._bus["power_node_1"][temp_row] # 
-                elif Connected_node == 2:
-                    self._bus["power_node_2"][temp_row] = power_per_unit + self._bus["power_node_2"][temp_row]
-                elif Connected_node == 3:
-                    self._bus["power_node_3"][temp_row] = power_per_unit + self._bus["power_node_3"][temp_row]
-                elif Connected_node == 4:
-                    power_per_unit_per_phase = power_per_unit/cmath.sqrt(3)  # calculate power per phase
-                    self._bus["power_node_1"][temp_row] = power_per_unit_per_phase + self._bus["power_node_1"][temp_row]
-                    self._bus["power_node_2"][temp_row] = power_per_unit_per_phase + self._bus["power_node_2"][temp_row]
-                    self._bus["power_node_3"][temp_row] = power_per_unit_per_phase + self._bus["power_node_3"][temp_row]
-
-            LOGGER.info("Power at node 1 is {}".format(self._bus["power_node_1"])) 
-        #    LOGGER.info("Power at node 2 is {}".format(self._bus["power_node_2"])) 
-        #    LOGGER.info("Power at node 3 is {}".format(self._bus["power_node_3"]))
-            LOGGER.info("19") 
-
-            power_flow_error_node=10 # 10 is a value that is way larger than the aaceptable limit to make sure that the first iteration will begin
-            iteration = 0    # Number of sweeps in the power flow
-            while power_flow_error_node > self._power_flow_percision and iteration < self._max_iteration: # stop power flow when enough accuracy of voltages reached. OR, the number of iteration get larger than specified                    
-                
-                # calculating nodal currents
-                iteration = iteration+1
-                LOGGER.info("iteration is {}".format(iteration))
-                LOGGER.info("20")
-                for bus in range (self._num_buses): 
-                #    LOGGER.info("bus is {}".format(bus))
-                    for node in range (0,3):   # for each node
-                #        LOGGER.info("node is {}".format((node)))
-                        voltage_difference = self._bus[voltage_old_node[node]][bus] - self._bus["voltage_old_node_neutral"][bus]
-                #        LOGGER.info("voltage difference is {}".format(cmath.polar(voltage_difference)))
-                        self._bus[current_node[node]][bus] = numpy.conj(self._bus[power_node[node]][bus]/voltage_difference)
-                    self._bus["current_node_neutral"][bus]=-(self._bus["current_node_1"][bus]+self._bus["current_node_2"][bus]+self._bus["current_node_3"][bus])
-
-                for bus in range(self._num_buses): # taking into account line admittances
-                    for node in range (0,4):
-                        self._bus[current_node[node]][bus] = self._bus[current_node[node]][bus]-(self._bus[admittance_node[node]][bus]*self._bus[voltage_old_node[node]][bus])
-
-
-                # for i in range (3):
-                #     LOGGER.info("node is {}".format(i))
-                #     for j in range (self._num_buses):
-                #         LOGGER.info("bus is {}".format(j))
-                #         LOGGER.info("the current at bus is {}".format(cmath.polar(self._bus[current_node[i]][j])))
-                
-            #    LOGGER.info("Current at node 1 is {}".format(self._bus[current_node[0]]))
-            #    LOGGER.info("Current at node 2 is {}".format(self._bus[current_node[1]]))
-            #    LOGGER.info("Current at node 3 is {}".format(self._bus[current_node[2]]))
-            #    LOGGER.info("Current at node neutral is {}".format(self._bus[current_node[3]]))
-
-                # calculating branch currents
-                LOGGER.info("21")
-                for i in range (self._num_buses):
-                        if abs(self._bus[current_node[0]][i])>0.0001 or abs(self._bus[current_node[1]][i])>0.0001 or abs(self._bus[current_node[2]][i])>0.0001:  # calculation is only done for buses with a non negligable load
-                        #    LOGGER.info("i is {}".format(i))
-                        #    LOGGER.info("bus name is {}".format(self._nis_bus_data.bus_name[i]))
-                            shortest_path = self._paths[i]
-                            #LOGGER.info("shortest path is {}".format(shortest_path))
-
-                            for j in range (self._num_branches):
-                                from_bus = self._nis_component_data.sending_end_bus[j]
-                                to_bus = self._nis_component_data.receiving_end_bus[j]
-                                try:
-                                    shortest_path.index(from_bus)    # we want to know where the bus value exist in the shortest path or not
-                                    shortest_path.index(to_bus)
-                                #    LOGGER.info("from bus is {}".format(from_bus))
-                                #    LOGGER.info("to bus is {}".format(to_bus))
-                                #    LOGGER.info("the row was found number{}".format(j))
-                                #    LOGGER.info("the nodal current is {}".format(self._bus[current_node[0]][i]))
-                                    for phases in range (0,4):
-                                        self._branch[current_phase[phases]][j] = self._bus[current_node[phases]][i] + self._branch[current_phase[phases]][j]
-                                #    LOGGER.info("branch current is {}".format(self._branch[current_phase[0]]))
-                                except:
-                                    pass  
-                
-                LOGGER.info("22")
-                #a=[]
-                #for i in range (1):
-                #    LOGGER.info("node is {}".format(i))
-                #    for j in range (self._num_branches):
-                #        LOGGER.info("branch is {}".format(j))
-                #        LOGGER.info("the branch current at phase 1 is {}".format(cmath.polar(self._branch[current_phase[i]][j])))
-                #        [c,d]=cmath.polar(self._branch[current_phase[i]][j])
-                #        a.append(c)
-
-                #LOGGER.info("branch current is {}".format(a))
-                #LOGGER.info("the branch current at phase 1 is {}".format(self._branch[current_phase[0]]))
-                # LOGGER.info("the branch current at phase 3 is {}".format(self._branch[current_phase[2]]))
-                # LOGGER.info("the branch current at phase neutral is {}".format(self._branch[current_phase[3]]))
-
-                # calculating the voltage drop over each branch
-                for row in range (self._num_branches):
-                    for kk in range (0,4):
-                        self._branch[delta_v_phase[kk]][row] = self._branch[current_phase[kk]][row] * self._branch["impedance"][row]
-
-                # for i in range (3):
-                #     LOGGER.info("phase is {}".format(i))
-                #     for j in range (self._num_branches):
-                #         LOGGER.info("branch is {}".format(j))
-                #         LOGGER.info("the voltage drop at phase is {}".format(cmath.polar(self._branch[delta_v_phase[i]][j])))
-
-                # LOGGER.info("the voltage drop at phase 1 is {}".format(self._branch[delta_v_phase[0]]))
-                # LOGGER.info("the voltage drop at phase 2 is {}".format(self._branch[delta_v_phase[1]]))
-                # LOGGER.info("the voltage drop at phase 3 is {}".format(self._branch[delta_v_phase[2]]))
-                # LOGGER.info("the voltage drop at phase neutral is {}".format(self._branch[delta_v_phase[3]]))
-                zero_avail = {}
-                zero_avail = self._bus["voltage_new_node_1"] + self._bus["voltage_new_node_2"] + self._bus["voltage_new_node_3"]  
-                zero_avail_num = zero_avail.count(0)
-                #LOGGER.info("the number of 0 voltages are {}".format(zero_avail_num))
-                
-                # calculating the new voltages
-
-                while zero_avail_num != 0:
-                    #    LOGGER.info("the new voltage for the node neutral is {}".format(self._bus["voltage_new_node_neutral"]))
-                    for bus in range (self._num_buses):
-                        node = 0
-                        if self._bus[voltage_new_node[node]][bus] == 0:
-                            bus_name = self._nis_bus_data.bus_name[bus]
-                            nearby_buses=self._graph[bus_name]
-                            length = len(nearby_buses)
-                #            LOGGER.info("Bus Name is {}".format(bus_name))
-                #            LOGGER.info("Nearby buses are {}".format(nearby_buses))
-                #            LOGGER.info("length of nearby buses is {}".format(length))
-                            if length > 0:
-                                for a in range (length):
-                                    index = self._nis_bus_data.bus_name.index(nearby_buses[a])
-                #                    LOGGER.info("Bus Name index is {}".format(index))
-                                    if abs(self._bus[voltage_new_node[node]][index]) > 0.1:
-                #                        LOGGER.info("the existing voltage is {}".format(self._bus[voltage_new_node[node]][index]))
-                                        to_bus = nearby_buses[a]
-                                        from_bus = bus_name
-                #                        LOGGER.info("to bus is {}".format(to_bus))
-                #                        LOGGER.info("from bus is {}".format(from_bus))
-                                        branch = [from_bus,to_bus]
-                                        branch1 = [to_bus,from_bus]
-
-                                        shortest_path1 = self._paths[self._nis_bus_data.bus_name.index(from_bus)]
-
-                                        try:
-                                            shortest_path2 = self._paths[index]
-                                        except:
-                                            shortest_path2 = None   
-
-                                        if shortest_path2 == None: # if it is source bus
-                                            shortest_path2_length = 0
-                                        else:
-                                            shortest_path2_length = len(shortest_path2)
-                                        
-                                        try:
-                                            row=list(self._sending_to_receiving.keys())[list(self._sending_to_receiving.values()).index(branch)]
-                                        except:
-                                            row=list(self._sending_to_receiving.keys())[list(self._sending_to_receiving.values()).index(branch1)]
-            #                            LOGGER.info("the row is {}".format(row))
-                                        if len(shortest_path1) > shortest_path2_length:
-                                            for node in range (0,4):
-        #                                        LOGGER.info("voltage is reduced as much as {}".format(self._branch[delta_v_phase[node]][row]))
-        #                                        LOGGER.info("voltage before change is {}".format(self._bus[voltage_new_node[node]][bus]))
-                                                self._bus[voltage_new_node[node]][bus] = self._bus[voltage_new_node[node]][index] - self._branch[delta_v_phase[node]][row]
-        #                                        LOGGER.info("voltage after change is {}".format(self._bus[voltage_new_node[node]][bus]))
-
-                                        else:
-                                            for node in range (0,4):
-        #                                        LOGGER.info("voltage is increased as much as {}".format(self._branch[delta_v_phase[node]][row]))
-        #                                        LOGGER.info("voltage before change is {}".format(self._bus[voltage_new_node[node]][bus]))
-                                                self._bus[voltage_new_node[node]][bus] = self._bus[voltage_new_node[node]][index] + self._branch[delta_v_phase[node]][row]
-        #                                        LOGGER.info("voltage after change is {}".format(self._bus[voltage_new_node[node]][bus]))
-                                        break
-                    zero_avail = {}
-                    zero_avail = self._bus["voltage_new_node_1"] + self._bus["voltage_new_node_2"] + self._bus["voltage_new_node_3"]
-                    zero_avail_num = zero_avail.count(0)
-
-                error = [0 for i in range(self._num_buses)]
-                for w in range (self._num_buses): # calculate the error only for node 1    
-                    error[w] = abs(self._bus["voltage_old_node_1"][w]-self._bus["voltage_new_node_1"][w])
-                power_flow_error_node=max(error)
-                LOGGER.info("the maximum error is {}".format(power_flow_error_node))
-            #    LOGGER.info("voltage new for node 1 is : {}".format(self._bus["voltage_new_node_1"]))
-            #    LOGGER.info("voltage new for node 2 is : {}".format(self._bus["voltage_new_node_2"]))
-            #    LOGGER.info("voltage new for node 3 is : {}".format(self._bus["voltage_new_node_3"]))
-            #    LOGGER.info("voltage new for node neutral is : {}".format(self._bus["voltage_new_node_neutral"]))
-
-                if power_flow_error_node > self._power_flow_percision and iteration < self._max_iteration:
-                    for p in range (4): # clear values for a fresh start
-                        self._bus[voltage_old_node[p]]=self._bus[voltage_new_node[p]]
-                        self._bus[voltage_new_node[p]]=[0 for i in range(self._num_buses)]
-                        self._bus[current_node[p]] = [0 for i in range(self._num_buses)]
-                        self._branch[current_phase[p]] = [0 for i in range(self._num_branches)]
-                        self._branch[delta_v_phase[p]] = [0 for i in range(self._num_branches)]
-                    self._bus["voltage_new_node_1"][self._root_bus_index] = self._root_bus_voltage
-                    self._bus["voltage_new_node_2"][self._root_bus_index] = cmath.rect(self._root_bus_voltage,4*math.pi/3)
-                    self._bus["voltage_new_node_3"][self._root_bus_index] = cmath.rect(self._root_bus_voltage,2*math.pi/3)
-
-
+            self._epoch_timer.start_epoch(self._latest_epoch)
+            if self._power_flow_executor is None:
+                self._calculate_network_state()
             else:
-                
-                LOGGER.info("24")
-            #    LOGGER.info("voltage new for node 1 is : {}".format(self._bus["voltage_new_node_1"]))
-            #    LOGGER.info("voltage new for node 2 is : {}".format(self._bus["voltage_new_node_2"]))
-            #    LOGGER.info("voltage new for node 3 is : {}".format(self._bus["voltage_new_node_3"]))
-            #    LOGGER.info("voltage new for node neutral is : {}".format(self._bus["voltage_new_node_neutral"]))
-
-                # storing voltage values as a result of power flow
-                for bus in range (self._num_buses):
-                    bus_name = self._nis_bus_data.bus_name[bus]
-                #    LOGGER.info("bus name is : {}".format(bus_name))
-                    voltage_base = self._nis_bus_data.bus_voltage_base.values[bus]
-                #    LOGGER.info("voltage base is : {}".format(voltage_base))
-                    for node in range (0,4):
-                        row = bus*4 + node
-                        voltage = self._bus[voltage_new_node[node]][bus]
-                        [absolute,angle] = cmath.polar(voltage*voltage_base)
-                        self._voltage_state[row]["Magnitude"]["Value"] = absolute
-                        self._voltage_state[row]["Angle"]["Value"] = angle*57.29    # radian to degree (360/(2*3.1415))=57.29
-                        self._voltage_state[row]["Bus"] = bus_name
-                        if node < 3:
-                            self._voltage_state[row]["Node"] = node+1
-                        else:
-                            self._voltage_state[row]["Node"] = "neutral"
-                
-                LOGGER.info("25")
-                for branch in range (self._num_branches):
-                    device_id = self._nis_component_data.device_id[branch]
-                    sending_end_bus = self._nis_component_data.sending_end_bus[branch]
-                    index = self._nis_bus_data.bus_name.index(sending_end_bus)
-                    voltage_base = self._nis_bus_data.bus_voltage_base.values[index]
-                    s_base = []
-                    s_base = self._per_unit["s_base"]
-                    current_base = [x / ((voltage_base)*cmath.sqrt(3)) for x in s_base]
-                #    LOGGER.info("device id is : {}".format(device_id))
-                #    LOGGER.info("voltage base is : {}".format(voltage_base))
-                #    LOGGER.info("current base is : {}".format(current_base))
-                    for phase in range (0,4):
-                        row = branch*4 + phase
-                        current = self._branch[current_phase[phase]][branch]
-                        [absolute,angle] = cmath.polar(current*current_base[0])
-                        self._current_state[row]["MagnitudeSendingEnd"]["Value"] = absolute    # we assume that current at sending end and receiving end of component is identical
-                        self._current_state[row]["MagnitudeReceivingEnd"]["Value"] = absolute
-                        self._current_state[row]["AngleSendingEnd"]["Value"] = angle*57.29    # radian to degree (360/(2*3.1415))=57.29
-                        self._current_state[row]["AngleReceivingEnd"]["Value"] = angle*57.29    # radian to degree (360/(2*3.1415))=57.29
-                        self._current_state[row]["DeviceId"] = device_id 
-                        if phase < 3:
-                            self._current_state[row]["Phase"] = phase+1
-                        else:
-                            self._current_state[row]["Phase"] = "neutral"
-
-                LOGGER.info("26")
-                self._resetting_lists()
+                # The power flow is calculated in a separate thread so that the event loop can keep on receiving
+                # and decoding messages and answering the message bus heartbeats during a long calculation.
+                await asyncio.get_running_loop().run_in_executor(
+                    self._power_flow_executor, self._calculate_network_state)
 
             LOGGER.info("Power flow is done")
         #    LOGGER.info("the final voltage state is {}".format(self._voltage_state))
         #    LOGGER.info("the final current state is {}".format(self._current_state))
 
+            self._epoch_timer.start_stage("Publishing")
             q = 0
             for p in range (0,len(self._voltage_state)):
                 if type(self._voltage_state[p]["Node"]) == int: # we donot need to send the voltage values for the neutral nodes
@@ -609,6 +342,7 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
                     NetworkStateMessageVoltage,
                     EpochNumber = self._latest_epoch,
                     TriggeringMessageIds = self._triggering_message_ids,
+                    Warnings = self._stale_resources_warnings(),
                     Magnitude = self._voltage_state[p]["Magnitude"],
                     Angle = self._voltage_state[p]["Angle"],
                     Bus = self._voltage_state[p]["Bus"],
@@ -616,8 +350,9 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
 
                     voltage_topic = self._voltage_state_topic + self._voltage_state[p]["Bus"]
                     q = q+1
-                    LOGGER.info("voltage sent is {}".format(q))
+                    LOGGER.log_sampled(logging.INFO, VOLTAGE_CURRENT_LOG_INTERVAL, "voltage sent is %d", q)
                     await self._send_message(voltage_message, voltage_topic)
+            self._epoch_timer.set_count("VoltageMessages", q)
 
             q = 0
             for n in range (0,len(self._current_state)):
@@ -626,6 +361,7 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
                     NetworkStateMessageCurrent,
                     EpochNumber = self._latest_epoch,
                     TriggeringMessageIds = self._triggering_message_ids,
+                    Warnings = self._stale_resources_warnings(),
                     MagnitudeSendingEnd = self._current_state[n]["MagnitudeSendingEnd"],
                     MagnitudeReceivingEnd = self._current_state[n]["MagnitudeReceivingEnd"],
                     AngleSendingEnd = self._current_state[n]["AngleSendingEnd"],
@@ -635,15 +371,702 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
 
                     current_topic = self._current_state_topic + self._current_state[n]["DeviceId"]
                     q = q+1
-                    LOGGER.info("current sent is {}".format(q))
+                    LOGGER.log_sampled(logging.INFO, VOLTAGE_CURRENT_LOG_INTERVAL, "current sent is %d", q)
                     await self._send_message(current_message, current_topic)
+            self._epoch_timer.set_count("CurrentMessages", q)
             LOGGER.info("all voltage and current states were successfully sent")
+            self._finish_epoch_timing()
             self._calculation_completed = True
             return True # return True to indicate that the component is finished with the current epoch
         else:
             LOGGER.info("input data arenot complete")
             return False
 
+    async def stop(self) -> None:
+        """Stops the component and the power flow worker thread."""
+        await super().stop()
+        self._cancel_epoch_deadline()
+        if self._power_flow_executor is not None:
+            # the threads are created only when needed, so a new executor is ready in case the component is restarted
+            self._power_flow_executor.shutdown(wait=False)
+            self._power_flow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PowerFlow")
+
+    def _calculate_network_state(self) -> None:
+        """
+        Calculates the power flow for the current epoch and stores the resulting voltages and currents
+        to self._voltage_state and self._current_state. Assumes that all the input data for the epoch is available.
+        This method does not use the event loop, so it can be run in a separate thread.
+        """
+        if self._latest_epoch == 1: # the calculation of this section is only needed once in Epoch 1 unless the networks topology changes (we assume it doesnot)
+                
+            self._epoch_timer.start_stage("TopologyBuild")
+            # setting up per unit dictionary
+
+            self._per_unit["voltage_base"] = self._nis_bus_data.bus_voltage_base.array
+            self._per_unit["s_base"] = [self._apparent_power_base for i in range(self._num_buses)]
+            self._per_unit["i_base"] = numpy.abs(numpy.divide(self._per_unit["s_base"],self._per_unit["voltage_base"]*math.sqrt(3))) # since we have line to line voltages sqrt(3) is needed
+            self._per_unit["z_base"] = numpy.divide(self._per_unit["voltage_base"],self._per_unit["i_base"]).tolist()
+
+            # creating a graph according to the network topology of NIS data
+
+            edges=[]
+            for i in range (self._num_branches):
+                list_1 = [self._nis_component_data.sending_end_bus[i],self._nis_component_data.receiving_end_bus[i]]
+                edges.append(list_1)
+            graph = defaultdict(list)
+            for edge in edges:
+                a, b = edge[0], edge[1]
+                graph[a].append(b)
+                graph[b].append(a)
+            self._graph = graph
+
+            LOGGER.debug("self._graph is %s", self._graph)
+            # impedances
+                # The network assumed to be symmetric. The neutral wire assumes to have a same characteristics than phase wires.
+
+            self._branch["impedance"]=(self._nis_component_data.resistance.array + 1j*self._nis_component_data.reactance.array).tolist()
+            self._branch["impedance_angle_polar"]=[0 for i in range(self._num_branches)] 
+
+            # Nodal admittances
+            for i in range(4):
+                self._bus[admittance_node[i]] = [0 for i in range(self._num_buses)]
+
+            merged_list=list(zip(self._nis_component_data.sending_end_bus,self._nis_component_data.receiving_end_bus))
+            for bus in range (self._num_buses):
+                bus_name=self._nis_bus_data.bus_name[bus]
+                nearby_buses=self._graph[bus_name]
+                length=len(nearby_buses)
+                for n in range(length):
+                    to_bus=nearby_buses[n]
+                    c=[bus_name,to_bus]
+                    c1=[to_bus,bus_name]
+                    for k in range(self._num_branches):
+                        if c==list(merged_list[k]) or c1==list(merged_list[k]):
+                            self._bus["admittance_node_1"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
+                            self._bus["admittance_node_2"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
+                            self._bus["admittance_node_3"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
+                            self._bus["admittance_node_neutral"][bus] = self._nis_component_data.shunt_admittance.values[k]/2 + self._bus["admittance_node_1"][bus]
+
+        #    LOGGER.info("nodal admittance for node 1 is {}".format(self._bus["admittance_node_1"]))
+                            # sending end and receiving end bus concatenation
+            for i in range (self._num_branches):
+                self._sending_to_receiving[i] = [self._nis_component_data.sending_end_bus[i],self._nis_component_data.receiving_end_bus[i]]
+            #LOGGER.info("sending to receiving bus concatenation is {}".format(self._sending_to_receiving))
+
+            # creation of a dictionary for the shortest paths
+            for i in range (self._num_buses):
+                if self._nis_bus_data.bus_name[i] != self._root_bus_name:
+                    self._paths[i]=self._shortest_path(self._root_bus_name,self._nis_bus_data.bus_name[i])  # in self._paths[key], the key is the index of the buses in self._nis_bus_data.bus_name 
+            
+        # preparing voltage and current state messages templates   
+
+        self._epoch_timer.start_stage("ResultTemplates")
+
+        for bus in range (self._num_buses): # making a list of dictionaries
+            for node in range(4):  # Each bus has three nodes + neutral node
+                a = {}
+                a = {'Magnitude': {'UnitOfMeasure': 'kV', 'Value': 0},\
+                'Angle': {'UnitOfMeasure': 'deg', 'Value': 0},\
+                'Bus': 'load', 'Node': 1}
+                self._voltage_state.append(a) 
+            
+        for branch in range (self._num_branches): # making a list of dictionaries
+            for phase in range (4): # each branch has three phases + neutral phase
+                a = {}
+                a = {"MagnitudeSendingEnd" :{"UnitOfMeasure" : "A","Value" :0},\
+                "MagnitudeReceivingEnd" :{"UnitOfMeasure" : "A","Value" :0},\
+                "AngleSendingEnd" :{"UnitOfMeasure" : "deg","Value" :0},\
+                "AngleReceivingEnd" :{"UnitOfMeasure" : "deg","Values" :0},\
+                "DeviceId" : "XYZ","Phase" : 1}
+                self._current_state.append(a) 
+
+        # setting up node dictionary for all four nodes and branches
+        self._resetting_lists()
+
+        self._epoch_timer.start_stage("InjectionAssembly")
+
+        # the resource powers, including the storage resource powers that replace the powers of the other resources
+        # of the same customer, have already been added to the nodal powers when the resource states were received
+        for node in range (3):
+            self._bus[power_node[node]] = list(self._injections[node])
+
+        LOGGER.debug("Power at node 1 is %s", self._bus["power_node_1"])
+    #    LOGGER.info("Power at node 2 is {}".format(self._bus["power_node_2"])) 
+    #    LOGGER.info("Power at node 3 is {}".format(self._bus["power_node_3"]))
+
+        linear_power_flow = self._get_linear_power_flow() if self._power_flow_solver != SWEEP_SOLVER else None
+        if self._power_flow_solver == LINEAR_SOLVER:
+            self._epoch_timer.start_stage("LinearSolve")
+            voltages, currents = linear_power_flow.solve(self._injections)
+            iterations, power_flow_error = 0, None
+            for node in range (4):
+                self._bus[voltage_new_node[node]] = voltages[node].tolist()
+                self._branch[current_phase[node]] = currents[node].tolist()
+        elif self._power_flow_solver == MULTI_RATE_SOLVER and not self._exact_power_flow_needed():
+            # the changes from the latest exact operating point are calculated using its sensitivities
+            self._epoch_timer.start_stage("SensitivityUpdate")
+            _, exact_injections, exact_voltages, exact_currents, current_sensitivities, nodal_currents = \
+                self._exact_operating_point
+            voltage_changes, current_changes = linear_power_flow.solve_changes(
+                numpy.asarray(self._injections) - exact_injections, current_sensitivities, nodal_currents)
+            iterations, power_flow_error = 0, None
+            for node in range (4):
+                self._bus[voltage_new_node[node]] = (exact_voltages[node] + voltage_changes[node]).tolist()
+                self._branch[current_phase[node]] = (exact_currents[node] + current_changes[node]).tolist()
+        else:
+            cache_key = None
+            cached_result = None
+            if self._power_flow_cache is not None:
+                self._epoch_timer.start_stage("CacheLookup")
+                cache_key = self._power_flow_cache.get_key(self._injections)
+                cached_result = self._power_flow_cache.get(cache_key)
+                self._epoch_timer.set_value("CacheHit", cached_result is not None)
+
+            if cached_result is None:
+                self._apply_warm_start()
+                iterations, power_flow_error, _ = self._power_flow_sweep(self._epoch_timer)
+                LOGGER.info("Power flow of epoch %d finished after %d iterations, the maximum error is %s",
+                            self._latest_epoch, iterations, power_flow_error)
+                if cache_key is not None and power_flow_error <= self._power_flow_percision:
+                    # only the converged results are reused, a sweep stopped at the maximum iteration count is not
+                    self._power_flow_cache.put(cache_key, (
+                        [list(self._bus[voltage_new_node[node]]) for node in range(4)],
+                        [list(self._branch[current_phase[node]]) for node in range(4)],
+                        power_flow_error))
+            else:
+                # the injections match an earlier epoch, so its converged voltages and currents are used
+                LOGGER.debug("Using the cached power flow result for epoch %d", self._latest_epoch)
+                voltages, currents, power_flow_error = cached_result
+                iterations = 0
+                for node in range (4):
+                    self._bus[voltage_new_node[node]] = list(voltages[node])
+                    self._branch[current_phase[node]] = list(currents[node])
+                self._warm_start_voltages = None
+
+            if self._power_flow_solver == MULTI_RATE_SOLVER:
+                self._set_exact_operating_point(linear_power_flow)
+            if self._sensitivity_buses or self._sensitivity_branches:
+                self._set_network_sensitivities()
+
+        self._epoch_timer.start_stage("ResultFormatting")
+        self._power_flow_iterations = iterations
+        self._power_flow_error = power_flow_error
+    #    LOGGER.info("voltage new for node 1 is : {}".format(self._bus["voltage_new_node_1"]))
+    #    LOGGER.info("voltage new for node 2 is : {}".format(self._bus["voltage_new_node_2"]))
+    #    LOGGER.info("voltage new for node 3 is : {}".format(self._bus["voltage_new_node_3"]))
+    #    LOGGER.info("voltage new for node neutral is : {}".format(self._bus["voltage_new_node_neutral"]))
+
+        # storing voltage values as a result of power flow
+        for bus in range (self._num_buses):
+            bus_name = self._nis_bus_data.bus_name[bus]
+        #    LOGGER.info("bus name is : {}".format(bus_name))
+            voltage_base = self._nis_bus_data.bus_voltage_base.values[bus]
+        #    LOGGER.info("voltage base is : {}".format(voltage_base))
+            for node in range (0,4):
+                row = bus*4 + node
+                voltage = self._bus[voltage_new_node[node]][bus]
+                [absolute,angle] = cmath.polar(voltage*voltage_base)
+                self._voltage_state[row]["Magnitude"]["Value"] = absolute
+                self._voltage_state[row]["Angle"]["Value"] = angle*57.29    # radian to degree (360/(2*3.1415))=57.29
+                self._voltage_state[row]["Bus"] = bus_name
+                if node < 3:
+                    self._voltage_state[row]["Node"] = node+1
+                else:
+                    self._voltage_state[row]["Node"] = "neutral"
+
+        for branch in range (self._num_branches):
+            device_id = self._nis_component_data.device_id[branch]
+            sending_end_bus = self._nis_component_data.sending_end_bus[branch]
+            index = self._nis_bus_data.bus_name.index(sending_end_bus)
+            voltage_base = self._nis_bus_data.bus_voltage_base.values[index]
+            s_base = []
+            s_base = self._per_unit["s_base"]
+            current_base = [x / ((voltage_base)*cmath.sqrt(3)) for x in s_base]
+        #    LOGGER.info("device id is : {}".format(device_id))
+        #    LOGGER.info("voltage base is : {}".format(voltage_base))
+        #    LOGGER.info("current base is : {}".format(current_base))
+            for phase in range (0,4):
+                row = branch*4 + phase
+                current = self._branch[current_phase[phase]][branch]
+                [absolute,angle] = cmath.polar(current*current_base[0])
+                self._current_state[row]["MagnitudeSendingEnd"]["Value"] = absolute    # we assume that current at sending end and receiving end of component is identical
+                self._current_state[row]["MagnitudeReceivingEnd"]["Value"] = absolute
+                self._current_state[row]["AngleSendingEnd"]["Value"] = angle*57.29    # radian to degree (360/(2*3.1415))=57.29
+                self._current_state[row]["AngleReceivingEnd"]["Value"] = angle*57.29    # radian to degree (360/(2*3.1415))=57.29
+                self._current_state[row]["DeviceId"] = device_id 
+                if phase < 3:
+                    self._current_state[row]["Phase"] = phase+1
+                else:
+                    self._current_state[row]["Phase"] = "neutral"
+
+        self._resetting_lists()
+
+    def _get_linear_power_flow(self) -> Optional[LinearPowerFlow]:
+        """Returns the linearized power flow for the network. It is built from the NIS data when first needed.
+           Returns None and switches to the backward-forward sweep if the network is not radial."""
+        if self._linear_power_flow is None:
+            try:
+                self._linear_power_flow = LinearPowerFlow(
+                    bus_names=self._nis_bus_data.bus_name,
+                    root_bus_index=self._root_bus_index,
+                    sending_end_buses=self._nis_component_data.sending_end_bus,
+                    receiving_end_buses=self._nis_component_data.receiving_end_bus,
+                    impedances=self._branch["impedance"],
+                    admittances=[self._bus[admittance_node[node]] for node in range(4)],
+                    root_voltages=[self._root_bus_voltage, cmath.rect(self._root_bus_voltage,4*math.pi/3),
+                                   cmath.rect(self._root_bus_voltage,2*math.pi/3), 0])
+            except ValueError as network_error:
+                LOGGER.warning("The linearized power flow cannot be used, using the sweep instead: %s", network_error)
+                self._power_flow_solver = SWEEP_SOLVER
+                return None
+        return self._linear_power_flow
+
+    def _exact_power_flow_needed(self) -> bool:
+        """Returns True if the power flow of the current epoch must be calculated with the sweep in the
+           multi-rate mode, i.e. if the latest exact power flow is at least the given number of epochs old or
+           the injections have changed more than the given threshold since it."""
+        exact_needed, injection_change = self._check_exact_power_flow(self._latest_epoch, self._injections)
+        if injection_change is not None:
+            self._epoch_timer.set_value("InjectionChange", injection_change)
+        self._epoch_timer.set_value("ExactSolve", exact_needed)
+        return exact_needed
+
+    def _check_exact_power_flow(self, epoch_number: int, injections: list) -> Tuple[bool, Optional[float]]:
+        """Returns whether the sweep is needed for the given epoch and injections in the multi-rate mode and
+           the largest injection change since the latest exact power flow or None if there is no exact power flow."""
+        if self._exact_operating_point is None:
+            return True, None
+
+        exact_epoch, exact_injections = self._exact_operating_point[:2]
+        injection_change = float(numpy.max(numpy.abs(numpy.asarray(injections) - exact_injections)))
+        exact_needed = (
+            epoch_number - exact_epoch >= self._multi_rate_interval or
+            (self._multi_rate_threshold > 0 and injection_change > self._multi_rate_threshold))
+        return exact_needed, injection_change
+
+    def _sweep_expected(self, epoch_number: int, predicted_injections: list) -> bool:
+        """Returns True if the power flow of the given epoch is expected to be calculated with the sweep when
+           its injections are the predicted ones. Only then the speculative power flow is useful."""
+        if self._power_flow_solver == SWEEP_SOLVER:
+            return True
+        if self._power_flow_solver == MULTI_RATE_SOLVER:
+            return self._check_exact_power_flow(epoch_number, predicted_injections)[0]
+        return False
+
+    def _set_exact_operating_point(self, linear_power_flow: LinearPowerFlow) -> None:
+        """Stores the result of the current epoch as the operating point for the multi-rate updates
+           together with the current sensitivities and the nodal currents at the operating point."""
+        self._epoch_timer.start_stage("Sensitivities")
+        injections = numpy.array(self._injections, dtype=complex)
+        voltages = numpy.array([self._bus[voltage_new_node[node]] for node in range(4)], dtype=complex)
+        self._exact_operating_point = (
+            self._latest_epoch,
+            injections,
+            voltages,
+            numpy.array([self._branch[current_phase[node]] for node in range(4)], dtype=complex),
+            linear_power_flow.get_current_sensitivities(voltages),
+            linear_power_flow.get_operating_point_currents(injections, voltages))
+
+    def _get_monitored_indexes(self) -> tuple:
+        """Returns the indexes of the buses and branches whose sensitivities are calculated.
+           The unknown bus names and device ids are ignored with a warning."""
+        if self._monitored_indexes is None:
+            bus_names = self._nis_bus_data.bus_name
+            device_ids = self._nis_component_data.device_id
+            if self._sensitivity_buses == [ALL_SELECTED]:
+                bus_indexes = list(range(len(bus_names)))
+            else:
+                bus_indexes = [bus_names.index(bus_name) for bus_name in self._sensitivity_buses if bus_name in bus_names]
+            if self._sensitivity_branches == [ALL_SELECTED]:
+                branch_indexes = list(range(len(device_ids)))
+            else:
+                branch_indexes = [device_ids.index(device_id) for device_id in self._sensitivity_branches if device_id in device_ids]
+            unknown = ([bus_name for bus_name in self._sensitivity_buses if bus_name not in bus_names + [ALL_SELECTED]] +
+                       [device_id for device_id in self._sensitivity_branches if device_id not in device_ids + [ALL_SELECTED]])
+            if unknown:
+                LOGGER.warning("Unknown buses or branches in the sensitivity selection are ignored: %s", ", ".join(unknown))
+            self._monitored_indexes = (bus_indexes, branch_indexes)
+        return self._monitored_indexes
+
+    def _set_network_sensitivities(self) -> None:
+        """Calculates the voltage and current sensitivities of the monitored buses and branches at the operating
+           point of the current epoch."""
+        linear_power_flow = self._get_linear_power_flow()
+        if linear_power_flow is None:
+            LOGGER.warning("The network sensitivities are not calculated")
+            self._sensitivity_buses, self._sensitivity_branches = [], []
+            return
+
+        self._epoch_timer.start_stage("SensitivityMatrices")
+        bus_indexes, branch_indexes = self._get_monitored_indexes()
+        self._network_sensitivities = NetworkSensitivities(
+            epoch_number=self._latest_epoch,
+            linear_power_flow=linear_power_flow,
+            voltages=[self._bus[voltage_new_node[node]] for node in range(4)],
+            branch_currents=[self._branch[current_phase[node]] for node in range(4)],
+            bus_names=self._nis_bus_data.bus_name,
+            branch_ids=self._nis_component_data.device_id,
+            monitored_bus_indexes=bus_indexes,
+            monitored_branch_indexes=branch_indexes)
+
+    def get_network_sensitivities(self) -> Optional[NetworkSensitivities]:
+        """Returns the voltage and current sensitivities at the operating point of the latest exact power flow,
+           or None if no sensitivities have been calculated. The sensitivities are calculated only for the buses
+           and branches given with SENSITIVITY_BUSES and SENSITIVITY_BRANCHES."""
+        return self._network_sensitivities
+
+    def evaluate_power_changes(self, power_changes: Union[numpy.ndarray, list]) -> Optional[tuple]:
+        """Returns the estimated voltages of the monitored buses and currents of the monitored branches for the
+           given candidate changes of the per unit real power injections with the shape (3, buses) or
+           (candidates, 3, buses), see NetworkSensitivities.evaluate. Returns None if no sensitivities have been
+           calculated."""
+        network_sensitivities = self._network_sensitivities
+        if network_sensitivities is None:
+            return None
+        return network_sensitivities.evaluate(power_changes)
+
+    def evaluate_offers(self, offers: List[OfferMessage],
+                        combinations: Optional[List[List[str]]] = None) -> Optional[List[dict]]:
+        """
+        Evaluates the given flexibility offers against the rated currents of the monitored branches and the voltage
+        limits of the monitored buses over the time horizon of the offers, see OfferEvaluator. The combinations are
+        lists of offer ids that are evaluated together, by default each offer is evaluated alone. Returns the ranked
+        evaluation table, or None if no sensitivities have been calculated.
+
+        The power of an offer is divided equally between its customers, and the customers are mapped to their
+        buses using the CIS data. The power of a customer is added to the node of its resources if they all are
+        on the same node, otherwise to all three phases. Upregulation increases and downregulation decreases
+        the nodal power injections, i.e. upregulation decreases consumption or increases production.
+        """
+        network_sensitivities = self._network_sensitivities
+        if network_sensitivities is None:
+            return None
+
+        offer_ids = [offer.offer_id for offer in offers]
+        time_indexes = sorted({time_index for offer in offers for time_index in offer.real_power.time_index})
+        time_positions = {time_index: position for position, time_index in enumerate(time_indexes)}
+        customer_nodes = self._get_customer_injection_nodes()
+        injection_patterns = numpy.zeros((len(offers), 3, self._num_buses), dtype=complex)
+        powers = numpy.zeros((len(offers), len(time_indexes)))
+        for offer_index, offer in enumerate(offers):
+            customer_ids = [customer_id for customer_id in offer.customerids or [] if customer_id in customer_nodes]
+            if len(customer_ids) < len(offer.customerids or []) or not customer_ids:
+                LOGGER.warning("Offer %s has customers that are not in the CIS data", offer.offer_id)
+            for customer_id in customer_ids:
+                bus_index, node = customer_nodes[customer_id]
+                self._add_injection(injection_patterns[offer_index], bus_index, node,
+                                    1 / (self._apparent_power_base * len(customer_ids)))
+
+            direction = 1 if offer.direction == UPREGULATION else -1
+            offer_powers = next(iter(offer.real_power.series.values())).values
+            for time_index, offer_power in zip(offer.real_power.time_index, offer_powers):
+                powers[offer_index, time_positions[time_index]] = direction * abs(offer_power)
+
+        if combinations is not None:
+            offer_indexes = {offer_id: offer_index for offer_index, offer_id in enumerate(offer_ids)}
+            combinations = [[offer_indexes[offer_id] for offer_id in combination] for combination in combinations]
+
+        rated_currents = self._nis_component_data.rated_current.values
+        offer_evaluator = OfferEvaluator(
+            network_sensitivities,
+            [rated_currents[branch_index] for branch_index in self._get_monitored_indexes()[1]],
+            self._voltage_limits)
+        return offer_evaluator.evaluate(
+            offer_ids=offer_ids,
+            injection_patterns=injection_patterns,
+            powers=powers,
+            prices=[offer.price.value if offer.price is not None else 0.0 for offer in offers],
+            congestion_ids=[offer.congestion_id for offer in offers],
+            combinations=combinations)
+
+    def _get_customer_injection_nodes(self) -> dict:
+        """Returns a dictionary from the customer ids in the CIS data to (bus index, node) for the flexibility of
+           the customer. The node is the node of the latest states of the resources of the customer if they all
+           have the same node, otherwise 4 for all three phases."""
+        resource_bus_indexes = self._get_resource_bus_indexes()
+        customer_nodes = {}
+        for resource_id, customer_id in zip(self._cis_customer_data.resource_id, self._cis_customer_data.customer_id):
+            bus_index = resource_bus_indexes.get(resource_id)
+            if bus_index is None:
+                continue
+            latest_state = self._latest_resource_states.get(resource_id)
+            node = self._node(latest_state[1]) if latest_state is not None else 4
+            if customer_id not in customer_nodes:
+                customer_nodes[customer_id] = (bus_index, node)
+            elif customer_nodes[customer_id][1] != node:
+                customer_nodes[customer_id] = (customer_nodes[customer_id][0], 4)
+        return customer_nodes
+
+    def _start_speculative_power_flow(self, epoch_number: int, injections: list) -> None:
+        """Starts the speculative power flow for the given epoch in the power flow thread. The actual power flow
+           of the epoch is queued after it in the same thread."""
+        future = asyncio.get_running_loop().run_in_executor(
+            self._power_flow_executor, self._speculative_power_flow, epoch_number, injections)
+        future.add_done_callback(self._speculative_power_flow_done)
+
+    def _speculative_power_flow_done(self, future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            LOGGER.warning("The speculative power flow failed: %s", future.exception())
+
+    def _speculative_power_flow(self, epoch_number: int, injections: list) -> None:
+        """
+        Calculates the power flow for the given epoch using the given predicted injections and stores the
+        resulting voltages as the initial voltages for the actual power flow of the epoch. The calculation is
+        stopped early if all the input data for the epoch is received before it is finished, in which case
+        the voltages of the latest completed iteration are used.
+        """
+        self._speculative_timer.start_epoch(epoch_number)
+        self._resetting_lists()
+        for node in range (3):
+            self._bus[power_node[node]] = list(injections[node])
+        iterations, power_flow_error, voltages = self._power_flow_sweep(
+            self._speculative_timer, abort=lambda: self._input_data_ready)
+        self._warm_start_voltages = (epoch_number, [list(voltages[node]) for node in range(4)])
+        self._speculative_timer.set_value("Iterations", iterations)
+        self._speculative_timer.set_value("Residual", power_flow_error)
+        self._speculative_timer.finish_epoch()
+        self._resetting_lists()
+        LOGGER.debug("The speculative power flow for epoch %d took %d iterations", epoch_number, iterations)
+
+    def _apply_warm_start(self) -> None:
+        """Uses the voltages from the speculative power flow of the current epoch as the initial voltages."""
+        warm_start = self._warm_start_voltages is not None and self._warm_start_voltages[0] == self._latest_epoch
+        if warm_start:
+            for node in range (4):
+                self._bus[voltage_old_node[node]] = list(self._warm_start_voltages[1][node])
+        self._warm_start_voltages = None
+        self._epoch_timer.set_value("WarmStart", warm_start)
+
+    def _power_flow_sweep(self, timer: EpochTimer, abort=None) -> tuple:
+        """
+        Runs the backward-forward sweeps until the voltages converge or the maximum number of iterations is reached.
+        Uses the nodal powers and the initial voltages in self._bus and records the sweep phases to the given timer.
+        If abort is given, it is called before each iteration and the sweeps are stopped if it returns True.
+        Returns the number of iterations, the final voltage error and the latest voltages for each node.
+        """
+        power_flow_error_node=10 # 10 is a value that is way larger than the aaceptable limit to make sure that the first iteration will begin
+        iteration = 0    # Number of sweeps in the power flow
+        while power_flow_error_node > self._power_flow_percision and iteration < self._max_iteration: # stop power flow when enough accuracy of voltages reached. OR, the number of iteration get larger than specified                    
+            if abort is not None and abort():
+                # the voltages of the latest completed iteration were moved to the old voltages
+                return iteration, power_flow_error_node, [self._bus[voltage_old_node[node]] for node in range(4)]
+                
+            # calculating nodal currents
+            iteration = iteration+1
+            LOGGER.debug("iteration is %d", iteration)
+            timer.start_stage("NodalCurrents")
+            for bus in range (self._num_buses): 
+            #    LOGGER.info("bus is {}".format(bus))
+                for node in range (0,3):   # for each node
+            #        LOGGER.info("node is {}".format((node)))
+                    voltage_difference = self._bus[voltage_old_node[node]][bus] - self._bus["voltage_old_node_neutral"][bus]
+            #        LOGGER.info("voltage difference is {}".format(cmath.polar(voltage_difference)))
+                    self._bus[current_node[node]][bus] = numpy.conj(self._bus[power_node[node]][bus]/voltage_difference)
+                self._bus["current_node_neutral"][bus]=-(self._bus["current_node_1"][bus]+self._bus["current_node_2"][bus]+self._bus["current_node_3"][bus])
+
+            for bus in range(self._num_buses): # taking into account line admittances
+                for node in range (0,4):
+                    self._bus[current_node[node]][bus] = self._bus[current_node[node]][bus]-(self._bus[admittance_node[node]][bus]*self._bus[voltage_old_node[node]][bus])
+
+
+            # for i in range (3):
+            #     LOGGER.info("node is {}".format(i))
+            #     for j in range (self._num_buses):
+            #         LOGGER.info("bus is {}".format(j))
+            #         LOGGER.info("the current at bus is {}".format(cmath.polar(self._bus[current_node[i]][j])))
+                
+        #    LOGGER.info("Current at node 1 is {}".format(self._bus[current_node[0]]))
+        #    LOGGER.info("Current at node 2 is {}".format(self._bus[current_node[1]]))
+        #    LOGGER.info("Current at node 3 is {}".format(self._bus[current_node[2]]))
+        #    LOGGER.info("Current at node neutral is {}".format(self._bus[current_node[3]]))
+
+            # calculating branch currents
+            timer.start_stage("BranchCurrents")
+            for i in range (self._num_buses):
+                    if abs(self._bus[current_node[0]][i])>0.0001 or abs(self._bus[current_node[1]][i])>0.0001 or abs(self._bus[current_node[2]][i])>0.0001:  # calculation is only done for buses with a non negligable load
+                    #    LOGGER.info("i is {}".format(i))
+                    #    LOGGER.info("bus name is {}".format(self._nis_bus_data.bus_name[i]))
+                        shortest_path = self._paths[i]
+                        #LOGGER.info("shortest path is {}".format(shortest_path))
+
+                        for j in range (self._num_branches):
+                            from_bus = self._nis_component_data.sending_end_bus[j]
+                            to_bus = self._nis_component_data.receiving_end_bus[j]
+                            try:
+                                shortest_path.index(from_bus)    # we want to know where the bus value exist in the shortest path or not
+                                shortest_path.index(to_bus)
+                            #    LOGGER.info("from bus is {}".format(from_bus))
+                            #    LOGGER.info("to bus is {}".format(to_bus))
+                            #    LOGGER.info("the row was found number{}".format(j))
+                            #    LOGGER.info("the nodal current is {}".format(self._bus[current_node[0]][i]))
+                                for phases in range (0,4):
+                                    self._branch[current_phase[phases]][j] = self._bus[current_node[phases]][i] + self._branch[current_phase[phases]][j]
+                            #    LOGGER.info("branch current is {}".format(self._branch[current_phase[0]]))
+                            except:
+                                pass  
+                
+            timer.start_stage("VoltageDrops")
+            #a=[]
+            #for i in range (1):
+            #    LOGGER.info("node is {}".format(i))
+            #    for j in range (self._num_branches):
+            #        LOGGER.info("branch is {}".format(j))
+            #        LOGGER.info("the branch current at phase 1 is {}".format(cmath.polar(self._branch[current_phase[i]][j])))
+            #        [c,d]=cmath.polar(self._branch[current_phase[i]][j])
+            #        a.append(c)
+
+            #LOGGER.info("branch current is {}".format(a))
+            #LOGGER.info("the branch current at phase 1 is {}".format(self._branch[current_phase[0]]))
+            # LOGGER.info("the branch current at phase 3 is {}".format(self._branch[current_phase[2]]))
+            # LOGGER.info("the branch current at phase neutral is {}".format(self._branch[current_phase[3]]))
+
+            # calculating the voltage drop over each branch
+            for row in range (self._num_branches):
+                for kk in range (0,4):
+                    self._branch[delta_v_phase[kk]][row] = self._branch[current_phase[kk]][row] * self._branch["impedance"][row]
+
+            # for i in range (3):
+            #     LOGGER.info("phase is {}".format(i))
+            #     for j in range (self._num_branches):
+            #         LOGGER.info("branch is {}".format(j))
+            #         LOGGER.info("the voltage drop at phase is {}".format(cmath.polar(self._branch[delta_v_phase[i]][j])))
+
+            # LOGGER.info("the voltage drop at phase 1 is {}".format(self._branch[delta_v_phase[0]]))
+            # LOGGER.info("the voltage drop at phase 2 is {}".format(self._branch[delta_v_phase[1]]))
+            # LOGGER.info("the voltage drop at phase 3 is {}".format(self._branch[delta_v_phase[2]]))
+            # LOGGER.info("the voltage drop at phase neutral is {}".format(self._branch[delta_v_phase[3]]))
+            timer.start_stage("VoltageUpdate")
+            zero_avail = {}
+            zero_avail = self._bus["voltage_new_node_1"] + self._bus["voltage_new_node_2"] + self._bus["voltage_new_node_3"]  
+            zero_avail_num = zero_avail.count(0)
+            #LOGGER.info("the number of 0 voltages are {}".format(zero_avail_num))
+                
+            # calculating the new voltages
+
+            while zero_avail_num != 0:
+                #    LOGGER.info("the new voltage for the node neutral is {}".format(self._bus["voltage_new_node_neutral"]))
+                for bus in range (self._num_buses):
+                    node = 0
+                    if self._bus[voltage_new_node[node]][bus] == 0:
+                        bus_name = self._nis_bus_data.bus_name[bus]
+                        nearby_buses=self._graph[bus_name]
+                        length = len(nearby_buses)
+            #            LOGGER.info("Bus Name is {}".format(bus_name))
+            #            LOGGER.info("Nearby buses are {}".format(nearby_buses))
+            #            LOGGER.info("length of nearby buses is {}".format(length))
+                        if length > 0:
+                            for a in range (length):
+                                index = self._nis_bus_data.bus_name.index(nearby_buses[a])
+            #                    LOGGER.info("Bus Name index is {}".format(index))
+                                if abs(self._bus[voltage_new_node[node]][index]) > 0.1:
+            #                        LOGGER.info("the existing voltage is {}".format(self._bus[voltage_new_node[node]][index]))
+                                    to_bus = nearby_buses[a]
+                                    from_bus = bus_name
+            #                        LOGGER.info("to bus is {}".format(to_bus))
+            #                        LOGGER.info("from bus is {}".format(from_bus))
+                                    branch = [from_bus,to_bus]
+                                    branch1 = [to_bus,from_bus]
+
+                                    shortest_path1 = self._paths[self._nis_bus_data.bus_name.index(from_bus)]
+
+                                    try:
+                                        shortest_path2 = self._paths[index]
+                                    except:
+                                        shortest_path2 = None   
+
+                                    if shortest_path2 == None: # if it is source bus
+                                        shortest_path2_length = 0
+                                    else:
+                                        shortest_path2_length = len(shortest_path2)
+                                        
+                                    try:
+                                        row=list(self._sending_to_receiving.keys())[list(self._sending_to_receiving.values()).index(branch)]
+                                    except:
+                                        row=list(self._sending_to_receiving.keys())[list(self._sending_to_receiving.values()).index(branch1)]
+        #                            LOGGER.info("the row is {}".format(row))
+                                    if len(shortest_path1) > shortest_path2_length:
+                                        for node in range (0,4):
+    #                                        LOGGER.info("voltage is reduced as much as {}".format(self._branch[delta_v_phase[node]][row]))
+    #                                        LOGGER.info("voltage before change is {}".format(self._bus[voltage_new_node[node]][bus]))
+                                            self._bus[voltage_new_node[node]][bus] = self._bus[voltage_new_node[node]][index] - self._branch[delta_v_phase[node]][row]
+    #                                        LOGGER.info("voltage after change is {}".format(self._bus[voltage_new_node[node]][bus]))
+
+                                    else:
+                                        for node in range (0,4):
+    #                                        LOGGER.info("voltage is increased as much as {}".format(self._branch[delta_v_phase[node]][row]))
+    #                                        LOGGER.info("voltage before change is {}".format(self._bus[voltage_new_node[node]][bus]))
+                                            self._bus[voltage_new_node[node]][bus] = self._bus[voltage_new_node[node]][index] + self._branch[delta_v_phase[node]][row]
+    #                                        LOGGER.info("voltage after change is {}".format(self._bus[voltage_new_node[node]][bus]))
+                                    break
+                zero_avail = {}
+                zero_avail = self._bus["voltage_new_node_1"] + self._bus["voltage_new_node_2"] + self._bus["voltage_new_node_3"]
+                zero_avail_num = zero_avail.count(0)
+
+            timer.start_stage("ConvergenceCheck")
+            error = [0 for i in range(self._num_buses)]
+            for w in range (self._num_buses): # calculate the error only for node 1    
+                error[w] = abs(self._bus["voltage_old_node_1"][w]-self._bus["voltage_new_node_1"][w])
+            power_flow_error_node=max(error)
+            LOGGER.debug("the maximum error is %s", power_flow_error_node)
+        #    LOGGER.info("voltage new for node 1 is : {}".format(self._bus["voltage_new_node_1"]))
+        #    LOGGER.info("voltage new for node 2 is : {}".format(self._bus["voltage_new_node_2"]))
+        #    LOGGER.info("voltage new for node 3 is : {}".format(self._bus["voltage_new_node_3"]))
+        #    LOGGER.info("voltage new for node neutral is : {}".format(self._bus["voltage_new_node_neutral"]))
+
+            if power_flow_error_node > self._power_flow_percision and iteration < self._max_iteration:
+                for p in range (4): # clear values for a fresh start
+                    self._bus[voltage_old_node[p]]=self._bus[voltage_new_node[p]]
+                    self._bus[voltage_new_node[p]]=[0 for i in range(self._num_buses)]
+                    self._bus[current_node[p]] = [0 for i in range(self._num_buses)]
+                    self._branch[current_phase[p]] = [0 for i in range(self._num_branches)]
+                    self._branch[delta_v_phase[p]] = [0 for i in range(self._num_branches)]
+                self._bus["voltage_new_node_1"][self._root_bus_index] = self._root_bus_voltage
+                self._bus["voltage_new_node_2"][self._root_bus_index] = cmath.rect(self._root_bus_voltage,4*math.pi/3)
+                self._bus["voltage_new_node_3"][self._root_bus_index] = cmath.rect(self._root_bus_voltage,2*math.pi/3)
+
+        return iteration, power_flow_error_node, [self._bus[voltage_new_node[node]] for node in range(4)]
+
+    def _finish_epoch_timing(self) -> None:
+        """Finishes the timing record for the current epoch and writes it to the timing file if one is set."""
+        self._epoch_timer.set_count("ResourceStateMessages", self._resource_state_msg_counter)
+        self._epoch_timer.set_count("StorageResourceStateMessages", self._storage_resource_message_counter)
+        self._epoch_timer.set_count("StaleResourceStates", len(self._stale_resources))
+        if self._power_flow_cache is not None:
+            for statistic_name, statistic_value in self._power_flow_cache.get_statistics().items():
+                self._epoch_timer.set_value(statistic_name, statistic_value)
+        speculative_record = self._speculative_timer.latest_record
+        if self._speculative_mode and speculative_record is not None and \
+                speculative_record[EpochTimer.EPOCH_NUMBER] == self._latest_epoch:
+            self._epoch_timer.set_value("SpeculativeTime", speculative_record[EpochTimer.TOTAL_TIME])
+            self._epoch_timer.set_value("SpeculativeIterations",
+                speculative_record[EpochTimer.VALUES].get("Iterations"))
+        self._epoch_timer.set_value("Iterations", self._power_flow_iterations)
+        self._epoch_timer.set_value("Residual", self._power_flow_error)
+        record = self._epoch_timer.finish_epoch()
+        LOGGER.debug("Epoch timing: %s", record)
+        if self._epoch_timing_file:
+            self._epoch_timer.write_record(self._epoch_timing_file, record)
+
+    def _get_status_message(self):
+        """Creates the status ready message. Adds the timing record for the epoch to the message
+           if EPOCH_TIMING_IN_STATUS is set."""
+        record = self._epoch_timer.latest_record
+        if not self._epoch_timing_in_status or record is None or \
+                record[EpochTimer.EPOCH_NUMBER] != self._latest_epoch:
+            return super()._get_status_message()
+
+        try:
+            return self._message_generator.get_message(
+                EpochTimingStatusMessage,
+                EpochNumber=self._latest_epoch,
+                TriggeringMessageIds=self._triggering_message_ids,
+                Value=EpochTimingStatusMessage.STATUS_VALUES[0],
+                EpochTiming=record)
+
+        except (ValueError, TypeError, MessageError) as message_error:
+            LOGGER.error("Problem with creating a status message: {}".format(message_error))
+            return None
+
     async def general_message_handler(self, message_object: Union[BaseMessage,QuantityBlock, Any],
                                       message_routing_key: str) -> None:
         """
@@ -653,24 +1076,14 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
 
         # Resource state
         if isinstance(message_object,ResourceStateMessage):
-            message_object = cast(ResourceStateMessage,message_object)
-            LOGGER.info("Received {:s} message from topic {:s}".format(
-                message_object.message_type, message_routing_key))
-
-            if self._storage_resource_existance == "True" and message_object.source_process_id in self._storage_resource_list:
-                self._storage_resources.append(message_object)
-                self._storage_resource_message_counter = self._storage_resource_message_counter + 1
-                LOGGER.info("the resource state message counter is {}".format(self._storage_resource_message_counter)) 
-            else:
-                resource_id=message_routing_key[message_routing_key.index(".",14)+1:len(message_routing_key)] # the format of the topic is ResourceState.load/generator.ResourceId. in order to find the resource Id from the topic, we find the "." and then whatever after that is the resource iD
-                LOGGER.info("the resource_id is {}".format(resource_id))
-                self._resource_state_message_handler(message_object,resource_id)
+            # the resource states are buffered already in general_message_handler_base
+            pass
 
         # NIS bus
-        elif isinstance(message_object,NISBusMessage) and self._latest_epoch == 1: # NIS data is only published in the first epoch
+        elif isinstance(message_object,NISBusMessage) and message_object.epoch_number == 1: # NIS data is only published in the first epoch
             message_object = cast(NISBusMessage,message_object)
-            LOGGER.info("Received {:s} message from topic {:s}".format(
-                message_object.message_type, message_routing_key))
+            LOGGER.info("Received %s message from topic %s",
+                message_object.message_type, message_routing_key)
             self._nis_bus_data = message_object
             self._num_buses = len(self._nis_bus_data.bus_name)
             self._root_bus_index = self._nis_bus_data.bus_type.index("root")
@@ -678,78 +1091,344 @@ class Grid(AbstractSimulationComponent):#QuantityBlock,QuantityArrayBlock,TimeSe
 
             LOGGER.info("NISBusMessage was received")
             self._nis_bus_data_received = True
+            self._resource_bus_indexes = None
 
         # NIS component
-        elif isinstance(message_object,NISComponentMessage) and self._latest_epoch == 1: # NIS data is only published in the first epoch
+        elif isinstance(message_object,NISComponentMessage) and message_object.epoch_number == 1: # NIS data is only published in the first epoch
             message_object = cast(NISComponentMessage,message_object)
-            LOGGER.info("Received {:s} message from topic {:s}".format(
-                message_object.message_type, message_routing_key))
+            LOGGER.info("Received %s message from topic %s",
+                message_object.message_type, message_routing_key)
             self._nis_component_data = message_object
             self._num_branches = len(self._nis_component_data.device_id)
 
             if self._nis_component_data.power_base.value != self._apparent_power_base:
                 LOGGER.warning("Power base in NIS and manifest arenot equal")
-                LOGGER.warning("Power base in NIS file:{} is used".format(self._nis_component_data.power_base.value))
+                LOGGER.warning("Power base in NIS file:%s is used", self._nis_component_data.power_base.value)
                 self._apparent_power_base = self._nis_component_data.power_base.value
 
             LOGGER.info("NISComponentMessage was received")
             self._nis_component_data_received = True
 
         # CIS
-        elif isinstance(message_object,CISCustomerMessage) and self._latest_epoch == 1: # CIS data is only published in the first epoch
+        elif isinstance(message_object,CISCustomerMessage) and message_object.epoch_number == 1: # CIS data is only published in the first epoch
             message_object = cast(CISCustomerMessage,message_object)
-            LOGGER.info("Received {:s} message from topic {:s}".format(
-                message_object.message_type, message_routing_key))
+            LOGGER.info("Received %s message from topic %s",
+                message_object.message_type, message_routing_key)
             self._cis_customer_data = message_object
             if self._num_resources != len(self._cis_customer_data.resource_id):
-                LOGGER.warning("The number of resources {} in CIS donot match with its number {} in manifest file".format(
-                len(self._cis_customer_data.resource_id),self._num_resources))
+                LOGGER.warning("The number of resources %d in CIS donot match with its number %d in manifest file",
+                len(self._cis_customer_data.resource_id),self._num_resources)
 
             LOGGER.info("CISCustomerMessage was received")
             self._cis_data_received = True
+            self._resource_bus_indexes = None
 
         else:
-            LOGGER.warning("Received unknown message from {}: {}".format(message_routing_key, message_object))
+            LOGGER.warning("Received unknown message from %s: %s", message_routing_key, message_object)
+
+        if not self._input_data_ready and self._check_input_data_ready():
+            await self.start_epoch()
+
+    async def general_message_handler_base(self, message_object: Union[BaseMessage, Any],
+                                           message_routing_key: str) -> None:
+        """Buffers the resource state messages by their epoch number before the normal message handling.
+           The buffering is done without waiting for the message handling lock, so that the resource states
+           for the next epoch are received while the current epoch is still being processed. Only the messages
+           for the current epoch continue to the normal message handling which checks whether the epoch can be
+           processed.
+        """
+        if isinstance(message_object, ResourceStateMessage) and not self._in_error_state:
+            message_object = cast(ResourceStateMessage, message_object)
+            LOGGER.log_sampled(logging.INFO, RESOURCE_STATE_LOG_INTERVAL, "Received %s message from topic %s",
+                message_object.message_type, message_routing_key)
+            if not self._buffer_resource_state(message_object, message_routing_key):
+                return
+            if self._current_input_epoch() != message_object.epoch_number:
+                LOGGER.debug("Buffered the resource state for epoch %d", message_object.epoch_number)
+                return
+
+        await super().general_message_handler_base(message_object, message_routing_key)
+
+    def _start_epoch_deadline(self, epoch_number: int) -> None:
+        """Starts waiting for the deadline of the given epoch. Any earlier deadline is cancelled."""
+        self._cancel_epoch_deadline()
+        self._epoch_deadline_task = asyncio.create_task(self._wait_for_epoch_deadline(epoch_number))
+
+    def _cancel_epoch_deadline(self) -> None:
+        """Cancels the waiting for the epoch deadline if it is still running."""
+        if self._epoch_deadline_task is not None and not self._epoch_deadline_task.done():
+            self._epoch_deadline_task.cancel()
+        self._epoch_deadline_task = None
+
+    async def _wait_for_epoch_deadline(self, epoch_number: int) -> None:
+        """Waits until the deadline of the given epoch and processes the epoch with the latest known states for
+           the resources whose states have not been received by then."""
+        await asyncio.sleep(self._epoch_deadline)
+        async with self._lock:
+            if self._epoch_deadline_task is asyncio.current_task():
+                # the epoch processing below must not cancel this task
+                self._epoch_deadline_task = None
+            if self._current_input_epoch() != epoch_number or self._input_data_ready or self._in_error_state:
+                return
+            if not self._injection_mapping_ready():
+                LOGGER.warning("The deadline of epoch %d passed before the NIS and CIS data was received", epoch_number)
+                return
+
+            self._add_stale_resource_states(epoch_number)
+            if self._check_input_data_ready(deadline_passed=True):
+                await self.start_epoch()
+
+    def _add_stale_resource_states(self, epoch_number: int) -> None:
+        """Adds the latest known states of the resources whose states have not been received for the given epoch.
+           The resources without any earlier state are left out of the power flow. All these resources are listed
+           in self._stale_resources."""
+        self._add_pending_resource_states()
+        resource_states = self._resource_state_buffers.setdefault(epoch_number, {})
+        storage_states = self._storage_resource_state_buffers.setdefault(epoch_number, {})
+
+        # the storage resource states first so that they replace the powers of the stale resource states
+        if self._storage_resource_existance == "True":
+            for source_process_id in self._storage_resource_list:
+                if source_process_id in storage_states:
+                    continue
+                self._stale_resources.append(source_process_id)
+                if source_process_id in self._latest_storage_resource_states:
+                    self._add_storage_resource_state(
+                        epoch_number, source_process_id, *self._latest_storage_resource_states[source_process_id])
+
+        for resource_id in self._cis_customer_data.resource_id:
+            if resource_id in resource_states:
+                continue
+            self._stale_resources.append(resource_id)
+            if resource_id in self._latest_resource_states:
+                self._add_resource_state(epoch_number, resource_id, *self._latest_resource_states[resource_id])
+
+        if self._stale_resources:
+            LOGGER.warning("The deadline of epoch %d passed, using the latest known states for %d resources: %s",
+                epoch_number, len(self._stale_resources), ", ".join(self._stale_resources))
+
+    def _stale_resources_warnings(self) -> Optional[list]:
+        """Returns the result message warnings for the resources whose latest known states were used
+           in the current epoch or None if there are no such resources."""
+        if not self._stale_resources:
+            return None
+        return [STALE_RESOURCE_WARNING + "." + resource_id for resource_id in self._stale_resources]
+
+    def _current_input_epoch(self) -> Optional[int]:
+        """Returns the epoch number of the latest epoch message or None if no epoch message has been received."""
+        if self._latest_epoch_message is None:
+            return None
+        return self._latest_epoch_message.epoch_number
+
+    def _buffer_resource_state(self, message_object: ResourceStateMessage, message_routing_key: str) -> bool:
+        """Adds the resource state to the buffer of its epoch.
+           Returns False if the message was ignored because it was for an earlier epoch, it was a duplicate or
+           it arrived after the input data for the current epoch was already taken into use."""
+        epoch_number = message_object.epoch_number
+        current_epoch = self._current_input_epoch()
+        if current_epoch is not None and epoch_number < current_epoch:
+            LOGGER.warning("Ignoring the resource state from %s for the earlier epoch %d, the current epoch is %d",
+                message_object.source_process_id, epoch_number, current_epoch)
+            return False
+        if epoch_number == current_epoch and self._input_data_ready:
+            # the power flow of the epoch has already been started, e.g. after the epoch deadline
+            LOGGER.warning("Ignoring the late resource state from %s for epoch %d, the epoch is already processed",
+                message_object.source_process_id, epoch_number)
+            return False
+
+        # the message bus can deliver the same message again, e.g. after a connection problem
+        message_ids = self._received_message_ids.setdefault(epoch_number, set())
+        if message_object.message_id in message_ids:
+            LOGGER.debug("Ignoring the redelivered resource state message %s", message_object.message_id)
+            return False
+        message_ids.add(message_object.message_id)
+
+        if self._storage_resource_existance == "True" and message_object.source_process_id in self._storage_resource_list:
+            return self._storage_resource_state_message_handler(message_object)
+
+        resource_id=message_routing_key[message_routing_key.index(".",14)+1:len(message_routing_key)] # the format of the topic is ResourceState.load/generator.ResourceId. in order to find the resource Id from the topic, we find the "." and then whatever after that is the resource iD
+        LOGGER.debug("the resource_id is %s", resource_id)
+        return self._resource_state_message_handler(message_object,resource_id)
+
+    def _check_input_data_ready(self, deadline_passed: bool = False) -> bool:
+        """Checks whether all the input data for the current epoch has been received.
+           If it has, takes the power injections of the current epoch into use and returns True.
+           If deadline_passed is True, the numbers of the received resource states are not checked."""
+        current_epoch = self._current_input_epoch()
+        if current_epoch is None:
+            return False
 
+        self._add_pending_resource_states()
+        resource_states = self._resource_state_buffers.get(current_epoch, {})
+        storage_states = self._storage_resource_state_buffers.get(current_epoch, {})
         if self._nis_bus_data_received==True and \
             self._nis_component_data_received==True and self._cis_data_received==True and \
-            self._resource_state_msg_counter == self._num_resources and \
-            self._storage_resource_message_counter == self._storage_resource_numbers:
+            (deadline_passed or (len(resource_states) == self._num_resources and \
+            len(storage_states) == self._storage_resource_numbers)):
+                # a copy, so that the buffers of the epoch are never changed while the power flow is calculated
+                self._injections = [list(node_injections) for node_injections in self._get_injections(current_epoch)]
+                self._resource_state_msg_counter = len(resource_states)
+                self._storage_resource_message_counter = len(storage_states)
                 self._input_data_ready = True
+                self._cancel_epoch_deadline()
                 LOGGER.info("all required data were received, now ready for the actual functionality")
-                await self.start_epoch()
-    
-
-    def _resource_state_message_handler(self,resource_state_data,resource_id:str) -> None:
-        if self._resource_state_msg_counter == [] or  self._resource_state_msg_counter == 0 :
-            self._resource_state_msg_counter = 0
-            self._resources.append(resource_state_data)
-            self._resource_id_logger[self._resource_state_msg_counter] = resource_id
-            self._resources[self._resource_state_msg_counter].resource_id = resource_id # we add one attribute tot he existing list becuse later in nodal power calculations we need it
-            self. _node(self._resources[self._resource_state_msg_counter].node)
-            self._resource_state_msg_counter = self._resource_state_msg_counter + 1
-            LOGGER.info("the resource state message counter is {}".format(self._resource_state_msg_counter)) 
+                return True
+
+        return False
+
+    def _remove_old_resource_state_buffers(self, current_epoch: int) -> None:
+        """Removes the buffered resource states for the epochs before the given epoch."""
+        for buffers in (self._resource_state_buffers, self._storage_resource_state_buffers,
+                        self._injection_buffers, self._pending_resource_states, self._storage_power_buffers,
+                        self._customer_resource_buffers, self._received_message_ids):
+            for epoch_number in [epoch_number for epoch_number in buffers if epoch_number < current_epoch]:
+                del buffers[epoch_number]
+
+    def _injection_mapping_ready(self) -> bool:
+        """Returns True if the NIS and CIS data that is needed to add the resource powers to the nodal power
+           injections has been received."""
+        return self._nis_bus_data_received and self._nis_component_data_received and self._cis_data_received
+
+    def _get_resource_bus_indexes(self) -> dict:
+        """Returns a dictionary from the resource ids in the CIS data to the indexes of their buses in the NIS data.
+           The resources whose bus is not found in the NIS data are not included."""
+        if self._resource_bus_indexes is None:
+            bus_indexes = {}
+            for bus_index, bus_name in enumerate(self._nis_bus_data.bus_name):
+                bus_indexes.setdefault(bus_name, bus_index)
+            self._resource_bus_indexes = {}
+            for resource_id, bus_name in zip(self._cis_customer_data.resource_id, self._cis_customer_data.bus_name):
+                if resource_id not in self._resource_bus_indexes and bus_name in bus_indexes:
+                    self._resource_bus_indexes[resource_id] = bus_indexes[bus_name]
+        return self._resource_bus_indexes
+
+    def _get_injections(self, epoch_number: int) -> list:
+        """Returns the per unit power injections for nodes 1, 2 and 3 of each bus for the given epoch.
+           The lists are created when they are first needed."""
+        injections = self._injection_buffers.get(epoch_number)
+        if injections is None:
+            injections = [[0 for i in range(self._num_buses)] for node in range(3)]
+            self._injection_buffers[epoch_number] = injections
+        return injections
+
+    def _add_injection(self, injections: list, bus_index: int, node: int, power_per_unit: float) -> None:
+        """Adds the given per unit power to the given node of the given bus. Node 4 means a three phase resource."""
+        if node == 4:
+            power_per_unit_per_phase = power_per_unit/cmath.sqrt(3)  # calculate power per phase
+            for phase in range (3):
+                injections[phase][bus_index] = power_per_unit_per_phase + injections[phase][bus_index]
+        else:
+            injections[node-1][bus_index] = power_per_unit + injections[node-1][bus_index]
+
+    def _add_pending_resource_states(self) -> None:
+        """Adds the powers of the resource states that were received before the NIS and CIS data to the injections."""
+        if not self._pending_resource_states or not self._injection_mapping_ready():
+            return
+
+        pending_resource_states = self._pending_resource_states
+        self._pending_resource_states = {}
+        for epoch_number, resource_states in pending_resource_states.items():
+            for resource_id, (customer_id, node_number, real_power) in resource_states.items():
+                self._add_resource_state(epoch_number, resource_id, customer_id, node_number, real_power)
+
+    def _add_resource_state(self, epoch_number: int, resource_id: str, customer_id: str,
+                            node_number: Optional[int], real_power: float) -> None:
+        """Adds the power of the resource to the injections of the epoch. If a storage resource state with the
+           same customer id has been received for the epoch, the power of the storage resource is used instead."""
+        storage_real_power = self._storage_power_buffers.get(epoch_number, {}).get(customer_id)
+        if storage_real_power is not None:
+            real_power = storage_real_power
+        power_per_unit = -(real_power/self._apparent_power_base) # Per unit power.
+
+        # finding the bus where the power should be added to
+        bus_index = self._get_resource_bus_indexes().get(resource_id)
+        if bus_index is None:
+            LOGGER.warning("Resource state message has a resource id %s that doesnot exist in the CIS data", resource_id)
+
+        node = self._node(node_number)
+        self._resource_state_buffers.setdefault(epoch_number, {})[resource_id] = [customer_id, bus_index, node, power_per_unit]
+        self._customer_resource_buffers.setdefault(epoch_number, {}).setdefault(customer_id, []).append(resource_id)
+        if bus_index is not None:
+            self._add_injection(self._get_injections(epoch_number), bus_index, node, power_per_unit)
+
+    def _resource_state_message_handler(self,resource_state_data,resource_id:str) -> bool:
+        epoch_number = resource_state_data.epoch_number
+        resource_states = self._resource_state_buffers.setdefault(epoch_number, {})
+        pending_resource_states = self._pending_resource_states.get(epoch_number, {})
+        if resource_id in resource_states or resource_id in pending_resource_states:
+            LOGGER.warning("The the state of the resource id %s has already been received for epoch %d",
+                resource_id, epoch_number)
+            return False
 
+        resource_values = (resource_state_data.customerid, resource_state_data.node, resource_state_data.real_power.value)
+        self._latest_resource_states[resource_id] = resource_values
+        if self._injection_mapping_ready():
+            self._add_resource_state(epoch_number, resource_id, *resource_values)
         else:
-            try: 
-                self._resource_id_logger.index(resource_id) # if CustomerId doesnot exist, it goes to the exception
-                LOGGER.warning("The the state of the resource id {} has already been received".format(resource_id))
-            except: # this message has a new ResourceId
-                self._resources.append(resource_state_data)
-                self._resource_id_logger[self._resource_state_msg_counter] = resource_id
-                self. _node(self._resources[self._resource_state_msg_counter].node)
-                self._resources[self._resource_state_msg_counter].resource_id = resource_id
-                self._resource_state_msg_counter = self._resource_state_msg_counter + 1
-                LOGGER.info("the resource state message counter is {}".format(self._resource_state_msg_counter))
-            #    LOGGER.info("the resourceid logger is {}".format(self._resource_id_logger))  
-    
-    def _node(self,node_number):    # this function makes sure that we have "three_phase" value for the node attribute for 3 phase resources
+            # the bus of the resource is known only after the NIS and CIS data has been received
+            self._pending_resource_states.setdefault(epoch_number, {})[resource_id] = resource_values
+        LOGGER.debug("the resource state message counter is %d for epoch %d",
+            len(resource_states) + len(self._pending_resource_states.get(epoch_number, {})), epoch_number)
+        return True
+
+    def _storage_resource_state_message_handler(self, resource_state_data: ResourceStateMessage) -> bool:
+        """Stores the power of the storage resource. The power replaces the powers of the other resources of the
+           same customer in the injections."""
+        epoch_number = resource_state_data.epoch_number
+        source_process_id = resource_state_data.source_process_id
+        if source_process_id in self._storage_resource_state_buffers.get(epoch_number, {}):
+            LOGGER.warning("The state of the storage resource %s has already been received for epoch %d",
+                source_process_id, epoch_number)
+            return False
+
+        storage_values = (resource_state_data.customerid, resource_state_data.real_power.value)
+        self._latest_storage_resource_states[source_process_id] = storage_values
+        self._add_storage_resource_state(epoch_number, source_process_id, *storage_values)
+        return True
+
+    def _add_storage_resource_state(self, epoch_number: int, source_process_id: str, customer_id: str,
+                                    real_power: float) -> None:
+        """Stores the power of the storage resource for the epoch and replaces the powers of the resources of
+           the same customer that have already been added to the injections."""
+        storage_states = self._storage_resource_state_buffers.setdefault(epoch_number, {})
+        storage_states[source_process_id] = [customer_id, real_power]
+        self._storage_power_buffers.setdefault(epoch_number, {})[customer_id] = real_power
+        LOGGER.debug("the storage resource state message counter is %d for epoch %d", len(storage_states), epoch_number)
+
+        # replacing the powers of the resources that have already been added to the injections
+        power_per_unit = -(real_power/self._apparent_power_base) # Per unit power.
+        resource_states = self._resource_state_buffers.get(epoch_number, {})
+        changed_bus_indexes = set()
+        for resource_id in self._customer_resource_buffers.get(epoch_number, {}).get(customer_id, []):
+            resource_state = resource_states[resource_id]
+            bus_index, node, resource_power_per_unit = resource_state[1:]
+            LOGGER.debug("customerid is %s, realpower %s is replaced with %s",
+                customer_id, resource_power_per_unit, power_per_unit)
+            if bus_index is not None:
+                changed_bus_indexes.add(bus_index)
+            resource_state[3] = power_per_unit
+
+        for bus_index in changed_bus_indexes:
+            self._rebuild_bus_injections(epoch_number, bus_index)
+
+    def _rebuild_bus_injections(self, epoch_number: int, bus_index: int) -> None:
+        """Sums the injections of the given bus again from the resource states of the epoch. The powers are added
+           in the order the resource states were received so that the sums are the same as when the replaced
+           powers would have been added in the first place."""
+        injections = self._get_injections(epoch_number)
+        for phase in range(3):
+            injections[phase][bus_index] = 0
+        for _, resource_bus_index, node, power_per_unit in self._resource_state_buffers.get(epoch_number, {}).values():
+            if resource_bus_index == bus_index:
+                self._add_injection(injections, bus_index, node, power_per_unit)
+
+    def _node(self,node_number) -> int:    # this function makes sure that we have "three_phase" value for the node attribute for 3 phase resources
         if  node_number in range (1,4):
-            self._resources[self._resource_state_msg_counter].node = node_number
-            LOGGER.info("there is node 1 or 2 or 3")
+            LOGGER.debug("there is node 1 or 2 or 3")
+            return node_number
         else:
-            self._resources[self._resource_state_msg_counter].node = 4    # 4 means "three-phase"
-            LOGGER.info("it is three phase")
+            LOGGER.debug("it is three phase")
+            return 4    # 4 means "three-phase"
                 
     async def _send_message(self, MessageContent, Topic):
         await self._rabbitmq_client.send_message(
@@ -822,7 +1501,6 @@ def create_component() -> Grid:         # Factory function. making instance of t
     """
     Creates and returns a NSP Component based on the environment variables.
     """
-    LOGGER.info("4")
     return Grid()    # the birth of the NIS object
 
 
@@ -830,12 +1508,9 @@ async def start_component():
     """
     Creates and starts a SimpleComponent component.
     """
-    LOGGER.info("1")
     simple_component = create_component()
-    LOGGER.info("2")
     # The component will only start listening to the message bus once the start() method has been called.
     await simple_component.start()
-    LOGGER.info("3")
     # Wait in the loop until the component has stopped itself.
     while not simple_component.is_stopped:
         await asyncio.sleep(TIMEOUT)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""This module contains the per-epoch instrumentation for the Grid component: a stage timer that produces
+one record for each epoch and a status message class that can carry the record."""
+
+from __future__ import annotations
+import json
+import time
+from typing import Any, Dict, Optional, Union
+
+from tools.exceptions.messages import MessageValueError
+from tools.message.status import StatusMessage
+from tools.tools import FullLogger
+
+LOGGER = FullLogger(__name__)
+
+
+class EpochTimer:
+    """Collects the time spent in the different stages of the epoch processing and some per-epoch counters.
+       The stages are consecutive: starting a new stage ends the previous one. A stage that is started several
+       times during an epoch, e.g. each sweep phase of the power flow, accumulates the time and the number of calls.
+       The times are measured with a monotonic clock and are given in seconds."""
+    EPOCH_NUMBER = "EpochNumber"
+    TOTAL_TIME = "TotalTime"
+    STAGE_TIMES = "StageTimes"
+    STAGE_CALLS = "StageCalls"
+    COUNTS = "Counts"
+    VALUES = "Values"
+
+    def __init__(self):
+        self.__epoch_number = None
+        self.__epoch_start_time = None
+        self.__current_stage = None
+        self.__stage_start_time = None
+        self.__stage_times = {}
+        self.__stage_calls = {}
+        self.__counts = {}
+        self.__values = {}
+        self.__latest_record = None
+
+    @property
+    def epoch_number(self) -> Optional[int]:
+        """The epoch number for the epoch that is currently timed."""
+        return self.__epoch_number
+
+    @property
+    def current_stage(self) -> Optional[str]:
+        """The name of the stage that is currently running."""
+        return self.__current_stage
+
+    @property
+    def latest_record(self) -> Optional[Dict[str, Any]]:
+        """The record for the latest finished epoch."""
+        return self.__latest_record
+
+    def start_epoch(self, epoch_number: int) -> None:
+        """Starts the timing for a new epoch. Any earlier unfinished timing is discarded."""
+        self.__epoch_number = epoch_number
+        self.__epoch_start_time = time.perf_counter()
+        self.__current_stage = None
+        self.__stage_start_time = None
+        self.__stage_times = {}
+        self.__stage_calls = {}
+        self.__counts = {}
+        self.__values = {}
+
+    def start_stage(self, stage_name: str) -> None:
+        """Ends the current stage and starts the given stage."""
+        current_time = time.perf_counter()
+        self.__end_stage(current_time)
+        self.__current_stage = stage_name
+        self.__stage_start_time = current_time
+
+    def end_stage(self) -> None:
+        """Ends the current stage without starting a new one."""
+        self.__end_stage(time.perf_counter())
+
+    def set_count(self, count_name: str, count: int) -> None:
+        """Sets the value for the given counter."""
+        self.__counts[count_name] = count
+
+    def add_count(self, count_name: str, count: int = 1) -> None:
+        """Adds the given value to the given counter."""
+        self.__counts[count_name] = self.__counts.get(count_name, 0) + count
+
+    def set_value(self, value_name: str, value: Union[int, float, str, None]) -> None:
+        """Sets the value for the given named value, e.g. the power flow residual."""
+        self.__values[value_name] = value
+
+    def finish_epoch(self) -> Optional[Dict[str, Any]]:
+        """Ends the current stage and the timing for the epoch and returns the record for the epoch.
+           Returns None if no epoch was started."""
+        if self.__epoch_start_time is None:
+            return None
+
+        current_time = time.perf_counter()
+        self.__end_stage(current_time)
+        self.__latest_record = {
+            self.__class__.EPOCH_NUMBER: self.__epoch_number,
+            self.__class__.TOTAL_TIME: current_time - self.__epoch_start_time,
+            self.__class__.STAGE_TIMES: dict(self.__stage_times),
+            self.__class__.STAGE_CALLS: dict(self.__stage_calls),
+            self.__class__.COUNTS: dict(self.__counts),
+            self.__class__.VALUES: dict(self.__values)
+        }
+        self.__epoch_start_time = None
+        return self.__latest_record
+
+    def write_record(self, file_name: str, record: Optional[Dict[str, Any]] = None) -> bool:
+        """Appends the given record, or the latest record, to the given file as a single JSON line.
+           Returns True if the record was written successfully."""
+        if record is None:
+            record = self.__latest_record
+        if record is None:
+            return False
+
+        try:
+            with open(file_name, mode="a", encoding="UTF-8") as record_file:
+                record_file.write(json.dumps(record) + "\n")
+            return True
+        except (OSError, TypeError, ValueError) as write_error:
+            LOGGER.warning("Could not write the epoch timing record to '%s': %s", file_name, write_error)
+            return False
+
+    def __end_stage(self, current_time: float) -> None:
+        if self.__current_stage is None:
+            return
+
+        self.__stage_times[self.__current_stage] = \
+            self.__stage_times.get(self.__current_stage, 0.0) + current_time - self.__stage_start_time
+        self.__stage_calls[self.__current_stage] = self.__stage_calls.get(self.__current_stage, 0) + 1
+        self.__current_stage = None
+        self.__stage_start_time = None
+
+
+class EpochTimingStatusMessage(StatusMessage):
+    """Status message with an additional optional attribute EpochTiming that contains the epoch timing record.
+       The message type is Status, so the receivers handle the message as a normal status message and ignore
+       the additional attribute. The class is not registered to the message factory."""
+
+    MESSAGE_ATTRIBUTES = {
+        "EpochTiming": "epoch_timing"
+    }
+    OPTIONAL_ATTRIBUTES = ["EpochTiming"]
+
+    MESSAGE_ATTRIBUTES_FULL = {
+        **StatusMessage.MESSAGE_ATTRIBUTES_FULL,
+        **MESSAGE_ATTRIBUTES
+    }
+    OPTIONAL_ATTRIBUTES_FULL = StatusMessage.OPTIONAL_ATTRIBUTES_FULL + OPTIONAL_ATTRIBUTES
+
+    @property
+    def epoch_timing(self) -> Optional[Dict[str, Any]]:
+        """The epoch timing record."""
+        return self.__epoch_timing
+
+    @epoch_timing.setter
+    def epoch_timing(self, epoch_timing: Optional[Dict[str, Any]]):
+        if not self._check_epoch_timing(epoch_timing):
+            raise MessageValueError("'{}' is an invalid value for epoch timing.".format(str(epoch_timing)))
+
+        self.__epoch_timing = epoch_timing
+
+    def __eq__(self, other: Any) -> bool:
+        return (
+            super().__eq__(other) and
+            isinstance(other, EpochTimingStatusMessage) and
+            self.epoch_timing == other.epoch_timing
+        )
+
+    @classmethod
+    def _check_epoch_timing(cls, epoch_timing: Optional[Dict[str, Any]]) -> bool:
+        return epoch_timing is None or isinstance(epoch_timing, dict)
+
+    @classmethod
+    def from_json(cls, json_message: Dict[str, Any]) -> Union[EpochTimingStatusMessage, None]:
+        """Returns a class object created based on the given JSON attributes.
+           If the given JSON does not contain valid values, returns None."""
+        if cls.validate_json(json_message):
+            return cls(**json_message)
+        return None
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""This module contains a linearized power flow for radial distribution networks. It is an approximate
+alternative to the backward-forward sweep of the Grid component for screening purposes."""
+
+from collections import deque
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy
+
+
+class LinearPowerFlow:
+    """
+    Linearized three phase power flow for radial networks in the style of the LinDistFlow model.
+    The network model is the same as in the backward-forward sweep of the Grid component: each phase and the
+    neutral wire have the impedance of the branch and the nodal currents are calculated separately for each phase.
+    The nodal currents are linearized around the nominal voltages, i.e. the voltage of the root bus, which
+    removes the iteration: the branch currents are the sums of the nodal currents of the downstream buses and
+    the voltages are the root voltages minus the voltage drops on the path from the root bus.
+
+    The path structure of the radial network is built once and stored as sparse index arrays, so that each
+    solution is a single sparse matrix-vector pass. The solution can be calculated for many injection
+    snapshots at once. All the values are in per unit.
+    """
+    PHASES = 4  # three phases and the neutral wire
+    # as in the sweep, only the buses with a nodal current larger than this in some phase are taken into account
+    CURRENT_THRESHOLD = 0.0001
+
+    def __init__(self, bus_names: Sequence[str], root_bus_index: int, sending_end_buses: Sequence[str],
+                 receiving_end_buses: Sequence[str], impedances: Sequence[complex],
+                 admittances: Sequence[Sequence[complex]], root_voltages: Sequence[complex]):
+        """
+        Builds the path structure of the network.
+        - bus_names: the names of the buses, the order defines the bus indexes
+        - root_bus_index: the index of the root bus
+        - sending_end_buses, receiving_end_buses: the bus names at the ends of each branch
+        - impedances: the per unit impedance of each branch
+        - admittances: the per unit shunt admittances of each bus for the three phases and the neutral wire
+        - root_voltages: the per unit voltages of the root bus for the three phases and the neutral wire
+        Raises ValueError if the network is not a connected radial network.
+        """
+        self.__num_buses = len(bus_names)
+        self.__num_branches = len(sending_end_buses)
+        self.__root_bus_index = root_bus_index
+        self.__impedances = numpy.asarray(impedances, dtype=complex)
+        self.__admittances = numpy.asarray(admittances, dtype=complex)
+        self.__root_voltages = numpy.asarray(root_voltages, dtype=complex)
+        if self.__num_branches != self.__num_buses - 1:
+            raise ValueError("A radial network with {} buses must have {} branches instead of {}".format(
+                self.__num_buses, self.__num_buses - 1, self.__num_branches))
+
+        parent_branches = self.__get_parent_branches(bus_names, sending_end_buses, receiving_end_buses)
+
+        # (branch, bus) pairs for each branch on the path from the root bus to each bus
+        path_branches = []
+        path_buses = []
+        for bus_index in range(self.__num_buses):
+            current_bus = bus_index
+            while current_bus != root_bus_index:
+                branch_index, parent_bus = parent_branches[current_bus]
+                path_branches.append(branch_index)
+                path_buses.append(bus_index)
+                current_bus = parent_bus
+        path_branches = numpy.asarray(path_branches, dtype=int)
+        path_buses = numpy.asarray(path_buses, dtype=int)
+
+        # the downstream buses of each branch ordered by the branch, i.e. the path matrix in compressed sparse rows
+        branch_order = numpy.lexsort((path_buses, path_branches))
+        self.__downstream_buses = path_buses[branch_order]
+        self.__branch_starts = numpy.searchsorted(path_branches[branch_order], numpy.arange(self.__num_branches))
+
+        # the branches on the path of each non-root bus ordered by the bus, i.e. the transposed path matrix
+        bus_order = numpy.lexsort((path_branches, path_buses))
+        self.__path_branches = path_branches[bus_order]
+        self.__non_root_buses = numpy.unique(path_buses)
+        self.__bus_starts = numpy.searchsorted(path_buses[bus_order], self.__non_root_buses)
+
+        # the currents of the shunt admittances at the nominal voltages do not depend on the injections
+        self.__shunt_currents = self.__admittances * self.__root_voltages[:, numpy.newaxis]
+
+    @property
+    def num_buses(self) -> int:
+        """The number of buses."""
+        return self.__num_buses
+
+    @property
+    def num_branches(self) -> int:
+        """The number of branches."""
+        return self.__num_branches
+
+    @property
+    def root_bus_index(self) -> int:
+        """The index of the root bus."""
+        return self.__root_bus_index
+
+    @property
+    def path_entries(self) -> int:
+        """The number of non-zero elements in the path matrix, i.e. the sum of the path lengths of the buses."""
+        return len(self.__downstream_buses)
+
+    def get_nodal_currents(self, injections: Union[numpy.ndarray, Sequence]) -> numpy.ndarray:
+        """Returns the linearized nodal currents for the three phases and the neutral wire of each bus.
+           The injections are the per unit powers for the three phases of each bus with the shape (3, buses)
+           or (snapshots, 3, buses). The result has the shape (4, buses) or (snapshots, 4, buses)."""
+        injections = numpy.asarray(injections, dtype=complex)
+        phase_voltages = self.__root_voltages[:3, numpy.newaxis]
+        load_currents = numpy.conj(injections / (phase_voltages - self.__root_voltages[3]))
+        nodal_currents = numpy.concatenate(
+            (load_currents, -numpy.sum(load_currents, axis=-2, keepdims=True)), axis=-2)
+        nodal_currents = self.__get_significant_currents(nodal_currents - self.__shunt_currents)
+        # the root bus is the source, so its own nodal currents do not flow through any branch
+        nodal_currents[..., self.__root_bus_index] = 0
+        return nodal_currents
+
+    def get_operating_point_currents(self, injections: Union[numpy.ndarray, Sequence],
+                                     voltages: Union[numpy.ndarray, Sequence]) -> numpy.ndarray:
+        """Returns the nodal currents for the three phases and the neutral wire of each bus with the shape
+           (4, buses) as in the sweep at the operating point given by the injections with the shape (3, buses)
+           and the voltages with the shape (4, buses). The buses with negligible currents are not left out."""
+        injections = numpy.asarray(injections, dtype=complex)
+        voltages = numpy.asarray(voltages, dtype=complex)
+        load_currents = numpy.conj(injections / (voltages[:3] - voltages[3]))
+        nodal_currents = numpy.concatenate((load_currents, -numpy.sum(load_currents, axis=0, keepdims=True)))
+        return nodal_currents - self.__admittances * voltages
+
+    def get_current_sensitivities(self, voltages: Union[numpy.ndarray, Sequence]) -> numpy.ndarray:
+        """Returns the sensitivities of the nodal currents to the real power injections, i.e. dI/dP, for the three
+           phases of each bus at the operating point given by the voltages with the shape (4, buses).
+           The result has the shape (3, buses)."""
+        voltages = numpy.asarray(voltages, dtype=complex)
+        return numpy.conj(1 / (voltages[:3] - voltages[3]))
+
+    def solve_changes(self, injection_changes: Union[numpy.ndarray, Sequence], current_sensitivities: numpy.ndarray,
+                      nodal_currents: Optional[numpy.ndarray] = None) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the first order changes of the bus voltages with the shape (4, buses) and the branch currents
+           with the shape (4, branches) for the given changes of the injections with the shape (3, buses) around
+           the operating point of the given current sensitivities. With the changes of several snapshots, i.e.
+           with the shape (snapshots, 3, buses), the results have an additional first dimension.
+           If the nodal currents at the operating point are given, see get_operating_point_currents, the buses
+           whose currents become negligible or non-negligible with the changes are handled as in the sweep."""
+        injection_changes = numpy.asarray(injection_changes, dtype=complex)
+        load_current_changes = numpy.conj(injection_changes) * current_sensitivities
+        nodal_current_changes = numpy.concatenate(
+            (load_current_changes, -numpy.sum(load_current_changes, axis=-2, keepdims=True)), axis=-2)
+        if nodal_currents is not None:
+            nodal_current_changes = (
+                self.__get_significant_currents(nodal_currents + nodal_current_changes) -
+                self.__get_significant_currents(nodal_currents))
+        nodal_current_changes[..., self.__root_bus_index] = 0
+        branch_current_changes = self.get_branch_currents(nodal_current_changes)
+        return -self.get_voltage_drops(branch_current_changes), branch_current_changes
+
+    def get_common_path_impedances(self, bus_indexes: Sequence[int]) -> numpy.ndarray:
+        """Returns the sums of the impedances of the branches that are on the paths from the root bus both to
+           each given bus and to each bus of the network with the shape (given buses, buses)."""
+        common_impedances = numpy.zeros((len(bus_indexes), self.__num_buses), dtype=complex)
+        branch_ends = numpy.append(self.__branch_starts[1:], len(self.__downstream_buses))
+        bus_ends = numpy.append(self.__bus_starts[1:], len(self.__path_branches))
+        non_root_positions = numpy.searchsorted(self.__non_root_buses, bus_indexes)
+        for row, (bus_index, position) in enumerate(zip(bus_indexes, non_root_positions)):
+            if bus_index == self.__root_bus_index:
+                continue
+            for branch_index in self.__path_branches[self.__bus_starts[position]:bus_ends[position]]:
+                downstream_buses = self.__downstream_buses[self.__branch_starts[branch_index]:branch_ends[branch_index]]
+                common_impedances[row, downstream_buses] += self.__impedances[branch_index]
+        return common_impedances
+
+    def get_downstream_matrix(self, branch_indexes: Sequence[int]) -> numpy.ndarray:
+        """Returns a matrix with the shape (given branches, buses) that has 1 for the buses that are downstream
+           of each given branch and 0 for the other buses."""
+        downstream_matrix = numpy.zeros((len(branch_indexes), self.__num_buses))
+        branch_ends = numpy.append(self.__branch_starts[1:], len(self.__downstream_buses))
+        for row, branch_index in enumerate(branch_indexes):
+            downstream_matrix[
+                row, self.__downstream_buses[self.__branch_starts[branch_index]:branch_ends[branch_index]]] = 1
+        return downstream_matrix
+
+    def get_branch_currents(self, nodal_currents: numpy.ndarray) -> numpy.ndarray:
+        """Returns the branch currents, i.e. the sums of the given nodal currents of the downstream buses.
+           The nodal currents have the shape (..., buses) and the result has the shape (..., branches)."""
+        return numpy.add.reduceat(nodal_currents[..., self.__downstream_buses], self.__branch_starts, axis=-1)
+
+    def get_voltage_drops(self, branch_currents: numpy.ndarray) -> numpy.ndarray:
+        """Returns the voltage drops from the root bus to each bus caused by the given branch currents.
+           The branch currents have the shape (..., branches) and the result has the shape (..., buses)."""
+        branch_drops = (branch_currents * self.__impedances)[..., self.__path_branches]
+        voltage_drops = numpy.zeros(branch_currents.shape[:-1] + (self.__num_buses,), dtype=complex)
+        voltage_drops[..., self.__non_root_buses] = numpy.add.reduceat(branch_drops, self.__bus_starts, axis=-1)
+        return voltage_drops
+
+    def solve(self, injections: Union[numpy.ndarray, Sequence]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the bus voltages with the shape (4, buses) and the branch currents with the shape (4, branches)
+           for the given injections with the shape (3, buses). With the injections of several snapshots,
+           i.e. with the shape (snapshots, 3, buses), the results have an additional first dimension."""
+        branch_currents = self.get_branch_currents(self.get_nodal_currents(injections))
+        voltages = self.__root_voltages[:, numpy.newaxis] - self.get_voltage_drops(branch_currents)
+        return voltages, branch_currents
+
+    def __get_significant_currents(self, nodal_currents: numpy.ndarray) -> numpy.ndarray:
+        """Returns the given nodal currents with the shape (..., 4, buses) where the currents of the buses that
+           have a negligible current in all the three phases are set to zero."""
+        significant_buses = numpy.any(
+            numpy.abs(nodal_currents[..., :3, :]) > self.__class__.CURRENT_THRESHOLD, axis=-2, keepdims=True)
+        return numpy.where(significant_buses, nodal_currents, 0)
+
+    def __get_parent_branches(self, bus_names: Sequence[str], sending_end_buses: Sequence[str],
+                              receiving_end_buses: Sequence[str]) -> List[Tuple[int, int]]:
+        """Returns (the branch to the parent bus, the parent bus) for each bus using a breadth-first search
+           from the root bus. Raises ValueError if some bus cannot be reached from the root bus."""
+        bus_indexes = {bus_name: bus_index for bus_index, bus_name in enumerate(bus_names)}
+        neighbours = [[] for _ in range(self.__num_buses)]
+        for branch_index, (sending_end_bus, receiving_end_bus) in enumerate(zip(sending_end_buses, receiving_end_buses)):
+            try:
+                sending_end_index = bus_indexes[sending_end_bus]
+                receiving_end_index = bus_indexes[receiving_end_bus]
+            except KeyError as bus_error:
+                raise ValueError("Unknown bus {} in branch {}".format(bus_error, branch_index)) from bus_error
+            neighbours[sending_end_index].append((receiving_end_index, branch_index))
+            neighbours[receiving_end_index].append((sending_end_index, branch_index))
+
+        parent_branches = [None] * self.__num_buses
+        visited = [False] * self.__num_buses
+        visited[self.__root_bus_index] = True
+        queue = deque([self.__root_bus_index])
+        while queue:
+            bus_index = queue.popleft()
+            for neighbour_index, branch_index in neighbours[bus_index]:
+                if not visited[neighbour_index]:
+                    visited[neighbour_index] = True
+                    parent_branches[neighbour_index] = (branch_index, bus_index)
+                    queue.append(neighbour_index)
+
+        if not all(visited):
+            raise ValueError("{} buses cannot be reached from the root bus".format(visited.count(False)))
+        return parent_branches
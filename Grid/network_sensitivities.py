@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""This module contains the voltage and current sensitivities of the Grid component. They are calculated at the
+operating point of an epoch and used to estimate the network state for candidate power changes, e.g. for the
+flexibility offers of a market, without calculating the power flow."""
+
+from typing import List, Sequence, Tuple, Union
+
+import numpy
+
+from Grid.linear_power_flow import LinearPowerFlow
+
+
+class NetworkSensitivities:
+    """
+    The sensitivities of the voltages of the monitored buses and the currents of the monitored branches to the
+    real power injections of all the buses, dV/dP and dI/dP, at the operating point of an epoch.
+
+    The sensitivities are derived from the radial structure of the network in the same way as in the linearized
+    power flow: a change of the injection of a bus changes its nodal current by dI/dP, which flows through the
+    branches on the path from the root bus. The voltage of a monitored bus changes by the nodal current change
+    times the impedance of the common part of the paths to the two buses.
+
+    The sensitivities are stored as dense matrices, so that the network state for many candidate power changes is
+    a single matrix product. The columns are the per unit real power injections of the three phases of each bus
+    in the order (phase, bus), i.e. the flattened injection array with the shape (3, buses). The rows are the
+    four nodes or phases (three phases and the neutral wire) of each monitored bus or branch in the order
+    (node, monitored bus) and (phase, monitored branch). All the values are in per unit.
+    """
+    PHASES = 3
+    NODES = 4
+
+    def __init__(self, epoch_number: int, linear_power_flow: LinearPowerFlow, voltages: numpy.ndarray,
+                 branch_currents: numpy.ndarray, bus_names: Sequence[str], branch_ids: Sequence[str],
+                 monitored_bus_indexes: Sequence[int], monitored_branch_indexes: Sequence[int]):
+        """
+        Calculates the sensitivities at the given operating point.
+        - epoch_number: the epoch of the operating point
+        - linear_power_flow: the linearized power flow of the network
+        - voltages: the bus voltages at the operating point with the shape (4, buses)
+        - branch_currents: the branch currents at the operating point with the shape (4, branches)
+        - bus_names, branch_ids: the names of all the buses and the ids of all the branches in index order
+        - monitored_bus_indexes, monitored_branch_indexes: the indexes of the monitored buses and branches
+        """
+        self.__epoch_number = epoch_number
+        self.__bus_names = list(bus_names)
+        self.__monitored_bus_names = [bus_names[bus_index] for bus_index in monitored_bus_indexes]
+        self.__monitored_branch_ids = [branch_ids[branch_index] for branch_index in monitored_branch_indexes]
+        num_buses = len(bus_names)
+        voltages = numpy.asarray(voltages, dtype=complex)
+        branch_currents = numpy.asarray(branch_currents, dtype=complex)
+        self.__base_voltages = voltages[:, monitored_bus_indexes].reshape(-1)
+        self.__base_currents = branch_currents[:, monitored_branch_indexes].reshape(-1)
+
+        current_sensitivities = linear_power_flow.get_current_sensitivities(voltages)
+        # the injections of the root bus do not flow through the network
+        current_sensitivities[:, linear_power_flow.root_bus_index] = 0
+
+        common_impedances = linear_power_flow.get_common_path_impedances(monitored_bus_indexes)
+        voltage_sensitivities = numpy.zeros(
+            (self.__class__.NODES, len(monitored_bus_indexes), self.__class__.PHASES, num_buses), dtype=complex)
+        downstream_matrix = linear_power_flow.get_downstream_matrix(monitored_branch_indexes)
+        current_sensitivity_matrix = numpy.zeros(
+            (self.__class__.NODES, len(monitored_branch_indexes), self.__class__.PHASES, num_buses), dtype=complex)
+        for phase in range(self.__class__.PHASES):
+            # the nodal current of the phase returns through the neutral wire
+            voltage_sensitivities[phase, :, phase, :] = -common_impedances * current_sensitivities[phase]
+            voltage_sensitivities[3, :, phase, :] = common_impedances * current_sensitivities[phase]
+            current_sensitivity_matrix[phase, :, phase, :] = downstream_matrix * current_sensitivities[phase]
+            current_sensitivity_matrix[3, :, phase, :] = -downstream_matrix * current_sensitivities[phase]
+
+        self.__voltage_sensitivities = voltage_sensitivities.reshape(-1, self.__class__.PHASES * num_buses)
+        self.__current_sensitivities = current_sensitivity_matrix.reshape(-1, self.__class__.PHASES * num_buses)
+
+    @property
+    def epoch_number(self) -> int:
+        """The epoch of the operating point."""
+        return self.__epoch_number
+
+    @property
+    def bus_names(self) -> List[str]:
+        """The names of all the buses in the order of the injection columns."""
+        return self.__bus_names
+
+    @property
+    def monitored_bus_names(self) -> List[str]:
+        """The names of the monitored buses."""
+        return self.__monitored_bus_names
+
+    @property
+    def monitored_branch_ids(self) -> List[str]:
+        """The ids of the monitored branches."""
+        return self.__monitored_branch_ids
+
+    @property
+    def base_voltages(self) -> numpy.ndarray:
+        """The voltages of the monitored buses at the operating point with the shape (4, monitored buses)."""
+        return self.__base_voltages.reshape(self.__class__.NODES, -1)
+
+    @property
+    def base_currents(self) -> numpy.ndarray:
+        """The currents of the monitored branches at the operating point with the shape (4, monitored branches)."""
+        return self.__base_currents.reshape(self.__class__.NODES, -1)
+
+    @property
+    def voltage_sensitivities(self) -> numpy.ndarray:
+        """The voltage sensitivity matrix dV/dP with the shape (4 * monitored buses, 3 * buses)."""
+        return self.__voltage_sensitivities
+
+    @property
+    def current_sensitivities(self) -> numpy.ndarray:
+        """The current sensitivity matrix dI/dP with the shape (4 * monitored branches, 3 * buses)."""
+        return self.__current_sensitivities
+
+    def evaluate(self, power_changes: Union[numpy.ndarray, Sequence]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Returns the estimated voltages of the monitored buses and currents of the monitored branches after the
+        given changes of the per unit nodal power injections. As in the Grid component, an injection is the
+        negative of the real power of the resource divided by the apparent power base. A single candidate has the
+        shape (3, buses) and the results have the shapes (4, monitored buses) and (4, monitored branches). Many
+        candidates have the shape (candidates, 3, buses) and the results then have an additional first dimension.
+        """
+        voltage_changes, current_changes = self.get_changes(power_changes)
+        return self.base_voltages + voltage_changes, self.base_currents + current_changes
+
+    def get_changes(self, power_changes: Union[numpy.ndarray, Sequence]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """Returns the changes of the voltages of the monitored buses and currents of the monitored branches
+           caused by the given changes of the per unit nodal power injections, see evaluate."""
+        # the injections are real powers, the reactive powers of the resources are not taken into account
+        power_changes = numpy.real(numpy.asarray(power_changes))
+        candidate_shape = power_changes.shape[:-2]
+        flat_changes = power_changes.reshape(-1, self.__class__.PHASES * len(self.__bus_names))
+        voltage_changes = flat_changes @ self.__voltage_sensitivities.T
+        current_changes = flat_changes @ self.__current_sensitivities.T
+        return (
+            voltage_changes.reshape(candidate_shape + (self.__class__.NODES, len(self.__monitored_bus_names))),
+            current_changes.reshape(candidate_shape + (self.__class__.NODES, len(self.__monitored_branch_ids))))
@@ -192,7 +192,7 @@ class NetworkStateMessageCurrent(AbstractResultMessage):
 
     @classmethod
     def _check_phase(cls, phase: List[int,str]) -> bool:
-        LOGGER.info("phase is {}".format(phase))
+        LOGGER.debug("phase is %s", phase)
         if phase in cls.ACCEPTED_PHASE_VALUES:
             return True
         else:
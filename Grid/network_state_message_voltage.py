@@ -136,7 +136,7 @@ class NetworkStateMessageVoltage(AbstractResultMessage):
 
     @classmethod
     def _check_node(cls, node: List[int,str]) -> bool:
-        LOGGER.info("node is {}".format(node))
+        LOGGER.debug("node is %s", node)
         if node in cls.ACCEPTED_NODE_VALUES:
             return True
         else:
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""This module contains the batch evaluation of the local flexibility market offers of the Grid component. The
+offers are evaluated against the branch current ratings and the bus voltage limits using the network
+sensitivities, so no power flow is calculated for the offers."""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy
+
+from Grid.network_sensitivities import NetworkSensitivities
+
+
+class OfferEvaluator:
+    """
+    Evaluates flexibility offers, or combinations of offers, over their time horizon in a single vectorized pass.
+
+    Each offer is given as the per unit injection changes for one unit of its power and the power of the offer for
+    each time step of the horizon. The network state of each candidate and time step is the state at the operating
+    point of the sensitivities plus the changes caused by the offers of the candidate. The phase currents of the
+    monitored branches are compared to their rated currents and the phase voltages of the monitored buses to the
+    voltage limits. A candidate is feasible if it does not cause any limit violations that do not exist at the
+    operating point. The effectiveness of a candidate is the overload relief, i.e. the decrease of the sum of the
+    branch overloads in per unit summed over the time steps.
+    """
+    PHASES = 3
+    OFFER_IDS = "OfferIds"
+    CONGESTION_IDS = "CongestionIds"
+    FEASIBLE = "Feasible"
+    NEW_VIOLATIONS = "NewViolations"
+    OVERLOAD_RELIEF = "OverloadRelief"
+    REMAINING_OVERLOAD = "RemainingOverload"
+    MAX_LOADING = "MaxLoading"
+    MIN_VOLTAGE = "MinVoltage"
+    MAX_VOLTAGE = "MaxVoltage"
+    PRICE = "Price"
+    RANK = "Rank"
+
+    def __init__(self, network_sensitivities: NetworkSensitivities, rated_currents: Sequence[float],
+                 voltage_limits: Tuple[float, float]):
+        """
+        - network_sensitivities: the sensitivities of the monitored buses and branches
+        - rated_currents: the per unit rated currents of the monitored branches, 0 for no rating
+        - voltage_limits: the lower and upper per unit limits for the phase voltages of the monitored buses
+        """
+        rated_currents = numpy.asarray(rated_currents, dtype=float)
+        if rated_currents.shape != (len(network_sensitivities.monitored_branch_ids),):
+            raise ValueError("A rated current is needed for each of the {} monitored branches, got {}".format(
+                len(network_sensitivities.monitored_branch_ids), len(rated_currents)))
+        self.__network_sensitivities = network_sensitivities
+        self.__rated_currents = numpy.where(rated_currents > 0, rated_currents, numpy.inf)
+        self.__voltage_limits = voltage_limits
+
+    def evaluate(self, offer_ids: Sequence[str], injection_patterns: numpy.ndarray, powers: numpy.ndarray,
+                 prices: Sequence[float], congestion_ids: Sequence[Optional[str]],
+                 combinations: Optional[Sequence[Sequence[int]]] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the evaluation table of the candidates ranked so that the feasible candidates come first, then by
+        the overload relief from the largest to the smallest and then by the price from the cheapest.
+        - offer_ids, prices, congestion_ids: the id, the price and the congestion id of each offer
+        - injection_patterns: the per unit injection changes for one unit of the power of each offer with the
+          shape (offers, 3, buses)
+        - powers: the power of each offer for each time step with the shape (offers, time steps)
+        - combinations: the candidates as lists of offer indexes, by default each offer alone
+        """
+        if combinations is None:
+            combinations = [[offer_index] for offer_index in range(len(offer_ids))]
+        if not combinations:
+            return []
+        if not all(combinations):
+            raise ValueError("Each combination must contain at least one offer")
+        powers = numpy.asarray(powers, dtype=float)
+
+        # the changes for one unit of the power of each offer
+        voltage_responses, current_responses = self.__network_sensitivities.get_changes(injection_patterns)
+        phase_voltages = self.__network_sensitivities.base_voltages[:self.__class__.PHASES]
+        phase_currents = self.__network_sensitivities.base_currents[:self.__class__.PHASES]
+        responses = numpy.concatenate((
+            voltage_responses[:, :self.__class__.PHASES].reshape(len(offer_ids), -1),
+            current_responses[:, :self.__class__.PHASES].reshape(len(offer_ids), -1)), axis=1)
+
+        # the changes of each candidate for each time step are the sums of the weighted responses of its offers
+        candidate_offers = numpy.array([offer_index for offer_indexes in combinations for offer_index in offer_indexes])
+        candidate_starts = numpy.cumsum([0] + [len(offer_indexes) for offer_indexes in combinations[:-1]])
+        changes = numpy.add.reduceat(
+            powers[candidate_offers, :, numpy.newaxis] * responses[candidate_offers, numpy.newaxis, :],
+            candidate_starts, axis=0)
+        voltages = numpy.abs(phase_voltages + changes[..., :phase_voltages.size].reshape(
+            changes.shape[:2] + phase_voltages.shape))
+        currents = numpy.abs(phase_currents + changes[..., phase_voltages.size:].reshape(
+            changes.shape[:2] + phase_currents.shape))
+        base_voltages = numpy.abs(phase_voltages)
+        base_currents = numpy.abs(phase_currents)
+
+        lower_limit, upper_limit = self.__voltage_limits
+        base_violations = numpy.concatenate((
+            (base_voltages < lower_limit) | (base_voltages > upper_limit),
+            base_currents > self.__rated_currents), axis=-1)
+        violations = numpy.concatenate((
+            (voltages < lower_limit) | (voltages > upper_limit),
+            currents > self.__rated_currents), axis=-1)
+        new_violations = numpy.sum(violations & ~base_violations, axis=(1, 2, 3))
+
+        base_overload = numpy.sum(numpy.maximum(base_currents - self.__rated_currents, 0))
+        overloads = numpy.sum(numpy.maximum(currents - self.__rated_currents, 0), axis=(2, 3))
+        overload_reliefs = numpy.sum(base_overload - overloads, axis=1)
+        loadings = numpy.max(currents / self.__rated_currents, axis=(1, 2, 3), initial=0)
+
+        table = []
+        for candidate_index, offer_indexes in enumerate(combinations):
+            table.append({
+                self.__class__.OFFER_IDS: [offer_ids[offer_index] for offer_index in offer_indexes],
+                self.__class__.CONGESTION_IDS: sorted({
+                    congestion_ids[offer_index] for offer_index in offer_indexes
+                    if congestion_ids[offer_index] is not None}),
+                self.__class__.FEASIBLE: bool(new_violations[candidate_index] == 0),
+                self.__class__.NEW_VIOLATIONS: int(new_violations[candidate_index]),
+                self.__class__.OVERLOAD_RELIEF: float(overload_reliefs[candidate_index]),
+                self.__class__.REMAINING_OVERLOAD: float(numpy.max(overloads[candidate_index], initial=0)),
+                self.__class__.MAX_LOADING: float(loadings[candidate_index]),
+                self.__class__.MIN_VOLTAGE: float(numpy.min(voltages[candidate_index])) if voltages.size else None,
+                self.__class__.MAX_VOLTAGE: float(numpy.max(voltages[candidate_index])) if voltages.size else None,
+                self.__class__.PRICE: float(sum(prices[offer_index] for offer_index in offer_indexes))
+            })
+
+        table.sort(key=lambda row: (
+            not row[self.__class__.FEASIBLE], -row[self.__class__.OVERLOAD_RELIEF], row[self.__class__.PRICE]))
+        for rank, row in enumerate(table, start=1):
+            row[self.__class__.RANK] = rank
+        return table
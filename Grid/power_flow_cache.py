@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""This module contains a bounded cache for the power flow results of the Grid component. The results are
+stored by the nodal power injections that are quantized to a given resolution, so that epochs with the same
+operating point can use the earlier result instead of calculating the power flow."""
+
+from collections import OrderedDict
+import hashlib
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy
+
+
+class PowerFlowCache:
+    """A least recently used cache for the power flow results.
+       The key of a result is a hash of the nodal power injections quantized to the given resolution, which is
+       given in per unit. Injections that differ less than the resolution usually get the same key.
+       When the cache is full, the least recently used result is removed."""
+    HITS = "CacheHits"
+    MISSES = "CacheMisses"
+    SIZE = "CacheSize"
+
+    def __init__(self, max_size: int, resolution: float):
+        if max_size < 1:
+            raise ValueError("The maximum size of the power flow cache must be positive: {}".format(max_size))
+        if resolution <= 0:
+            raise ValueError("The resolution of the power flow cache must be positive: {}".format(resolution))
+
+        self.__max_size = max_size
+        self.__resolution = resolution
+        self.__results = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def max_size(self) -> int:
+        """The maximum number of results in the cache."""
+        return self.__max_size
+
+    @property
+    def resolution(self) -> float:
+        """The per unit resolution of the injections in the cache keys."""
+        return self.__resolution
+
+    @property
+    def size(self) -> int:
+        """The number of results in the cache."""
+        return len(self.__results)
+
+    @property
+    def hits(self) -> int:
+        """The number of successful lookups."""
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """The number of lookups that did not find a result."""
+        return self.__misses
+
+    def get_key(self, injections: Sequence[Sequence[Union[int, float, complex]]]) -> bytes:
+        """Returns the cache key for the given injections, e.g. a list of the injections for each node."""
+        injection_array = numpy.asarray(injections, dtype=complex)
+        quantized = numpy.stack((
+            numpy.rint(injection_array.real / self.__resolution),
+            numpy.rint(injection_array.imag / self.__resolution))).astype(numpy.int64)
+        return hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        """Returns the result stored with the given key or None if there is no such result."""
+        result = self.__results.get(key)
+        if result is None:
+            self.__misses += 1
+            return None
+
+        self.__hits += 1
+        self.__results.move_to_end(key)
+        return result
+
+    def put(self, key: bytes, result: Any) -> None:
+        """Stores the result with the given key. Removes the least recently used result if the cache is full."""
+        self.__results[key] = result
+        self.__results.move_to_end(key)
+        while len(self.__results) > self.__max_size:
+            self.__results.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all the results from the cache. The hit and miss counts are not reset."""
+        self.__results.clear()
+
+    def get_statistics(self) -> Dict[str, int]:
+        """Returns the numbers of hits and misses and the current size of the cache."""
+        return {
+            self.__class__.HITS: self.__hits,
+            self.__class__.MISSES: self.__misses,
+            self.__class__.SIZE: len(self.__results)
+        }
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""Common tools for the unit tests of the Grid component. The tests run the Grid component with the local message
+bus for the synthetic radial feeders of the benchmarks and collect the published network state messages."""
+
+import cmath
+import datetime
+import json
+import math
+import os
+import pathlib
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from unittest import mock
+
+import numpy
+
+REPOSITORY_DIRECTORY = pathlib.Path(__file__).resolve().parents[2]
+for python_path in (REPOSITORY_DIRECTORY, REPOSITORY_DIRECTORY / "simulation-tools"):
+    if str(python_path) not in sys.path:
+        sys.path.append(str(python_path))
+
+# The environment must be set before the Grid component is imported.
+os.environ.update({
+    "SIMULATION_COMPONENT_NAME": "Grid",
+    "SIMULATION_MESSAGE_BUS": "local",
+    "SIMULATION_LOG_LEVEL": "50",
+    "SIMULATION_LOG_FILE": os.devnull
+})
+
+# pylint: disable=wrong-import-position
+from tools.message.epoch import EpochMessage  # noqa: E402
+from tools.message.generator import MessageGenerator  # noqa: E402
+from tools.message.simulation_state import SimulationStateMessage  # noqa: E402
+from benchmarks.synthetic_network import SyntheticNetwork, SyntheticNetworkConfig  # noqa: E402
+from Grid.component import Grid, BUS_DATA_TOPIC, COMPONENT_DATA_TOPIC, CUSTOMER_DATA_TOPIC  # noqa: E402
+from Grid.linear_power_flow import LinearPowerFlow  # noqa: E402
+
+SIMULATION_MANAGER_ID = "SimulationManager"
+SIMULATION_START_TIME = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+NETWORK_STATE_TOPIC_PREFIX = "NetworkState."
+STATUS_TOPIC_PREFIX = "Status."
+# the per unit root bus voltages of the small hand-computed networks
+ROOT_VOLTAGES = [1.0, cmath.rect(1.0, 4 * math.pi / 3), cmath.rect(1.0, 2 * math.pi / 3), 0.0]
+
+
+def get_network(bus_count: int = 12, seed: int = 1, **kwargs) -> SyntheticNetwork:
+    """Returns a small synthetic radial feeder for the tests."""
+    return SyntheticNetwork(SyntheticNetworkConfig(bus_count, seed=seed, **kwargs))
+
+
+def get_chain_network(impedances: Sequence[complex] = (0.01 + 0.02j, 0.03 + 0.01j, 0.02 + 0.02j)) \
+        -> LinearPowerFlow:
+    """Returns the linearized power flow for a feeder where bus B1 is connected to the root bus B0 and
+       buses B2 and B3 are both connected to bus B1. There are no shunt admittances."""
+    return LinearPowerFlow(
+        bus_names=["B0", "B1", "B2", "B3"],
+        root_bus_index=0,
+        sending_end_buses=["B0", "B1", "B1"],
+        receiving_end_buses=["B1", "B2", "B3"],
+        impedances=impedances,
+        admittances=numpy.zeros((4, 4)),
+        root_voltages=ROOT_VOLTAGES)
+
+
+class GridRunner:
+    """Helper class for running the Grid component with the local message bus.
+       The published network state messages are collected for each epoch and the status messages for the whole
+       run, both in JSON format."""
+    def __init__(self, network: SyntheticNetwork, environment: Optional[Dict[str, str]] = None):
+        """Creates the Grid component for the network. The given environment variables override the defaults
+           of the network and are only used while the component is created."""
+        self.network = network
+        with mock.patch.dict(os.environ, {**network.get_environment(), **(environment or {})}):
+            self.grid = Grid()
+        self.manager_generator = MessageGenerator(network.simulation_id, SIMULATION_MANAGER_ID)
+        self.published = []
+        self.status_messages = []
+
+        async def send_message(topic_name: str, message_bytes: bytes) -> None:
+            if topic_name.startswith(NETWORK_STATE_TOPIC_PREFIX):
+                self.published.append(json.loads(message_bytes))
+            elif topic_name.startswith(STATUS_TOPIC_PREFIX):
+                self.status_messages.append(json.loads(message_bytes))
+        self.grid._rabbitmq_client.send_message = send_message  # pylint: disable=protected-access
+
+    async def start(self) -> None:
+        """Starts the component and sets the simulation to the running state."""
+        await self.grid.start()
+        await self.send(
+            self.manager_generator.get_message(SimulationStateMessage, SimulationState="running"), "SimState")
+
+    async def stop(self) -> None:
+        """Stops the component."""
+        await self.grid.stop()
+
+    async def send(self, message_object: Any, topic_name: str) -> None:
+        """Gives the message to the component as if it was received from the message bus."""
+        await self.grid.general_message_handler_base(message_object, topic_name)
+
+    def get_epoch_message(self, epoch_number: int) -> EpochMessage:
+        """Returns the epoch message for the given epoch."""
+        epoch_start = SIMULATION_START_TIME + datetime.timedelta(hours=epoch_number - 1)
+        return self.manager_generator.get_message(
+            EpochMessage,
+            EpochNumber=epoch_number,
+            TriggeringMessageIds=["{:s}-status".format(SIMULATION_MANAGER_ID)],
+            StartTime=epoch_start,
+            EndTime=epoch_start + datetime.timedelta(hours=1))
+
+    def get_input_messages(self, epoch_number: int) -> List[Tuple[Any, str]]:
+        """Returns the epoch message, the network and customer data for the first epoch and the resource states
+           for the given epoch as a list of (message object, topic name) tuples."""
+        input_messages = [(self.get_epoch_message(epoch_number), "Epoch")]
+        if epoch_number == 1:
+            input_messages += [
+                (self.network.get_bus_message(epoch_number), BUS_DATA_TOPIC),
+                (self.network.get_component_message(epoch_number), COMPONENT_DATA_TOPIC),
+                (self.network.get_customer_message(epoch_number), CUSTOMER_DATA_TOPIC)
+            ]
+        return input_messages + self.network.get_resource_state_messages(epoch_number)
+
+    async def run_epoch(self, epoch_number: int) -> List[Dict[str, Any]]:
+        """Sends all the input messages for the given epoch and returns the published network state messages."""
+        self.published.clear()
+        for message_object, topic_name in self.get_input_messages(epoch_number):
+            await self.send(message_object, topic_name)
+        return list(self.published)
+
+    async def run_epochs(self, epochs: int) -> List[List[Dict[str, Any]]]:
+        """Runs the given number of epochs and returns the published network state messages for each epoch."""
+        return [await self.run_epoch(epoch_number) for epoch_number in range(1, epochs + 1)]
+
+
+def get_voltages(messages: List[Dict[str, Any]]) -> Dict[Tuple[str, int], complex]:
+    """Returns the published voltages by (bus name, node) as complex numbers in kV."""
+    return {
+        (message["Bus"], message["Node"]): cmath.rect(
+            message["Magnitude"]["Value"], math.radians(message["Angle"]["Value"]))
+        for message in messages if "Bus" in message
+    }
+
+
+def get_currents(messages: List[Dict[str, Any]]) -> Dict[Tuple[str, int], float]:
+    """Returns the published sending end current magnitudes by (device id, phase)."""
+    return {
+        (message["DeviceId"], message["Phase"]): message["MagnitudeSendingEnd"]["Value"]
+        for message in messages if "DeviceId" in message
+    }
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the epoch deadline of the Grid component.
+"""
+import asyncio
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_network, get_voltages
+from Grid.component import STALE_RESOURCE_WARNING
+
+EPOCH_DEADLINE = 0.05
+DEADLINE_WAIT = 0.3
+
+
+class TestEpochDeadline(AsyncTestCase):
+    """Unit tests for processing the epoch with the latest known resource states after the deadline."""
+
+    async def test_stale_resource_states(self):
+        """Unit test for the missing resource states being replaced by the states of the previous epoch."""
+        network = get_network(12, seed=8)
+        grid_runner = GridRunner(network, {"EPOCH_DEADLINE": str(EPOCH_DEADLINE)})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+
+        # pylint: disable=protected-access
+        epoch_1_injections = [list(node_injections) for node_injections in grid._injections]
+        # epoch 2 gets only the epoch message, so all the states from epoch 1 are used after the deadline
+        grid_runner.published.clear()
+        await grid_runner.send(grid_runner.get_epoch_message(2), "Epoch")
+        self.assertEqual(grid._completed_epoch, 1)
+        await asyncio.sleep(DEADLINE_WAIT)
+        self.assertEqual(grid._completed_epoch, 2)
+        self.assertEqual(grid._injections, epoch_1_injections)
+
+        # epoch 3 is missing two resource states
+        epoch_message, *resource_states = grid_runner.get_input_messages(3)
+        missing_resources = sorted(topic_name.split(".")[-1] for _, topic_name in resource_states[:2])
+        grid_runner.published.clear()
+        await grid_runner.send(*epoch_message)
+        for message_object, topic_name in resource_states[2:]:
+            await grid_runner.send(message_object, topic_name)
+        self.assertEqual(grid._completed_epoch, 2)
+        await asyncio.sleep(DEADLINE_WAIT)
+
+        self.assertEqual(grid._completed_epoch, 3)
+        self.assertEqual(sorted(grid._stale_resources), missing_resources)
+        expected_warnings = sorted(
+            "{:s}.{:s}".format(STALE_RESOURCE_WARNING, resource_id) for resource_id in missing_resources)
+        self.assertEqual(len(grid_runner.published), 3 * (network.bus_count + network.branch_count))
+        for message in grid_runner.published:
+            self.assertEqual(message["EpochNumber"], 3)
+            self.assertEqual(sorted(message["Warnings"]), expected_warnings)
+        self.assertEqual(grid._epoch_timer.latest_record["Counts"]["StaleResourceStates"], 2)
+
+        # the resource states that arrive after the deadline are ignored
+        for message_object, topic_name in resource_states[:2]:
+            await grid_runner.send(message_object, topic_name)
+        self.assertEqual(sorted(grid._stale_resources), missing_resources)
+        await grid_runner.stop()
+
+    async def test_all_states_before_deadline(self):
+        """Unit test for the epoch that receives all the resource states before the deadline."""
+        network = get_network(10)
+        reference_runner = GridRunner(network)
+        await reference_runner.start()
+        reference_messages = await reference_runner.run_epochs(2)
+        await reference_runner.stop()
+
+        grid_runner = GridRunner(network, {"EPOCH_DEADLINE": str(EPOCH_DEADLINE)})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        epoch_messages = await grid_runner.run_epochs(2)
+        # pylint: disable=protected-access
+        self.assertIsNone(grid._epoch_deadline_task)
+        await asyncio.sleep(DEADLINE_WAIT)
+
+        self.assertEqual(grid._completed_epoch, 2)
+        self.assertEqual(grid._stale_resources, [])
+        for messages, reference in zip(epoch_messages, reference_messages):
+            self.assertEqual(get_voltages(messages), get_voltages(reference))
+            self.assertTrue(all(not message.get("Warnings") for message in messages))
+        await grid_runner.stop()
+
+    async def test_resources_without_states(self):
+        """Unit test for the deadline in the first epoch when some resources have no earlier state."""
+        network = get_network(10, seed=9)
+        grid_runner = GridRunner(network, {"EPOCH_DEADLINE": str(EPOCH_DEADLINE)})
+        grid = grid_runner.grid
+        await grid_runner.start()
+
+        input_messages = grid_runner.get_input_messages(1)
+        for message_object, topic_name in input_messages[:-1]:
+            await grid_runner.send(message_object, topic_name)
+        missing_resource = input_messages[-1][1].split(".")[-1]
+        # pylint: disable=protected-access
+        self.assertEqual(grid._completed_epoch, 0)
+        await asyncio.sleep(DEADLINE_WAIT)
+
+        # the resource without any state is left out of the power flow
+        self.assertEqual(grid._completed_epoch, 1)
+        self.assertEqual(grid._stale_resources, [missing_resource])
+        self.assertNotIn(missing_resource, grid._resource_state_buffers[1])
+        self.assertTrue(all(
+            message["Warnings"] == ["{:s}.{:s}".format(STALE_RESOURCE_WARNING, missing_resource)]
+            for message in grid_runner.published))
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the per-epoch timing records of the Grid component.
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_network
+from Grid.epoch_timing import EpochTimer, EpochTimingStatusMessage
+from tools.exceptions.messages import MessageValueError
+from tools.message.generator import MessageGenerator
+
+
+class TestEpochTimer(unittest.TestCase):
+    """Unit tests for the EpochTimer class."""
+
+    def test_stages(self):
+        """Unit test for the stage times, the stage calls, the counters and the values of an epoch."""
+        epoch_timer = EpochTimer()
+        self.assertIsNone(epoch_timer.finish_epoch())
+
+        perf_counter_values = iter([10.0, 10.5, 11.0, 11.25, 12.0, 12.5, 13.0])
+        with mock.patch("Grid.epoch_timing.time.perf_counter", side_effect=lambda: next(perf_counter_values)):
+            epoch_timer.start_epoch(3)               # 10.0
+            epoch_timer.start_stage("Sweep")         # 10.5
+            epoch_timer.start_stage("Check")         # 11.0, the sweep took 0.5 s
+            epoch_timer.start_stage("Sweep")         # 11.25, the check took 0.25 s
+            self.assertEqual(epoch_timer.current_stage, "Sweep")
+            epoch_timer.end_stage()                  # 12.0, the sweep took 0.75 s
+            self.assertIsNone(epoch_timer.current_stage)
+            epoch_timer.start_stage("Publishing")    # 12.5
+            epoch_timer.add_count("Messages")
+            epoch_timer.add_count("Messages", 2)
+            epoch_timer.set_count("States", 5)
+            epoch_timer.set_value("Residual", 0.001)
+            record = epoch_timer.finish_epoch()      # 13.0
+
+        self.assertEqual(record, {
+            EpochTimer.EPOCH_NUMBER: 3,
+            EpochTimer.TOTAL_TIME: 3.0,
+            EpochTimer.STAGE_TIMES: {"Sweep": 1.25, "Check": 0.25, "Publishing": 0.5},
+            EpochTimer.STAGE_CALLS: {"Sweep": 2, "Check": 1, "Publishing": 1},
+            EpochTimer.COUNTS: {"Messages": 3, "States": 5},
+            EpochTimer.VALUES: {"Residual": 0.001}
+        })
+        self.assertEqual(epoch_timer.latest_record, record)
+        # the epoch has been finished, so a new epoch must be started before the next record
+        self.assertIsNone(epoch_timer.finish_epoch())
+
+        epoch_timer.start_epoch(4)
+        self.assertEqual(epoch_timer.epoch_number, 4)
+        self.assertEqual(epoch_timer.finish_epoch()[EpochTimer.STAGE_TIMES], {})
+
+    def test_write_record(self):
+        """Unit test for writing the records to a JSON lines file."""
+        epoch_timer = EpochTimer()
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "timing.jsonl")
+            self.assertFalse(epoch_timer.write_record(file_name))
+
+            for epoch_number in (1, 2):
+                epoch_timer.start_epoch(epoch_number)
+                epoch_timer.start_stage("Stage")
+                epoch_timer.finish_epoch()
+                self.assertTrue(epoch_timer.write_record(file_name))
+            self.assertTrue(epoch_timer.write_record(file_name, {EpochTimer.EPOCH_NUMBER: 5}))
+            self.assertFalse(epoch_timer.write_record(os.path.join(directory, "missing", "timing.jsonl")))
+
+            with open(file_name, mode="r", encoding="UTF-8") as timing_file:
+                records = [json.loads(line) for line in timing_file]
+        self.assertEqual([record[EpochTimer.EPOCH_NUMBER] for record in records], [1, 2, 5])
+        self.assertEqual(records[0][EpochTimer.STAGE_CALLS], {"Stage": 1})
+
+
+class TestEpochTimingStatusMessage(unittest.TestCase):
+    """Unit tests for the EpochTimingStatusMessage class."""
+
+    def test_epoch_timing(self):
+        """Unit test for the optional EpochTiming attribute."""
+        timing_record = {EpochTimer.EPOCH_NUMBER: 1, EpochTimer.TOTAL_TIME: 0.1}
+        status_json = MessageGenerator("2020-01-01T00:00:00.000Z", "Grid").get_message(
+            EpochTimingStatusMessage, EpochNumber=1, TriggeringMessageIds=["manager-1"], Value="ready").json()
+
+        status_message = EpochTimingStatusMessage(**{**status_json, "EpochTiming": timing_record})
+        self.assertEqual(status_message.epoch_timing, timing_record)
+        self.assertEqual(status_message.json()["EpochTiming"], timing_record)
+        self.assertEqual(status_message.message_type, "Status")
+        self.assertIsNone(EpochTimingStatusMessage(**status_json).epoch_timing)
+        self.assertNotIn("EpochTiming", status_json)
+        self.assertEqual(EpochTimingStatusMessage.from_json(status_message.json()), status_message)
+
+        with self.assertRaises(MessageValueError):
+            EpochTimingStatusMessage(**{**status_json, "EpochTiming": [timing_record]})
+
+
+class TestGridEpochTiming(AsyncTestCase):
+    """Unit tests for the epoch timing of the Grid component."""
+
+    async def test_timing_records(self):
+        """Unit test for the timing records written by the Grid component and added to the status messages."""
+        network = get_network(10)
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "timing.jsonl")
+            grid_runner = GridRunner(network, {"EPOCH_TIMING_FILE": file_name, "EPOCH_TIMING_IN_STATUS": "true"})
+            await grid_runner.start()
+            await grid_runner.run_epochs(2)
+            await grid_runner.stop()
+
+            with open(file_name, mode="r", encoding="UTF-8") as timing_file:
+                records = [json.loads(line) for line in timing_file]
+
+        self.assertEqual([record[EpochTimer.EPOCH_NUMBER] for record in records], [1, 2])
+        for record in records:
+            self.assertTrue({"NodalCurrents", "BranchCurrents", "VoltageUpdate", "ConvergenceCheck", "Publishing"}
+                            <= set(record[EpochTimer.STAGE_TIMES]))
+            self.assertEqual(record[EpochTimer.STAGE_CALLS]["NodalCurrents"], record[EpochTimer.VALUES]["Iterations"])
+            self.assertEqual(record[EpochTimer.COUNTS]["ResourceStateMessages"], network.resource_count)
+            self.assertEqual(record[EpochTimer.COUNTS]["VoltageMessages"], 3 * network.bus_count)
+            self.assertEqual(record[EpochTimer.COUNTS]["CurrentMessages"], 3 * network.branch_count)
+            self.assertGreaterEqual(
+                record[EpochTimer.TOTAL_TIME], sum(record[EpochTimer.STAGE_TIMES].values()) - 1e-9)
+        self.assertIn("TopologyBuild", records[0][EpochTimer.STAGE_TIMES])
+        self.assertNotIn("TopologyBuild", records[1][EpochTimer.STAGE_TIMES])
+
+        ready_messages = [
+            status_message for status_message in grid_runner.status_messages
+            if status_message.get("EpochNumber", 0) > 0]
+        self.assertEqual([status_message["EpochTiming"] for status_message in ready_messages], records)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the synthetic radial feeders and the end-to-end benchmark of the Grid component.
+"""
+import os
+import unittest
+from unittest import mock
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_network
+from benchmarks.grid_benchmark import compare_results, get_summary, run_epochs
+from benchmarks.synthetic_network import SyntheticNetwork, SyntheticNetworkConfig
+
+
+class TestSyntheticNetwork(unittest.TestCase):
+    """Unit tests for the SyntheticNetwork class."""
+
+    def test_radial_topology(self):
+        """Unit test for the shape of the generated network."""
+        config = SyntheticNetworkConfig(50, depth=4, branching=3, seed=2)
+        network = SyntheticNetwork(config)
+        bus_message = network.get_bus_message()
+        component_message = network.get_component_message()
+        bus_names = bus_message.bus_name
+        sending_end_buses = component_message.sending_end_bus
+        receiving_end_buses = component_message.receiving_end_bus
+
+        self.assertEqual(network.bus_count, 50)
+        self.assertEqual(network.branch_count, network.bus_count - 1)
+        self.assertEqual(len(set(bus_names)), network.bus_count)
+        self.assertEqual(bus_message.bus_type[0], "root")
+
+        # each bus other than the root has exactly one parent and all buses can be reached from the root
+        self.assertEqual(sorted(receiving_end_buses), sorted(bus_names[1:]))
+        children = {}
+        for sending_end_bus, receiving_end_bus in zip(sending_end_buses, receiving_end_buses):
+            children.setdefault(sending_end_bus, []).append(receiving_end_bus)
+        depths = {bus_names[0]: 0}
+        open_buses = [bus_names[0]]
+        while open_buses:
+            bus_name = open_buses.pop()
+            for child_bus in children.get(bus_name, []):
+                depths[child_bus] = depths[bus_name] + 1
+                open_buses.append(child_bus)
+        self.assertEqual(len(depths), network.bus_count)
+        self.assertEqual(max(depths.values()), network.max_depth)
+        self.assertLessEqual(network.max_depth, config.depth)
+        self.assertLessEqual(max(len(child_buses) for child_buses in children.values()), config.branching)
+
+    def test_resource_states(self):
+        """Unit test for the resource states of the network."""
+        network = get_network(20, seed=3)
+        customer_message = network.get_customer_message()
+        self.assertEqual(len(customer_message.resource_id), network.resource_count)
+        self.assertTrue(set(customer_message.bus_name) <= set(network.get_bus_message().bus_name[1:]))
+
+        first_messages = network.get_resource_state_messages(1, shuffle=False)
+        self.assertEqual(len(first_messages), network.resource_count)
+        self.assertEqual(
+            [topic_name.split(".")[-1] for _, topic_name in first_messages], customer_message.resource_id)
+        self.assertTrue(all(topic_name.split(".")[1] in ("Load", "Generator") for _, topic_name in first_messages))
+
+        # the powers depend only on the seed and the epoch number, not on the order of the messages
+        def get_powers(epoch_number: int, shuffle: bool) -> dict:
+            return {
+                topic_name: message_object.real_power.value
+                for message_object, topic_name in network.get_resource_state_messages(epoch_number, shuffle)
+            }
+        self.assertEqual(get_powers(1, False), get_powers(1, True))
+        self.assertNotEqual(get_powers(1, False), get_powers(2, False))
+        self.assertEqual(get_powers(2, False), {
+            topic_name: message_object.real_power.value
+            for message_object, topic_name in get_network(20, seed=3).get_resource_state_messages(2)
+        })
+
+    def test_invalid_config(self):
+        """Unit test for invalid network parameters."""
+        with self.assertRaises(ValueError):
+            SyntheticNetworkConfig(1)
+
+
+class TestGridBenchmark(AsyncTestCase):
+    """Unit tests for running the Grid component with the synthetic networks."""
+
+    async def test_published_network_state(self):
+        """Unit test for the network state messages published for a synthetic network."""
+        network = get_network(15)
+        grid_runner = GridRunner(network, {"POWER_FLOW_IN_THREAD": "false"})
+        await grid_runner.start()
+        epoch_messages = await grid_runner.run_epochs(2)
+        await grid_runner.stop()
+
+        bus_message = network.get_bus_message()
+        voltage_bases = dict(zip(bus_message.bus_name, bus_message.bus_voltage_base.values))
+        for epoch_number, messages in enumerate(epoch_messages, start=1):
+            self.assertTrue(all(message["EpochNumber"] == epoch_number for message in messages))
+            voltage_messages = [message for message in messages if "Bus" in message]
+            current_messages = [message for message in messages if "DeviceId" in message]
+            self.assertEqual(len(voltage_messages), 3 * network.bus_count)
+            self.assertEqual(len(current_messages), 3 * network.branch_count)
+            for message in voltage_messages:
+                # the loads are small compared to the network, so the voltages stay close to the nominal value
+                self.assertAlmostEqual(
+                    message["Magnitude"]["Value"] / voltage_bases[message["Bus"]], 1.02, delta=0.05)
+        self.assertEqual(grid_runner.grid._completed_epoch, 2)  # pylint: disable=protected-access
+
+    async def test_benchmark_results(self):
+        """Unit test for the results and the summary of the end-to-end benchmark."""
+        network = get_network(10)
+        with mock.patch.dict(os.environ, network.get_environment()):
+            result = await run_epochs(network, 2, False)
+        self.assertEqual([epoch["epoch"] for epoch in result["epochs"]], [1, 2])
+        self.assertTrue(all(epoch["completed"] for epoch in result["epochs"]))
+        self.assertTrue(all(
+            epoch["published_messages"] == 3 * (network.bus_count + network.branch_count)
+            for epoch in result["epochs"]))
+
+        summary = get_summary(result)
+        self.assertTrue(summary["all_completed"])
+        self.assertEqual(summary["iterations"], [epoch["iterations"] for epoch in result["epochs"]])
+        self.assertEqual(summary["mean_epoch_s"], result["epochs"][1]["wall_time_s"])
+        self.assertEqual(get_summary({}), {})
+
+        current = {"results": [{"network": network.json(), "summary": {"mean_epoch_s": 0.5}}]}
+        baseline = {"results": [{"network": network.json(), "summary": {"mean_epoch_s": 0.25}}]}
+        self.assertEqual(compare_results(baseline, current)[1].split(), ["10", "0.2500", "0.5000", "2.000"])
+        self.assertEqual(compare_results({}, current)[1].split(), ["10", "None", "0.5", "-"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the linearized power flow of the Grid component.
+"""
+import unittest
+
+from aiounittest.case import AsyncTestCase
+import numpy
+
+from Grid.test.common import ROOT_VOLTAGES, GridRunner, get_chain_network, get_currents, get_network, get_voltages
+from Grid.linear_power_flow import LinearPowerFlow
+
+# the tolerances of the linearized results compared to the exact sweep for the lightly loaded synthetic feeders
+VOLTAGE_TOLERANCE = 1e-6    # relative to the voltage magnitude
+CURRENT_TOLERANCE = 1e-3    # relative to the largest branch current
+
+
+class TestLinearPowerFlow(unittest.TestCase):
+    """Unit tests for the LinearPowerFlow class."""
+
+    def test_hand_computed_case(self):
+        """Unit test for the voltages and currents of a single phase load calculated by hand."""
+        z01, z12, z13 = 0.01 + 0.02j, 0.03 + 0.01j, 0.02 + 0.02j
+        linear_power_flow = get_chain_network((z01, z12, z13))
+        self.assertEqual((linear_power_flow.num_buses, linear_power_flow.num_branches), (4, 3))
+        self.assertEqual(linear_power_flow.path_entries, 5)
+
+        # a load of 0.1 per unit in phase 1 of bus B2, i.e. a nodal current of -0.1 at the nominal voltage
+        injections = numpy.zeros((3, 4))
+        injections[0, 2] = -0.1
+        voltages, currents = linear_power_flow.solve(injections)
+
+        # the phase current and the return current in the neutral wire flow through branches B0-B1 and B1-B2
+        numpy.testing.assert_allclose(currents[0], [-0.1, -0.1, 0.0])
+        numpy.testing.assert_allclose(currents[3], [0.1, 0.1, 0.0])
+        numpy.testing.assert_allclose(currents[1:3], numpy.zeros((2, 3)))
+        numpy.testing.assert_allclose(voltages[0], [1.0, 1.0 + 0.1 * z01, 1.0 + 0.1 * (z01 + z12), 1.0 + 0.1 * z01])
+        numpy.testing.assert_allclose(voltages[3], [0.0, -0.1 * z01, -0.1 * (z01 + z12), -0.1 * z01])
+        numpy.testing.assert_allclose(voltages[1:3], numpy.transpose([ROOT_VOLTAGES[1:3]] * 4))
+
+    def test_snapshots(self):
+        """Unit test for solving several injection snapshots at once."""
+        linear_power_flow = get_chain_network()
+        random_generator = numpy.random.default_rng(1)
+        snapshots = -random_generator.uniform(0.0, 0.2, (5, 3, 4))
+        voltages, currents = linear_power_flow.solve(snapshots)
+        self.assertEqual(voltages.shape, (5, 4, 4))
+        self.assertEqual(currents.shape, (5, 4, 3))
+        for snapshot, snapshot_voltages, snapshot_currents in zip(snapshots, voltages, currents):
+            single_voltages, single_currents = linear_power_flow.solve(snapshot)
+            numpy.testing.assert_allclose(snapshot_voltages, single_voltages)
+            numpy.testing.assert_allclose(snapshot_currents, single_currents)
+
+    def test_solve_changes(self):
+        """Unit test for the changes from an operating point when a bus crosses the negligible current threshold."""
+        linear_power_flow = get_chain_network()
+        root_voltages = numpy.transpose([ROOT_VOLTAGES] * 4)
+        # bus B3 has a negligible load at the operating point and a significant load after the change
+        base_injections = numpy.zeros((3, 4))
+        base_injections[0, 2] = -0.1
+        base_injections[1, 3] = -0.00005
+        new_injections = numpy.array(base_injections)
+        new_injections[0, 2] = -0.12
+        new_injections[1, 3] = -0.01
+
+        base_voltages, base_currents = linear_power_flow.solve(base_injections)
+        new_voltages, new_currents = linear_power_flow.solve(new_injections)
+        current_sensitivities = linear_power_flow.get_current_sensitivities(root_voltages)
+        nodal_currents = linear_power_flow.get_operating_point_currents(base_injections, root_voltages)
+        voltage_changes, current_changes = linear_power_flow.solve_changes(
+            new_injections - base_injections, current_sensitivities, nodal_currents)
+        numpy.testing.assert_allclose(base_voltages + voltage_changes, new_voltages)
+        numpy.testing.assert_allclose(base_currents + current_changes, new_currents)
+
+        # without the operating point currents, the negligible load of bus B3 is missing from the result
+        _, current_changes = linear_power_flow.solve_changes(new_injections - base_injections, current_sensitivities)
+        self.assertAlmostEqual(abs((base_currents + current_changes)[1, 2] - new_currents[1, 2]), 0.00005)
+
+    def test_path_matrices(self):
+        """Unit test for the common path impedances and the downstream buses."""
+        z01, z12, z13 = 0.01 + 0.02j, 0.03 + 0.01j, 0.02 + 0.02j
+        linear_power_flow = get_chain_network((z01, z12, z13))
+        numpy.testing.assert_allclose(linear_power_flow.get_common_path_impedances([2, 0]), [
+            [0, z01, z01 + z12, z01],
+            [0, 0, 0, 0]])
+        numpy.testing.assert_allclose(linear_power_flow.get_downstream_matrix([0, 2]), [
+            [0, 1, 1, 1],
+            [0, 0, 0, 1]])
+
+    def test_invalid_networks(self):
+        """Unit test for the networks that are not connected radial networks."""
+        with self.assertRaises(ValueError):
+            LinearPowerFlow(["B0", "B1", "B2"], 0, ["B0"], ["B1"], [0.01], numpy.zeros((4, 3)), ROOT_VOLTAGES)
+        with self.assertRaises(ValueError):
+            # bus B2 is not connected to the other buses
+            LinearPowerFlow(["B0", "B1", "B2"], 0, ["B0", "B1"], ["B1", "B0"], [0.01, 0.01],
+                            numpy.zeros((4, 3)), ROOT_VOLTAGES)
+        with self.assertRaises(ValueError):
+            LinearPowerFlow(["B0", "B1"], 0, ["B0"], ["B5"], [0.01], numpy.zeros((4, 2)), ROOT_VOLTAGES)
+
+
+class TestGridLinearPowerFlow(AsyncTestCase):
+    """Unit tests for the linearized power flow solver of the Grid component."""
+
+    async def test_compared_to_sweep(self):
+        """Unit test for the linearized results being close to the results of the converged sweep."""
+        network = get_network(30, seed=14)
+        epoch_results = {}
+        for solver, environment in (
+                ("sweep", {"POWER_FLOW_PERCISION": "1e-12", "MAX_ITERATION": "50"}),
+                ("linear", {"POWER_FLOW_SOLVER": "linear"})):
+            grid_runner = GridRunner(network, environment)
+            await grid_runner.start()
+            epoch_results[solver] = await grid_runner.run_epochs(2)
+            # pylint: disable=protected-access
+            if solver == "linear":
+                record = grid_runner.grid._epoch_timer.latest_record
+                self.assertIn("LinearSolve", record["StageTimes"])
+                self.assertNotIn("NodalCurrents", record["StageTimes"])
+                self.assertEqual(record["Values"]["Iterations"], 0)
+            await grid_runner.stop()
+
+        for sweep_messages, linear_messages in zip(epoch_results["sweep"], epoch_results["linear"]):
+            sweep_voltages, linear_voltages = get_voltages(sweep_messages), get_voltages(linear_messages)
+            self.assertEqual(set(sweep_voltages), set(linear_voltages))
+            for bus_node, voltage in sweep_voltages.items():
+                self.assertAlmostEqual(linear_voltages[bus_node], voltage, delta=VOLTAGE_TOLERANCE * abs(voltage))
+
+            sweep_currents, linear_currents = get_currents(sweep_messages), get_currents(linear_messages)
+            self.assertEqual(set(sweep_currents), set(linear_currents))
+            max_current = max(sweep_currents.values())
+            for branch_phase, current in sweep_currents.items():
+                self.assertAlmostEqual(linear_currents[branch_phase], current, delta=CURRENT_TOLERANCE * max_current)
+
+
+if __name__ == '__main__':
+    unittest.main()
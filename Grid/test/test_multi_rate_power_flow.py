@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the multi-rate power flow mode of the Grid component.
+"""
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_currents, get_network, get_voltages
+from domain_messages.resource.resource_state import ResourceStateMessage
+
+EXACT_ENVIRONMENT = {"POWER_FLOW_PERCISION": "1e-12", "MAX_ITERATION": "50"}
+# the tolerances of the sensitivity updates compared to the exact sweep for the lightly loaded synthetic feeders
+VOLTAGE_TOLERANCE = 1e-6    # relative to the voltage magnitude
+CURRENT_TOLERANCE = 1e-3    # relative to the largest branch current
+
+
+class TestMultiRatePowerFlow(AsyncTestCase):
+    """Unit tests for the exact sweeps and the sensitivity updates of the multi-rate mode."""
+
+    async def run_multi_rate(self, network, epochs: int, environment: dict) -> tuple:
+        """Runs the given number of epochs in the multi-rate mode and returns the published messages and
+           the timing record values for each epoch."""
+        grid_runner = GridRunner(network, {**EXACT_ENVIRONMENT, "POWER_FLOW_SOLVER": "multirate", **environment})
+        await grid_runner.start()
+        epoch_messages, epoch_values = [], []
+        for epoch_number in range(1, epochs + 1):
+            epoch_messages.append(await grid_runner.run_epoch(epoch_number))
+            # pylint: disable=protected-access
+            epoch_values.append(grid_runner.grid._epoch_timer.latest_record["Values"])
+        await grid_runner.stop()
+        return epoch_messages, epoch_values
+
+    async def test_exact_interval(self):
+        """Unit test for the exact sweep every given number of epochs and the updates in between."""
+        network = get_network(25, seed=15)
+        reference_runner = GridRunner(network, EXACT_ENVIRONMENT)
+        await reference_runner.start()
+        reference_messages = await reference_runner.run_epochs(5)
+        await reference_runner.stop()
+
+        epoch_messages, epoch_values = await self.run_multi_rate(network, 5, {"MULTI_RATE_INTERVAL": "3"})
+        self.assertEqual([values["ExactSolve"] for values in epoch_values], [True, False, False, True, False])
+        for values in epoch_values:
+            self.assertEqual(values["Iterations"] > 0, values["ExactSolve"])
+
+        for epoch_index, (messages, reference) in enumerate(zip(epoch_messages, reference_messages)):
+            voltages, reference_voltages = get_voltages(messages), get_voltages(reference)
+            currents, reference_currents = get_currents(messages), get_currents(reference)
+            if epoch_values[epoch_index]["ExactSolve"]:
+                self.assertEqual(voltages, reference_voltages)
+                self.assertEqual(currents, reference_currents)
+                continue
+
+            self.assertEqual(set(voltages), set(reference_voltages))
+            for bus_node, voltage in reference_voltages.items():
+                self.assertAlmostEqual(voltages[bus_node], voltage, delta=VOLTAGE_TOLERANCE * abs(voltage))
+            max_current = max(reference_currents.values())
+            for branch_phase, current in reference_currents.items():
+                self.assertAlmostEqual(currents[branch_phase], current, delta=CURRENT_TOLERANCE * max_current)
+
+    async def test_injection_threshold(self):
+        """Unit test for the exact sweep when the injections change more than the threshold."""
+        network = get_network(15, seed=16)
+        _, epoch_values = await self.run_multi_rate(
+            network, 3, {"MULTI_RATE_INTERVAL": "10", "MULTI_RATE_THRESHOLD": "1e-9"})
+        self.assertEqual([values["ExactSolve"] for values in epoch_values], [True, True, True])
+        self.assertTrue(all(values["InjectionChange"] > 1e-9 for values in epoch_values[1:]))
+
+        _, epoch_values = await self.run_multi_rate(
+            network, 3, {"MULTI_RATE_INTERVAL": "10", "MULTI_RATE_THRESHOLD": "1000"})
+        self.assertEqual([values["ExactSolve"] for values in epoch_values], [True, False, False])
+
+    async def test_unchanged_injections(self):
+        """Unit test for the update with the same injections as in the latest exact power flow."""
+        network = get_network(15, seed=17)
+        grid_runner = GridRunner(network, {**EXACT_ENVIRONMENT, "POWER_FLOW_SOLVER": "multirate"})
+        await grid_runner.start()
+        exact_messages = await grid_runner.run_epoch(1)
+
+        grid_runner.published.clear()
+        await grid_runner.send(grid_runner.get_epoch_message(2), "Epoch")
+        for message_object, topic_name in network.get_resource_state_messages(1):
+            await grid_runner.send(ResourceStateMessage(**{
+                **message_object.json(), "EpochNumber": 2, "MessageId": message_object.message_id + "-2"
+            }), topic_name)
+
+        # pylint: disable=protected-access
+        values = grid_runner.grid._epoch_timer.latest_record["Values"]
+        self.assertFalse(values["ExactSolve"])
+        self.assertEqual(values["InjectionChange"], 0.0)
+        # without any changes the results are the ones of the exact power flow
+        self.assertEqual(get_voltages(grid_runner.published), get_voltages(exact_messages))
+        self.assertEqual(get_currents(grid_runner.published), get_currents(exact_messages))
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
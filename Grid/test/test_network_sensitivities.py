@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the voltage and current sensitivities of the Grid component.
+"""
+import unittest
+
+from aiounittest.case import AsyncTestCase
+import numpy
+
+from Grid.test.common import ROOT_VOLTAGES, GridRunner, get_chain_network, get_network
+from Grid.network_sensitivities import NetworkSensitivities
+from domain_messages.resource.resource_state import ResourceStateMessage
+
+SENSITIVITY_ENVIRONMENT = {
+    "SENSITIVITY_BUSES": "all",
+    "SENSITIVITY_BRANCHES": "all",
+    "POWER_FLOW_PERCISION": "1e-12",
+    "MAX_ITERATION": "50"
+}
+POWER_CHANGE = 10.0  # kW
+# the largest allowed error of the estimated changes relative to the largest actual change
+CHANGE_TOLERANCE = 0.01
+
+
+class TestNetworkSensitivities(unittest.TestCase):
+    """Unit tests for the NetworkSensitivities class."""
+
+    def test_compared_to_linear_power_flow(self):
+        """Unit test for the estimated changes at the nominal operating point being the linearized solution."""
+        linear_power_flow = get_chain_network()
+        base_voltages = numpy.transpose([ROOT_VOLTAGES] * 4)
+        network_sensitivities = NetworkSensitivities(
+            epoch_number=1,
+            linear_power_flow=linear_power_flow,
+            voltages=base_voltages,
+            branch_currents=numpy.zeros((4, 3)),
+            bus_names=["B0", "B1", "B2", "B3"],
+            branch_ids=["L1", "L2", "L3"],
+            monitored_bus_indexes=[3, 2],
+            monitored_branch_indexes=[0, 2])
+        self.assertEqual(network_sensitivities.monitored_bus_names, ["B3", "B2"])
+        self.assertEqual(network_sensitivities.monitored_branch_ids, ["L1", "L3"])
+        self.assertEqual(network_sensitivities.voltage_sensitivities.shape, (8, 12))
+        self.assertEqual(network_sensitivities.current_sensitivities.shape, (8, 12))
+
+        random_generator = numpy.random.default_rng(2)
+        power_changes = -random_generator.uniform(0.01, 0.1, (6, 3, 4))
+        power_changes[..., 0] = 0
+        voltages, currents = network_sensitivities.evaluate(power_changes)
+        self.assertEqual(voltages.shape, (6, 4, 2))
+        self.assertEqual(currents.shape, (6, 4, 2))
+        for candidate, power_change in enumerate(power_changes):
+            expected_voltages, expected_currents = linear_power_flow.solve(power_change)
+            numpy.testing.assert_allclose(voltages[candidate], expected_voltages[:, [3, 2]])
+            numpy.testing.assert_allclose(currents[candidate], expected_currents[:, [0, 2]])
+
+        # the injections of the root bus do not change the network state
+        root_change = numpy.zeros((3, 4))
+        root_change[:, 0] = 1.0
+        voltage_changes, current_changes = network_sensitivities.get_changes(root_change)
+        numpy.testing.assert_array_equal(voltage_changes, numpy.zeros((4, 2)))
+        numpy.testing.assert_array_equal(current_changes, numpy.zeros((4, 2)))
+
+
+class TestGridNetworkSensitivities(AsyncTestCase):
+    """Unit tests for the sensitivities calculated by the Grid component."""
+
+    async def test_finite_differences(self):
+        """Unit test for the estimated changes compared to the finite differences of the exact power flow."""
+        network = get_network(25, seed=18)
+        grid_runner = GridRunner(network, SENSITIVITY_ENVIRONMENT)
+        grid = grid_runner.grid
+        await grid_runner.start()
+        self.assertIsNone(grid.get_network_sensitivities())
+        await grid_runner.run_epoch(1)
+
+        # pylint: disable=protected-access
+        network_sensitivities = grid.get_network_sensitivities()
+        self.assertEqual(network_sensitivities.epoch_number, 1)
+        self.assertEqual(network_sensitivities.monitored_bus_names, network.get_bus_message().bus_name)
+        self.assertEqual(network_sensitivities.monitored_branch_ids, network.get_component_message().device_id)
+        self.assertEqual(network_sensitivities.base_voltages.shape, (4, network.bus_count))
+        self.assertEqual(network_sensitivities.base_currents.shape, (4, network.branch_count))
+        base_injections = numpy.array(grid._injections, dtype=complex)
+
+        # the same resource states except that the largest load consumes more
+        resource_states = network.get_resource_state_messages(1)
+        changed_resource = max(
+            range(len(resource_states)), key=lambda index: resource_states[index][0].real_power.value)
+        await grid_runner.send(grid_runner.get_epoch_message(2), "Epoch")
+        for resource_index, (message_object, topic_name) in enumerate(resource_states):
+            real_power = message_object.real_power.value
+            if resource_index == changed_resource:
+                real_power += POWER_CHANGE
+            await grid_runner.send(ResourceStateMessage(**{
+                **message_object.json(),
+                "EpochNumber": 2,
+                "MessageId": message_object.message_id + "-2",
+                "RealPower": {"UnitOfMeasure": "kW", "Value": real_power}
+            }), topic_name)
+        self.assertEqual(grid._completed_epoch, 2)
+
+        # the sensitivities of epoch 2 are at its operating point, i.e. they contain the exact results of epoch 2
+        changed_sensitivities = grid.get_network_sensitivities()
+        self.assertEqual(changed_sensitivities.epoch_number, 2)
+        power_changes = numpy.array(grid._injections, dtype=complex) - base_injections
+        self.assertIn(numpy.count_nonzero(numpy.abs(power_changes) > 1e-12), (1, 3))
+        voltage_changes, current_changes = network_sensitivities.get_changes(power_changes)
+        for estimated_changes, actual_changes in (
+                (voltage_changes, changed_sensitivities.base_voltages - network_sensitivities.base_voltages),
+                (current_changes, changed_sensitivities.base_currents - network_sensitivities.base_currents)):
+            largest_change = numpy.max(numpy.abs(actual_changes))
+            self.assertGreater(largest_change, 0.0)
+            self.assertLessEqual(
+                numpy.max(numpy.abs(estimated_changes - actual_changes)), CHANGE_TOLERANCE * largest_change)
+
+        # evaluating the opposite change at the new operating point gives back the state of epoch 1
+        estimated_voltages, estimated_currents = grid.evaluate_power_changes(-power_changes)
+        numpy.testing.assert_allclose(
+            estimated_voltages, network_sensitivities.base_voltages,
+            atol=CHANGE_TOLERANCE * numpy.max(numpy.abs(voltage_changes)))
+        numpy.testing.assert_allclose(
+            estimated_currents, network_sensitivities.base_currents,
+            atol=CHANGE_TOLERANCE * numpy.max(numpy.abs(current_changes)))
+        await grid_runner.stop()
+
+    async def test_without_sensitivities(self):
+        """Unit test for the Grid component without any monitored buses or branches."""
+        grid_runner = GridRunner(get_network(10))
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+        self.assertIsNone(grid_runner.grid.get_network_sensitivities())
+        self.assertIsNone(grid_runner.grid.evaluate_power_changes(numpy.zeros((3, 10))))
+        self.assertIsNone(grid_runner.grid.evaluate_offers([]))
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the evaluation of the flexibility offers in the Grid component.
+"""
+import unittest
+
+from aiounittest.case import AsyncTestCase
+import numpy
+
+from Grid.test.common import ROOT_VOLTAGES, GridRunner, get_chain_network, get_network
+from Grid.network_sensitivities import NetworkSensitivities
+from Grid.offer_evaluation import OfferEvaluator
+from benchmarks.synthetic_network import SyntheticNetwork
+from domain_messages.Offer import OfferMessage
+from tools.message.block import QuantityBlock, TimeSeriesBlock, ValueArrayBlock
+
+TIME_INDEX = ["2020-01-01T00:00:00.000Z", "2020-01-01T00:15:00.000Z"]
+
+
+def get_chain_evaluator(rated_currents=(0.08, 0.2)) -> OfferEvaluator:
+    """Returns the offer evaluator for the chain network where a load of 0.1 per unit in phase 1 of bus B2 causes
+       a current of 0.1 per unit in branches L1 (B0-B1) and L2 (B1-B2). Branch L1 is overloaded by 0.02 per unit."""
+    linear_power_flow = get_chain_network()
+    base_injections = numpy.zeros((3, 4))
+    base_injections[0, 2] = -0.1
+    base_voltages, base_currents = linear_power_flow.solve(base_injections)
+    network_sensitivities = NetworkSensitivities(
+        epoch_number=1,
+        linear_power_flow=linear_power_flow,
+        voltages=numpy.transpose([ROOT_VOLTAGES] * 4),
+        branch_currents=base_currents,
+        bus_names=["B0", "B1", "B2", "B3"],
+        branch_ids=["L1", "L2", "L3"],
+        monitored_bus_indexes=[2],
+        monitored_branch_indexes=[0, 1])
+    return OfferEvaluator(network_sensitivities, rated_currents, (0.9, 1.1))
+
+
+def get_injection_pattern(bus_index: int, phase: int, injection: float) -> numpy.ndarray:
+    """Returns the per unit injection changes for one unit of power at the given bus and phase of the chain network."""
+    pattern = numpy.zeros((3, 4))
+    pattern[phase, bus_index] = injection
+    return pattern
+
+
+class TestOfferEvaluator(unittest.TestCase):
+    """Unit tests for the OfferEvaluator class."""
+
+    def test_hand_computed_ranking(self):
+        """Unit test for the ranking of the offers whose effects are calculated by hand."""
+        offer_evaluator = get_chain_evaluator()
+        offer_ids = ["A", "B", "C", "D"]
+        injection_patterns = numpy.array([
+            get_injection_pattern(2, 0, 1.0),   # A: less consumption at bus B2, relieves L1 and L2
+            get_injection_pattern(3, 0, 1.0),   # B: less consumption at bus B3, relieves only L1
+            get_injection_pattern(2, 0, 1.0),   # C: the same as A but cheaper
+            get_injection_pattern(1, 1, -1.0)   # D: more consumption in phase 2 of bus B1, overloads L1
+        ])
+        powers = numpy.array([[0.03, 0.03], [0.01, 0.0], [0.03, 0.03], [0.1, 0.1]])
+        prices = [10.0, 5.0, 8.0, 1.0]
+        congestion_ids = ["c1", None, "c1", "c2"]
+
+        table = offer_evaluator.evaluate(offer_ids, injection_patterns, powers, prices, congestion_ids)
+        self.assertEqual([row[OfferEvaluator.OFFER_IDS] for row in table], [["C"], ["A"], ["B"], ["D"]])
+        self.assertEqual([row[OfferEvaluator.RANK] for row in table], [1, 2, 3, 4])
+        rows = {row[OfferEvaluator.OFFER_IDS][0]: row for row in table}
+
+        # A and C: the L1 current decreases from 0.1 to 0.07 in both time steps, so the overload of 0.02 is removed
+        for offer_id in ("A", "C"):
+            self.assertTrue(rows[offer_id][OfferEvaluator.FEASIBLE])
+            self.assertAlmostEqual(rows[offer_id][OfferEvaluator.OVERLOAD_RELIEF], 0.04)
+            self.assertAlmostEqual(rows[offer_id][OfferEvaluator.REMAINING_OVERLOAD], 0.0)
+            self.assertAlmostEqual(rows[offer_id][OfferEvaluator.MAX_LOADING], 0.07 / 0.08)
+            self.assertEqual(rows[offer_id][OfferEvaluator.CONGESTION_IDS], ["c1"])
+        # B: the L1 current is 0.09 in the first time step and 0.1 in the second one
+        self.assertTrue(rows["B"][OfferEvaluator.FEASIBLE])
+        self.assertAlmostEqual(rows["B"][OfferEvaluator.OVERLOAD_RELIEF], 0.01)
+        self.assertAlmostEqual(rows["B"][OfferEvaluator.REMAINING_OVERLOAD], 0.02)
+        self.assertEqual(rows["B"][OfferEvaluator.CONGESTION_IDS], [])
+        # D: a current of 0.1 in phase 2 of L1 is a new violation in both time steps
+        self.assertFalse(rows["D"][OfferEvaluator.FEASIBLE])
+        self.assertEqual(rows["D"][OfferEvaluator.NEW_VIOLATIONS], 2)
+        self.assertAlmostEqual(rows["D"][OfferEvaluator.OVERLOAD_RELIEF], -0.04)
+        self.assertAlmostEqual(rows["D"][OfferEvaluator.MAX_LOADING], 0.1 / 0.08)
+        self.assertEqual(rows["D"][OfferEvaluator.PRICE], 1.0)
+        for row in table:
+            self.assertGreater(row[OfferEvaluator.MIN_VOLTAGE], 0.99)
+            self.assertLess(row[OfferEvaluator.MAX_VOLTAGE], 1.01)
+
+    def test_combinations(self):
+        """Unit test for the offer combinations that are evaluated together."""
+        offer_evaluator = get_chain_evaluator()
+        injection_patterns = numpy.array([get_injection_pattern(3, 0, 1.0), get_injection_pattern(2, 0, 1.0)])
+        powers = numpy.array([[0.01, 0.01], [0.03, 0.0]])
+        table = offer_evaluator.evaluate(
+            ["B", "C"], injection_patterns, powers, [5.0, 8.0], ["c1", "c2"], combinations=[[0], [0, 1], [1]])
+
+        # B and C together: the L1 currents are 0.06 and 0.09, the overloads 0 and 0.01
+        self.assertEqual([row[OfferEvaluator.OFFER_IDS] for row in table], [["B", "C"], ["C"], ["B"]])
+        self.assertAlmostEqual(table[0][OfferEvaluator.OVERLOAD_RELIEF], 0.03)
+        self.assertAlmostEqual(table[0][OfferEvaluator.PRICE], 13.0)
+        self.assertEqual(table[0][OfferEvaluator.CONGESTION_IDS], ["c1", "c2"])
+        self.assertAlmostEqual(table[1][OfferEvaluator.OVERLOAD_RELIEF], 0.02)
+        self.assertAlmostEqual(table[2][OfferEvaluator.OVERLOAD_RELIEF], 0.02)
+        # the same relief, so the cheaper candidate comes first
+        self.assertEqual(table[1][OfferEvaluator.PRICE], 8.0)
+
+        self.assertEqual(offer_evaluator.evaluate(
+            ["B", "C"], injection_patterns, powers, [5.0, 8.0], [None, None], combinations=[]), [])
+        with self.assertRaises(ValueError):
+            offer_evaluator.evaluate(
+                ["B", "C"], injection_patterns, powers, [5.0, 8.0], [None, None], combinations=[[0], []])
+
+    def test_rated_currents(self):
+        """Unit test for the branches without a rating and an invalid number of ratings."""
+        offer_evaluator = get_chain_evaluator((0.0, 0.0))
+        table = offer_evaluator.evaluate(
+            ["D"], numpy.array([get_injection_pattern(1, 1, -1.0)]), numpy.array([[0.1]]), [1.0], [None])
+        self.assertTrue(table[0][OfferEvaluator.FEASIBLE])
+        self.assertEqual(table[0][OfferEvaluator.OVERLOAD_RELIEF], 0.0)
+        self.assertEqual(table[0][OfferEvaluator.MAX_LOADING], 0.0)
+
+        with self.assertRaises(ValueError):
+            get_chain_evaluator((0.08,))
+
+
+class TestGridOfferEvaluation(AsyncTestCase):
+    """Unit tests for evaluating the offer messages in the Grid component."""
+
+    async def test_evaluate_offers(self):
+        """Unit test for the offers of the customers compared to the network sensitivities."""
+        network = get_network(15, seed=19)
+        grid_runner = GridRunner(network, {"SENSITIVITY_BUSES": "all", "SENSITIVITY_BRANCHES": "all"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+
+        customer_message = network.get_customer_message()
+        bus_names = network.get_bus_message().bus_name
+        resource_nodes = {
+            topic_name.split(".")[-1]: message_object.node
+            for message_object, topic_name in network.get_resource_state_messages(1)}
+        customer_id = customer_message.customer_id[0]
+        bus_index = bus_names.index(customer_message.bus_name[0])
+        node = resource_nodes[customer_message.resource_id[0]]
+
+        def get_offer(offer_id: str, direction: str, offer_powers: list, price: float) -> OfferMessage:
+            return grid_runner.manager_generator.get_message(
+                OfferMessage,
+                EpochNumber=1,
+                TriggeringMessageIds=["manager-1"],
+                ActivationTime=TIME_INDEX[0],
+                Duration=QuantityBlock(Value=30, UnitOfMeasure="Minute"),
+                Direction=direction,
+                RealPower=TimeSeriesBlock(
+                    TimeIndex=TIME_INDEX,
+                    Series={"Regulation": ValueArrayBlock(UnitOfMeasure="kW", Values=offer_powers)}),
+                Price=QuantityBlock(Value=price, UnitOfMeasure="EUR"),
+                CongestionId="congestion",
+                OfferId=offer_id,
+                OfferCount=1,
+                CustomerIds=[customer_id])
+
+        offers = [get_offer("up", "upregulation", [20.0, 10.0], 3.0), get_offer("down", "downregulation", [20.0, 10.0], 2.0)]
+        table = grid.evaluate_offers(offers)
+        # the synthetic feeders have no current ratings, so both offers are feasible and the cheaper one is first
+        self.assertEqual([row[OfferEvaluator.OFFER_IDS] for row in table], [["down"], ["up"]])
+        self.assertTrue(all(row[OfferEvaluator.FEASIBLE] for row in table))
+
+        # upregulation increases the injection of the customer's node by the offered power
+        network_sensitivities = grid.get_network_sensitivities()
+        for row, direction in zip(table, (-1, 1)):
+            voltages = []
+            for offer_power in (20.0, 10.0):
+                power_changes = numpy.zeros((3, network.bus_count))
+                power_per_unit = direction * offer_power / SyntheticNetwork.POWER_BASE
+                if node in (1, 2, 3):
+                    power_changes[node - 1, bus_index] = power_per_unit
+                else:
+                    power_changes[:, bus_index] = power_per_unit / numpy.sqrt(3)
+                voltages.append(numpy.abs(network_sensitivities.evaluate(power_changes)[0][:3]))
+            self.assertAlmostEqual(row[OfferEvaluator.MIN_VOLTAGE], float(numpy.min(voltages)))
+            self.assertAlmostEqual(row[OfferEvaluator.MAX_VOLTAGE], float(numpy.max(voltages)))
+
+        table = grid.evaluate_offers(offers, combinations=[["up", "down"]])
+        self.assertEqual(len(table), 1)
+        self.assertAlmostEqual(table[0][OfferEvaluator.PRICE], 5.0)
+        # the offers cancel each other out
+        base_voltages = numpy.abs(network_sensitivities.base_voltages[:3])
+        self.assertAlmostEqual(table[0][OfferEvaluator.MIN_VOLTAGE], float(numpy.min(base_voltages)))
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the power flow calculation of the Grid component.
+"""
+import logging
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_currents, get_network, get_voltages
+from domain_messages.resource.resource_state import ResourceStateMessage
+
+GRID_LOGGER_NAME = "Grid.component"
+
+
+class TestPowerFlowLogging(AsyncTestCase):
+    """Unit tests for the log messages of the power flow calculation."""
+
+    async def test_iteration_logs(self):
+        """Unit test for logging the sweep iterations at DEBUG level and only a summary at INFO level."""
+        # a tight precision so that the sweep takes several iterations
+        grid_runner = GridRunner(get_network(10), {
+            "POWER_FLOW_IN_THREAD": "false", "POWER_FLOW_PERCISION": "1e-9", "MAX_ITERATION": "20"})
+        await grid_runner.start()
+        with self.assertLogs(GRID_LOGGER_NAME, level=logging.DEBUG) as logs:
+            await grid_runner.run_epoch(1)
+        await grid_runner.stop()
+
+        iterations = grid_runner.grid._power_flow_iterations  # pylint: disable=protected-access
+        self.assertGreater(iterations, 1)
+        iteration_records = [record for record in logs.records if record.msg == "iteration is %d"]
+        error_records = [record for record in logs.records if record.msg == "the maximum error is %s"]
+        self.assertEqual(len(iteration_records), iterations)
+        self.assertEqual(len(error_records), iterations)
+        self.assertTrue(all(record.levelno == logging.DEBUG for record in iteration_records + error_records))
+
+        summary_records = [record for record in logs.records if record.msg.startswith("Power flow of epoch")]
+        self.assertEqual(len(summary_records), 1)
+        self.assertEqual(summary_records[0].levelno, logging.INFO)
+        self.assertEqual(summary_records[0].args[:2], (1, iterations))
+
+
+class TestPowerFlowThread(AsyncTestCase):
+    """Unit tests for calculating the power flow outside the event loop thread."""
+
+    async def test_thread_results(self):
+        """Unit test for getting the same results with the power flow in a separate thread and in the event loop."""
+        network = get_network(20, seed=4)
+        epoch_results = []
+        for in_thread in ("true", "false"):
+            grid_runner = GridRunner(network, {"POWER_FLOW_IN_THREAD": in_thread})
+            self.assertEqual(
+                grid_runner.grid._power_flow_executor is not None,  # pylint: disable=protected-access
+                in_thread == "true")
+            await grid_runner.start()
+            epoch_results.append([
+                (get_voltages(messages), get_currents(messages)) for messages in await grid_runner.run_epochs(3)])
+            await grid_runner.stop()
+
+        self.assertEqual(epoch_results[0], epoch_results[1])
+        self.assertTrue(all(voltages and currents for voltages, currents in epoch_results[0]))
+
+    async def test_late_resource_state(self):
+        """Unit test for ignoring a resource state that arrives after the epoch input was taken into use."""
+        network = get_network(10)
+        grid_runner = GridRunner(network)
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+
+        # pylint: disable=protected-access
+        # the power flow uses a copy of the buffered injections
+        self.assertEqual(grid._injections, grid._injection_buffers[1])
+        self.assertTrue(all(
+            node_injections is not buffer_injections
+            for node_injections, buffer_injections in zip(grid._injections, grid._injection_buffers[1])))
+
+        injections = [list(node_injections) for node_injections in grid._injection_buffers[1]]
+        resource_states = dict(grid._resource_state_buffers[1])
+        resource_state, topic_name = network.get_resource_state_messages(1)[0]
+        late_resource_state = ResourceStateMessage(**{
+            **resource_state.json(),
+            "MessageId": "late-1",
+            "RealPower": {"UnitOfMeasure": "kW", "Value": resource_state.real_power.value + 100.0}
+        })
+        with self.assertLogs(GRID_LOGGER_NAME, level=logging.WARNING) as logs:
+            await grid_runner.send(late_resource_state, topic_name)
+        self.assertTrue(any("late resource state" in message for message in logs.output))
+        self.assertEqual(grid._injection_buffers[1], injections)
+        self.assertEqual(grid._resource_state_buffers[1], resource_states)
+        self.assertEqual(grid._completed_epoch, 1)
+
+        # the next epoch is processed normally
+        self.assertTrue(await grid_runner.run_epoch(2))
+        self.assertEqual(grid._completed_epoch, 2)
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
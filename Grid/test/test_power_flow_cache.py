@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the power flow result cache of the Grid component.
+"""
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_currents, get_network, get_voltages
+from Grid.power_flow_cache import PowerFlowCache
+from domain_messages.resource.resource_state import ResourceStateMessage
+
+
+class TestPowerFlowCache(unittest.TestCase):
+    """Unit tests for the PowerFlowCache class."""
+
+    def test_keys(self):
+        """Unit test for the cache keys of the quantized injections."""
+        cache = PowerFlowCache(4, 0.001)
+        injections = [[0.0, 0.1, -0.2], [0.0, 0.05j, 0.0], [0.3, 0.0, 0.0]]
+        key = cache.get_key(injections)
+        self.assertEqual(cache.get_key([list(node_injections) for node_injections in injections]), key)
+        # a change smaller than the resolution gives the same key
+        self.assertEqual(cache.get_key([[0.0, 0.1 + 0.0001, -0.2]] + injections[1:]), key)
+        self.assertNotEqual(cache.get_key([[0.0, 0.102, -0.2]] + injections[1:]), key)
+        self.assertNotEqual(cache.get_key([[0.0, 0.1, -0.2], [0.0, 0.05, 0.0], [0.3, 0.0, 0.0]]), key)
+
+    def test_hits_and_misses(self):
+        """Unit test for the lookups and the statistics."""
+        cache = PowerFlowCache(2, 0.001)
+        self.assertIsNone(cache.get(b"missing"))
+        cache.put(b"first", "first result")
+        self.assertEqual(cache.get(b"first"), "first result")
+        self.assertEqual(cache.get(b"first"), "first result")
+        self.assertEqual((cache.hits, cache.misses, cache.size), (2, 1, 1))
+        self.assertEqual(cache.get_statistics(), {
+            PowerFlowCache.HITS: 2, PowerFlowCache.MISSES: 1, PowerFlowCache.SIZE: 1})
+
+        cache.clear()
+        self.assertIsNone(cache.get(b"first"))
+        self.assertEqual((cache.hits, cache.misses, cache.size), (2, 2, 0))
+
+    def test_lru_eviction(self):
+        """Unit test for removing the least recently used result when the cache is full."""
+        cache = PowerFlowCache(2, 0.001)
+        cache.put(b"first", 1)
+        cache.put(b"second", 2)
+        # using the first result makes the second result the least recently used one
+        self.assertEqual(cache.get(b"first"), 1)
+        cache.put(b"third", 3)
+        self.assertEqual(cache.size, 2)
+        self.assertIsNone(cache.get(b"second"))
+        self.assertEqual(cache.get(b"first"), 1)
+        self.assertEqual(cache.get(b"third"), 3)
+
+        # storing a result again with an existing key updates it and makes it the most recently used one
+        cache.put(b"first", 4)
+        cache.put(b"fourth", 5)
+        self.assertIsNone(cache.get(b"third"))
+        self.assertEqual(cache.get(b"first"), 4)
+
+    def test_invalid_parameters(self):
+        """Unit test for the invalid cache size and resolution."""
+        with self.assertRaises(ValueError):
+            PowerFlowCache(0, 0.001)
+        with self.assertRaises(ValueError):
+            PowerFlowCache(2, 0.0)
+
+
+class TestGridPowerFlowCache(AsyncTestCase):
+    """Unit tests for using the power flow cache in the Grid component."""
+
+    @staticmethod
+    def get_repeated_states(grid_runner: GridRunner, epoch_number: int, state_epoch_number: int) -> list:
+        """Returns the resource states of the given earlier epoch as the resource states of the given epoch."""
+        return [
+            (ResourceStateMessage(**{
+                **message_object.json(),
+                "EpochNumber": epoch_number,
+                "MessageId": "{:s}-{:d}".format(message_object.message_id, epoch_number)
+            }), topic_name)
+            for message_object, topic_name in grid_runner.network.get_resource_state_messages(state_epoch_number)
+        ]
+
+    async def run_repeated_epoch(self, grid_runner: GridRunner, epoch_number: int, state_epoch_number: int) -> list:
+        """Runs the given epoch with the resource states of the given earlier epoch."""
+        grid_runner.published.clear()
+        await grid_runner.send(grid_runner.get_epoch_message(epoch_number), "Epoch")
+        for message_object, topic_name in self.get_repeated_states(grid_runner, epoch_number, state_epoch_number):
+            await grid_runner.send(message_object, topic_name)
+        self.assertEqual(grid_runner.grid._completed_epoch, epoch_number)  # pylint: disable=protected-access
+        return list(grid_runner.published)
+
+    async def test_cached_results(self):
+        """Unit test for reusing the result of an earlier epoch with the same injections."""
+        network = get_network(15, seed=13)
+        grid_runner = GridRunner(network, {"POWER_FLOW_CACHE_SIZE": "2"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        epoch_messages = await grid_runner.run_epochs(3)
+        # pylint: disable=protected-access
+        self.assertEqual(grid._power_flow_cache.get_statistics(), {
+            PowerFlowCache.HITS: 0, PowerFlowCache.MISSES: 3, PowerFlowCache.SIZE: 2})
+
+        # the injections of epoch 3 are still in the cache, but the ones of epoch 1 have been removed
+        messages = await self.run_repeated_epoch(grid_runner, 4, 3)
+        values = grid._epoch_timer.latest_record["Values"]
+        self.assertTrue(values["CacheHit"])
+        self.assertEqual(values[PowerFlowCache.HITS], 1)
+        self.assertEqual(grid._power_flow_iterations, 0)
+        self.assertEqual(get_voltages(messages), get_voltages(epoch_messages[2]))
+        self.assertEqual(get_currents(messages), get_currents(epoch_messages[2]))
+
+        messages = await self.run_repeated_epoch(grid_runner, 5, 1)
+        self.assertFalse(grid._epoch_timer.latest_record["Values"]["CacheHit"])
+        self.assertGreater(grid._power_flow_iterations, 0)
+        self.assertEqual(get_voltages(messages), get_voltages(epoch_messages[0]))
+        self.assertEqual(grid._power_flow_cache.get_statistics(), {
+            PowerFlowCache.HITS: 1, PowerFlowCache.MISSES: 4, PowerFlowCache.SIZE: 2})
+        await grid_runner.stop()
+
+    async def test_non_converged_results(self):
+        """Unit test for not caching the results of a power flow that did not converge."""
+        network = get_network(15, seed=13)
+        grid_runner = GridRunner(network, {
+            "POWER_FLOW_CACHE_SIZE": "2", "POWER_FLOW_PERCISION": "1e-12", "MAX_ITERATION": "1"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+        # pylint: disable=protected-access
+        self.assertGreater(grid._power_flow_error, grid._power_flow_percision)
+        self.assertEqual(grid._power_flow_cache.size, 0)
+
+        await self.run_repeated_epoch(grid_runner, 2, 1)
+        self.assertFalse(grid._epoch_timer.latest_record["Values"]["CacheHit"])
+        self.assertEqual(grid._power_flow_iterations, 1)
+        self.assertEqual(grid._power_flow_cache.get_statistics(), {
+            PowerFlowCache.HITS: 0, PowerFlowCache.MISSES: 2, PowerFlowCache.SIZE: 0})
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for receiving the resource states in the Grid component.
+"""
+import cmath
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_currents, get_network, get_voltages
+from benchmarks.synthetic_network import SyntheticNetwork
+from domain_messages.resource.resource_state import ResourceStateMessage
+from tools.message.generator import MessageGenerator
+
+STORAGE_RESOURCE_ID = "Storage1"
+
+
+class TestResourceStateBuffers(AsyncTestCase):
+    """Unit tests for buffering the resource states by their epoch number."""
+
+    async def test_early_resource_states(self):
+        """Unit test for the resource states of the next epoch that are received before its epoch message."""
+        network = get_network(12, seed=5)
+        reference_runner = GridRunner(network)
+        await reference_runner.start()
+        reference_messages = await reference_runner.run_epochs(2)
+        await reference_runner.stop()
+
+        grid_runner = GridRunner(network)
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+
+        # pylint: disable=protected-access
+        grid_runner.published.clear()
+        epoch_message, *resource_states = grid_runner.get_input_messages(2)
+        for message_object, topic_name in resource_states:
+            await grid_runner.send(message_object, topic_name)
+        self.assertEqual(grid._completed_epoch, 1)
+        self.assertEqual(grid_runner.published, [])
+        self.assertEqual(len(grid._resource_state_buffers[2]), network.resource_count)
+        # the buffers of the current epoch are not changed by the states of the next epoch
+        self.assertEqual(len(grid._resource_state_buffers[1]), network.resource_count)
+
+        # all the resource states are already available when the epoch message arrives
+        await grid_runner.send(*epoch_message)
+        self.assertEqual(grid._completed_epoch, 2)
+        self.assertEqual(get_voltages(grid_runner.published), get_voltages(reference_messages[1]))
+        self.assertEqual(get_currents(grid_runner.published), get_currents(reference_messages[1]))
+        self.assertEqual(set(grid._resource_state_buffers), {2})
+        self.assertEqual(set(grid._injection_buffers), {2})
+        await grid_runner.stop()
+
+    async def test_earlier_epoch_resource_state(self):
+        """Unit test for ignoring the resource states of an earlier epoch."""
+        network = get_network(10)
+        grid_runner = GridRunner(network)
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+
+        # pylint: disable=protected-access
+        await grid_runner.send(grid_runner.get_epoch_message(2), "Epoch")
+        for message_object, topic_name in network.get_resource_state_messages(1):
+            await grid_runner.send(message_object, topic_name)
+        self.assertNotIn(1, grid._resource_state_buffers)
+        self.assertEqual(len(grid._resource_state_buffers.get(2, {})), 0)
+        self.assertEqual(grid._completed_epoch, 1)
+
+        for message_object, topic_name in network.get_resource_state_messages(2):
+            await grid_runner.send(message_object, topic_name)
+        self.assertEqual(grid._completed_epoch, 2)
+        await grid_runner.stop()
+
+
+class TestInjections(AsyncTestCase):
+    """Unit tests for adding the resource powers to the nodal injections as the resource states arrive."""
+
+    @staticmethod
+    def get_expected_injections(network: SyntheticNetwork, resource_states: list, customer_powers: dict) -> list:
+        """Returns the per unit injections for the given resource states. The powers in customer_powers replace
+           the powers of the resources of those customers."""
+        bus_names = network.get_bus_message().bus_name
+        customer_message = network.get_customer_message()
+        resource_buses = dict(zip(customer_message.resource_id, customer_message.bus_name))
+        injections = [[0.0] * network.bus_count for _ in range(3)]
+        for message_object, topic_name in resource_states:
+            real_power = customer_powers.get(message_object.customerid, message_object.real_power.value)
+            power_per_unit = -real_power / SyntheticNetwork.POWER_BASE
+            bus_index = bus_names.index(resource_buses[topic_name.split(".")[-1]])
+            if message_object.node in (1, 2, 3):
+                injections[message_object.node - 1][bus_index] += power_per_unit
+            else:
+                for phase in range(3):
+                    injections[phase][bus_index] += power_per_unit / cmath.sqrt(3)
+        return injections
+
+    def assert_injections(self, injections: list, expected_injections: list):
+        """Checks that the injections match for each node and bus."""
+        self.assertEqual(len(injections), len(expected_injections))
+        for node_injections, expected_node_injections in zip(injections, expected_injections):
+            self.assertEqual(len(node_injections), len(expected_node_injections))
+            for injection, expected_injection in zip(node_injections, expected_node_injections):
+                self.assertAlmostEqual(complex(injection), complex(expected_injection), places=12)
+
+    async def test_resource_injections(self):
+        """Unit test for the injections from the resource states, also for the states received before
+           the network data."""
+        network = get_network(15, seed=6)
+        grid_runner = GridRunner(network)
+        grid = grid_runner.grid
+        await grid_runner.start()
+
+        # pylint: disable=protected-access
+        input_messages = grid_runner.get_input_messages(1)
+        network_messages, resource_states = input_messages[:4], input_messages[4:]
+        # half of the resource states before the network data, when their buses are not yet known
+        for message_object, topic_name in resource_states[:len(resource_states) // 2] + network_messages + \
+                resource_states[len(resource_states) // 2:]:
+            await grid_runner.send(message_object, topic_name)
+
+        self.assertEqual(grid._completed_epoch, 1)
+        self.assert_injections(grid._injections, self.get_expected_injections(network, resource_states, {}))
+        await grid_runner.stop()
+
+    async def test_storage_injections(self):
+        """Unit test for the storage resource power replacing the powers of the resources of the same customer,
+           both when the storage state is received before and after the other resource states."""
+        # the customer of the last resource state shares its bus with an earlier resource
+        network = get_network(12, seed=12)
+        storage_generator = MessageGenerator(network.simulation_id, STORAGE_RESOURCE_ID)
+        epoch_injections = []
+        for storage_first in (True, False):
+            grid_runner = GridRunner(network, {"STORAGE_RESOURCE_LIST": STORAGE_RESOURCE_ID})
+            grid = grid_runner.grid
+            await grid_runner.start()
+
+            epoch_message, *input_messages = grid_runner.get_input_messages(1)
+            resource_states = input_messages[3:]
+            customer_id = resource_states[-1][0].customerid
+            storage_state = storage_generator.get_message(
+                ResourceStateMessage,
+                EpochNumber=1,
+                TriggeringMessageIds=[epoch_message[0].message_id],
+                CustomerId=customer_id,
+                RealPower={"UnitOfMeasure": "kW", "Value": 7.5},
+                ReactivePower={"UnitOfMeasure": "kV.A{r}", "Value": 0.0})
+            storage_message = (storage_state, "ResourceState.Storage.{:s}".format(STORAGE_RESOURCE_ID))
+
+            await grid_runner.send(*epoch_message)
+            if storage_first:
+                await grid_runner.send(*storage_message)
+            for message_object, topic_name in input_messages:
+                await grid_runner.send(message_object, topic_name)
+            # pylint: disable=protected-access
+            # the epoch waits for the storage resource state
+            self.assertEqual(grid._completed_epoch == 1, storage_first)
+            if not storage_first:
+                await grid_runner.send(*storage_message)
+            self.assertEqual(grid._completed_epoch, 1)
+            self.assertEqual(grid._storage_resource_message_counter, 1)
+            self.assert_injections(
+                grid._injections, self.get_expected_injections(network, resource_states, {customer_id: 7.5}))
+            epoch_injections.append(grid._injections)
+            await grid_runner.stop()
+
+        # the replaced powers are summed again, so the injections are the same regardless of the message order
+        self.assertEqual(epoch_injections[0], epoch_injections[1])
+
+
+class TestDuplicateResourceStates(AsyncTestCase):
+    """Unit tests for ignoring the duplicate and redelivered resource states."""
+
+    async def test_duplicate_resource_states(self):
+        """Unit test for a redelivered message and for a second state of the same resource."""
+        network = get_network(10, seed=12)
+        grid_runner = GridRunner(network, {"STORAGE_RESOURCE_LIST": STORAGE_RESOURCE_ID})
+        grid = grid_runner.grid
+        await grid_runner.start()
+
+        epoch_message, *input_messages = grid_runner.get_input_messages(1)
+        network_messages, resource_states = input_messages[:3], input_messages[3:]
+        for message_object, topic_name in [epoch_message] + network_messages:
+            await grid_runner.send(message_object, topic_name)
+
+        resource_state, topic_name = resource_states[0]
+        resource_id = topic_name.split(".")[-1]
+        await grid_runner.send(resource_state, topic_name)
+        # pylint: disable=protected-access
+        buffered_state = list(grid._resource_state_buffers[1][resource_id])
+        injections = [list(node_injections) for node_injections in grid._get_injections(1)]
+
+        # the same message delivered again by the message bus
+        await grid_runner.send(resource_state, topic_name)
+        # another message with a different power for the same resource
+        duplicate_state = ResourceStateMessage(**{
+            **resource_state.json(),
+            "MessageId": resource_state.message_id + "-duplicate",
+            "RealPower": {"UnitOfMeasure": "kW", "Value": resource_state.real_power.value + 50.0}
+        })
+        with self.assertLogs("Grid.component", level="WARNING") as logs:
+            await grid_runner.send(duplicate_state, topic_name)
+        self.assertTrue(any(resource_id in message for message in logs.output))
+        self.assertEqual(len(grid._resource_state_buffers[1]), 1)
+        self.assertEqual(grid._resource_state_buffers[1][resource_id], buffered_state)
+        self.assertEqual(grid._get_injections(1), injections)
+        self.assertEqual(grid._received_message_ids[1], {resource_state.message_id, duplicate_state.message_id})
+
+        # the duplicate storage resource state is ignored in the same way
+        storage_generator = MessageGenerator(network.simulation_id, STORAGE_RESOURCE_ID)
+        storage_states = [
+            storage_generator.get_message(
+                ResourceStateMessage,
+                EpochNumber=1,
+                TriggeringMessageIds=[epoch_message[0].message_id],
+                CustomerId=resource_state.customerid,
+                RealPower={"UnitOfMeasure": "kW", "Value": real_power},
+                ReactivePower={"UnitOfMeasure": "kV.A{r}", "Value": 0.0})
+            for real_power in (2.0, 4.0)
+        ]
+        storage_topic = "ResourceState.Storage.{:s}".format(STORAGE_RESOURCE_ID)
+        for storage_state in storage_states:
+            await grid_runner.send(storage_state, storage_topic)
+        self.assertEqual(grid._storage_resource_state_buffers[1][STORAGE_RESOURCE_ID][1], 2.0)
+        self.assertEqual(grid._resource_state_buffers[1][resource_id][3], -2.0 / SyntheticNetwork.POWER_BASE)
+
+        # the epoch is processed once all the other states are received
+        for message_object, topic_name in resource_states[1:]:
+            await grid_runner.send(message_object, topic_name)
+        self.assertEqual(grid._completed_epoch, 1)
+        self.assertEqual(grid._resource_state_msg_counter, network.resource_count)
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This software was developed as a part of doctroal studies of Mehdi Attar, funded by Fortum and Neste Foundation.
+#  This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+"""
+Tests for the speculative power flow of the Grid component.
+"""
+import asyncio
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from Grid.test.common import GridRunner, get_network, get_voltages
+from domain_messages.resource.resource_state import ResourceStateMessage
+
+# a tight precision so that the power flow takes several iterations from the flat start
+POWER_FLOW_ENVIRONMENT = {"POWER_FLOW_PERCISION": "1e-10", "MAX_ITERATION": "50"}
+SPECULATIVE_WAIT = 0.2
+
+
+class TestSpeculativePowerFlow(AsyncTestCase):
+    """Unit tests for the warm start of the power flow from the speculative power flow."""
+
+    async def test_warm_start(self):
+        """Unit test for the speculative power flow that is run before the resource states are received."""
+        network = get_network(20, seed=10)
+        reference_runner = GridRunner(network, POWER_FLOW_ENVIRONMENT)
+        await reference_runner.start()
+        reference_messages = await reference_runner.run_epochs(3)
+        await reference_runner.stop()
+
+        grid_runner = GridRunner(network, {**POWER_FLOW_ENVIRONMENT, "SPECULATIVE_POWER_FLOW": "true"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        epoch_messages = [await grid_runner.run_epoch(1)]
+        # pylint: disable=protected-access
+        # there is no previous epoch for the first epoch, so it is calculated from the flat start
+        self.assertFalse(grid._epoch_timer.latest_record["Values"]["WarmStart"])
+
+        for epoch_number in (2, 3):
+            epoch_message, *resource_states = grid_runner.get_input_messages(epoch_number)
+            grid_runner.published.clear()
+            await grid_runner.send(*epoch_message)
+            # the speculative power flow uses the injections of the previous epoch while waiting for the states
+            await asyncio.sleep(SPECULATIVE_WAIT)
+            for message_object, topic_name in resource_states:
+                await grid_runner.send(message_object, topic_name)
+            self.assertEqual(grid._completed_epoch, epoch_number)
+            epoch_messages.append(list(grid_runner.published))
+
+            values = grid._epoch_timer.latest_record["Values"]
+            self.assertTrue(values["WarmStart"])
+            self.assertGreater(values["SpeculativeIterations"], 0)
+            self.assertGreaterEqual(values["SpeculativeTime"], 0.0)
+        await grid_runner.stop()
+
+        for messages, reference in zip(epoch_messages, reference_messages):
+            voltages, reference_voltages = get_voltages(messages), get_voltages(reference)
+            self.assertEqual(set(voltages), set(reference_voltages))
+            for bus_node, voltage in voltages.items():
+                self.assertAlmostEqual(voltage, reference_voltages[bus_node], places=6)
+
+    async def test_correct_prediction(self):
+        """Unit test for the warm start when the injections of the epoch are the same as in the previous epoch."""
+        network = get_network(20, seed=11)
+        grid_runner = GridRunner(network, {**POWER_FLOW_ENVIRONMENT, "SPECULATIVE_POWER_FLOW": "true"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+        # pylint: disable=protected-access
+        flat_start_iterations = grid._power_flow_iterations
+        self.assertGreater(flat_start_iterations, 1)
+
+        await grid_runner.send(grid_runner.get_epoch_message(2), "Epoch")
+        await asyncio.sleep(SPECULATIVE_WAIT)
+        for message_object, topic_name in network.get_resource_state_messages(1):
+            repeated_state = ResourceStateMessage(**{
+                **message_object.json(), "EpochNumber": 2, "MessageId": message_object.message_id + "-repeated"})
+            await grid_runner.send(repeated_state, topic_name)
+
+        # the speculative power flow already found the solution, so a single sweep confirms it
+        self.assertEqual(grid._completed_epoch, 2)
+        values = grid._epoch_timer.latest_record["Values"]
+        self.assertTrue(values["WarmStart"])
+        self.assertEqual(values["SpeculativeIterations"], flat_start_iterations)
+        self.assertEqual(grid._power_flow_iterations, 1)
+        await grid_runner.stop()
+
+    async def test_without_speculation(self):
+        """Unit test for the epoch whose resource states are all received before the epoch message."""
+        network = get_network(10)
+        grid_runner = GridRunner(network, {**POWER_FLOW_ENVIRONMENT, "SPECULATIVE_POWER_FLOW": "true"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+
+        epoch_message, *resource_states = grid_runner.get_input_messages(2)
+        for message_object, topic_name in resource_states:
+            await grid_runner.send(message_object, topic_name)
+        await grid_runner.send(*epoch_message)
+
+        # pylint: disable=protected-access
+        self.assertEqual(grid._completed_epoch, 2)
+        values = grid._epoch_timer.latest_record["Values"]
+        self.assertFalse(values["WarmStart"])
+        self.assertNotIn("SpeculativeIterations", values)
+        await grid_runner.stop()
+
+    async def test_solvers(self):
+        """Unit test for running the speculative power flow only in the epochs that are calculated with the sweep."""
+        with self.assertLogs("Grid.component", level="WARNING") as logs:
+            grid_runner = GridRunner(get_network(10), {"SPECULATIVE_POWER_FLOW": "true", "POWER_FLOW_SOLVER": "linear"})
+        # pylint: disable=protected-access
+        self.assertFalse(grid_runner.grid._speculative_mode)
+        self.assertTrue(any("linear solver" in message for message in logs.output))
+
+        network = get_network(15, seed=16)
+        grid_runner = GridRunner(network, {
+            **POWER_FLOW_ENVIRONMENT, "SPECULATIVE_POWER_FLOW": "true", "POWER_FLOW_SOLVER": "multirate",
+            "MULTI_RATE_INTERVAL": "3", "MULTI_RATE_THRESHOLD": "1000"})
+        grid = grid_runner.grid
+        await grid_runner.start()
+        await grid_runner.run_epoch(1)
+        exact_solves, speculative_epochs = [], []
+        for epoch_number in range(2, 6):
+            epoch_message, *resource_states = grid_runner.get_input_messages(epoch_number)
+            await grid_runner.send(*epoch_message)
+            await asyncio.sleep(SPECULATIVE_WAIT)
+            for message_object, topic_name in resource_states:
+                await grid_runner.send(message_object, topic_name)
+            self.assertEqual(grid._completed_epoch, epoch_number)
+            values = grid._epoch_timer.latest_record["Values"]
+            exact_solves.append(values["ExactSolve"])
+            if "SpeculativeIterations" in values:
+                speculative_epochs.append(epoch_number)
+
+        # only the sweep of epoch 4 can use the speculative power flow, the other epochs use the sensitivities
+        self.assertEqual(exact_solves, [False, False, True, False])
+        self.assertEqual(speculative_epochs, [4])
+        await grid_runner.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
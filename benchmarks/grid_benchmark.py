@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""End-to-end benchmark for the Grid component using synthetic radial feeders.
+
+   For each network size, the Grid component is run in a fresh Python interpreter using the in-process message bus,
+   i.e. without a RabbitMQ server. The input messages are given directly to the message handler of the component
+   in the same order as they would arrive from the message bus: SimState, and for each epoch an Epoch message,
+   the NIS and CIS messages (only in the first epoch) and the ResourceState messages in a random order.
+
+   For each epoch, the benchmark reports the wall time, the time spent in the different stages, the number of
+   power flow iterations and the final power flow error, and the number and size of the published messages.
+   The peak memory usage is reported for each network size. The results are written in JSON format.
+
+   Usage: python benchmarks/grid_benchmark.py [--sizes 10,30,100,300] [--epochs 3] [--output results.json]
+                                              [--baseline old_results.json] [other network parameters]
+   Use --help to see all the parameters.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # the resource module is only available on Unix platforms
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+BENCHMARK_DIRECTORY = pathlib.Path(__file__).resolve().parent
+REPOSITORY_DIRECTORY = BENCHMARK_DIRECTORY.parent
+
+DEFAULT_SIZES = [10, 30, 100, 300]
+DEFAULT_EPOCHS = 3
+DEFAULT_TIMEOUT = 600.0  # seconds for each network size
+
+SIMULATION_MANAGER_ID = "SimulationManager"
+SIMULATION_START_TIME = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+NETWORK_STATE_TOPIC_PREFIX = "NetworkState."
+
+# stage name -> the Grid method (or the attribute path to the method) that is timed for the stage
+TIMED_STAGES = {
+    "message_handling": "general_message_handler",
+    "process_epoch": "process_epoch",
+    "shortest_paths": "_shortest_path",
+    "list_resets": "_resetting_lists",
+    "message_creation": "_message_generator.get_message",
+    "publishing": "_send_message",
+}
+
+
+class StageTimer:
+    """Accumulates the time spent and the number of calls for the timed methods of an object."""
+    def __init__(self):
+        self.__times: Dict[str, float] = {}
+        self.__calls: Dict[str, int] = {}
+
+    def reset(self) -> None:
+        """Resets the accumulated times and call counts."""
+        self.__times = {stage_name: 0.0 for stage_name in self.__times}
+        self.__calls = {stage_name: 0 for stage_name in self.__calls}
+
+    def get_time(self, stage_name: str) -> float:
+        """Returns the accumulated time in seconds for the given stage."""
+        return self.__times.get(stage_name, 0.0)
+
+    def get_calls(self, stage_name: str) -> int:
+        """Returns the number of calls for the given stage."""
+        return self.__calls.get(stage_name, 0)
+
+    def wrap(self, target: Any, attribute_path: str, stage_name: str) -> None:
+        """Replaces the method given by the dot separated attribute path with a timed version of the method."""
+        *owner_path, method_name = attribute_path.split(".")
+        for attribute_name in owner_path:
+            target = getattr(target, attribute_name)
+        method = getattr(target, method_name)
+        self.__times[stage_name] = 0.0
+        self.__calls[stage_name] = 0
+
+        if asyncio.iscoroutinefunction(method):
+            async def timed_coroutine(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    self.__add(stage_name, time.perf_counter() - start_time)
+            setattr(target, method_name, timed_coroutine)
+        else:
+            def timed_function(*args, **kwargs):
+                start_time = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.__add(stage_name, time.perf_counter() - start_time)
+            setattr(target, method_name, timed_function)
+
+    def __add(self, stage_name: str, elapsed_time: float) -> None:
+        self.__times[stage_name] += elapsed_time
+        self.__calls[stage_name] += 1
+
+
+class PublishCounter:
+    """Counts the messages and bytes published by a message client."""
+    def __init__(self, send_function: Callable):
+        self.__send_function = send_function
+        self.messages = 0
+        self.bytes = 0
+
+    async def send_message(self, topic_name: str, message_bytes: bytes) -> None:
+        """Counts the network state messages and forwards all the messages to the original send function."""
+        if topic_name.startswith(NETWORK_STATE_TOPIC_PREFIX):
+            self.messages += 1
+            self.bytes += len(message_bytes)
+        await self.__send_function(topic_name, message_bytes)
+
+
+def get_peak_memory() -> Dict[str, Optional[int]]:
+    """Returns the peak resident set size of the process in bytes and the traced peak memory in bytes."""
+    peak_rss = None
+    if resource is not None:
+        # ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            peak_rss *= 1024
+
+    traced_peak = None
+    if tracemalloc is not None and tracemalloc.is_tracing():
+        traced_peak = tracemalloc.get_traced_memory()[1]
+
+    return {"peak_rss_bytes": peak_rss, "traced_peak_bytes": traced_peak}
+
+
+async def run_epochs(network: Any, epochs: int, trace_memory: bool) -> Dict[str, Any]:
+    """Runs the Grid component for the given number of epochs and returns the results."""
+    # pylint: disable=import-outside-toplevel
+    from tools.message.epoch import EpochMessage
+    from tools.message.generator import MessageGenerator
+    from tools.message.simulation_state import SimulationStateMessage
+    from Grid.component import Grid, BUS_DATA_TOPIC, COMPONENT_DATA_TOPIC, CUSTOMER_DATA_TOPIC
+
+    if trace_memory and tracemalloc is not None:
+        tracemalloc.start()
+
+    setup_start_time = time.perf_counter()
+    grid = Grid()
+    stage_timer = StageTimer()
+    for stage_name, attribute_path in TIMED_STAGES.items():
+        stage_timer.wrap(grid, attribute_path, stage_name)
+    publish_counter = PublishCounter(grid._rabbitmq_client.send_message)  # pylint: disable=protected-access
+    grid._rabbitmq_client.send_message = publish_counter.send_message  # pylint: disable=protected-access
+    setup_time = time.perf_counter() - setup_start_time
+
+    await grid.start()
+    manager_generator = MessageGenerator(network.simulation_id, SIMULATION_MANAGER_ID)
+    await grid.general_message_handler_base(
+        manager_generator.get_message(SimulationStateMessage, SimulationState="running"), "SimState")
+
+    epoch_results = []
+    for epoch_number in range(1, epochs + 1):
+        epoch_start = SIMULATION_START_TIME + datetime.timedelta(hours=epoch_number - 1)
+        input_messages = [(
+            manager_generator.get_message(
+                EpochMessage,
+                EpochNumber=epoch_number,
+                TriggeringMessageIds=["{:s}-status".format(SIMULATION_MANAGER_ID)],
+                StartTime=epoch_start,
+                EndTime=epoch_start + datetime.timedelta(hours=1)),
+            "Epoch")]
+        if epoch_number == 1:
+            input_messages += [
+                (network.get_bus_message(epoch_number), BUS_DATA_TOPIC),
+                (network.get_component_message(epoch_number), COMPONENT_DATA_TOPIC),
+                (network.get_customer_message(epoch_number), CUSTOMER_DATA_TOPIC)
+            ]
+        input_messages += network.get_resource_state_messages(epoch_number)
+
+        stage_timer.reset()
+        publish_counter.messages = 0
+        publish_counter.bytes = 0
+        epoch_start_time = time.perf_counter()
+        for message_object, topic_name in input_messages:
+            await grid.general_message_handler_base(message_object, topic_name)
+        epoch_time = time.perf_counter() - epoch_start_time
+
+        stage_times = {
+            stage_name: stage_timer.get_time(stage_name)
+            for stage_name in TIMED_STAGES
+        }
+        # process_epoch is called from the message handler, and the other stages from process_epoch
+        stage_times["message_handling"] -= stage_times["process_epoch"]
+        stage_times["power_flow"] = stage_times["process_epoch"] - sum(
+            stage_times[stage_name]
+            for stage_name in ("shortest_paths", "list_resets", "message_creation", "publishing"))
+
+        epoch_results.append({
+            "epoch": epoch_number,
+            "completed": grid._completed_epoch == epoch_number,  # pylint: disable=protected-access
+            "input_messages": len(input_messages),
+            "wall_time_s": epoch_time,
+            "stage_times_s": stage_times,
+            "shortest_path_calls": stage_timer.get_calls("shortest_paths"),
+            "iterations": grid._power_flow_iterations,  # pylint: disable=protected-access
+            "power_flow_error": grid._power_flow_error,  # pylint: disable=protected-access
+            "published_messages": publish_counter.messages,
+            "published_bytes": publish_counter.bytes,
+            "grid_timing": getattr(grid, "_epoch_timer", None) and grid._epoch_timer.latest_record
+        })
+
+    await grid.stop()
+    result = {
+        "network": network.json(),
+        "setup_time_s": setup_time,
+        "epochs": epoch_results,
+        **get_peak_memory()
+    }
+    if trace_memory and tracemalloc is not None:
+        tracemalloc.stop()
+    return result
+
+
+def run_single(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs the benchmark for a single network size in the current interpreter."""
+    sys.path[:0] = [str(REPOSITORY_DIRECTORY), str(REPOSITORY_DIRECTORY / "simulation-tools")]
+    # pylint: disable=import-outside-toplevel
+    from benchmarks.synthetic_network import SyntheticNetwork, SyntheticNetworkConfig
+
+    generation_start_time = time.perf_counter()
+    network = SyntheticNetwork(SyntheticNetworkConfig(**parameters["network"]))
+    generation_time = time.perf_counter() - generation_start_time
+
+    # The environment must be set before the Grid component is imported.
+    os.environ.update(network.get_environment())
+    os.environ.update({
+        "SIMULATION_COMPONENT_NAME": "Grid",
+        "SIMULATION_MESSAGE_BUS": "local",
+        "SIMULATION_LOG_LEVEL": str(parameters["log_level"]),
+        "SIMULATION_LOG_FILE": parameters["log_file"]
+    })
+
+    result = asyncio.run(run_epochs(network, parameters["epochs"], parameters["trace_memory"]))
+    result["generation_time_s"] = generation_time
+    return result
+
+
+def run_in_subprocess(parameters: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+    """Runs the benchmark for a single network size in a fresh interpreter and returns the results."""
+    try:
+        completed_process = subprocess.run(
+            [sys.executable, str(pathlib.Path(__file__).resolve()), "--single", json.dumps(parameters)],
+            cwd=str(REPOSITORY_DIRECTORY), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, timeout=timeout, check=False)
+    except subprocess.TimeoutExpired:
+        return {"network": {"config": parameters["network"]}, "error": "timeout after {:.0f} s".format(timeout)}
+
+    if completed_process.returncode != 0:
+        error_lines = completed_process.stderr.strip().splitlines()
+        return {"network": {"config": parameters["network"]}, "error": error_lines[-1] if error_lines else "failed"}
+    return json.loads(completed_process.stdout.strip().splitlines()[-1])
+
+
+def get_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns a summary of the results for one network size. The first epoch includes the topology building,
+       so the steady state values are calculated from the later epochs when they are available."""
+    epochs = result.get("epochs", [])
+    if not epochs:
+        return {}
+
+    steady_epochs = epochs[1:] or epochs
+    return {
+        "first_epoch_s": epochs[0]["wall_time_s"],
+        "mean_epoch_s": sum(epoch["wall_time_s"] for epoch in steady_epochs) / len(steady_epochs),
+        "mean_stage_times_s": {
+            stage_name: sum(epoch["stage_times_s"][stage_name] for epoch in steady_epochs) / len(steady_epochs)
+            for stage_name in steady_epochs[0]["stage_times_s"]
+        },
+        "iterations": [epoch["iterations"] for epoch in epochs],
+        "all_completed": all(epoch["completed"] for epoch in epochs)
+    }
+
+
+def get_git_commit() -> Optional[str]:
+    """Returns the current git commit of the repository or None if it is not available."""
+    try:
+        completed_process = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=str(REPOSITORY_DIRECTORY), stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, universal_newlines=True, check=False)
+    except OSError:
+        return None
+    return completed_process.stdout.strip() or None
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Returns a list of text lines comparing the mean epoch times of the current results to the baseline."""
+    baseline_times = {
+        result["network"]["config"]["bus_count"]: result.get("summary", {}).get("mean_epoch_s", None)
+        for result in baseline.get("results", [])
+    }
+    lines = ["{:>10s} {:>14s} {:>14s} {:>8s}".format("buses", "baseline (s)", "current (s)", "ratio")]
+    for result in current["results"]:
+        bus_count = result["network"]["config"]["bus_count"]
+        current_time = result.get("summary", {}).get("mean_epoch_s", None)
+        baseline_time = baseline_times.get(bus_count, None)
+        if current_time is None or baseline_time is None:
+            lines.append("{:>10d} {:>14s} {:>14s} {:>8s}".format(
+                bus_count, str(baseline_time), str(current_time), "-"))
+        else:
+            lines.append("{:>10d} {:>14.4f} {:>14.4f} {:>8.3f}".format(
+                bus_count, baseline_time, current_time, current_time / baseline_time))
+    return lines
+
+
+def get_arguments() -> argparse.Namespace:
+    """Returns the command line arguments."""
+    parser = argparse.ArgumentParser(description="End-to-end benchmark for the Grid component.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=DEFAULT_SIZES,
+                        help="comma separated list of bus counts (default: {:s})".format(
+                            ",".join(str(size) for size in DEFAULT_SIZES)))
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS, help="number of epochs for each size")
+    parser.add_argument("--depth", type=int, default=20, help="maximum depth of the radial network")
+    parser.add_argument("--branching", type=int, default=4, help="maximum number of child buses for each bus")
+    parser.add_argument("--resource-density", type=float, default=1.0,
+                        help="average number of resources per non-root bus")
+    parser.add_argument("--phase-mix", type=lambda value: [float(share) for share in value.split(",")],
+                        default=[0.1, 0.1, 0.1, 0.7],
+                        help="relative shares of resources on phases 1, 2, 3 and three-phase (default: 0.1,0.1,0.1,0.7)")
+    parser.add_argument("--generator-share", type=float, default=0.2, help="share of generator resources")
+    parser.add_argument("--reversed-branch-share", type=float, default=0.0,
+                        help="share of branches given in the upstream direction")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the random number generators")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="maximum time in seconds for each size, the larger sizes are skipped after a timeout")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="trace the Python memory allocations (slows down the benchmark)")
+    parser.add_argument("--log-level", type=int, default=50, help="log level for the Grid component")
+    parser.add_argument("--log-file", default=os.devnull, help="log file for the Grid component")
+    parser.add_argument("--output", help="file for the JSON results (default: standard output)")
+    parser.add_argument("--baseline", help="earlier JSON results to compare the results with")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    """Runs the benchmark for all the given network sizes."""
+    arguments = get_arguments()
+    if arguments.single is not None:
+        print(json.dumps(run_single(json.loads(arguments.single))))
+        return
+
+    results = []
+    for bus_count in arguments.sizes:
+        parameters = {
+            "network": {
+                "bus_count": bus_count,
+                "depth": arguments.depth,
+                "branching": arguments.branching,
+                "resource_density": arguments.resource_density,
+                "phase_mix": arguments.phase_mix,
+                "generator_share": arguments.generator_share,
+                "reversed_branch_share": arguments.reversed_branch_share,
+                "seed": arguments.seed
+            },
+            "epochs": arguments.epochs,
+            "trace_memory": arguments.trace_memory,
+            "log_level": arguments.log_level,
+            "log_file": arguments.log_file
+        }
+        print("Running the Grid benchmark with {:d} buses".format(bus_count), file=sys.stderr)
+        result = run_in_subprocess(parameters, arguments.timeout)
+        result["summary"] = get_summary(result)
+        results.append(result)
+        if "error" in result:
+            print("Stopping after an error with {:d} buses: {:s}".format(bus_count, result["error"]), file=sys.stderr)
+            break
+
+    output = {
+        "benchmark": "grid",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {key: value for key, value in vars(arguments).items() if key not in ("single", "output")},
+        "results": results
+    }
+    output_json = json.dumps(output, indent=4)
+    if arguments.output is None:
+        print(output_json)
+    else:
+        with open(arguments.output, mode="w", encoding="UTF-8") as output_file:
+            output_file.write(output_json)
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline, mode="r", encoding="UTF-8") as baseline_file:
+            for line in compare_results(json.load(baseline_file), output):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Accuracy and speed of the linearized power flow compared to the backward-forward sweep of the Grid component.
+
+   For each network size, the Grid component is run for the same synthetic radial feeder and the same resource
+   states twice, first with the backward-forward sweep and then with the linearized power flow
+   (POWER_FLOW_SOLVER=linear). The sweep is used as the exact reference, so it is run with a tight precision:
+   with the default precision of the Grid component, the sweep of a lightly loaded feeder stops after the first
+   iteration, which gives the same result as the linearized power flow. The published voltages and currents are compared and the maximum errors are
+   reported: the voltage magnitude error relative to the exact voltage (i.e. approximately in per unit), the voltage
+   angle error in degrees and the branch current magnitude error relative to the largest exact branch current of
+   the epoch. The solve times of the two solvers and the time per snapshot of the linearized power flow for
+   a batch of random injection snapshots are also reported.
+
+   Usage: python benchmarks/linear_power_flow_accuracy.py [--sizes 10,30,100,300] [--epochs 3] [--output results.json]
+   Use --help to see all the parameters.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy
+
+from grid_benchmark import REPOSITORY_DIRECTORY, SIMULATION_MANAGER_ID, SIMULATION_START_TIME, get_git_commit
+
+DEFAULT_SIZES = [10, 30, 100, 300]
+DEFAULT_EPOCHS = 3
+DEFAULT_BATCH_SIZE = 1000
+
+SWEEP_STAGES = ["NodalCurrents", "BranchCurrents", "VoltageDrops", "VoltageUpdate", "ConvergenceCheck"]
+LINEAR_STAGES = ["LinearSolve"]
+
+
+async def run_solver(network: Any, solver: str, epochs: int) \
+        -> Tuple[Any, List[Dict[str, Any]], List[float], List[int]]:
+    """Runs the Grid component with the given solver and returns the component, the published network state
+       messages for each epoch, the solve time for each epoch and the number of iterations for each epoch."""
+    # pylint: disable=import-outside-toplevel
+    from tools.message.epoch import EpochMessage
+    from tools.message.generator import MessageGenerator
+    from tools.message.simulation_state import SimulationStateMessage
+    from Grid.component import Grid, BUS_DATA_TOPIC, COMPONENT_DATA_TOPIC, CUSTOMER_DATA_TOPIC
+
+    os.environ["POWER_FLOW_SOLVER"] = solver
+    grid = Grid()
+    published = []
+
+    async def send_message(topic_name: str, message_bytes: bytes) -> None:
+        if topic_name.startswith("NetworkState."):
+            published.append(json.loads(message_bytes))
+    grid._rabbitmq_client.send_message = send_message  # pylint: disable=protected-access
+
+    await grid.start()
+    manager_generator = MessageGenerator(network.simulation_id, SIMULATION_MANAGER_ID)
+    await grid.general_message_handler_base(
+        manager_generator.get_message(SimulationStateMessage, SimulationState="running"), "SimState")
+
+    epoch_messages = []
+    solve_times = []
+    iterations = []
+    stages = LINEAR_STAGES if solver == "linear" else SWEEP_STAGES
+    for epoch_number in range(1, epochs + 1):
+        epoch_start = SIMULATION_START_TIME + datetime.timedelta(hours=epoch_number - 1)
+        input_messages = [(
+            manager_generator.get_message(
+                EpochMessage,
+                EpochNumber=epoch_number,
+                TriggeringMessageIds=["{:s}-status".format(SIMULATION_MANAGER_ID)],
+                StartTime=epoch_start,
+                EndTime=epoch_start + datetime.timedelta(hours=1)),
+            "Epoch")]
+        if epoch_number == 1:
+            input_messages += [
+                (network.get_bus_message(epoch_number), BUS_DATA_TOPIC),
+                (network.get_component_message(epoch_number), COMPONENT_DATA_TOPIC),
+                (network.get_customer_message(epoch_number), CUSTOMER_DATA_TOPIC)
+            ]
+        input_messages += network.get_resource_state_messages(epoch_number)
+
+        published.clear()
+        for message_object, topic_name in input_messages:
+            await grid.general_message_handler_base(message_object, topic_name)
+        epoch_messages.append(list(published))
+        stage_times = grid._epoch_timer.latest_record["StageTimes"]  # pylint: disable=protected-access
+        solve_times.append(sum(stage_times.get(stage_name, 0.0) for stage_name in stages))
+        iterations.append(grid._power_flow_iterations)  # pylint: disable=protected-access
+
+    await grid.stop()
+    return grid, epoch_messages, solve_times, iterations
+
+
+def get_errors(exact_messages: List[Dict[str, Any]], linear_messages: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Returns the maximum errors of the linearized results compared to the exact results for one epoch."""
+    def get_key(message: Dict[str, Any]) -> Tuple[str, Any]:
+        return message.get("Bus", message.get("DeviceId")), message.get("Node", message.get("Phase"))
+
+    linear_by_key = {get_key(message): message for message in linear_messages}
+    max_current = max(
+        (message["MagnitudeSendingEnd"]["Value"] for message in exact_messages if "MagnitudeSendingEnd" in message),
+        default=0.0)
+    voltage_error = 0.0
+    angle_error = 0.0
+    current_error = 0.0
+    for exact_message in exact_messages:
+        linear_message = linear_by_key[get_key(exact_message)]
+        if "Magnitude" in exact_message:
+            exact_voltage = exact_message["Magnitude"]["Value"]
+            voltage_error = max(voltage_error,
+                abs(linear_message["Magnitude"]["Value"] - exact_voltage) / exact_voltage)
+            angle_difference = linear_message["Angle"]["Value"] - exact_message["Angle"]["Value"]
+            angle_error = max(angle_error, abs((angle_difference + 180.0) % 360.0 - 180.0))
+        elif max_current > 0:
+            current_error = max(current_error, abs(
+                linear_message["MagnitudeSendingEnd"]["Value"] - exact_message["MagnitudeSendingEnd"]["Value"]
+            ) / max_current)
+
+    return {
+        "max_voltage_error_pu": voltage_error,
+        "max_voltage_angle_error_deg": angle_error,
+        "max_current_error_relative": current_error
+    }
+
+
+def get_batch_time(grid: Any, batch_size: int, seed: int) -> float:
+    """Returns the time per snapshot of the linearized power flow for a batch of random injections."""
+    linear_power_flow = grid._get_linear_power_flow()  # pylint: disable=protected-access
+    random_generator = numpy.random.default_rng(seed)
+    injections = random_generator.uniform(-0.002, 0.001, size=(batch_size, 3, linear_power_flow.num_buses))
+    start_time = time.perf_counter()
+    linear_power_flow.solve(injections)
+    return (time.perf_counter() - start_time) / batch_size
+
+
+def run_size(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs the comparison for one network size."""
+    # pylint: disable=import-outside-toplevel
+    from benchmarks.synthetic_network import SyntheticNetwork, SyntheticNetworkConfig
+
+    network = SyntheticNetwork(SyntheticNetworkConfig(**parameters["network"]))
+    os.environ.update(network.get_environment())
+
+    os.environ.update({
+        "POWER_FLOW_PERCISION": str(parameters["precision"]),
+        "MAX_ITERATION": str(parameters["max_iteration"])
+    })
+    _, exact_messages, sweep_times, sweep_iterations = asyncio.run(
+        run_solver(network, "sweep", parameters["epochs"]))
+    grid, linear_messages, linear_times, _ = asyncio.run(run_solver(network, "linear", parameters["epochs"]))
+
+    epoch_errors = [
+        get_errors(exact_epoch_messages, linear_epoch_messages)
+        for exact_epoch_messages, linear_epoch_messages in zip(exact_messages, linear_messages)
+    ]
+    return {
+        "network": network.json(),
+        "epochs": epoch_errors,
+        "max_errors": {
+            error_name: max(errors[error_name] for errors in epoch_errors)
+            for error_name in epoch_errors[0]
+        },
+        "sweep_iterations": sweep_iterations,
+        "mean_sweep_time_s": sum(sweep_times) / len(sweep_times),
+        "mean_linear_time_s": sum(linear_times) / len(linear_times),
+        "linear_batch_time_per_snapshot_s": get_batch_time(
+            grid, parameters["batch_size"], parameters["network"]["seed"])
+    }
+
+
+def get_arguments() -> argparse.Namespace:
+    """Returns the command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Accuracy of the linearized power flow compared to the backward-forward sweep.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=DEFAULT_SIZES,
+                        help="comma separated list of bus counts (default: {:s})".format(
+                            ",".join(str(size) for size in DEFAULT_SIZES)))
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS, help="number of epochs for each size")
+    parser.add_argument("--depth", type=int, default=20, help="maximum depth of the radial network")
+    parser.add_argument("--branching", type=int, default=4, help="maximum number of child buses for each bus")
+    parser.add_argument("--resource-density", type=float, default=1.0,
+                        help="average number of resources per non-root bus")
+    parser.add_argument("--precision", type=float, default=1e-9,
+                        help="power flow precision of the reference sweep (POWER_FLOW_PERCISION)")
+    parser.add_argument("--max-iteration", type=int, default=100,
+                        help="maximum number of iterations of the reference sweep (MAX_ITERATION)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="number of snapshots in the batch timing of the linearized power flow")
+    parser.add_argument("--seed", type=int, default=1, help="seed for the random number generators")
+    parser.add_argument("--log-level", type=int, default=50, help="log level for the Grid component")
+    parser.add_argument("--output", help="file for the JSON results (default: standard output)")
+    return parser.parse_args()
+
+
+def main():
+    """Runs the comparison for all the given network sizes."""
+    arguments = get_arguments()
+    sys.path[:0] = [str(REPOSITORY_DIRECTORY), str(REPOSITORY_DIRECTORY / "simulation-tools")]
+    # The environment must be set before the Grid component is imported.
+    os.environ.update({
+        "SIMULATION_COMPONENT_NAME": "Grid",
+        "SIMULATION_MESSAGE_BUS": "local",
+        "SIMULATION_LOG_LEVEL": str(arguments.log_level),
+        "SIMULATION_LOG_FILE": os.devnull,
+        "POWER_FLOW_IN_THREAD": "false"
+    })
+
+    results = []
+    for bus_count in arguments.sizes:
+        print("Comparing the power flow solvers with {:d} buses".format(bus_count), file=sys.stderr)
+        results.append(run_size({
+            "network": {
+                "bus_count": bus_count,
+                "depth": arguments.depth,
+                "branching": arguments.branching,
+                "resource_density": arguments.resource_density,
+                "seed": arguments.seed
+            },
+            "epochs": arguments.epochs,
+            "precision": arguments.precision,
+            "max_iteration": arguments.max_iteration,
+            "batch_size": arguments.batch_size
+        }))
+
+    output = {
+        "benchmark": "linear_power_flow_accuracy",
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "git_commit": get_git_commit(),
+        "parameters": {key: value for key, value in vars(arguments).items() if key != "output"},
+        "results": results
+    }
+    output_json = json.dumps(output, indent=4)
+    if arguments.output is None:
+        print(output_json)
+    else:
+        with open(arguments.output, mode="w", encoding="UTF-8") as output_file:
+            output_file.write(output_json)
+
+    print("{:>8s} {:>12s} {:>10s} {:>12s} {:>12s} {:>12s} {:>14s}".format(
+        "buses", "V err (pu)", "ang (deg)", "I err (rel)", "sweep (s)", "linear (s)", "batch (s/snap)"),
+        file=sys.stderr)
+    for result in results:
+        print("{:>8d} {:>12.2e} {:>10.2e} {:>12.2e} {:>12.4f} {:>12.6f} {:>14.2e}".format(
+            result["network"]["bus_count"], result["max_errors"]["max_voltage_error_pu"],
+            result["max_errors"]["max_voltage_angle_error_deg"], result["max_errors"]["max_current_error_relative"],
+            result["mean_sweep_time_s"], result["mean_linear_time_s"], result["linear_batch_time_per_snapshot_s"]),
+            file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
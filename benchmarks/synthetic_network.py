@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# Copyright 2023 Tampere University.
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Generator for synthetic radial distribution feeders that can be used as input for the Grid component.
+
+   The network is generated as a random tree whose shape is limited by the maximum depth and the maximum
+   number of child buses for each bus. The network and customer data are given as NISBusMessage,
+   NISComponentMessage and CISCustomerMessage objects and the resource states for each epoch as
+   ResourceStateMessage objects, i.e. in the same form as the Grid component receives them from the message bus.
+"""
+
+import pathlib
+import random
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+REPOSITORY_DIRECTORY = pathlib.Path(__file__).resolve().parents[1]
+for python_path in (REPOSITORY_DIRECTORY, REPOSITORY_DIRECTORY / "simulation-tools"):
+    if str(python_path) not in sys.path:
+        sys.path.append(str(python_path))
+
+# pylint: disable=wrong-import-position
+from tools.message.generator import MessageGenerator  # noqa: E402
+from domain_messages.CIS.CISCustomerMessage import CISCustomerMessage  # noqa: E402
+from domain_messages.NIS.NISBusMessage import NISBusMessage  # noqa: E402
+from domain_messages.NIS.NISComponentMessage import NISComponentMessage  # noqa: E402
+from domain_messages.resource.resource_state import ResourceStateMessage  # noqa: E402
+
+DEFAULT_SIMULATION_ID = "2020-01-01T00:00:00.000Z"
+DEFAULT_SOURCE_PROCESS_ID = "SyntheticNetwork"
+DEFAULT_GRID_ID = "SyntheticGrid"
+
+LOAD_CATEGORY = "Load"
+GENERATOR_CATEGORY = "Generator"
+RESOURCE_CATEGORIES = [LOAD_CATEGORY, GENERATOR_CATEGORY]
+
+# The node values for the phase mix: phases 1, 2 and 3 and a three-phase connection (no Node attribute).
+PHASE_NODES = [1, 2, 3, None]
+
+
+class SyntheticNetworkConfig:
+    """The parameters for a synthetic radial feeder.
+       - bus_count:             the number of buses including the root bus
+       - depth:                 the maximum number of branches between the root bus and any other bus
+       - branching:             the maximum number of child buses for each bus
+       - resource_density:      the number of resources per each non-root bus on average
+       - phase_mix:             the relative shares of the resources connected to phase 1, 2, 3 and to all phases
+       - generator_share:       the share of the resources that are generators instead of loads
+       - reversed_branch_share: the share of branches whose sending end bus is the downstream bus
+       - medium_voltage_depth:  the buses up to this depth use the medium voltage base, others the low voltage base
+       - seed:                  the seed for the random number generator
+    """
+    def __init__(self, bus_count: int, depth: int = 20, branching: int = 4, resource_density: float = 1.0,
+                 phase_mix: Tuple[float, float, float, float] = (0.1, 0.1, 0.1, 0.7),
+                 generator_share: float = 0.2, reversed_branch_share: float = 0.0,
+                 medium_voltage_depth: int = 1, seed: int = 1):
+        if bus_count < 2:
+            raise ValueError("The network must have at least 2 buses, got {:d}".format(bus_count))
+        if depth < 1 or branching < 1:
+            raise ValueError("The depth and the branching must be positive, got {:d} and {:d}".format(
+                depth, branching))
+        if SyntheticNetworkConfig.get_capacity(depth, branching) < bus_count:
+            raise ValueError("A radial network with depth {:d} and branching {:d} cannot have {:d} buses".format(
+                depth, branching, bus_count))
+        if len(phase_mix) != len(PHASE_NODES) or min(phase_mix) < 0 or sum(phase_mix) <= 0:
+            raise ValueError("The phase mix must contain {:d} non-negative shares, got {:s}".format(
+                len(PHASE_NODES), str(phase_mix)))
+
+        self.bus_count = bus_count
+        self.depth = depth
+        self.branching = branching
+        self.resource_density = resource_density
+        self.phase_mix = tuple(phase_mix)
+        self.generator_share = generator_share
+        self.reversed_branch_share = reversed_branch_share
+        self.medium_voltage_depth = medium_voltage_depth
+        self.seed = seed
+
+    @staticmethod
+    def get_capacity(depth: int, branching: int) -> int:
+        """Returns the maximum number of buses in a radial network with the given depth and branching."""
+        if branching == 1:
+            return depth + 1
+        return (branching ** (depth + 1) - 1) // (branching - 1)
+
+    def json(self) -> Dict[str, Any]:
+        """Returns the configuration as a JSON object."""
+        return {
+            "bus_count": self.bus_count,
+            "depth": self.depth,
+            "branching": self.branching,
+            "resource_density": self.resource_density,
+            "phase_mix": list(self.phase_mix),
+            "generator_share": self.generator_share,
+            "reversed_branch_share": self.reversed_branch_share,
+            "medium_voltage_depth": self.medium_voltage_depth,
+            "seed": self.seed
+        }
+
+
+class SyntheticNetwork:
+    """A synthetic radial feeder with the input messages for the Grid component."""
+    MEDIUM_VOLTAGE_BASE = 20.0  # kV
+    LOW_VOLTAGE_BASE = 0.4  # kV
+    POWER_BASE = 10000.0  # kV.A
+    IMPEDANCE_RANGE = (0.001, 0.01)  # {pu}
+    SHUNT_ADMITTANCES = [0.0, 1e-6, 2e-5]  # {pu}
+    LOAD_POWER_RANGE = (0.0, 10.0)  # kW
+    GENERATOR_POWER_RANGE = (-20.0, 0.0)  # kW
+
+    def __init__(self, config: SyntheticNetworkConfig, simulation_id: str = DEFAULT_SIMULATION_ID,
+                 grid_id: str = DEFAULT_GRID_ID):
+        self.__config = config
+        self.__simulation_id = simulation_id
+        self.__grid_id = grid_id
+        self.__random = random.Random(config.seed)
+        self.__message_generator = MessageGenerator(simulation_id, DEFAULT_SOURCE_PROCESS_ID)
+
+        self.__bus_names: List[str] = []
+        self.__bus_depths: List[int] = []
+        self.__sending_end_buses: List[str] = []
+        self.__receiving_end_buses: List[str] = []
+        self.__create_topology()
+
+        self.__resource_ids: List[str] = []
+        self.__customer_ids: List[str] = []
+        self.__resource_buses: List[str] = []
+        self.__resource_nodes: List[Optional[int]] = []
+        self.__resource_categories: List[str] = []
+        self.__create_resources()
+
+    @property
+    def config(self) -> SyntheticNetworkConfig:
+        """The configuration for the network."""
+        return self.__config
+
+    @property
+    def simulation_id(self) -> str:
+        """The simulation id used in the messages."""
+        return self.__simulation_id
+
+    @property
+    def grid_id(self) -> str:
+        """The grid id for the Grid component."""
+        return self.__grid_id
+
+    @property
+    def bus_count(self) -> int:
+        """The number of buses in the network."""
+        return len(self.__bus_names)
+
+    @property
+    def branch_count(self) -> int:
+        """The number of branches in the network."""
+        return len(self.__sending_end_buses)
+
+    @property
+    def resource_count(self) -> int:
+        """The number of resources in the network."""
+        return len(self.__resource_ids)
+
+    @property
+    def max_depth(self) -> int:
+        """The actual maximum depth of the generated network."""
+        return max(self.__bus_depths)
+
+    def get_environment(self) -> Dict[str, str]:
+        """Returns the environmental variables that the Grid component needs for this network."""
+        return {
+            "SIMULATION_ID": self.__simulation_id,
+            "GRID_ID": self.__grid_id,
+            "NUM_OF_RESOURCES": str(self.resource_count),
+            "RESOURCE_CATEGORIES": ",".join(RESOURCE_CATEGORIES),
+            "APPARENT_POWER_BASE": str(int(SyntheticNetwork.POWER_BASE))
+        }
+
+    def get_bus_message(self, epoch_number: int = 1) -> NISBusMessage:
+        """Returns the NIS bus information message for the network."""
+        return self.__message_generator.get_message(
+            NISBusMessage,
+            EpochNumber=epoch_number,
+            TriggeringMessageIds=[self.__get_epoch_message_id(epoch_number)],
+            BusName=list(self.__bus_names),
+            BusType=["root"] + ["usage-point"] * (self.bus_count - 1),
+            BusVoltageBase={
+                "UnitOfMeasure": "kV",
+                "Values": [
+                    SyntheticNetwork.MEDIUM_VOLTAGE_BASE if bus_depth <= self.__config.medium_voltage_depth
+                    else SyntheticNetwork.LOW_VOLTAGE_BASE
+                    for bus_depth in self.__bus_depths
+                ]
+            })
+
+    def get_component_message(self, epoch_number: int = 1) -> NISComponentMessage:
+        """Returns the NIS component information message for the network."""
+        random_generator = random.Random(self.__config.seed + 1)
+        branch_count = self.branch_count
+        return self.__message_generator.get_message(
+            NISComponentMessage,
+            EpochNumber=epoch_number,
+            TriggeringMessageIds=[self.__get_epoch_message_id(epoch_number)],
+            Resistance=self.__get_pu_block(
+                [random_generator.uniform(*SyntheticNetwork.IMPEDANCE_RANGE) for _ in range(branch_count)]),
+            Reactance=self.__get_pu_block(
+                [random_generator.uniform(*SyntheticNetwork.IMPEDANCE_RANGE) for _ in range(branch_count)]),
+            ShuntAdmittance=self.__get_pu_block(
+                [random_generator.choice(SyntheticNetwork.SHUNT_ADMITTANCES) for _ in range(branch_count)]),
+            ShuntConductance=self.__get_pu_block([0.0] * branch_count),
+            RatedCurrent=self.__get_pu_block([1.0] * branch_count),
+            SendingEndBus=list(self.__sending_end_buses),
+            ReceivingEndBus=list(self.__receiving_end_buses),
+            DeviceId=["line{:d}".format(branch_index) for branch_index in range(branch_count)],
+            PowerBase={"UnitOfMeasure": "kV.A", "Value": SyntheticNetwork.POWER_BASE})
+
+    def get_customer_message(self, epoch_number: int = 1) -> CISCustomerMessage:
+        """Returns the CIS customer information message for the network."""
+        return self.__message_generator.get_message(
+            CISCustomerMessage,
+            EpochNumber=epoch_number,
+            TriggeringMessageIds=[self.__get_epoch_message_id(epoch_number)],
+            ResourceId=list(self.__resource_ids),
+            CustomerId=list(self.__customer_ids),
+            BusName=list(self.__resource_buses))
+
+    def get_resource_state_messages(self, epoch_number: int, shuffle: bool = True) \
+            -> List[Tuple[ResourceStateMessage, str]]:
+        """Returns a list of (resource state message, topic name) tuples for the given epoch.
+           The resource powers are random but the same for the same epoch number.
+           If shuffle is True, the messages are in random order like when received from the message bus."""
+        random_generator = random.Random(self.__config.seed * 1000003 + epoch_number)
+        triggering_message_ids = [self.__get_epoch_message_id(epoch_number)]
+        messages = []
+        for resource_id, customer_id, node, category in zip(
+                self.__resource_ids, self.__customer_ids, self.__resource_nodes, self.__resource_categories):
+            power_range = (
+                SyntheticNetwork.GENERATOR_POWER_RANGE if category == GENERATOR_CATEGORY
+                else SyntheticNetwork.LOAD_POWER_RANGE)
+            message_attributes = {
+                "EpochNumber": epoch_number,
+                "TriggeringMessageIds": triggering_message_ids,
+                "CustomerId": customer_id,
+                "RealPower": {"UnitOfMeasure": "kW", "Value": random_generator.uniform(*power_range)},
+                "ReactivePower": {"UnitOfMeasure": "kV.A{r}", "Value": 0.0}
+            }
+            if node is not None:
+                message_attributes["Node"] = node
+            messages.append((
+                self.__message_generator.get_message(ResourceStateMessage, **message_attributes),
+                "ResourceState.{:s}.{:s}".format(category, resource_id)))
+
+        if shuffle:
+            random_generator.shuffle(messages)
+        return messages
+
+    def json(self) -> Dict[str, Any]:
+        """Returns a summary of the generated network as a JSON object."""
+        return {
+            "config": self.__config.json(),
+            "bus_count": self.bus_count,
+            "branch_count": self.branch_count,
+            "resource_count": self.resource_count,
+            "max_depth": self.max_depth
+        }
+
+    def __create_topology(self):
+        """Creates the radial network by attaching each new bus to a random bus that can still have children."""
+        self.__bus_names = ["bus{:d}".format(bus_index) for bus_index in range(self.__config.bus_count)]
+        self.__bus_depths = [0]
+        child_counts = [0]
+        open_buses = [0]  # the buses that can still have new child buses
+
+        for bus_index in range(1, self.__config.bus_count):
+            open_index = self.__random.randrange(len(open_buses))
+            parent_index = open_buses[open_index]
+
+            self.__bus_depths.append(self.__bus_depths[parent_index] + 1)
+            child_counts.append(0)
+            child_counts[parent_index] += 1
+            if child_counts[parent_index] >= self.__config.branching:
+                # remove the full bus from the open buses by swapping it with the last one
+                open_buses[open_index] = open_buses[-1]
+                open_buses.pop()
+            if self.__bus_depths[bus_index] < self.__config.depth:
+                open_buses.append(bus_index)
+
+            if self.__random.random() < self.__config.reversed_branch_share:
+                self.__sending_end_buses.append(self.__bus_names[bus_index])
+                self.__receiving_end_buses.append(self.__bus_names[parent_index])
+            else:
+                self.__sending_end_buses.append(self.__bus_names[parent_index])
+                self.__receiving_end_buses.append(self.__bus_names[bus_index])
+
+    def __create_resources(self):
+        """Creates the resources and connects them to random non-root buses."""
+        resource_count = max(1, round(self.__config.resource_density * (self.__config.bus_count - 1)))
+        for resource_index in range(resource_count):
+            self.__resource_ids.append("resource{:d}".format(resource_index))
+            self.__customer_ids.append("customer{:d}".format(resource_index))
+            self.__resource_buses.append(self.__bus_names[self.__random.randrange(1, self.__config.bus_count)])
+            self.__resource_nodes.append(self.__random.choices(PHASE_NODES, weights=self.__config.phase_mix)[0])
+            self.__resource_categories.append(
+                GENERATOR_CATEGORY if self.__random.random() < self.__config.generator_share else LOAD_CATEGORY)
+
+    def __get_epoch_message_id(self, epoch_number: int) -> str:
+        return "SimulationManager-{:d}".format(epoch_number)
+
+    @staticmethod
+    def __get_pu_block(values: List[float]) -> Dict[str, Any]:
+        return {"UnitOfMeasure": "{pu}", "Values": values}
@@ -10,4 +10,30 @@
 #            Tanjim <tanjim0023@gmail.com>
 #            Ville Heikkilä <ville.heikkila@tuni.fi>
 #            Ville Mörsky (TAU) <ville.morsky@tuni.fi>
-#import init_tools
\ No newline at end of file
+#import init_tools
+
+"""The domain specific message types are registered to the message factory lazily so that
+   the message modules are only imported when a component uses or receives the message type."""
+
+from tools.message.factory import MessageFactory
+
+DOMAIN_MESSAGE_TYPES = {
+    "ResourceState": ("domain_messages.resource.resource_state", "ResourceStateMessage"),
+    "ResourceForecastState.Power": (
+        "domain_messages.resource_forecast.resource_forecast_state", "ResourceForecastPowerMessage"),
+    "ResourceForecastState.Dispatch": ("domain_messages.dispatch.dispatch", "ResourceForecastStateDispatchMessage"),
+    "ControlState.PowerSetpoint": (
+        "domain_messages.ControlState.ControlState_Power_Setpoint", "ControlStatePowerSetpointMessage"),
+    "PriceForecastState": ("domain_messages.price_forecaster.price_forecast", "PriceForecastStateMessage"),
+    "Init.NIS.NetworkBusInfo": ("domain_messages.NIS.NISBusMessage", "NISBusMessage"),
+    "Init.NIS.NetworkComponentInfo": ("domain_messages.NIS.NISComponentMessage", "NISComponentMessage"),
+    "Init.CIS.CustomerInfo": ("domain_messages.CIS.CISCustomerMessage", "CISCustomerMessage"),
+    "Offer": ("domain_messages.Offer.offer", "OfferMessage"),
+    "Request": ("domain_messages.Request.request", "RequestMessage"),
+    "LFMMarketResult": ("domain_messages.LFMMarketResult.lfmmarketresult", "LFMMarketResultMessage"),
+}
+
+for _message_type, (_module_name, _class_name) in DOMAIN_MESSAGE_TYPES.items():
+    if _message_type not in MessageFactory.get_message_types():
+        MessageFactory.register_lazy_message_type(_message_type, _module_name, _class_name)
+
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Benchmark for the import time of the simulation-tools modules.
+
+   Each import is timed in a fresh Python interpreter. The lazy imports are compared to the eager imports
+   of all the message modules and the MongoDB libraries that the modules used to load at import time.
+   The results are printed in JSON format.
+
+   Usage: python benchmarks/import_time.py [--repeats N] [--domain-messages PATH]
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+SIMULATION_TOOLS_DIRECTORY = pathlib.Path(__file__).resolve().parents[1]
+
+MESSAGE_MODULES = [
+    "tools.message.abstract",
+    "tools.message.block",
+    "tools.message.epoch",
+    "tools.message.factory",
+    "tools.message.general",
+    "tools.message.generator",
+    "tools.message.simulation_state",
+    "tools.message.status",
+    "tools.message.utils",
+]
+DOMAIN_MESSAGE_MODULES = [
+    "domain_messages.resource.resource_state",
+    "domain_messages.resource_forecast.resource_forecast_state",
+    "domain_messages.dispatch.dispatch",
+    "domain_messages.ControlState.ControlState_Power_Setpoint",
+    "domain_messages.price_forecaster.price_forecast",
+    "domain_messages.NIS.NISBusMessage",
+    "domain_messages.NIS.NISComponentMessage",
+    "domain_messages.CIS.CISCustomerMessage",
+    "domain_messages.Offer.offer",
+    "domain_messages.Request.request",
+    "domain_messages.LFMMarketResult.lfmmarketresult",
+]
+MONGODB_MODULES = ["motor.motor_asyncio", "pymongo"]
+
+# benchmark name -> (lazy import statements, eager import statements)
+BENCHMARKS = {
+    "tools.messages": (["tools.messages"], MESSAGE_MODULES),
+    "tools.components": (["tools.components"], ["tools.components"] + MESSAGE_MODULES),
+    "tools.db_clients": (["tools.db_clients"], ["tools.db_clients"] + MONGODB_MODULES),
+}
+DOMAIN_MESSAGE_BENCHMARKS = {
+    "domain_messages": (["domain_messages"], ["domain_messages"] + DOMAIN_MESSAGE_MODULES),
+}
+
+TIMING_CODE = """
+import importlib, sys, time
+start_time = time.perf_counter()
+for module_name in sys.argv[1:]:
+    importlib.import_module(module_name)
+print(time.perf_counter() - start_time)
+"""
+
+
+def time_imports(module_names: List[str], python_path: List[str]) -> Optional[float]:
+    """Returns the time in seconds that importing the given modules takes in a fresh interpreter.
+       Returns None if any of the modules could not be imported."""
+    result = subprocess.run(
+        [sys.executable, "-c", TIMING_CODE] + module_names,
+        cwd=str(SIMULATION_TOOLS_DIRECTORY),
+        env={"PYTHONPATH": ":".join(python_path), "SIMULATION_LOG_LEVEL": "50", "SIMULATION_LOG_FILE": "/dev/null"},
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True, check=False)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def run_benchmark(lazy_modules: List[str], eager_modules: List[str], python_path: List[str],
+                  repeats: int) -> Dict[str, Optional[float]]:
+    """Returns the median import times in milliseconds for the lazy and the eager imports and the saving."""
+    lazy_times = [time_imports(lazy_modules, python_path) for _ in range(repeats)]
+    eager_times = [time_imports(eager_modules, python_path) for _ in range(repeats)]
+
+    lazy_time = None if None in lazy_times else statistics.median(lazy_times) * 1000.0
+    eager_time = None if None in eager_times else statistics.median(eager_times) * 1000.0
+    return {
+        "lazy_ms": lazy_time,
+        "eager_ms": eager_time,
+        "saving_ms": None if lazy_time is None or eager_time is None else eager_time - lazy_time,
+    }
+
+
+def main():
+    """Runs the import time benchmarks and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5, help="the number of fresh interpreters per import")
+    parser.add_argument("--domain-messages", type=str, default=None,
+                        help="the directory containing the domain_messages package")
+    arguments = parser.parse_args()
+
+    python_path = [str(SIMULATION_TOOLS_DIRECTORY)]
+    benchmarks = dict(BENCHMARKS)
+    if arguments.domain_messages is not None:
+        python_path.append(arguments.domain_messages)
+        benchmarks.update(DOMAIN_MESSAGE_BENCHMARKS)
+
+    results = {
+        benchmark_name: run_benchmark(lazy_modules, eager_modules, python_path, arguments.repeats)
+        for benchmark_name, (lazy_modules, eager_modules) in benchmarks.items()
+    }
+    print(json.dumps({"python": sys.version.split()[0], "repeats": arguments.repeats, "results": results}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
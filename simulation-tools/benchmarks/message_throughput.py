@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Micro-benchmark for the message classes: construction, serialization and parsing.
+
+   For each message class and payload size, the following operations are timed:
+   - "construct": creating the message object with MessageGenerator.get_message (includes the validation)
+   - "json": converting the message object to a dictionary with json()
+   - "bytes": converting the message object to bytes with bytes()
+   - "factory": creating the message object from a dictionary with MessageFactory.get_message
+   - "callback": decoding the message bytes to a message object with MessageCallback, like a received message
+
+   The small and large payloads differ in the length of the array attributes, e.g. the number of buses in the NIS
+   messages or the length of the time series in the Offer messages. For the messages with a fixed structure,
+   like the Epoch and Status messages, the length of the TriggeringMessageIds list is varied instead.
+   The domain message classes are only included if the directory containing the domain_messages package is given.
+   The NetworkState messages from the Grid component are included if the directory also contains the Grid package.
+   The results are printed in JSON format.
+
+   Usage: python benchmarks/message_throughput.py [--small N] [--large N] [--min-time SECONDS] [--repeats N]
+                                                  [--domain-messages PATH] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import datetime
+import importlib
+import json
+import os
+import pathlib
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+SIMULATION_TOOLS_DIRECTORY = pathlib.Path(__file__).resolve().parents[1]
+
+SIMULATION_ID = "2020-01-01T00:00:00.000Z"
+SOURCE_PROCESS_ID = "benchmark"
+START_TIME = datetime.datetime(2020, 6, 3, 4, tzinfo=datetime.timezone.utc)
+
+OPERATIONS = ["construct", "json", "bytes", "factory", "callback"]
+
+
+def get_triggering_ids(size: int) -> List[str]:
+    """Returns a list of triggering message ids of the given length."""
+    return ["component{:d}-1".format(index) for index in range(size)]
+
+
+def get_time_index(size: int) -> List[str]:
+    """Returns a time index with the given number of 15 minute intervals."""
+    return [
+        (START_TIME + datetime.timedelta(minutes=15 * index)).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        for index in range(size)
+    ]
+
+
+def get_epoch_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for an Epoch message."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(size),
+        "StartTime": "2020-06-03T04:00:00.000Z",
+        "EndTime": "2020-06-03T05:00:00.000Z"
+    }
+
+
+def get_status_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a Status message."""
+    return {"EpochNumber": 1, "TriggeringMessageIds": get_triggering_ids(size), "Value": "ready"}
+
+
+def get_resource_state_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a ResourceState message."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(size),
+        "CustomerId": "customer1",
+        "RealPower": {"Value": 12.5, "UnitOfMeasure": "kW"},
+        "ReactivePower": {"Value": 1.5, "UnitOfMeasure": "kV.A{r}"},
+        "Node": 2
+    }
+
+
+def get_voltage_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a NetworkState voltage message."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(size),
+        "Magnitude": {"Value": 0.401, "UnitOfMeasure": "kV"},
+        "Angle": {"Value": -1.2, "UnitOfMeasure": "deg"},
+        "Bus": "bus1",
+        "Node": 1
+    }
+
+
+def get_current_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a NetworkState current message."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(size),
+        "MagnitudeSendingEnd": {"Value": 105.0, "UnitOfMeasure": "A"},
+        "MagnitudeReceivingEnd": {"Value": 104.0, "UnitOfMeasure": "A"},
+        "AngleSendingEnd": {"Value": -10.0, "UnitOfMeasure": "deg"},
+        "AngleReceivingEnd": {"Value": -11.0, "UnitOfMeasure": "deg"},
+        "DeviceId": "line1",
+        "Phase": 1
+    }
+
+
+def get_nis_bus_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a NIS bus message with the given number of buses."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(1),
+        "BusName": ["bus{:d}".format(index) for index in range(size)],
+        "BusType": ["root"] + ["usage-point"] * (size - 1),
+        "BusVoltageBase": {"UnitOfMeasure": "kV", "Values": [20.0] + [0.4] * (size - 1)}
+    }
+
+
+def get_nis_component_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a NIS component message with the given number of branches."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(1),
+        "Resistance": {"UnitOfMeasure": "{pu}", "Values": [0.01] * size},
+        "Reactance": {"UnitOfMeasure": "{pu}", "Values": [0.005] * size},
+        "ShuntAdmittance": {"UnitOfMeasure": "{pu}", "Values": [0.0] * size},
+        "ShuntConductance": {"UnitOfMeasure": "{pu}", "Values": [0.0] * size},
+        "RatedCurrent": {"UnitOfMeasure": "{pu}", "Values": [1.0] * size},
+        "SendingEndBus": ["bus{:d}".format(index) for index in range(size)],
+        "ReceivingEndBus": ["bus{:d}".format(index + 1) for index in range(size)],
+        "DeviceId": ["line{:d}".format(index) for index in range(size)],
+        "PowerBase": {"UnitOfMeasure": "kV.A", "Value": 10000.0}
+    }
+
+
+def get_cis_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a CIS customer message with the given number of resources."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(1),
+        "ResourceId": ["resource{:d}".format(index) for index in range(size)],
+        "CustomerId": ["customer{:d}".format(index) for index in range(size)],
+        "BusName": ["bus{:d}".format(index % 100 + 1) for index in range(size)]
+    }
+
+
+def get_offer_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes common to the Offer and LFMMarketResult messages with a time series of given length."""
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(1),
+        "ActivationTime": "2020-06-03T04:00:00.000Z",
+        "Duration": {"Value": 15 * size, "UnitOfMeasure": "Minute"},
+        "Direction": "upregulation",
+        "RealPower": {
+            "TimeIndex": get_time_index(size),
+            "Series": {"Regulation": {"UnitOfMeasure": "kW", "Values": [100.0 + index for index in range(size)]}}
+        },
+        "Price": {"Value": 50.0, "UnitOfMeasure": "EUR"},
+        "CongestionId": "congestion1",
+        "OfferId": "offer1",
+        "CustomerIds": ["customer{:d}".format(index) for index in range(size)]
+    }
+
+
+def get_market_result_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a LFMMarketResult message."""
+    attributes = get_offer_attributes(size)
+    attributes["ResultCount"] = 1
+    return attributes
+
+
+def get_offer_message_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for an Offer message."""
+    attributes = get_offer_attributes(size)
+    attributes["OfferCount"] = 1
+    return attributes
+
+
+def get_dispatch_attributes(size: int) -> Dict[str, Any]:
+    """Returns the attributes for a Dispatch message with the given number of resources."""
+    time_index = get_time_index(4)
+    return {
+        "EpochNumber": 1,
+        "TriggeringMessageIds": get_triggering_ids(1),
+        "Dispatch": {
+            "resource{:d}".format(index): {
+                "TimeIndex": time_index,
+                "Series": {"RealPower": {"UnitOfMeasure": "kW", "Values": [0.0, 0.2, 0.27, 0.1]}}
+            }
+            for index in range(size)
+        }
+    }
+
+
+# benchmark name -> (module name, class name, function returning the message attributes for the given size)
+MESSAGE_CASES: Dict[str, Tuple[str, str, Callable[[int], Dict[str, Any]]]] = {
+    "Epoch": ("tools.message.epoch", "EpochMessage", get_epoch_attributes),
+    "Status": ("tools.message.status", "StatusMessage", get_status_attributes),
+    "ResourceState": ("domain_messages.resource.resource_state", "ResourceStateMessage",
+                      get_resource_state_attributes),
+    "NetworkState.Voltage": ("Grid.network_state_message_voltage", "NetworkStateMessageVoltage",
+                             get_voltage_attributes),
+    "NetworkState.Current": ("Grid.network_state_message_current", "NetworkStateMessageCurrent",
+                             get_current_attributes),
+    "NIS.Bus": ("domain_messages.NIS.NISBusMessage", "NISBusMessage", get_nis_bus_attributes),
+    "NIS.Component": ("domain_messages.NIS.NISComponentMessage", "NISComponentMessage",
+                      get_nis_component_attributes),
+    "CIS.Customer": ("domain_messages.CIS.CISCustomerMessage", "CISCustomerMessage", get_cis_attributes),
+    "Offer": ("domain_messages.Offer.offer", "OfferMessage", get_offer_message_attributes),
+    "LFMMarketResult": ("domain_messages.LFMMarketResult.lfmmarketresult", "LFMMarketResultMessage",
+                        get_market_result_attributes),
+    "Dispatch": ("domain_messages.dispatch.dispatch", "ResourceForecastStateDispatchMessage",
+                 get_dispatch_attributes),
+}
+
+
+def measure(run_function: Callable[[int], float], min_time: float, repeats: int) -> Dict[str, float]:
+    """Returns the median time per operation in microseconds and the corresponding operations per second.
+       The run_function is called with the number of operations and it should return the elapsed time in seconds.
+       The number of operations is increased until a single round takes at least min_time seconds."""
+    count = 1
+    while True:
+        elapsed_time = run_function(count)
+        if elapsed_time >= min_time:
+            break
+        count = count * 10 if elapsed_time < min_time / 10 else count * 2
+
+    round_times = [elapsed_time] + [run_function(count) for _ in range(repeats - 1)]
+    time_per_operation = statistics.median(round_times) / count
+    return {
+        "us_per_op": time_per_operation * 1e6,
+        "ops_per_s": 1.0 / time_per_operation if time_per_operation > 0.0 else float("inf"),
+        "operations": count
+    }
+
+
+def measure_operation(run_function: Callable[[int], float], min_time: float, repeats: int) -> Dict[str, Any]:
+    """Returns the timing results for the operation or the error message if the operation failed."""
+    # pylint: disable=import-outside-toplevel
+    from tools.exceptions.messages import MessageError
+
+    try:
+        return measure(run_function, min_time, repeats)
+    except (MessageError, TypeError, ValueError) as operation_error:
+        return {"error": "{:s}: {:s}".format(type(operation_error).__name__, str(operation_error))}
+
+
+def get_timed_loop(function: Callable[[], Any]) -> Callable[[int], float]:
+    """Returns a function that calls the given function the given number of times and returns the elapsed time."""
+    def run_function(count: int) -> float:
+        start_time = time.perf_counter()
+        for _ in range(count):
+            function()
+        return time.perf_counter() - start_time
+    return run_function
+
+
+def benchmark_message(message_class: Any, attributes: Dict[str, Any], topic_name: str,
+                      min_time: float, repeats: int) -> Dict[str, Any]:
+    """Returns the timing results for all the operations for the given message class and attributes."""
+    # pylint: disable=import-outside-toplevel
+    from tools.callbacks import MessageCallback
+    from tools.local_bus import LocalMessage
+    from tools.message.factory import MessageFactory
+    from tools.message.generator import MessageGenerator
+
+    generator = MessageGenerator(SIMULATION_ID, SOURCE_PROCESS_ID)
+    message_object = generator.get_message(message_class, **attributes)
+    message_json = message_object.json()
+    message_bytes = message_object.bytes()
+
+    decoded_messages = []
+
+    async def store_message(decoded_message: Any, _: str) -> None:
+        decoded_messages.append(decoded_message)
+
+    callback = MessageCallback(store_message)
+    received_message = LocalMessage(message_bytes, topic_name)
+    event_loop = asyncio.new_event_loop()
+
+    async def decode_messages(count: int) -> float:
+        start_time = time.perf_counter()
+        for _ in range(count):
+            await callback.process(received_message)
+        return time.perf_counter() - start_time
+
+    def run_callback(count: int) -> float:
+        decoded_messages.clear()
+        return event_loop.run_until_complete(decode_messages(count))
+
+    try:
+        results = {
+            "construct": measure_operation(
+                get_timed_loop(lambda: generator.get_message(message_class, **attributes)), min_time, repeats),
+            "json": measure_operation(get_timed_loop(message_object.json), min_time, repeats),
+            "bytes": measure_operation(get_timed_loop(message_object.bytes), min_time, repeats),
+            "factory": measure_operation(
+                get_timed_loop(lambda: MessageFactory.get_message(**message_json)), min_time, repeats),
+            "callback": measure_operation(run_callback, min_time, repeats),
+        }
+    finally:
+        event_loop.close()
+
+    # The factory and the callback can only return one class for each message type. If several classes share
+    # the message type, the callback returns the message as a dictionary for the classes not in the factory.
+    results["bytes_size"] = len(message_bytes)
+    results["decoded_class"] = type(decoded_messages[-1]).__name__ if decoded_messages else None
+    return results
+
+
+def run_benchmarks(small_size: int, large_size: int, min_time: float, repeats: int) -> Dict[str, Any]:
+    """Runs the benchmarks for all the available message classes and returns the results."""
+    results = {}
+    for case_name, (module_name, class_name, attribute_function) in MESSAGE_CASES.items():
+        try:
+            message_class = getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError) as import_error:
+            results[case_name] = {"skipped": str(import_error)}
+            continue
+
+        results[case_name] = {
+            size_name: {
+                "size": size,
+                **benchmark_message(message_class, attribute_function(size), case_name, min_time, repeats)
+            }
+            for size_name, size in (("small", small_size), ("large", large_size))
+        }
+    return results
+
+
+def main():
+    """Runs the message benchmarks and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--small", type=int, default=4, help="the length of the array attributes in small payloads")
+    parser.add_argument("--large", type=int, default=1000, help="the length of the array attributes in large payloads")
+    parser.add_argument("--min-time", type=float, default=0.2, help="the minimum time in seconds for each round")
+    parser.add_argument("--repeats", type=int, default=3, help="the number of timed rounds for each operation")
+    parser.add_argument("--domain-messages", type=str, default=None,
+                        help="the directory containing the domain_messages package")
+    parser.add_argument("--output", type=str, default=None, help="the output file (default: standard output)")
+    arguments = parser.parse_args()
+
+    os.environ.setdefault("SIMULATION_LOG_LEVEL", "50")
+    os.environ.setdefault("SIMULATION_LOG_FILE", os.devnull)
+    sys.path.insert(0, str(SIMULATION_TOOLS_DIRECTORY))
+    if arguments.domain_messages is not None:
+        sys.path.append(arguments.domain_messages)
+
+    output = json.dumps(
+        {
+            "python": sys.version.split()[0],
+            "small": arguments.small,
+            "large": arguments.large,
+            "min_time": arguments.min_time,
+            "repeats": arguments.repeats,
+            "operations": OPERATIONS,
+            "results": run_benchmarks(arguments.small, arguments.large, arguments.min_time, arguments.repeats)
+        },
+        indent=4)
+
+    if arguments.output is None:
+        print(output)
+    else:
+        with open(arguments.output, mode="w", encoding="UTF-8") as output_file:
+            output_file.write(output)
+
+
+if __name__ == "__main__":
+    main()
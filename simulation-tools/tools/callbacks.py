@@ -9,14 +9,20 @@
 import asyncio
 import inspect
 import json
-from typing import Awaitable, Callable, Union
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 import aio_pika.message
 
 from tools.exceptions.messages import MessageError
-from tools.messages import (
-    AbstractMessage, AbstractResultMessage, BaseMessage, EpochMessage, GeneralMessage,
-    SimulationStateMessage, StatusMessage, MessageFactory)
+from tools.message.abstract import AbstractMessage, AbstractResultMessage, BaseMessage
+from tools.message.batch import BatchMessage
+from tools.message.epoch import EpochMessage
+from tools.message.factory import MessageFactory
+from tools.message.general import GeneralMessage
+from tools.message.simulation_state import SimulationStateMessage
+from tools.message.status import StatusMessage
+from tools.topics import TopicTrie
 from tools.tools import FullLogger
 
 CallbackFunctionType = Callable[[Union[BaseMessage, dict, str], str], Awaitable[None]]
@@ -32,7 +38,8 @@ class MessageCallback():
     MESSAGE_TYPE_ATTRIBUTE = next(iter(BaseMessage.MESSAGE_ATTRIBUTES))  # should be "Type"
     DEFAULT_MESSAGE_TYPE = GeneralMessage.CLASS_MESSAGE_TYPE
 
-    def __init__(self, callback_function: CallbackFunctionType, message_type: Union[str, None] = None):
+    def __init__(self, callback_function: CallbackFunctionType, message_type: Union[str, None] = None,
+                 topic_names: Optional[List[str]] = None):
         """Sets up a callback that receives incoming messages from the message bus, transforms the received object
            to an instance of BaseMessage and sends the transformed object to the given callback_function.
 
@@ -47,6 +54,12 @@ class MessageCallback():
            If message_type is None, the actual type for the transformed message is determined by the "Type" attribute.
            Otherwise, the given message type is used for as transformed message type.
            The legal string for the parameter message_type are defined in tools.messages.MESSAGE_TYPES
+
+           Received batch messages (BatchMessage) are unpacked and the callback_function is called separately
+           for each contained message with the topic given in the batch. If topic_names contains other than batch
+           topics (see BatchMessage.get_topic_name), only the contained messages whose topic matches one of those
+           topic patterns are handled. This ensures that a listener does not receive messages it is not listening to
+           when a batch contains messages for several topics.
         """
         self.__lock = asyncio.Lock()
         self.__callback_function = callback_function
@@ -56,6 +69,17 @@ class MessageCallback():
         else:
             self.__message_type = message_type
 
+        message_topic_names = [
+            topic_name for topic_name in topic_names or []
+            if not BatchMessage.is_batch_topic(topic_name)
+        ]
+        if message_topic_names:
+            self.__topic_trie = TopicTrie()
+            for topic_name in message_topic_names:
+                self.__topic_trie.add(topic_name, topic_name)
+        else:
+            self.__topic_trie = None
+
         self.__last_message = None
         self.__last_topic = None
 
@@ -70,39 +94,41 @@ class MessageCallback():
         return self.__last_topic
 
     def log_last_message(self) -> None:
-        """Writes a log message based on the last received message."""
+        """Writes a log message based on the last received message.
+           The log messages use lazy arguments, so they are only formatted if the INFO level is enabled."""
         if isinstance(self.last_message, SimulationStateMessage):
-            LOGGER.info("Received simulation state message '{:s}' from '{:s}'".format(
-                self.last_message.simulation_state, self.last_message.source_process_id))
+            LOGGER.info("Received simulation state message '%s' from '%s'",
+                        self.last_message.simulation_state, self.last_message.source_process_id)
         elif isinstance(self.last_message, EpochMessage):
-            LOGGER.info("Epoch message received from '{:s}' for epoch number {:d} ({:s} - {:s})".format(
-                self.last_message.source_process_id,
-                self.last_message.epoch_number,
-                self.last_message.start_time,
-                self.last_message.end_time))
+            LOGGER.info("Epoch message received from '%s' for epoch number %d (%s - %s)",
+                        self.last_message.source_process_id,
+                        self.last_message.epoch_number,
+                        self.last_message.start_time,
+                        self.last_message.end_time)
         elif isinstance(self.last_message, StatusMessage):
-            LOGGER.info("Status message received from '{:s}' for epoch number {:d} with value: {:s}".format(
-                self.last_message.source_process_id,
-                self.last_message.epoch_number,
-                self.last_message.value))
+            LOGGER.info("Status message received from '%s' for epoch number %d with value: %s",
+                        self.last_message.source_process_id,
+                        self.last_message.epoch_number,
+                        self.last_message.value)
         elif isinstance(self.last_message, AbstractResultMessage):
-            LOGGER.info("Received '{:s}' message from '{:s}' for epoch {:d}".format(
-                self.last_message.message_type,
-                self.last_message.source_process_id,
-                self.last_message.epoch_number))
+            LOGGER.info("Received '%s' message from '%s' for epoch %d",
+                        self.last_message.message_type,
+                        self.last_message.source_process_id,
+                        self.last_message.epoch_number)
         elif isinstance(self.last_message, AbstractMessage):
-            LOGGER.info("Received '{:s}' message from '{:s}' on topic '{:s}'".format(
-                self.last_message.message_type,
-                self.last_message.source_process_id,
-                self.last_topic))
+            LOGGER.info("Received '%s' message from '%s' on topic '%s'",
+                        self.last_message.message_type,
+                        self.last_message.source_process_id,
+                        self.last_topic)
         elif isinstance(self.last_message, BaseMessage):
-            LOGGER.info("Received message from topic '{:s}'".format(self.last_topic))
+            LOGGER.info("Received message from topic '%s'", self.last_topic)
         elif isinstance(self.last_message, dict):
-            LOGGER.info("Received a JSON message with errors: '{:s}'".format(json.dumps(self.last_message)))
+            if LOGGER.is_enabled_for(logging.INFO):
+                LOGGER.info("Received a JSON message with errors: '%s'", json.dumps(self.last_message))
         elif self.last_message is None:
             LOGGER.warning("No last message found.")
         else:
-            LOGGER.warning("The last message in unknown format: '{:s}'".format(str(self.last_message)))
+            LOGGER.warning("The last message in unknown format: '%s'", str(self.last_message))
 
     async def callback(self, message: aio_pika.message.IncomingMessage) -> None:
         """Callback function for the received messages from the message bus.
@@ -110,44 +136,92 @@ class MessageCallback():
         """
         # Use a lock to be able to handle each incoming message one at a time.
         async with self.__lock:
-            message_str = ""
-            message_json = {}
-            try:
-                message_str = message.body.decode(MessageCallback.MESSAGE_CODING)
-                message_json = json.loads(message_str)
-
-                if self.__message_type is None:
-                    # Convert the message to the specified special cases if possible.
-                    expected_message_type = message_json.get(
-                        self.__class__.MESSAGE_TYPE_ATTRIBUTE,
-                        self.__class__.DEFAULT_MESSAGE_TYPE)
-                    if expected_message_type not in MessageFactory.get_message_types():
-                        expected_message_type = self.__class__.DEFAULT_MESSAGE_TYPE
-                else:
-                    expected_message_type = self.__message_type
-
-                message_object = MessageFactory.get_message(
-                    message_type=expected_message_type,
-                    **message_json,
-                )
-
-            except json.decoder.JSONDecodeError:
-                LOGGER.warning("Received message could not be decoded into JSON format.")
-                message_object = message_str
-            except (TypeError, ValueError, MessageError) as message_error:
-                # The message did not conform to the simulation platform message schema or
-                # the message type was not supported by the message factory.
-                LOGGER.warning("Received {:s} error when creating message object: {:s}".format(
-                    type(message_error).__name__, str(message_error)
-                ))
-                message_object = message_json
-
-            self.__last_message = message_object
-            self.__last_topic = message.routing_key
-            self.log_last_message()
+            message_objects = self.__to_message_objects(message)
 
             if inspect.iscoroutinefunction(self.__callback_function):
-                asyncio.create_task(self.__callback_function(message_object, message.routing_key))
+                for message_object, topic_name in message_objects:
+                    asyncio.create_task(self.__callback_function(message_object, topic_name))
             else:
                 LOGGER.error("Callback function '{:s}' is not awaitable.".format(
                     str(getattr(self.__callback_function, "__name__", None))))
+
+    async def process(self, message: aio_pika.message.IncomingMessage) -> None:
+        """Transforms the received message to an instance of AbstractMessage and awaits the callback_function.
+           Unlike the callback method, this method returns only after the callback_function has been completed.
+           This is intended for the bounded message processing where each worker handles one message at a time.
+        """
+        async with self.__lock:
+            message_objects = self.__to_message_objects(message)
+
+        if inspect.iscoroutinefunction(self.__callback_function):
+            for message_object, topic_name in message_objects:
+                await self.__callback_function(message_object, topic_name)
+        else:
+            LOGGER.error("Callback function '{:s}' is not awaitable.".format(
+                str(getattr(self.__callback_function, "__name__", None))))
+
+    def __to_message_objects(self, message: aio_pika.message.IncomingMessage) \
+            -> List[Tuple[Union[BaseMessage, dict, str], str]]:
+        """Transforms the received message to a list of (message object, topic name) tuples.
+           A batch message is unpacked to the contained messages, any other message results in a single item list.
+           Each message object is in turn stored as the last received message."""
+        message_str = ""
+        try:
+            message_str = message.body.decode(MessageCallback.MESSAGE_CODING)
+            message_json = json.loads(message_str)
+
+        except json.decoder.JSONDecodeError:
+            LOGGER.warning("Received message could not be decoded into JSON format.")
+            return [self.__store_last_message(message_str, message.routing_key)]
+
+        if (isinstance(message_json, dict) and
+                message_json.get(self.__class__.MESSAGE_TYPE_ATTRIBUTE, None) == BatchMessage.CLASS_MESSAGE_TYPE):
+            try:
+                batch_message = BatchMessage(**message_json)
+                return [
+                    self.__store_last_message(self.__to_message_object(inner_message_json), inner_topic_name)
+                    for inner_topic_name, inner_message_json in batch_message.get_messages()
+                    if self.__topic_trie is None or self.__topic_trie.matches(inner_topic_name)
+                ]
+            except (TypeError, ValueError, MessageError) as message_error:
+                LOGGER.warning("Received {:s} error when unpacking a batch message: {:s}".format(
+                    type(message_error).__name__, str(message_error)
+                ))
+                return [self.__store_last_message(message_json, message.routing_key)]
+
+        return [self.__store_last_message(self.__to_message_object(message_json), message.routing_key)]
+
+    def __to_message_object(self, message_json: Any) -> Union[BaseMessage, dict]:
+        """Transforms the received message in JSON format to a message object."""
+        try:
+            if self.__message_type is None:
+                # Convert the message to the specified special cases if possible.
+                expected_message_type = message_json.get(
+                    self.__class__.MESSAGE_TYPE_ATTRIBUTE,
+                    self.__class__.DEFAULT_MESSAGE_TYPE)
+                if expected_message_type not in MessageFactory.get_message_types():
+                    expected_message_type = self.__class__.DEFAULT_MESSAGE_TYPE
+            else:
+                expected_message_type = self.__message_type
+
+            return MessageFactory.get_message(
+                message_type=expected_message_type,
+                **message_json,
+            )
+
+        except (AttributeError, TypeError, ValueError, MessageError) as message_error:
+            # The message did not conform to the simulation platform message schema or
+            # the message type was not supported by the message factory.
+            LOGGER.warning("Received {:s} error when creating message object: {:s}".format(
+                type(message_error).__name__, str(message_error)
+            ))
+            return message_json
+
+    def __store_last_message(self, message_object: Union[BaseMessage, Dict[str, Any], str], topic_name: str) \
+            -> Tuple[Union[BaseMessage, Dict[str, Any], str], str]:
+        """Stores the message object as the last received message and returns a (message object, topic name) tuple."""
+        self.__last_message = message_object
+        self.__last_topic = topic_name
+        self.log_last_message()
+
+        return message_object, topic_name
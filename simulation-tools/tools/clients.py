@@ -7,15 +7,19 @@
 """This module contains a client class for sending and listening to messages using a RabbitMQ message bus."""
 
 import asyncio
-from typing import Dict, List, Optional, Tuple, Union, cast
+import json
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 import aio_pika
 from aio_pika.exceptions import CONNECTION_EXCEPTIONS
 
 from tools.callbacks import CallbackFunctionType, MessageCallback
-from tools.messages import AbstractMessage
+from tools.message.abstract import AbstractMessage, BaseMessage
+from tools.message.batch import BatchMessage
 from tools.tools import (
-    FullLogger, handle_async_exception, load_environmental_variables,
+    FullLogger, handle_async_exception, load_environmental_variables, log_exception,
     EnvironmentVariableType, EnvironmentVariableValue)
 
 LOGGER = FullLogger(__name__)
@@ -40,7 +44,16 @@ def default_env_variable_definitions() -> List[Tuple[str, EnvironmentVariableTyp
         (env_variable_name("ssl_version"), str, "PROTOCOL_TLS"),
         (env_variable_name("exchange"), str, ""),
         (env_variable_name("exchange_autodelete"), bool, False),
-        (env_variable_name("exchange_durable"), bool, False)
+        (env_variable_name("exchange_durable"), bool, False),
+        (env_variable_name("listener_queue_size"), int, 0),
+        (env_variable_name("listener_workers"), int, 1),
+        (env_variable_name("prefetch_count"), int, 0),
+        (env_variable_name("ack_batch_size"), int, 1),
+        (env_variable_name("ack_batch_interval"), int, MessageAcknowledger.DEFAULT_BATCH_INTERVAL),
+        (env_variable_name("no_ack"), bool, False),
+        (env_variable_name("connection_pool_size"), int, 0),
+        (env_variable_name("publisher_channels"), int, 1),
+        (env_variable_name("publish_strategy"), str, RabbitmqConnectionPool.PUBLISH_BY_TOPIC)
     ]
 
 
@@ -79,6 +92,45 @@ def validate_message(topic_name: str, message_to_publish: Union[bytes, AbstractM
     return topic_name, message_to_publish
 
 
+def create_batch_message(messages: List[Tuple[str, Union[bytes, BaseMessage]]], batch_name: str) \
+        -> Union[Tuple[None, None], Tuple[str, bytes]]:
+    """Wraps the given (topic name, message) pairs into a batch message for publishing.
+       The messages can be given either in bytes format or as message objects.
+       Messages that are not valid JSON are left out from the batch.
+       The batch is published to the batch topic for batch_name, e.g. "Batch.Grid" for "Grid".
+       Returns a tuple (topic_name: str, message_to_publish: bytes) if the batch could be created.
+       Otherwise, i.e. if there are no valid messages or the batch name is empty, returns (None, None)."""
+    if not isinstance(batch_name, str) or batch_name == "":
+        LOGGER.warning("Batch name was empty.")
+        return None, None
+
+    batch_messages = []
+    for message_topic_name, message in messages:
+        if not isinstance(message_topic_name, str) or message_topic_name == "":
+            LOGGER.warning("Topic name for a message in the batch was empty.")
+            continue
+
+        if isinstance(message, BaseMessage):
+            batch_messages.append((message_topic_name, message.json()))
+            continue
+
+        try:
+            batch_messages.append((message_topic_name, json.loads(message.decode(RabbitmqClient.MESSAGE_ENCODING))))
+        except (AttributeError, UnicodeDecodeError, json.decoder.JSONDecodeError) as error:
+            LOGGER.warning("{:s} when adding a message to a batch: {:s}".format(type(error).__name__, str(error)))
+
+    if not batch_messages:
+        return None, None
+
+    return BatchMessage.get_topic_name(batch_name), BatchMessage.from_messages(batch_messages).bytes()
+
+
+async def wait_before_reconnecting():
+    """Waits before trying to reconnect a topic listener to the message bus."""
+    LOGGER.info("Could not create a connection. Trying again in {} seconds.".format(RECONNECT_INTERVAL))
+    await asyncio.sleep(RECONNECT_INTERVAL)
+
+
 class RabbitmqExchangeParameters:
     """Class for holding the parameters required for declaring an exchange for RabbitMQ message bus."""
     def __init__(self, exchange_name: str, exchange_autodelete: bool, exchange_durable: bool):
@@ -102,17 +154,343 @@ class RabbitmqExchangeParameters:
         return self.__durable
 
 
+class ListenerStatistics:
+    """Class for holding the counters for the messages received by the topic listeners of a RabbitmqClient.
+       The times are given in seconds."""
+    def __init__(self):
+        self.__received_messages = 0
+        self.__processed_messages = 0
+        self.__failed_messages = 0
+        self.__acknowledgements = 0
+        self.__queue_depth = 0
+        self.__max_queue_depth = 0
+        self.__total_queue_time = 0.0
+        self.__max_queue_time = 0.0
+        self.__total_processing_time = 0.0
+        self.__max_processing_time = 0.0
+
+    @property
+    def received_messages(self) -> int:
+        """Returns the number of messages that have been received from the message bus."""
+        return self.__received_messages
+
+    @property
+    def processed_messages(self) -> int:
+        """Returns the number of messages that have been processed by the callback."""
+        return self.__processed_messages
+
+    @property
+    def failed_messages(self) -> int:
+        """Returns the number of messages for which the processing raised an exception."""
+        return self.__failed_messages
+
+    @property
+    def acknowledgements(self) -> int:
+        """Returns the number of acknowledgements (basic.ack or basic.reject) sent to the message bus."""
+        return self.__acknowledgements
+
+    @property
+    def queue_depth(self) -> int:
+        """Returns the number of messages currently waiting in the listener queues."""
+        return self.__queue_depth
+
+    @property
+    def max_queue_depth(self) -> int:
+        """Returns the largest number of messages that have been waiting in the listener queues."""
+        return self.__max_queue_depth
+
+    @property
+    def mean_queue_time(self) -> float:
+        """Returns the average time the messages have waited in the listener queues."""
+        return self.__total_queue_time / max(self.__processed_messages + self.__failed_messages, 1)
+
+    @property
+    def max_queue_time(self) -> float:
+        """Returns the longest time a message has waited in the listener queues."""
+        return self.__max_queue_time
+
+    @property
+    def mean_processing_time(self) -> float:
+        """Returns the average time used by the callback for processing a message."""
+        return self.__total_processing_time / max(self.__processed_messages + self.__failed_messages, 1)
+
+    @property
+    def max_processing_time(self) -> float:
+        """Returns the longest time used by the callback for processing a message."""
+        return self.__max_processing_time
+
+    def message_received(self):
+        """Updates the counters after a message has been received from the message bus."""
+        self.__received_messages += 1
+
+    def message_queued(self):
+        """Updates the counters after a message has been added to a listener queue."""
+        self.message_received()
+        self.__queue_depth += 1
+        self.__max_queue_depth = max(self.__max_queue_depth, self.__queue_depth)
+
+    def message_dequeued(self, queue_time: float):
+        """Updates the counters after a message has been taken from a listener queue."""
+        self.__queue_depth -= 1
+        self.__total_queue_time += queue_time
+        self.__max_queue_time = max(self.__max_queue_time, queue_time)
+
+    def acknowledgement_sent(self):
+        """Updates the counters after an acknowledgement has been sent to the message bus."""
+        self.__acknowledgements += 1
+
+    def message_processed(self, processing_time: float, success: bool = True):
+        """Updates the counters after a message has been processed."""
+        if success:
+            self.__processed_messages += 1
+        else:
+            self.__failed_messages += 1
+        self.__total_processing_time += processing_time
+        self.__max_processing_time = max(self.__max_processing_time, processing_time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the counters as a dictionary."""
+        return {
+            "received_messages": self.received_messages,
+            "processed_messages": self.processed_messages,
+            "failed_messages": self.failed_messages,
+            "acknowledgements": self.acknowledgements,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_queue_time": self.mean_queue_time,
+            "max_queue_time": self.max_queue_time,
+            "mean_processing_time": self.mean_processing_time,
+            "max_processing_time": self.max_processing_time
+        }
+
+
+class MessageAcknowledger:
+    """Class for acknowledging the messages received by a topic listener either one at a time or in batches.
+
+       With a batch size larger than 1, a single acknowledgement with multiple=True is sent after every
+       batch_size messages or when batch_interval milliseconds have passed since the first unacknowledged message.
+       In the batch mode the messages for which the processing failed are acknowledged as well, since the
+       exclusive listener queues do not use dead-lettering. In the no-ack mode the message bus does not expect
+       any acknowledgements.
+
+       Since an acknowledgement with multiple=True covers all the earlier deliveries of the channel, the batch
+       acknowledgement is only sent up to the highest delivery tag below which every message has been processed.
+       The messages that are still being processed, e.g. by another worker of a ListenerQueue, must be registered
+       with message_received so that they are not acknowledged before their processing has finished.
+    """
+    DEFAULT_BATCH_INTERVAL = 100
+
+    def __init__(self, batch_size: int = 1, batch_interval: int = DEFAULT_BATCH_INTERVAL, no_ack: bool = False,
+                 statistics: Optional[ListenerStatistics] = None):
+        self.__batch_size = max(batch_size, 1)
+        if batch_interval <= 0:
+            LOGGER.warning("Acknowledgement batch interval must be positive, using {:d} ms instead.".format(
+                MessageAcknowledger.DEFAULT_BATCH_INTERVAL))
+            batch_interval = MessageAcknowledger.DEFAULT_BATCH_INTERVAL
+        self.__batch_interval = batch_interval
+        self.__no_ack = no_ack
+        self.__statistics = statistics if statistics is not None else ListenerStatistics()
+
+        # the processed but unacknowledged messages and the delivery tags of the unprocessed messages
+        self.__pending_messages = {}
+        self.__unprocessed_tags = set()
+        self.__channel = None
+        self.__acknowledged_tag = 0
+        self.__flush_task = None
+
+    @property
+    def batch_size(self) -> int:
+        """Returns the number of messages that are acknowledged together."""
+        return self.__batch_size
+
+    @property
+    def batch_interval(self) -> int:
+        """Returns the maximum time in milliseconds that an acknowledgement is delayed in the batch mode."""
+        return self.__batch_interval
+
+    @property
+    def no_ack(self) -> bool:
+        """Returns True if the messages are consumed without acknowledgements."""
+        return self.__no_ack
+
+    @property
+    def pending_messages(self) -> int:
+        """Returns the number of processed messages that have not yet been acknowledged."""
+        return len(self.__pending_messages)
+
+    async def message_received(self, message: aio_pika.message.IncomingMessage) -> None:
+        """Registers a received message whose processing has not yet finished.
+           The batch acknowledgements do not cover the message until acknowledge has been called for it."""
+        if self.__no_ack or self.__batch_size == 1:
+            return
+
+        await self.__check_channel(message)
+        self.__unprocessed_tags.add(message.delivery_tag)
+
+    async def acknowledge(self, message: aio_pika.message.IncomingMessage, success: bool = True) -> None:
+        """Acknowledges the given message or adds it to the current batch.
+           If success is False and batching is not used, the message is rejected instead."""
+        if self.__no_ack:
+            return
+
+        if self.__batch_size == 1:
+            await self.__send_acknowledgement(message, multiple=False, reject=not success)
+            return
+
+        if message.channel is not self.__channel and message.channel.is_closed:
+            # a message received before a reconnection can no longer be acknowledged
+            return
+
+        await self.__check_channel(message)
+        self.__unprocessed_tags.discard(message.delivery_tag)
+        if message.delivery_tag > self.__acknowledged_tag:
+            self.__pending_messages[message.delivery_tag] = message
+
+        if len(self.__pending_messages) >= self.__batch_size:
+            await self.flush()
+        elif self.__pending_messages and self.__flush_task is None:
+            self.__flush_task = asyncio.create_task(self.__flush_after_interval())
+
+    async def flush(self) -> None:
+        """Acknowledges the pending messages that are not preceded by any unprocessed messages."""
+        if self.__flush_task is not None and self.__flush_task is not asyncio.current_task():
+            self.__flush_task.cancel()
+        self.__flush_task = None
+
+        first_unprocessed_tag = min(self.__unprocessed_tags, default=None)
+        acknowledged_tags = sorted(
+            delivery_tag for delivery_tag in self.__pending_messages
+            if first_unprocessed_tag is None or delivery_tag < first_unprocessed_tag)
+        if not acknowledged_tags:
+            return
+
+        latest_message = self.__pending_messages[acknowledged_tags[-1]]
+        for delivery_tag in acknowledged_tags:
+            del self.__pending_messages[delivery_tag]
+        self.__acknowledged_tag = latest_message.delivery_tag
+        await self.__send_acknowledgement(latest_message, multiple=True, reject=False)
+
+    async def __check_channel(self, message: aio_pika.message.IncomingMessage) -> None:
+        """Starts a new batch if the message has been received through a different channel than the earlier ones."""
+        if message.channel is self.__channel:
+            return
+
+        if self.__channel is not None:
+            # the listener has reconnected, the unacknowledged messages of the old channel can no longer be
+            # acknowledged beyond the ones that have already been processed
+            self.__unprocessed_tags.clear()
+            await self.flush()
+            self.__pending_messages.clear()
+        self.__channel = message.channel
+        self.__acknowledged_tag = 0
+
+    async def __flush_after_interval(self) -> None:
+        await asyncio.sleep(self.__batch_interval / 1000)
+        await self.flush()
+
+    async def __send_acknowledgement(self, message: aio_pika.message.IncomingMessage,
+                                     multiple: bool, reject: bool) -> None:
+        if message.channel.is_closed:
+            LOGGER.warning("Acknowledgement is not sent since channel is closed")
+            return
+
+        try:
+            if reject:
+                await message.reject(requeue=False)
+            else:
+                await message.ack(multiple=multiple)
+            self.__statistics.acknowledgement_sent()
+        except CONNECTION_EXCEPTIONS as error:
+            LOGGER.warning("{}: '{}' when trying to acknowledge a message.".format(type(error).__name__, error))
+
+
+class ListenerQueue:
+    """Class for processing the messages received by a topic listener using a bounded queue and worker tasks.
+
+       The messages are acknowledged (or added to the acknowledgement batch) only after the callback has
+       processed them. When the queue is full,
+       the listener stops reading new messages which together with the channel prefetch count
+       (basic.qos) causes the message bus to hold back the deliveries.
+    """
+    def __init__(self, callback_class: MessageCallback, queue_size: int, workers: int,
+                 statistics: ListenerStatistics, acknowledger: Optional[MessageAcknowledger] = None):
+        self.__callback_class = callback_class
+        self.__acknowledger = acknowledger if acknowledger is not None else MessageAcknowledger(statistics=statistics)
+        self.__queue = asyncio.Queue(maxsize=max(queue_size, 1))
+        self.__worker_count = max(workers, 1)
+        self.__statistics = statistics
+        self.__worker_tasks = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Returns the number of messages currently waiting in the queue."""
+        return self.__queue.qsize()
+
+    def start(self) -> None:
+        """Starts the worker tasks."""
+        if not self.__worker_tasks:
+            self.__worker_tasks = [
+                asyncio.create_task(self.__process_messages())
+                for _ in range(self.__worker_count)
+            ]
+
+    async def stop(self) -> None:
+        """Stops the worker tasks. Any messages still in the queue are not processed."""
+        for worker_task in self.__worker_tasks:
+            worker_task.cancel()
+        for worker_task in self.__worker_tasks:
+            try:
+                await worker_task
+            except asyncio.CancelledError:
+                pass
+        self.__worker_tasks = []
+
+        while not self.__queue.empty():
+            self.__queue.get_nowait()
+            self.__statistics.message_dequeued(0.0)
+
+    async def put(self, message: aio_pika.message.IncomingMessage) -> None:
+        """Adds a message to the queue. Waits until there is room in the queue."""
+        await self.__acknowledger.message_received(message)
+        await self.__queue.put((message, time.monotonic()))
+        self.__statistics.message_queued()
+
+    async def join(self) -> None:
+        """Waits until all the messages in the queue have been processed."""
+        await self.__queue.join()
+
+    async def __process_messages(self) -> None:
+        """Processes the messages from the queue one at a time."""
+        while True:
+            message, queued_time = await self.__queue.get()
+            start_time = time.monotonic()
+            self.__statistics.message_dequeued(start_time - queued_time)
+
+            success = True
+            try:
+                await self.__callback_class.process(message)
+            except asyncio.CancelledError:
+                self.__queue.task_done()
+                raise
+            except Exception as error:  # pylint: disable=broad-except
+                success = False
+                log_exception(error, LOGGER.warning, "Exception while processing a received message:")
+
+            try:
+                self.__statistics.message_processed(time.monotonic() - start_time, success)
+                await self.__acknowledger.acknowledge(message, success)
+            finally:
+                self.__queue.task_done()
+
+
 class RabbitmqConnection:
-    """Class for holding a RabbitMQ connection including the channel and exchange.
-       This is mainly intended for the use of RabbitmqClient objects.
+    """Class for holding a RabbitMQ connection that can be shared by several RabbitmqChannel objects.
+       This is mainly intended for the use of RabbitmqConnectionPool objects.
     """
-    def __init__(self, connection_parameters: dict, exchange_parameters: RabbitmqExchangeParameters):
+    def __init__(self, connection_parameters: dict):
         self.__connection_parameters = connection_parameters
-        self.__exchange_parameters = exchange_parameters
 
         self.__rabbitmq_connection = None
-        self.__rabbitmq_channel = None
-        self.__rabbitmq_exchange = None
 
     async def get_connection(self) -> Optional[aio_pika.connection.ConnectionType]:
         """Returns a RabbitMQ connection. Creates the connection on the first call.
@@ -157,13 +535,49 @@ class RabbitmqConnection:
                     connection_try_number, connection_creation_interval = \
                         await update_connection_attempt_variables(connection_try_number, connection_creation_interval)
 
-            self.__rabbitmq_channel = None
-            self.__rabbitmq_exchange = None
-
         return self.__rabbitmq_connection  # pyright: reportGeneralTypeIssues=false
 
+    async def close(self) -> None:
+        """Closes the RabbitMQ connection."""
+        if self.__rabbitmq_connection is not None and not self.__rabbitmq_connection.is_closed:
+            try:
+                await self.__rabbitmq_connection.close()
+            except CONNECTION_EXCEPTIONS as closing_error:
+                LOGGER.warning("When closing RabbitMQ connection, received: {} : {}".format(
+                    type(closing_error).__name__, closing_error))
+
+        self.__rabbitmq_connection = None
+
+
+class RabbitmqChannel:
+    """Class for holding a RabbitMQ channel and exchange that use a possibly shared RabbitmqConnection.
+       This is mainly intended for the use of RabbitmqConnectionPool objects.
+    """
+    def __init__(self, connection_class: RabbitmqConnection, exchange_parameters: RabbitmqExchangeParameters):
+        self.__connection_class = connection_class
+        self.__exchange_parameters = exchange_parameters
+
+        self.__rabbitmq_channel = None
+        self.__rabbitmq_exchange = None
+        # lock that is used to publish the messages through the channel one at a time
+        self.__lock = asyncio.Lock()
+
+    @property
+    def connection_class(self) -> RabbitmqConnection:
+        """Returns the connection object that the channel uses."""
+        return self.__connection_class
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Returns the lock that should be held while publishing messages through the channel."""
+        return self.__lock
+
+    async def get_connection(self) -> Optional[aio_pika.connection.ConnectionType]:
+        """Returns the RabbitMQ connection for the channel."""
+        return await self.__connection_class.get_connection()
+
     async def get_channel(self) -> Optional[aio_pika.channel.Channel]:
-        """Returns a channel for a RabbitMQ connection. Creates the channel on the first call."""
+        """Returns the RabbitMQ channel. Creates the channel on the first call or if the channel has been closed."""
         if self.__rabbitmq_channel is None or self.__rabbitmq_channel.is_closed:
             connection = await self.get_connection()
             if connection is None:
@@ -183,9 +597,9 @@ class RabbitmqConnection:
         return self.__rabbitmq_channel
 
     async def get_exchange(self) -> Optional[aio_pika.exchange.Exchange]:
-        """Returns an exchange for a RabbitMQ connection. Declares the exchange on the first call.
-           No checking to ensure that exchange still exists on later calls."""
-        if self.__rabbitmq_exchange is None:
+        """Returns the exchange declared using the channel. Declares the exchange on the first call or
+           if the channel has been closed."""
+        if self.__rabbitmq_exchange is None or self.__rabbitmq_channel is None or self.__rabbitmq_channel.is_closed:
             channel = await self.get_channel()
             if channel is None:
                 LOGGER.warning("No RabbitMQ channel found, setting exchange to None")
@@ -199,26 +613,131 @@ class RabbitmqConnection:
                         auto_delete=self.__exchange_parameters.auto_delete,
                         durable=self.__exchange_parameters.durable)
                 except CONNECTION_EXCEPTIONS as exchange_error:
-                    LOGGER.warning("When creating RabbitMQ channel, received: {} : {}".format(
+                    LOGGER.warning("When creating RabbitMQ exchange, received: {} : {}".format(
                         type(exchange_error).__name__, exchange_error))
                     self.__rabbitmq_exchange = None
 
         return self.__rabbitmq_exchange
 
     async def close(self) -> None:
-        """Closes the RabbitMQ connection."""
-        if self.__rabbitmq_connection is not None and not self.__rabbitmq_connection.is_closed:
+        """Closes the RabbitMQ channel. The connection is not closed."""
+        if self.__rabbitmq_channel is not None and not self.__rabbitmq_channel.is_closed:
             try:
-                await self.__rabbitmq_connection.close()
+                await self.__rabbitmq_channel.close()
             except CONNECTION_EXCEPTIONS as closing_error:
-                LOGGER.warning("When closing RabbitMQ connection, received: {} : {}".format(
+                LOGGER.warning("When closing RabbitMQ channel, received: {} : {}".format(
                     type(closing_error).__name__, closing_error))
 
-        self.__rabbitmq_connection = None
         self.__rabbitmq_channel = None
         self.__rabbitmq_exchange = None
 
 
+class RabbitmqConnectionPool:
+    """Class for sharing a set of RabbitMQ connections between the topic listeners and the publishers of a client.
+
+       With pool size 0, each listener uses a dedicated connection and the publisher channels share one connection.
+       With a positive pool size, the listeners and the publisher channels are distributed over at most that many
+       connections and each listener uses its own channel.
+
+       The publisher channel for a message is selected either by the topic name, which keeps the messages for
+       a topic in order, or by round-robin over all the publisher channels.
+    """
+    PUBLISH_BY_TOPIC = "topic"
+    PUBLISH_ROUND_ROBIN = "round_robin"
+    PUBLISH_STRATEGIES = [PUBLISH_BY_TOPIC, PUBLISH_ROUND_ROBIN]
+
+    def __init__(self, connection_parameters: dict, exchange_parameters: RabbitmqExchangeParameters,
+                 pool_size: int = 0, publisher_channels: int = 1, publish_strategy: str = PUBLISH_BY_TOPIC):
+        self.__connection_parameters = connection_parameters
+        self.__exchange_parameters = exchange_parameters
+
+        if publish_strategy not in RabbitmqConnectionPool.PUBLISH_STRATEGIES:
+            LOGGER.warning("Unknown publish strategy '{:s}', using '{:s}' instead.".format(
+                str(publish_strategy), RabbitmqConnectionPool.PUBLISH_BY_TOPIC))
+            publish_strategy = RabbitmqConnectionPool.PUBLISH_BY_TOPIC
+        self.__publish_strategy = publish_strategy
+
+        # the connection objects do not connect to the message bus before they are used
+        self.__pooled_connections = [self.__new_connection() for _ in range(max(pool_size, 0))]
+        self.__dedicated_connections = []
+        self.__next_listener_connection = 0
+
+        if self.__pooled_connections:
+            self.__publisher_connection = None
+            publisher_connections = self.__pooled_connections
+        else:
+            self.__publisher_connection = self.__new_connection()
+            publisher_connections = [self.__publisher_connection]
+        self.__publisher_channels = [
+            RabbitmqChannel(publisher_connections[channel_index % len(publisher_connections)], exchange_parameters)
+            for channel_index in range(max(publisher_channels, 1))
+        ]
+        self.__next_publisher_channel = 0
+
+    @property
+    def pool_size(self) -> int:
+        """Returns the number of shared connections in the pool. 0 means that each listener uses its own connection."""
+        return len(self.__pooled_connections)
+
+    @property
+    def publish_strategy(self) -> str:
+        """Returns the strategy for selecting the publisher channel."""
+        return self.__publish_strategy
+
+    @property
+    def publisher_channels(self) -> List[RabbitmqChannel]:
+        """Returns the list of the publisher channels."""
+        return list(self.__publisher_channels)
+
+    def get_listener_channel(self) -> RabbitmqChannel:
+        """Returns a new channel for a topic listener.
+           The channel should be released with release_listener_channel after the listener has been closed."""
+        if self.__pooled_connections:
+            connection_class = self.__pooled_connections[self.__next_listener_connection]
+            self.__next_listener_connection = (self.__next_listener_connection + 1) % len(self.__pooled_connections)
+        else:
+            connection_class = self.__new_connection()
+            self.__dedicated_connections.append(connection_class)
+
+        return RabbitmqChannel(connection_class, self.__exchange_parameters)
+
+    async def release_listener_channel(self, channel_class: RabbitmqChannel) -> None:
+        """Closes the given listener channel and the connection if the connection is not shared."""
+        await channel_class.close()
+        if channel_class.connection_class in self.__dedicated_connections:
+            self.__dedicated_connections.remove(channel_class.connection_class)
+            await channel_class.connection_class.close()
+
+    def get_publisher_channel(self, topic_name: str) -> RabbitmqChannel:
+        """Returns the publisher channel that should be used for a message to the given topic."""
+        if len(self.__publisher_channels) == 1:
+            return self.__publisher_channels[0]
+
+        if self.__publish_strategy == RabbitmqConnectionPool.PUBLISH_ROUND_ROBIN:
+            channel_index = self.__next_publisher_channel
+            self.__next_publisher_channel = (channel_index + 1) % len(self.__publisher_channels)
+        else:
+            channel_index = zlib.crc32(topic_name.encode(RabbitmqClient.MESSAGE_ENCODING)) % \
+                len(self.__publisher_channels)
+
+        return self.__publisher_channels[channel_index]
+
+    async def close(self) -> None:
+        """Closes all the channels and connections in the pool."""
+        for channel_class in self.__publisher_channels:
+            await channel_class.close()
+
+        connections = self.__pooled_connections + self.__dedicated_connections
+        if self.__publisher_connection is not None:
+            connections.append(self.__publisher_connection)
+        for connection_class in connections:
+            await connection_class.close()
+        self.__dedicated_connections = []
+
+    def __new_connection(self) -> RabbitmqConnection:
+        return RabbitmqConnection(self.__connection_parameters)
+
+
 class RabbitmqClient:
     """RabbitMQ client that can be used to send messages and to create topic listeners."""
     DEFAULT_ENV_VARIABLE_PREFIX = "RABBITMQ_"
@@ -231,7 +750,23 @@ class RabbitmqClient:
     EXCHANGE_ATTRIBUTE_DURABLE = "exchange_durable"
     EXCHANGE_PARAMETERS = [EXCHANGE_ATTRIBUTE_NAME, EXCHANGE_ATTRIBUTE_AUTODELETE, EXCHANGE_ATTRIBUTE_DURABLE]
 
-    FULL_ATTRIBUTE_NAME_LIST = CONNECTION_PARAMTERS + [OPTIONAL_SSL_PARAMETER] + EXCHANGE_PARAMETERS
+    LISTENER_ATTRIBUTE_QUEUE_SIZE = "listener_queue_size"
+    LISTENER_ATTRIBUTE_WORKERS = "listener_workers"
+    LISTENER_ATTRIBUTE_PREFETCH_COUNT = "prefetch_count"
+    LISTENER_ATTRIBUTE_ACK_BATCH_SIZE = "ack_batch_size"
+    LISTENER_ATTRIBUTE_ACK_BATCH_INTERVAL = "ack_batch_interval"
+    LISTENER_ATTRIBUTE_NO_ACK = "no_ack"
+    LISTENER_PARAMETERS = [
+        LISTENER_ATTRIBUTE_QUEUE_SIZE, LISTENER_ATTRIBUTE_WORKERS, LISTENER_ATTRIBUTE_PREFETCH_COUNT,
+        LISTENER_ATTRIBUTE_ACK_BATCH_SIZE, LISTENER_ATTRIBUTE_ACK_BATCH_INTERVAL, LISTENER_ATTRIBUTE_NO_ACK]
+
+    POOL_ATTRIBUTE_SIZE = "connection_pool_size"
+    POOL_ATTRIBUTE_PUBLISHER_CHANNELS = "publisher_channels"
+    POOL_ATTRIBUTE_PUBLISH_STRATEGY = "publish_strategy"
+    POOL_PARAMETERS = [POOL_ATTRIBUTE_SIZE, POOL_ATTRIBUTE_PUBLISHER_CHANNELS, POOL_ATTRIBUTE_PUBLISH_STRATEGY]
+
+    FULL_ATTRIBUTE_NAME_LIST = CONNECTION_PARAMTERS + [OPTIONAL_SSL_PARAMETER] + EXCHANGE_PARAMETERS + \
+        LISTENER_PARAMETERS + POOL_PARAMETERS
 
     MESSAGE_ENCODING = "UTF-8"
 
@@ -246,6 +781,20 @@ class RabbitmqClient:
            - exchange     : the name for the exchange used by the client
            - exchange_autodelete  : whether to automatically delete the exchange after use
            - exchange_durable     : whether to setup the exchange to survive message bus restarts
+           - listener_queue_size  : the maximum number of received messages waiting for processing per listener,
+                                    0 means that each received message is handled in a new task without limit
+           - listener_workers     : the number of worker tasks processing the messages per listener
+                                    (only used when listener_queue_size > 0)
+           - prefetch_count       : the maximum number of unacknowledged messages per listener channel (basic.qos),
+                                    0 means no limit
+           - ack_batch_size       : the number of received messages that are acknowledged together (multiple=True)
+           - ack_batch_interval   : the maximum time in milliseconds an acknowledgement is delayed when batching
+           - no_ack               : whether to consume the messages without acknowledgements
+           - connection_pool_size : the number of connections shared by the listeners and the publishers,
+                                    0 means a separate connection for each listener and one for publishing
+           - publisher_channels   : the number of channels used for publishing messages
+           - publish_strategy     : how the publisher channel is selected for a message,
+                                    "topic" (by the topic name) or "round_robin"
 
            If a value for attribute is missing from kwargs, the value is read from
            the corresponding environmental variable with the given default value as a backup.
@@ -258,6 +807,20 @@ class RabbitmqClient:
            - RABBITMQ_EXCHANGE (default value: "")
            - RABBITMQ_EXCHANGE_AUTODELETE (default value: False)
            - RABBITMQ_EXCHANGE_DURABLE (default value: False)
+           - RABBITMQ_LISTENER_QUEUE_SIZE (default value: 0)
+           - RABBITMQ_LISTENER_WORKERS (default value: 1)
+           - RABBITMQ_PREFETCH_COUNT (default value: 0)
+           - RABBITMQ_ACK_BATCH_SIZE (default value: 1)
+           - RABBITMQ_ACK_BATCH_INTERVAL (default value: 100)
+           - RABBITMQ_NO_ACK (default value: False)
+           - RABBITMQ_CONNECTION_POOL_SIZE (default value: 0)
+           - RABBITMQ_PUBLISHER_CHANNELS (default value: 1)
+           - RABBITMQ_PUBLISH_STRATEGY (default value: "topic")
+
+           With a listener_queue_size larger than 0, the received messages are acknowledged only after they
+           have been processed. With more than one worker, the messages can be processed in a different order
+           than they were received. Similarly, with the "round_robin" publish strategy and more than one publisher
+           channel, the messages can arrive to the message bus in a different order than they were sent.
         """
         kwargs_env = load_config_from_env_variables()
         kwargs = {
@@ -270,8 +833,22 @@ class RabbitmqClient:
             exchange_name=cast(str, kwargs[RabbitmqClient.EXCHANGE_ATTRIBUTE_NAME]),
             exchange_autodelete=cast(bool, kwargs[RabbitmqClient.EXCHANGE_ATTRIBUTE_AUTODELETE]),
             exchange_durable=cast(bool, kwargs[RabbitmqClient.EXCHANGE_ATTRIBUTE_DURABLE]))
-
-        self.__send_connection = RabbitmqConnection(self.__connection_parameters, self.__exchange_parameters)
+        self.__listener_queue_size = cast(int, kwargs[RabbitmqClient.LISTENER_ATTRIBUTE_QUEUE_SIZE])
+        self.__listener_workers = cast(int, kwargs[RabbitmqClient.LISTENER_ATTRIBUTE_WORKERS])
+        self.__prefetch_count = cast(int, kwargs[RabbitmqClient.LISTENER_ATTRIBUTE_PREFETCH_COUNT])
+        self.__ack_batch_size = cast(int, kwargs[RabbitmqClient.LISTENER_ATTRIBUTE_ACK_BATCH_SIZE])
+        self.__ack_batch_interval = cast(int, kwargs[RabbitmqClient.LISTENER_ATTRIBUTE_ACK_BATCH_INTERVAL])
+        self.__no_ack = cast(bool, kwargs[RabbitmqClient.LISTENER_ATTRIBUTE_NO_ACK])
+        if not self.__no_ack and 0 < self.__prefetch_count < self.__ack_batch_size:
+            LOGGER.warning("The prefetch count {:d} is smaller than the acknowledgement batch size {:d}.".format(
+                self.__prefetch_count, self.__ack_batch_size))
+        self.__listener_statistics = ListenerStatistics()
+
+        self.__connection_pool = RabbitmqConnectionPool(
+            self.__connection_parameters, self.__exchange_parameters,
+            pool_size=cast(int, kwargs[RabbitmqClient.POOL_ATTRIBUTE_SIZE]),
+            publisher_channels=cast(int, kwargs[RabbitmqClient.POOL_ATTRIBUTE_PUBLISHER_CHANNELS]),
+            publish_strategy=cast(str, kwargs[RabbitmqClient.POOL_ATTRIBUTE_PUBLISH_STRATEGY]))
         self.__listened_topics = set()
         self.__listener_tasks = []
 
@@ -286,7 +863,7 @@ class RabbitmqClient:
         """Closes the sender connection and all the listener connections."""
         async with self.__lock:
             await self.remove_listeners()
-            await self.__send_connection.close()
+            await self.__connection_pool.close()
             self.__is_closed = True
 
     @property
@@ -299,6 +876,17 @@ class RabbitmqClient:
         """Returns the RabbitMQ exchange name that the client uses."""
         return self.__exchange_parameters.exchange_name
 
+    @property
+    def connection_pool(self) -> RabbitmqConnectionPool:
+        """Returns the connection pool that the client uses."""
+        return self.__connection_pool
+
+    @property
+    def listener_statistics(self) -> ListenerStatistics:
+        """Returns the counters for the messages received by the topic listeners.
+           The queue depth and the queue times are only updated when listener_queue_size > 0."""
+        return self.__listener_statistics
+
     @property
     def listened_topics(self) -> List[str]:
         """Returns a list of the topics the client is currently listening."""
@@ -324,11 +912,10 @@ class RabbitmqClient:
         if isinstance(topic_names, str):
             topic_names = [topic_names]
 
-        new_connection = RabbitmqConnection(self.__connection_parameters, self.__exchange_parameters)
         listener_task = asyncio.create_task(self.__listen_to_topics(
-            connection_class=new_connection,
+            channel_class=self.__connection_pool.get_listener_channel(),
             topic_names=topic_names,
-            callback_class=MessageCallback(callback_function)
+            callback_class=MessageCallback(callback_function, topic_names=topic_names)
         ))
 
         self.__listener_tasks.append(listener_task)
@@ -349,44 +936,87 @@ class RabbitmqClient:
 
     async def send_message(self, topic_name: str, message_bytes: bytes) -> None:
         """Sends the given message to the given topic. Assumes that the message is in bytes format."""
-        async with self.__lock:
+        if self.is_closed:
+            LOGGER.warning("Message not sent because the client is closed.")
+            return
+
+        validated_topic_name, message_to_publish = validate_message(topic_name, message_bytes)
+        if validated_topic_name is None or message_to_publish is None:
+            return
+
+        publisher_channel = self.__connection_pool.get_publisher_channel(validated_topic_name)
+        async with publisher_channel.lock:
             if self.is_closed:
                 LOGGER.warning("Message not sent because the client is closed.")
                 return
 
-            validated_topic_name, message_to_publish = validate_message(topic_name, message_bytes)
-            if validated_topic_name is None or message_to_publish is None:
-                return
-
             try:
-                send_exchange = await self.__send_connection.get_exchange()
+                send_exchange = await publisher_channel.get_exchange()
                 if send_exchange is None:
                     LOGGER.warning("Cannot publish message because there is no connection")
                     return
 
-                await send_exchange.publish(aio_pika.Message(message_to_publish), routing_key=topic_name)
+                await send_exchange.publish(aio_pika.Message(message_to_publish), routing_key=validated_topic_name)
                 LOGGER.debug("Message '{:s}' send to topic: '{:s}'".format(
-                    message_to_publish.decode(RabbitmqClient.MESSAGE_ENCODING), topic_name))
+                    message_to_publish.decode(RabbitmqClient.MESSAGE_ENCODING), validated_topic_name))
 
             except SystemExit:
                 LOGGER.debug("SystemExit received when trying to publish message.")
-                await self.__send_connection.close()
+                await self.__connection_pool.close()
                 raise
             except CONNECTION_EXCEPTIONS as error:
                 LOGGER.warning("{}: '{}' when trying to publish message.".format(type(error).__name__, error))
             except GeneratorExit:
                 LOGGER.warning("GeneratorExit received when trying to publish message.")
 
-    async def __listen_to_topics(self, connection_class: RabbitmqConnection, topic_names: Union[str, List[str]],
+    async def send_messages_as_batch(self, messages: List[Tuple[str, Union[bytes, BaseMessage]]],
+                                     batch_name: str) -> None:
+        """Sends the given (topic name, message) pairs wrapped into a single batch message (BatchMessage).
+           The batch is sent to the batch topic for batch_name, e.g. "Batch.Grid" for "Grid". Only the listeners
+           that listen to the batch topic receive the contained messages, separately with their own topics.
+           The listeners that only listen to the topics of the contained messages do not receive them.
+           If the batch cannot be created, the messages are sent separately.
+        """
+        batch_topic_name, batch_bytes = create_batch_message(messages, batch_name)
+        if batch_topic_name is None or batch_bytes is None:
+            for message_topic_name, message in messages:
+                await self.send_message(
+                    message_topic_name, message.bytes() if isinstance(message, BaseMessage) else message)
+            return
+
+        await self.send_message(batch_topic_name, batch_bytes)
+
+    async def __listen_to_topics(self, channel_class: RabbitmqChannel, topic_names: Union[str, List[str]],
                                  callback_class: MessageCallback) -> None:
         """Starts a RabbitMQ message bus listener for the given topics."""
         if isinstance(topic_names, str):
             topic_names = [topic_names]
 
-        async def wait_before_reconnecting():
-            LOGGER.info("Could not create a connection. Trying again in {} seconds.".format(RECONNECT_INTERVAL))
-            await asyncio.sleep(RECONNECT_INTERVAL)
-
+        acknowledger = MessageAcknowledger(
+            self.__ack_batch_size, self.__ack_batch_interval, self.__no_ack, self.__listener_statistics)
+        if self.__listener_queue_size > 0:
+            listener_queue = ListenerQueue(
+                callback_class, self.__listener_queue_size, self.__listener_workers, self.__listener_statistics,
+                acknowledger)
+            listener_queue.start()
+        else:
+            listener_queue = None
+
+        try:
+            await self.__listen_with_reconnects(
+                channel_class, topic_names, callback_class, listener_queue, acknowledger)
+        finally:
+            if listener_queue is not None:
+                await listener_queue.stop()
+            await acknowledger.flush()
+
+            LOGGER.info("Closing listener for topics: '{:s}'".format(", ".join(topic_names)))
+            await self.__connection_pool.release_listener_channel(channel_class)
+
+    async def __listen_with_reconnects(self, channel_class: RabbitmqChannel, topic_names: List[str],
+                                       callback_class: MessageCallback, listener_queue: Optional[ListenerQueue],
+                                       acknowledger: MessageAcknowledger) -> None:
+        """Listens to the given topics and reconnects to the message bus after connection problems."""
         reconnect_listeners = True
         while reconnect_listeners:
             # by default, no reconnect unless there is a reason for it
@@ -394,56 +1024,61 @@ class RabbitmqClient:
             LOGGER.info("Opening RabbitMQ listener for the topics: '{:s}'".format(", ".join(topic_names)))
 
             try:
-                rabbitmq_connection = await connection_class.get_connection()
+                rabbitmq_connection = await channel_class.get_connection()
                 if rabbitmq_connection is None:
                     reconnect_listeners = True
                     await wait_before_reconnecting()
                     continue
 
-                async with rabbitmq_connection:
-                    rabbitmq_channel = await connection_class.get_channel()
-                    if rabbitmq_channel is not None:
-                        rabbitmq_queue = await rabbitmq_channel.declare_queue(
-                            auto_delete=True,  # Delete the queue when no one uses it anymore
-                            exclusive=True     # No other application can access the queue; delete on exit
-                        )
-                        rabbitmq_exchange = await connection_class.get_exchange()
-                    else:
-                        rabbitmq_queue = None
-                        rabbitmq_exchange = None
-                        reconnect_listeners = True
-
-                    if rabbitmq_queue is not None and rabbitmq_exchange is not None:
-                        # Binding the queue to the given topics
-                        for topic_name in topic_names:
-                            await rabbitmq_queue.bind(rabbitmq_exchange, routing_key=topic_name)
-                            LOGGER.info("Now listening to messages; exc={}, topic={}".format(
-                                rabbitmq_exchange.name, topic_name))
-
-                        async with rabbitmq_queue.iterator() as queue_iter:
-                            async for message in queue_iter:
-                                async with message.process():
-                                    LOGGER.debug("Message '{}' received from topic: '{}'".format(
-                                        message.body.decode(RabbitmqClient.MESSAGE_ENCODING), message.routing_key))
-                                    asyncio.create_task(callback_class.callback(message))
+                # the connection can be shared with other listeners, so only the channel is owned by this listener
+                rabbitmq_channel = await channel_class.get_channel()
+                if rabbitmq_channel is not None:
+                    if self.__prefetch_count > 0:
+                        await rabbitmq_channel.set_qos(prefetch_count=self.__prefetch_count)
+                    rabbitmq_queue = await rabbitmq_channel.declare_queue(
+                        auto_delete=True,  # Delete the queue when no one uses it anymore
+                        exclusive=True     # No other application can access the queue; delete on exit
+                    )
+                    rabbitmq_exchange = await channel_class.get_exchange()
+                else:
+                    rabbitmq_queue = None
+                    rabbitmq_exchange = None
+                    reconnect_listeners = True
+
+                if rabbitmq_queue is not None and rabbitmq_exchange is not None:
+                    # Binding the queue to the given topics
+                    for topic_name in topic_names:
+                        await rabbitmq_queue.bind(rabbitmq_exchange, routing_key=topic_name)
+                        LOGGER.info("Now listening to messages; exc={}, topic={}".format(
+                            rabbitmq_exchange.name, topic_name))
+
+                    async with rabbitmq_queue.iterator(no_ack=acknowledger.no_ack) as queue_iter:
+                        async for message in queue_iter:
+                            LOGGER.debug("Message '{}' received from topic: '{}'".format(
+                                message.body.decode(RabbitmqClient.MESSAGE_ENCODING), message.routing_key))
+                            if listener_queue is not None:
+                                # waits if the queue is full
+                                await listener_queue.put(message)
+                            else:
+                                self.__listener_statistics.message_received()
+                                asyncio.create_task(callback_class.callback(message))
+                                await acknowledger.acknowledge(message)
 
                 if reconnect_listeners:
                     await wait_before_reconnecting()
 
             except SystemExit:
                 LOGGER.warning("SystemExit received when trying to listen to the message bus.")
-                await connection_class.close()
+                await channel_class.close()
                 raise
 
             except CONNECTION_EXCEPTIONS as error:
                 LOGGER.warning("{}: '{}' when trying to listen to the message bus.".format(
                     type(error).__name__, error))
+                await channel_class.close()
                 reconnect_listeners = True
                 await wait_before_reconnecting()
 
-        LOGGER.info("Closing listener for topics: '{:s}'".format(", ".join(topic_names)))
-        await connection_class.close()
-
     @classmethod
     def __get_connection_parameters_only(cls, connection_config_dict: dict) -> dict:
         """Returns only the parameters needed for creating a connection."""
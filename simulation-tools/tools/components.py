@@ -12,9 +12,13 @@ import json
 from typing import cast, Any, Dict, List, Optional, Union
 
 from tools.clients import RabbitmqClient
+from tools.local_bus import LocalClient
 from tools.exceptions.messages import MessageError
-from tools.messages import (
-    BaseMessage, AbstractMessage, EpochMessage, StatusMessage, SimulationStateMessage, MessageGenerator)
+from tools.message.abstract import BaseMessage, AbstractMessage
+from tools.message.epoch import EpochMessage
+from tools.message.generator import MessageGenerator
+from tools.message.simulation_state import SimulationStateMessage
+from tools.message.status import StatusMessage
 from tools.tools import FullLogger, EnvironmentVariable
 
 LOGGER = FullLogger(__name__)
@@ -27,6 +31,7 @@ SIMULATION_STATUS_MESSAGE_TOPIC = "SIMULATION_STATUS_MESSAGE_TOPIC"
 SIMULATION_STATE_MESSAGE_TOPIC = "SIMULATION_STATE_MESSAGE_TOPIC"
 SIMULATION_ERROR_MESSAGE_TOPIC = "SIMULATION_ERROR_MESSAGE_TOPIC"
 SIMULATION_START_MESSAGE_FILENAME = "SIMULATION_START_MESSAGE_FILENAME"
+SIMULATION_MESSAGE_BUS = "SIMULATION_MESSAGE_BUS"
 
 # To receive any other messages other than "Epoch" and "SimState" from the message bus
 # use a comma separated list in SIMULATION_OTHER_TOPICS
@@ -34,6 +39,11 @@ SIMULATION_START_MESSAGE_FILENAME = "SIMULATION_START_MESSAGE_FILENAME"
 # "Result" and "Info" in addition to the topics "Epoch" and "SimState
 SIMULATION_OTHER_TOPICS = "SIMULATION_OTHER_TOPICS"
 
+# The supported message bus types for SIMULATION_MESSAGE_BUS
+MESSAGE_BUS_RABBITMQ = "rabbitmq"
+MESSAGE_BUS_LOCAL = "local"
+MESSAGE_BUS_TYPES = [MESSAGE_BUS_RABBITMQ, MESSAGE_BUS_LOCAL]
+
 
 class AbstractSimulationComponent:
     """Class for holding the state of a abstract simulation component.
@@ -61,6 +71,7 @@ class AbstractSimulationComponent:
                  rabbitmq_exchange: Optional[str] = None,
                  rabbitmq_exchange_autodelete: Optional[bool] = None,
                  rabbitmq_exchange_durable: Optional[bool] = None,
+                 message_bus: Optional[str] = None,
                  **kwargs: Any):
         """Loads the simulation is and the component name as wells as the required topic names from environmental
         variables and sets up the connection to the RabbitMQ message bus for which the connection parameters are
@@ -136,6 +147,12 @@ class AbstractSimulationComponent:
             - whether to setup the exchange to survive message bus restarts
             - environmental variable: "RABBITMQ_EXCHANGE_DURABLE"
             - default value: False
+        - message_bus (str)
+            - the message bus used by the component, either "rabbitmq" or "local"
+            - "local" uses an in-process message bus shared by all the components in the same process
+              and with the same exchange name, instead of connecting to the RabbitMQ server
+            - environmental variable: "SIMULATION_MESSAGE_BUS"
+            - default value: "rabbitmq"
         - **kwargs
             - all other arguments are ignored
         """
@@ -154,7 +171,13 @@ class AbstractSimulationComponent:
             exchange_autodelete=rabbitmq_exchange_autodelete,
             exchange_durable=rabbitmq_exchange_durable
         )
-        self._rabbitmq_client = RabbitmqClient(**self._rabbitmq_parameters)
+        if message_bus is None:
+            message_bus = cast(str, EnvironmentVariable(SIMULATION_MESSAGE_BUS, str, MESSAGE_BUS_RABBITMQ).value)
+        if message_bus not in MESSAGE_BUS_TYPES:
+            LOGGER.warning("Unknown message bus '{:s}', using '{:s}' instead.".format(message_bus, MESSAGE_BUS_RABBITMQ))
+            message_bus = MESSAGE_BUS_RABBITMQ
+        self._message_bus = message_bus
+        self._rabbitmq_client = self._create_message_client()
 
         # set the component variables for which the values can also be received from the environmental variables
         self.__set_component_variables(
@@ -240,7 +263,7 @@ class AbstractSimulationComponent:
             LOGGER.warning("The component will be started to allow the others to know about the error.")
 
         if self.is_client_closed:
-            self._rabbitmq_client = RabbitmqClient(**self._rabbitmq_parameters)
+            self._rabbitmq_client = self._create_message_client()
 
         LOGGER.info("Starting the component: '{}'".format(self.component_name))
         topics_to_listen = self._other_topics + [
@@ -542,6 +565,12 @@ class AbstractSimulationComponent:
         self._error_topic = error_message_topic
         self._other_topics = other_topics
 
+    def _create_message_client(self) -> Union[RabbitmqClient, LocalClient]:
+        """Returns a new client for the message bus the component uses."""
+        if self._message_bus == MESSAGE_BUS_LOCAL:
+            return LocalClient(**self._rabbitmq_parameters)
+        return RabbitmqClient(**self._rabbitmq_parameters)
+
     @staticmethod
     def __get_rabbitmq_parameters(**kwargs: Union[str, int, bool, None]) -> Dict[str, Union[str, int, bool]]:
         """Returns a dictionary of parameters that can be used with the RabbitmqClient constructor.
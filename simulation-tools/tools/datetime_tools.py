@@ -7,6 +7,8 @@
 """Module containing utility functions related to datetime values."""
 
 import datetime
+import functools
+import re
 from typing import Union
 
 from tools.tools import FullLogger
@@ -16,15 +18,20 @@ LOGGER = FullLogger(__name__)
 UTC_TIMEZONE_MARK = "Z"
 DIGITS_IN_MILLISECONDS = 3
 
+# The maximum number of cached results for each of the cached conversion functions
+DATETIME_CACHE_SIZE = 4096
+
+# The canonical ISO 8601 format used in the messages: YYYY-MM-DDTHH:MM:SS.mmmZ
+# The month, hour, minute and second ranges are checked by the pattern, the day is checked separately.
+CANONICAL_DATETIME_PATTERN = re.compile(
+    r"\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])T(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d\.\d{3}Z",
+    re.ASCII)
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
 
 def get_utcnow_in_milliseconds() -> str:
     """Returns the current ISO 8601 format datetime string in UTC timezone."""
-    isoformat_with_milliseconds = isoformat_to_milliseconds(datetime.datetime.utcnow().isoformat())
-    if isoformat_with_milliseconds is None:
-        LOGGER.error("Unexpected error when trying to get current time in ISO 8601 format")
-        return "1970-01-01T00:00:00.000Z"
-
-    return isoformat_with_milliseconds + UTC_TIMEZONE_MARK
+    return _format_utc_datetime(datetime.datetime.now(datetime.timezone.utc))
 
 
 def to_iso_format_datetime_string(datetime_value: Union[str, datetime.datetime]) -> Union[str, None]:
@@ -32,22 +39,18 @@ def to_iso_format_datetime_string(datetime_value: Union[str, datetime.datetime])
        Accepts either datetime objects or strings.
        Return None if the given values was invalid."""
     if isinstance(datetime_value, datetime.datetime):
-        isoformat_with_milliseconds = isoformat_to_milliseconds(
-            datetime_value.astimezone(datetime.timezone.utc).isoformat())
-        if isoformat_with_milliseconds is None:
-            return None
-        return isoformat_with_milliseconds + UTC_TIMEZONE_MARK
+        return _format_utc_datetime(datetime_value.astimezone(datetime.timezone.utc))
     if isinstance(datetime_value, str):
-        datetime_object = to_utc_datetime_object(datetime_value)
-        return to_iso_format_datetime_string(datetime_object)
+        return _string_to_iso_format(datetime_value)
     return None
 
 
 def to_utc_datetime_object(datetime_str: str) -> datetime.datetime:
     """Returns a datetime object corresponding to the given ISO 8601 formatted string."""
-    return datetime.datetime.fromisoformat(datetime_str.replace(UTC_TIMEZONE_MARK, "+00:00"))
+    return _string_to_datetime_object(datetime_str)
 
 
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
 def isoformat_to_milliseconds(datetime_str: str) -> Union[str, None]:
     """Returns the given ISO 8601 format datetime string in millisecond precision.
        Also removes timezone information."""
@@ -72,3 +75,54 @@ def isoformat_to_milliseconds(datetime_str: str) -> Union[str, None]:
         )
 
     return datetime_str + "." + "0" * DIGITS_IN_MILLISECONDS
+
+
+def clear_datetime_caches() -> None:
+    """Clears the cached results of the datetime conversion functions."""
+    _string_to_iso_format.cache_clear()
+    _string_to_datetime_object.cache_clear()
+    isoformat_to_milliseconds.cache_clear()
+
+
+def _is_canonical_datetime(datetime_str: str) -> bool:
+    """Returns True if the given string is a valid datetime in the canonical format YYYY-MM-DDTHH:MM:SS.mmmZ.
+       The check is done without creating any datetime objects."""
+    if CANONICAL_DATETIME_PATTERN.fullmatch(datetime_str) is None or datetime_str[0:4] == "0000":
+        return False
+
+    day_str = datetime_str[8:10]
+    if day_str < "29":
+        # every month has at least 28 days
+        return True
+    return int(day_str) <= _days_in_month(int(datetime_str[0:4]), int(datetime_str[5:7]))
+
+
+def _days_in_month(year: int, month: int) -> int:
+    """Returns the number of days in the given month."""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return DAYS_IN_MONTH[month - 1]
+
+
+def _format_utc_datetime(datetime_value: datetime.datetime) -> str:
+    """Returns the given UTC datetime object as a string in the canonical format YYYY-MM-DDTHH:MM:SS.mmmZ."""
+    return "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}.{:03d}{:s}".format(
+        datetime_value.year, datetime_value.month, datetime_value.day,
+        datetime_value.hour, datetime_value.minute, datetime_value.second,
+        datetime_value.microsecond // 1000, UTC_TIMEZONE_MARK)
+
+
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def _string_to_iso_format(datetime_str: str) -> str:
+    """Returns the given datetime string in the canonical format. Raises ValueError for invalid strings."""
+    if _is_canonical_datetime(datetime_str):
+        # the string is already in the canonical format
+        return datetime_str
+    return _format_utc_datetime(_string_to_datetime_object(datetime_str).astimezone(datetime.timezone.utc))
+
+
+@functools.lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def _string_to_datetime_object(datetime_str: str) -> datetime.datetime:
+    """Returns a datetime object corresponding to the given ISO 8601 formatted string.
+       Raises ValueError for invalid strings."""
+    return datetime.datetime.fromisoformat(datetime_str.replace(UTC_TIMEZONE_MARK, "+00:00"))
@@ -11,10 +11,8 @@ import datetime
 import operator
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-import motor.motor_asyncio
-import pymongo
-import pymongo.results
-
+# motor and pymongo are imported only when a MongodbClient instance is used
+# so that importing this module does not require loading the MongoDB libraries.
 from tools.datetime_tools import to_utc_datetime_object
 from tools.tools import EnvironmentVariableType, EnvironmentVariableValue, FullLogger, load_environmental_variables
 
@@ -159,6 +157,7 @@ class MongodbClient:
         self.__collection_identifier = str(kwargs["collection_identifier"])
 
         # Set up the Mongo database connection and the metadata collection
+        import motor.motor_asyncio  # pylint: disable=import-outside-toplevel
         self.__mongo_client = motor.motor_asyncio.AsyncIOMotorClient(**self.__connection_parameters)
         self.__mongo_database = self.__mongo_client[self.__database_name]
         self.__metadata_collection = self.__mongo_database[self.__metadata_collection_name]
@@ -232,6 +231,7 @@ class MongodbClient:
 
     async def update_metadata(self, simulation_id: str, **attribute_updates) -> bool:
         """Creates or updates the metadata information for a simulation."""
+        import pymongo.results  # pylint: disable=import-outside-toplevel
         if not isinstance(simulation_id, str):
             LOGGER.warning("Given simulation id was not of type str: '{:s}'".format(str(type(simulation_id))))
             return False
@@ -267,6 +267,7 @@ class MongodbClient:
 
     async def update_metadata_indexes(self):
         """Updates indexes to the metadata collection and adds them if they do not exist yet."""
+        import pymongo  # pylint: disable=import-outside-toplevel
         metadata_indexes = [
             pymongo.IndexModel(
                 [(self.__collection_identifier, pymongo.ASCENDING)],
@@ -297,6 +298,7 @@ class MongodbClient:
     async def add_simulation_indexes(self, simulation_id: str):
         """Adds or updates indexes to the collections containing the valid and invalid messages
            from the specified simulation."""
+        import pymongo  # pylint: disable=import-outside-toplevel
         # indexes for the valid messages collection
         simulation_indexes = [
             pymongo.IndexModel(
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""This module contains an in-process message bus that can be used instead of RabbitMQ message bus.
+
+   The message bus routes the messages using the same topic semantics as a RabbitMQ topic exchange.
+   All clients in the same process that use the same exchange name share the same message bus.
+"""
+
+import asyncio
+from typing import Dict, List, Set, Tuple, Union, cast
+
+from tools.callbacks import CallbackFunctionType, MessageCallback
+from tools.clients import create_batch_message, load_config_from_env_variables, validate_message
+from tools.message.abstract import BaseMessage
+from tools.topics import TopicTrie
+from tools.tools import FullLogger
+
+LOGGER = FullLogger(__name__)
+
+
+class LocalMessage:
+    """Class for a message delivered by the local message bus.
+       Has the same attributes as the incoming messages from RabbitMQ that MessageCallback uses."""
+    __slots__ = ["body", "routing_key"]
+
+    def __init__(self, body: bytes, routing_key: str):
+        self.body = body
+        self.routing_key = routing_key
+
+
+class LocalListener:
+    """Class for a topic listener of the local message bus. The messages are handled in the order they were sent."""
+    def __init__(self, topic_names: List[str], callback_class: MessageCallback):
+        self.__topic_names = topic_names
+        self.__callback_class = callback_class
+        self.__queue = asyncio.Queue()
+        self.__task = asyncio.create_task(self.__process_messages())
+
+    @property
+    def topic_names(self) -> List[str]:
+        """Returns the topic names the listener is listening to."""
+        return self.__topic_names
+
+    def deliver(self, message: LocalMessage) -> None:
+        """Adds the message to the listener queue."""
+        self.__queue.put_nowait(message)
+
+    async def join(self) -> None:
+        """Waits until all the delivered messages have been handled."""
+        await self.__queue.join()
+
+    async def close(self) -> None:
+        """Stops the listener. The messages that are still in the queue are discarded."""
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+
+    async def __process_messages(self) -> None:
+        while True:
+            message = await self.__queue.get()
+            try:
+                await self.__callback_class.callback(message)  # type: ignore
+            finally:
+                self.__queue.task_done()
+
+
+class LocalMessageBus:
+    """In-process message bus that routes the messages to the listeners using the topic exchange semantics.
+       Like with RabbitMQ, a message sent to a topic without any listeners is discarded."""
+    __message_buses: Dict[str, "LocalMessageBus"] = {}
+
+    def __init__(self, exchange_name: str):
+        self.__exchange_name = exchange_name
+        self.__topic_trie = TopicTrie()
+        self.__listeners: Set[LocalListener] = set()
+
+    @classmethod
+    def get_message_bus(cls, exchange_name: str) -> "LocalMessageBus":
+        """Returns the message bus for the given exchange name. Creates a new message bus on the first call."""
+        message_bus = cls.__message_buses.get(exchange_name, None)
+        if message_bus is None:
+            message_bus = LocalMessageBus(exchange_name)
+            cls.__message_buses[exchange_name] = message_bus
+        return message_bus
+
+    @property
+    def exchange_name(self) -> str:
+        """Returns the exchange name for the message bus."""
+        return self.__exchange_name
+
+    def subscribe(self, listener: LocalListener) -> None:
+        """Adds the listener to the message bus."""
+        self.__listeners.add(listener)
+        for topic_name in listener.topic_names:
+            self.__topic_trie.add(topic_name, listener)
+
+    def unsubscribe(self, listener: LocalListener) -> None:
+        """Removes the listener from the message bus."""
+        self.__listeners.discard(listener)
+        for topic_name in listener.topic_names:
+            self.__topic_trie.remove(topic_name, listener)
+
+    def publish(self, topic_name: str, message_bytes: bytes) -> int:
+        """Delivers the message to all the listeners with a matching topic pattern.
+           Returns the number of listeners the message was delivered to."""
+        listeners = self.__topic_trie.match(topic_name)
+        for listener in listeners:
+            cast(LocalListener, listener).deliver(LocalMessage(message_bytes, topic_name))
+        return len(listeners)
+
+    async def join(self) -> None:
+        """Waits until all the listeners have handled all the delivered messages."""
+        for listener in list(self.__listeners):
+            await listener.join()
+
+
+class LocalClient:
+    """Client for the in-process message bus with the same interface as RabbitmqClient.
+       Only the exchange attribute is used from the constructor arguments, all other attributes are ignored.
+       If the exchange is not given, the value is read from the environmental variable RABBITMQ_EXCHANGE.
+    """
+    EXCHANGE_ATTRIBUTE_NAME = "exchange"
+
+    def __init__(self, **kwargs):
+        exchange_name = kwargs.get(LocalClient.EXCHANGE_ATTRIBUTE_NAME, None)
+        if exchange_name is None:
+            exchange_name = load_config_from_env_variables()[LocalClient.EXCHANGE_ATTRIBUTE_NAME]
+
+        self.__message_bus = LocalMessageBus.get_message_bus(cast(str, exchange_name))
+        self.__listeners = []
+        self.__listened_topics = set()
+        self.__is_closed = False
+
+    async def close(self) -> None:
+        """Removes all the listeners of the client."""
+        await self.remove_listeners()
+        self.__is_closed = True
+
+    @property
+    def is_closed(self) -> bool:
+        """Returns True if the client has been closed."""
+        return self.__is_closed
+
+    @property
+    def exchange_name(self) -> str:
+        """Returns the exchange name that the client uses."""
+        return self.__message_bus.exchange_name
+
+    @property
+    def message_bus(self) -> LocalMessageBus:
+        """Returns the message bus that the client uses."""
+        return self.__message_bus
+
+    @property
+    def listened_topics(self) -> List[str]:
+        """Returns a list of the topics the client is currently listening."""
+        return list(self.__listened_topics)
+
+    def add_listener(self, topic_names: Union[str, List[str]], callback_function: CallbackFunctionType) -> None:
+        """Adds a new topic listener to the client for the given topic(s).
+           The callback_function is used in the same way as with RabbitmqClient.add_listener."""
+        if self.is_closed:
+            LOGGER.warning("Client is closed, no topic listener added.")
+            return
+
+        if isinstance(topic_names, str):
+            topic_names = [topic_names]
+
+        listener = LocalListener(list(topic_names), MessageCallback(callback_function, topic_names=topic_names))
+        self.__message_bus.subscribe(listener)
+        self.__listeners.append(listener)
+        self.__listened_topics.update(topic_names)
+
+    async def remove_listeners(self) -> None:
+        """Removes all topic listeners from the client."""
+        for listener in self.__listeners:
+            self.__message_bus.unsubscribe(listener)
+            await listener.close()
+
+        self.__listeners = []
+        self.__listened_topics = set()
+
+    async def send_message(self, topic_name: str, message_bytes: bytes) -> None:
+        """Sends the given message to the given topic. Assumes that the message is in bytes format."""
+        if self.is_closed:
+            LOGGER.warning("Message not sent because the client is closed.")
+            return
+
+        validated_topic_name, message_to_publish = validate_message(topic_name, message_bytes)
+        if validated_topic_name is None or message_to_publish is None:
+            return
+
+        self.__message_bus.publish(validated_topic_name, message_to_publish)
+        # allow the listeners to handle the message similarly to sending the message to RabbitMQ
+        await asyncio.sleep(0)
+
+    async def send_messages_as_batch(self, messages: List[Tuple[str, Union[bytes, BaseMessage]]],
+                                     batch_name: str) -> None:
+        """Sends the given (topic name, message) pairs wrapped into a single batch message.
+           Works in the same way as RabbitmqClient.send_messages_as_batch."""
+        batch_topic_name, batch_bytes = create_batch_message(messages, batch_name)
+        if batch_topic_name is None or batch_bytes is None:
+            for message_topic_name, message in messages:
+                await self.send_message(
+                    message_topic_name, message.bytes() if isinstance(message, BaseMessage) else message)
+            return
+
+        await self.send_message(batch_topic_name, batch_bytes)
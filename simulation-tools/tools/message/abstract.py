@@ -12,6 +12,11 @@ import datetime
 import json
 from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
+try:
+    import numpy
+except ImportError:  # numpy is an optional dependency for the array backed value blocks
+    numpy = None
+
 from tools.datetime_tools import get_utcnow_in_milliseconds, to_iso_format_datetime_string
 from tools.exceptions.messages import (
     MessageDateError, MessageIdError, MessageSourceError, MessageTypeError,
@@ -260,6 +265,7 @@ class BaseMessage():
         """Check that the value for quantity array block is valid.
 
         value:             The value to be checked.
+                           A list has to contain only float values and a NumPy array has to have a float data type.
                            A dictionary has to in a form that can be used to construct a QuantityArrayBlock object.
                            A QuantityArrayBlock has to have the expected unit.
         unit:              The unit of measure expected.
@@ -272,7 +278,8 @@ class BaseMessage():
             return can_be_none
 
         # extra check to avoid illegal value types
-        if not isinstance(value, (list, QuantityArrayBlock, dict)):
+        if not isinstance(value, (list, QuantityArrayBlock, dict)) and (
+                numpy is None or not isinstance(value, numpy.ndarray)):
             return False
 
         if isinstance(value, list):
@@ -281,6 +288,11 @@ class BaseMessage():
                     return False
             return value_array_check is None or value_array_check(value)
 
+        if numpy is not None and isinstance(value, numpy.ndarray):
+            if value.dtype.kind != "f" or not QuantityArrayBlock._check_values(value):
+                return False
+            return value_array_check is None or value_array_check(value)
+
         if isinstance(value, dict):
             if not QuantityArrayBlock.validate_json(value):
                 return False
@@ -294,7 +306,8 @@ class BaseMessage():
         """Sets value for a quantity array block attribute.
 
         message_attribute:     Name of the message attribute e.g. RatedCurrent whose value is set.
-        quantity_array_value:  The value to be set which can be either a dictionary, QuantityArrayBlock or None.
+        quantity_array_value:  The value to be set which can be either a list, a NumPy array, a dictionary,
+                               QuantityArrayBlock or None.
         A dictionary should follow the definition of time series block and it is converted to a QuantityArrayBlock.
 
         Throws MessageBlockError if the message_attribute has not been included in QUANTITY_ARRAY_BLOCK_ATTRIBUTES_FULL.
@@ -305,7 +318,8 @@ class BaseMessage():
             raise MessageBlockError(
                 "Attribute {:s} is not registered as a quantity array block".format(message_attribute))
 
-        if isinstance(quantity_array_value, list):
+        if isinstance(quantity_array_value, list) or (
+                numpy is not None and isinstance(quantity_array_value, numpy.ndarray)):
             unit = self.QUANTITY_ARRAY_BLOCK_ATTRIBUTES_FULL[message_attribute]
             quantity_array_value = QuantityArrayBlock(Values=quantity_array_value, UnitOfMeasure=unit)
 
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""This module contains the message class for the batch messages that wrap several messages into one."""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple, Union
+
+from tools.exceptions.messages import MessageValueError
+from tools.message.abstract import BaseMessage
+from tools.tools import FullLogger
+
+LOGGER = FullLogger(__name__)
+
+
+class BatchMessage(BaseMessage):
+    """Class for a batch message that contains several messages with their own topics.
+       The batch message is an envelope that allows a component to publish many small messages
+       with a single publish to the message bus. MessageCallback unpacks the received batch messages
+       and handles each contained message separately with the topic given in the batch.
+
+       Each item in the Messages attribute is a dictionary with the attributes:
+       - "Topic": the topic (routing key) for the contained message
+       - "Message": the contained message in JSON format
+
+       The batches are published to dedicated batch topics starting with "Batch." (see get_topic_name) instead of
+       the topics of the contained messages. A listener receives the contained messages of a batch only if it
+       listens to the batch topic in addition to its normal topics. The listeners that only listen to the topics
+       of the contained messages do not receive the batch, so batching should only be used for messages whose
+       consumers listen to the batch topic.
+    """
+    CLASS_MESSAGE_TYPE = "Batch"
+    TOPIC_PREFIX = "Batch"
+    TOPIC_SEPARATOR = "."
+    MESSAGE_TYPE_CHECK = True
+
+    MESSAGE_ATTRIBUTES = {
+        "Messages": "messages"
+    }
+    OPTIONAL_ATTRIBUTES = []
+
+    TOPIC_ATTRIBUTE = "Topic"
+    MESSAGE_ATTRIBUTE = "Message"
+
+    MESSAGE_ATTRIBUTES_FULL = {
+        **BaseMessage.MESSAGE_ATTRIBUTES_FULL,
+        **MESSAGE_ATTRIBUTES
+    }
+    OPTIONAL_ATTRIBUTES_FULL = BaseMessage.OPTIONAL_ATTRIBUTES_FULL + OPTIONAL_ATTRIBUTES
+
+    def __init__(self, **kwargs):
+        """Only arguments "Type", "SimulationId", "Timestamp" and "Messages" are considered.
+           The contained messages can be given either in JSON format or as message objects.
+           If one the arguments is not valid, throws an instance of MessageError.
+        """
+        super().__init__(**kwargs)
+
+    @property
+    def messages(self) -> List[Dict[str, Any]]:
+        """The contained messages as a list of dictionaries with the attributes "Topic" and "Message"."""
+        return self.__messages
+
+    @messages.setter
+    def messages(self, messages: List[Dict[str, Union[str, Dict[str, Any], BaseMessage]]]):
+        if not self._check_messages(messages):
+            raise MessageValueError("'{:s}' is an invalid list of messages for a batch".format(str(messages)))
+
+        self.__messages = [
+            {
+                self.__class__.TOPIC_ATTRIBUTE: message_item[self.__class__.TOPIC_ATTRIBUTE],
+                self.__class__.MESSAGE_ATTRIBUTE: (
+                    message_item[self.__class__.MESSAGE_ATTRIBUTE].json()
+                    if isinstance(message_item[self.__class__.MESSAGE_ATTRIBUTE], BaseMessage)
+                    else message_item[self.__class__.MESSAGE_ATTRIBUTE]
+                )
+            }
+            for message_item in messages
+        ]
+
+    def get_messages(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns the contained messages as a list of (topic name, message in JSON format) tuples."""
+        return [
+            (message_item[self.__class__.TOPIC_ATTRIBUTE], message_item[self.__class__.MESSAGE_ATTRIBUTE])
+            for message_item in self.messages
+        ]
+
+    def __eq__(self, other: Any) -> bool:
+        return (
+            super().__eq__(other) and
+            isinstance(other, BatchMessage) and
+            self.messages == other.messages
+        )
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    @classmethod
+    def get_topic_name(cls, batch_name: str) -> str:
+        """Returns the batch topic for the given batch name, e.g. "Batch.Grid" for "Grid".
+           If the given name is already a batch topic, it is returned as is."""
+        if cls.is_batch_topic(batch_name):
+            return batch_name
+        return cls.TOPIC_SEPARATOR.join((cls.TOPIC_PREFIX, batch_name))
+
+    @classmethod
+    def is_batch_topic(cls, topic_name: str) -> bool:
+        """Returns True if the given topic name or topic pattern is a batch topic."""
+        return topic_name.startswith(cls.TOPIC_PREFIX + cls.TOPIC_SEPARATOR)
+
+    @classmethod
+    def _check_messages(cls, messages: List[Dict[str, Union[str, Dict[str, Any], BaseMessage]]]) -> bool:
+        if not isinstance(messages, list):
+            return False
+
+        for message_item in messages:
+            if not isinstance(message_item, dict):
+                return False
+            topic_name = message_item.get(cls.TOPIC_ATTRIBUTE, None)
+            if not isinstance(topic_name, str) or not topic_name:
+                return False
+            if not isinstance(message_item.get(cls.MESSAGE_ATTRIBUTE, None), (dict, BaseMessage)):
+                return False
+
+        return True
+
+    @classmethod
+    def from_messages(cls, messages: List[Tuple[str, Union[Dict[str, Any], BaseMessage]]],
+                      **kwargs) -> BatchMessage:
+        """Returns a batch message containing the given (topic name, message) pairs.
+           The other attributes for the batch message can be given as keyword arguments.
+           If SimulationId is not given, the simulation id from the first contained message is used.
+        """
+        message_list = [
+            {cls.TOPIC_ATTRIBUTE: topic_name, cls.MESSAGE_ATTRIBUTE: message}
+            for topic_name, message in messages
+        ]
+
+        simulation_id = kwargs.get("SimulationId", None)
+        if simulation_id is None and messages:
+            first_message = messages[0][1]
+            simulation_id = (
+                first_message.simulation_id if isinstance(first_message, BaseMessage)
+                else first_message.get("SimulationId", None))
+
+        return cls(**{
+            **kwargs,
+            "Type": cls.CLASS_MESSAGE_TYPE,
+            "SimulationId": simulation_id,
+            "Messages": message_list
+        })
+
+    @classmethod
+    def from_json(cls, json_message: Dict[str, Any]) -> Union[BatchMessage, None]:
+        """Returns a class object created based on the given JSON attributes.
+           If the given JSON does not contain valid values, returns None."""
+        if cls.validate_json(json_message):
+            return cls(**json_message)
+        return None
+
+
+BatchMessage.register_to_factory()
@@ -12,15 +12,24 @@ Defines various message attribute value blocks that different kinds of messages
 from __future__ import annotations
 import datetime
 import json
-from typing import Any, Dict, List, Union
+import re
+from typing import Any, Dict, List, Tuple, Union
 
-from tools.datetime_tools import to_iso_format_datetime_string
+try:
+    import numpy
+except ImportError:  # numpy is an optional dependency for the array backed value blocks
+    numpy = None
+
+from tools.datetime_tools import DIGITS_IN_MILLISECONDS, UTC_TIMEZONE_MARK, to_iso_format_datetime_string
 from tools.exceptions.messages import MessageDateError, MessageError, MessageValueError, MessageUnitValueError
 from tools.message.unit import UnitCode
-from tools.tools import FullLogger
+from tools.tools import FullLogger, load_environmental_variables
 
 LOGGER = FullLogger(__name__)
 
+# environment variable that enables the NumPy array storage for the number value lists, see ValueArrayBlock
+SIMULATION_NUMPY_STORAGE = "SIMULATION_NUMPY_STORAGE"
+
 
 class QuantityBlock():
     '''
@@ -132,8 +141,18 @@ class ValueArrayBlock:
     Represents an array of values with an associated unit of measurement.
     The allowed value types are int, float, str and bool. The value array can
     contain only one type of values where int and float together are seen as a number value.
+
+    The values can also be given as a one dimensional NumPy array (if NumPy is available).
+    The array is stored as is and can be accessed without copying through the array property.
+    If NUMPY_STORAGE is True, lists of number values are also converted to NumPy arrays. By default it is
+    set from the environment variable SIMULATION_NUMPY_STORAGE when the module is imported, and a subclass
+    can set it explicitly for its own blocks.
+    In JSON format the values are always given as a list.
     """
     ALLOWED_VALUE_TYPES = [int, float, str, bool]
+    # The allowed NumPy array data type kinds, https://numpy.org/doc/stable/reference/generated/numpy.dtype.kind.html
+    ALLOWED_ARRAY_KINDS = "biufU"
+    NUMBER_ARRAY_KINDS = "iuf"
 
     # name of block attribute which contains the array of number values
     VALUES_ATTRIBUTE = 'Values'
@@ -142,8 +161,10 @@ class ValueArrayBlock:
 
     # By default the unit code validator is not in use.
     UNIT_CODE_VALIDATION = False
+    # By default number value lists are stored as lists.
+    NUMPY_STORAGE = load_environmental_variables((SIMULATION_NUMPY_STORAGE, bool, False))[SIMULATION_NUMPY_STORAGE]
 
-    def __init__(self, Values: Union[List[Union[int, float]], List[str], List[bool]], UnitOfMeasure: str):
+    def __init__(self, Values: Union[List[Union[int, float]], List[str], List[bool], Any], UnitOfMeasure: str):
         """Creates a new value array block. Throws an exception if parameters contain invalid values."""
         self.values = Values
         self.unit_of_measure = UnitOfMeasure
@@ -154,10 +175,19 @@ class ValueArrayBlock:
         return self.__unit_of_measure
 
     @property
-    def values(self) -> Union[List[Union[int, float]], List[str], List[bool]]:
-        """The values for the value array block"""
+    def values(self) -> Union[List[Union[int, float]], List[str], List[bool], Any]:
+        """The values for the value array block.
+           Either a list or a NumPy array depending on how the values were given."""
         return self.__values
 
+    @property
+    def array(self) -> Any:
+        """The values for the value array block as a read-only NumPy array.
+           If the values are stored as a NumPy array, a view to it is returned without copying the values.
+           Otherwise, a new array is created from the value list.
+           Raises RuntimeError if NumPy is not available."""
+        return _as_read_only_array(self.values)
+
     @unit_of_measure.setter
     def unit_of_measure(self, unit_of_measure: str):
         if not self._check_unit_of_measure(unit_of_measure):
@@ -165,7 +195,8 @@ class ValueArrayBlock:
         self.__unit_of_measure = unit_of_measure
 
     @values.setter
-    def values(self, values: Union[List[Union[int, float]], List[str], List[bool]]):
+    def values(self, values: Union[List[Union[int, float]], List[str], List[bool], Any]):
+        values = self._convert_values(values)
         if not self._check_values(values):
             raise MessageValueError("'{:s}' is not a valid for value array block".format(str(values)))
         self.__values = values
@@ -178,7 +209,25 @@ class ValueArrayBlock:
         )
 
     @classmethod
-    def _check_values(cls, values: Union[List[Union[int, float]], List[str], List[bool]]) -> bool:
+    def _convert_values(cls, values: Any) -> Any:
+        """Converts a list of number values to a NumPy array if NUMPY_STORAGE is enabled.
+           Only lists whose values are all int or all float are converted so that the JSON format does not change.
+           Any other value is returned as is."""
+        if (cls.NUMPY_STORAGE and numpy is not None and isinstance(values, list) and values and
+                type(values[0]) in (int, float) and
+                all(type(value) is type(values[0]) for value in values)):  # pylint: disable=unidiomatic-typecheck
+            try:
+                array_values = numpy.array(values)
+            except (ValueError, TypeError):
+                return values
+            if array_values.dtype.kind in cls.NUMBER_ARRAY_KINDS:
+                return array_values
+        return values
+
+    @classmethod
+    def _check_values(cls, values: Union[List[Union[int, float]], List[str], List[bool], Any]) -> bool:
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            return cls._check_array_values(values)
         if not isinstance(values, list):
             return False
         if not values:  # accept empty list
@@ -199,19 +248,36 @@ class ValueArrayBlock:
                 return False
         return True
 
+    @classmethod
+    def _check_array_values(cls, values: Any) -> bool:
+        """Checks the data type and the dimension of the given NumPy array.
+           Float arrays are only accepted if all the values are finite."""
+        if values.ndim != 1:
+            return False
+        if values.size == 0:  # accept empty array
+            return True
+        if values.dtype.kind not in cls.ALLOWED_ARRAY_KINDS:
+            return False
+        if values.dtype.kind == "f":
+            return bool(numpy.isfinite(values).all())
+        return True
+
     def json(self) -> Dict[str, Any]:
         """Returns the time series attribute as JSON object."""
+        values = self.values
+        if not isinstance(values, list):
+            values = values.tolist()
         return {
             self.UNIT_OF_MEASURE_ATTRIBUTE: self.unit_of_measure,
-            self.VALUES_ATTRIBUTE: self.values
+            self.VALUES_ATTRIBUTE: values
         }
 
     def __eq__(self, other: Any) -> bool:
-        return (
-            isinstance(other, self.__class__) and
-            self.unit_of_measure == other.unit_of_measure and
-            self.values == other.values
-        )
+        if not isinstance(other, self.__class__) or self.unit_of_measure != other.unit_of_measure:
+            return False
+        if isinstance(self.values, list) and isinstance(other.values, list):
+            return self.values == other.values
+        return bool(numpy.array_equal(self.array, other.array))
 
     def __str__(self) -> str:
         return json.dumps(self.json())
@@ -248,21 +314,48 @@ class QuantityArrayBlock(ValueArrayBlock):
     Represents an array of number values with an associated unit of measurement.
     """
     ALLOWED_VALUE_TYPES = [int, float]
+    ALLOWED_ARRAY_KINDS = ValueArrayBlock.NUMBER_ARRAY_KINDS
 
     @property
-    def values(self) -> List[Union[int, float]]:
+    def values(self) -> Union[List[Union[int, float]], Any]:
         """The values for the value array block"""
         return self.__values
 
     @values.setter
-    def values(self, values: List[Union[int, float]]):
+    def values(self, values: Union[List[Union[int, float]], Any]):
+        values = self._convert_values(values)
         if not self._check_values(values):
             raise MessageValueError("'{:s}' is not a valid for value array block".format(str(values)))
         self.__values = values
 
 
+# The NumPy data type used for the time index values
+DATETIME64_TYPE = "datetime64[ms]"
+# ISO 8601 formatted date times in UTC that can be converted directly with NumPy, e.g. 2020-01-01T12:00:00.000Z
+UTC_DATETIME_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.(\d{1,6}))?Z")
+
+
+def _as_read_only_array(values: Any) -> Any:
+    """Returns the given list or NumPy array as a read-only NumPy array.
+       For NumPy arrays the returned array is a view that shares the memory with the original array."""
+    if numpy is None:
+        raise RuntimeError("NumPy is required for accessing the values as an array")
+
+    if isinstance(values, numpy.ndarray):
+        array_view = values.view()
+    else:
+        array_view = numpy.array(values)
+    array_view.flags.writeable = False
+    return array_view
+
+
 class TimeSeriesBlock():
-    """Class for containing one time series block for a message in the simulation platform. """
+    """Class for containing one time series block for a message in the simulation platform.
+
+       If NumPy is available, the time index is stored in columnar form as a datetime64[ms] array and
+       it is converted to ISO 8601 formatted strings only when needed, for example, when serializing the block.
+       The value series are stored as ValueArrayBlock objects (see ValueArrayBlock.NUMPY_STORAGE).
+    """
     TIMEINDEX_ATTRIBUTE = "TimeIndex"
     SERIES_ATTRIBUTE = "Series"
 
@@ -275,8 +368,18 @@ class TimeSeriesBlock():
     @property
     def time_index(self) -> List[str]:
         """The list of date times for the time series in ISO 8601 format (UTC)."""
+        if self.__time_index is None:
+            self.__time_index = _datetime64_to_iso_strings(self.__time_array)
         return self.__time_index
 
+    @property
+    def time_index_array(self) -> Any:
+        """The date times for the time series as a read-only NumPy datetime64[ms] array (UTC).
+           Raises RuntimeError if NumPy is not available."""
+        if self.__time_array is None:
+            self.__time_array = _iso_strings_to_datetime64(self.__time_index)
+        return _as_read_only_array(self.__time_array)
+
     @property
     def series(self) -> Dict[str, ValueArrayBlock]:
         """The list of the time series values as dictionary with the series name as keys and
@@ -296,7 +399,14 @@ class TimeSeriesBlock():
             # Check that the time series list is the same length as the first value series list.
             expected_list_length = len(self.series[next(iter(self.series))].values)
 
-        if self._check_time_index(time_index, expected_list_length):
+        # Fast path: UTC strings are validated and converted with NumPy without creating datetime objects.
+        time_array, is_normalized = _utc_strings_to_datetime64(time_index)
+        if time_array is not None and (expected_list_length is None or len(time_array) == expected_list_length):
+            self.__time_array = time_array
+            # the original list can be used as is if it is already in the normalized format
+            self.__time_index = list(time_index) if is_normalized else None
+
+        elif self._check_time_index(time_index, expected_list_length):
             new_time_index_list = []
             for datetime_value in time_index:
                 iso_format_string = to_iso_format_datetime_string(datetime_value)
@@ -305,17 +415,19 @@ class TimeSeriesBlock():
                 else:
                     raise MessageDateError("'{:s}' is not a valid date time value".format(str(datetime_value)))
             self.__time_index = new_time_index_list
+            self.__time_array = None
 
         else:
             raise MessageDateError("'{:s}' is not a valid list of date times".format(str(time_index)))
 
     @series.setter
     def series(self, series: Dict[str, Union[ValueArrayBlock, Dict[str, Any]]]):
-        if getattr(self, "time_index", None) is None:
+        if getattr(self, "_TimeSeriesBlock__time_index", None) is None and \
+                getattr(self, "_TimeSeriesBlock__time_array", None) is None:
             expected_list_length = None
         else:
             # Check that all the values series lists are the same length as the time series list.
-            expected_list_length = len(self.time_index)
+            expected_list_length = len(self)
 
         if not self._check_series(series, expected_list_length):
             raise MessageValueError("'{:s}' is not a valid dictionary of time series values".format(str(series)))
@@ -329,12 +441,75 @@ class TimeSeriesBlock():
 
     def add_series(self, series_name: str, series_values: ValueArrayBlock):
         """Adds a new or replaces an old value series for the TimeSeriesBlock."""
-        if self._check_series({series_name: series_values}, len(self.__time_index)):
+        if self._check_series({series_name: series_values}, len(self)):
             self.series[series_name] = series_values
         else:
             raise MessageValueError("'{:s}' is not a valid value series for {:s}".format(
                 str(series_name), str(series_values)))
 
+    def slice(self, start_time: Union[str, datetime.datetime, None] = None,
+              end_time: Union[str, datetime.datetime, None] = None) -> TimeSeriesBlock:
+        """Returns a new TimeSeriesBlock that contains the values for the time interval [start_time, end_time).
+           If start_time or end_time is None, the interval is not limited from that end.
+           Raises MessageDateError if the given times are invalid or the slice would not contain any values.
+           Raises RuntimeError if NumPy is not available."""
+        time_array = self.time_index_array
+        selection = numpy.ones(len(time_array), dtype=bool)
+        if start_time is not None:
+            selection &= time_array >= _to_datetime64(start_time)
+        if end_time is not None:
+            selection &= time_array < _to_datetime64(end_time)
+
+        if not selection.any():
+            raise MessageDateError("The time series block has no values between {} and {}".format(
+                start_time, end_time))
+
+        return self.__class__(
+            TimeIndex=_datetime64_to_iso_strings(time_array[selection]),
+            Series={
+                series_name: _select_values(series_values, selection)
+                for series_name, series_values in self.series.items()
+            }
+        )
+
+    def resample(self, time_index: Union[List[Union[str, datetime.datetime]], Any]) -> TimeSeriesBlock:
+        """Returns a new TimeSeriesBlock where the value series have been resampled to the given time index.
+           Each value in the time series is assumed to be valid until the next time index, i.e. the value
+           for each new time index is the latest value at or before that time.
+           The new time index can be given as a list of date times or as a NumPy datetime64 array.
+           Raises MessageDateError if the new time index contains times before the first time index
+           or if the current time index is not in ascending order.
+           Raises RuntimeError if NumPy is not available."""
+        time_array = self.time_index_array
+        if numpy is not None and isinstance(time_index, numpy.ndarray):
+            new_time_array = time_index.astype(DATETIME64_TYPE)
+        else:
+            new_time_array = numpy.array([_to_datetime64(time_value) for time_value in time_index],
+                                         dtype=DATETIME64_TYPE)
+
+        if len(time_array) > 1 and (time_array[1:] < time_array[:-1]).any():
+            raise MessageDateError("Only time series blocks with ascending time index can be resampled")
+        if len(new_time_array) == 0:
+            raise MessageDateError("The new time index for resampling cannot be empty")
+
+        positions = numpy.searchsorted(time_array, new_time_array, side="right") - 1
+        if (positions < 0).any():
+            raise MessageDateError("The new time index starts before the time series block")
+
+        return self.__class__(
+            TimeIndex=_datetime64_to_iso_strings(new_time_array),
+            Series={
+                series_name: _select_values(series_values, positions)
+                for series_name, series_values in self.series.items()
+            }
+        )
+
+    def __len__(self) -> int:
+        """Returns the number of time index values in the time series block."""
+        if self.__time_index is not None:
+            return len(self.__time_index)
+        return len(self.__time_array)
+
     @classmethod
     def _check_time_index(cls, time_index: List[Union[str, datetime.datetime]], list_length: Union[int, None] = None) -> bool:
         if not isinstance(time_index, list):
@@ -385,11 +560,13 @@ class TimeSeriesBlock():
         }
 
     def __eq__(self, other: Any) -> bool:
-        return (
-            isinstance(other, self.__class__) and
-            self.time_index == other.time_index and
-            self.series == other.series
-        )
+        if not isinstance(other, self.__class__) or len(self) != len(other):
+            return False
+        if numpy is not None:
+            same_time_index = bool(numpy.array_equal(self.time_index_array, other.time_index_array))
+        else:
+            same_time_index = self.time_index == other.time_index
+        return same_time_index and self.series == other.series
 
     def __str__(self) -> str:
         return json.dumps(self.json())
@@ -416,4 +593,72 @@ class TimeSeriesBlock():
            If the given JSON is not validated returns None."""
         if cls.validate_json(json_timeseries_block):
             return cls(**json_timeseries_block)
-        return None
\ No newline at end of file
+        return None
+
+
+def _utc_strings_to_datetime64(time_index: Any) -> Tuple[Any, bool]:
+    """Converts a list of ISO 8601 formatted UTC date time strings to a datetime64[ms] array.
+       Returns a tuple (array, is_normalized) where is_normalized tells whether the strings were already
+       in the normalized format with millisecond precision.
+       Returns (None, False) if NumPy is not available or the list contains values in any other format."""
+    if numpy is None or not isinstance(time_index, list):
+        return None, False
+
+    is_normalized = True
+    for datetime_value in time_index:
+        if not isinstance(datetime_value, str):
+            return None, False
+        match = UTC_DATETIME_PATTERN.fullmatch(datetime_value)
+        if match is None:
+            return None, False
+        if is_normalized and (match.group(1) is None or len(match.group(1)) != DIGITS_IN_MILLISECONDS):
+            is_normalized = False
+
+    try:
+        # parse with microsecond precision so that the extra digits are truncated like with the string values
+        time_array = numpy.array(
+            [datetime_value[:-1] for datetime_value in time_index],
+            dtype="datetime64[us]"
+        ).astype(DATETIME64_TYPE)
+    except ValueError:
+        return None, False
+
+    return time_array, is_normalized
+
+
+def _iso_strings_to_datetime64(time_index: List[str]) -> Any:
+    """Converts a list of normalized ISO 8601 formatted UTC date time strings to a datetime64[ms] array."""
+    if numpy is None:
+        raise RuntimeError("NumPy is required for accessing the time index as an array")
+    return numpy.array([datetime_value[:-1] for datetime_value in time_index], dtype=DATETIME64_TYPE)
+
+
+def _datetime64_to_iso_strings(time_array: Any) -> List[str]:
+    """Converts a datetime64 array to a list of ISO 8601 formatted UTC date time strings."""
+    return [
+        datetime_value + UTC_TIMEZONE_MARK
+        for datetime_value in numpy.datetime_as_string(time_array, unit="ms").tolist()
+    ]
+
+
+def _to_datetime64(datetime_value: Union[str, datetime.datetime]) -> Any:
+    """Converts a single date time value to a NumPy datetime64[ms] value.
+       Raises MessageDateError if the given value is not a valid date time."""
+    try:
+        iso_format_string = to_iso_format_datetime_string(datetime_value)
+    except ValueError:
+        iso_format_string = None
+    if iso_format_string is None:
+        raise MessageDateError("'{:s}' is not a valid date time value".format(str(datetime_value)))
+    return numpy.datetime64(iso_format_string[:-1], "ms")
+
+
+def _select_values(value_block: ValueArrayBlock, selection: Any) -> ValueArrayBlock:
+    """Returns a new value array block that contains the selected values from the given block.
+       The selection can be a boolean mask or an array of indexes. The storage type (list or array) is kept."""
+    selected_values = value_block.array[selection]
+    if isinstance(value_block.values, list):
+        selected_values = selected_values.tolist()
+    else:
+        selected_values = selected_values.copy()
+    return value_block.__class__(Values=selected_values, UnitOfMeasure=value_block.unit_of_measure)
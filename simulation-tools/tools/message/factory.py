@@ -8,7 +8,8 @@
    from the JSON contents without explicitly specifying the message class."""
 
 from __future__ import annotations
-from typing import List, Type, TYPE_CHECKING
+import importlib
+from typing import Dict, List, Tuple, Type, TYPE_CHECKING
 
 from tools.tools import FullLogger
 
@@ -23,9 +24,12 @@ LOGGER = FullLogger(__name__)
 class MessageFactory:
     """Class for creating instances of non-abstract message classes,
        i.e. subclasses of BaseMessage that have non-empty definition for class constant CLASS_MESSAGE_TYPE.
+
+       Message classes can also be registered lazily by the message type name and the module and class names.
+       The module for a lazily registered message type is imported only when the message type is first used.
     """
-    # TODO: implement unit test for the message factory (in addition to what callback unit test do)
     __message_types = {}
+    __lazy_message_types: Dict[str, Tuple[str, str]] = {}
 
     @classmethod
     def register_message_type(cls, message_type: Type[BaseMessage]):
@@ -41,11 +45,50 @@ class MessageFactory:
                 message_type.CLASS_MESSAGE_TYPE))
         else:
             cls.__message_types[message_type.CLASS_MESSAGE_TYPE] = message_type
+            cls.__lazy_message_types.pop(message_type.CLASS_MESSAGE_TYPE, None)
+
+    @classmethod
+    def register_lazy_message_type(cls, message_type_name: str, module_name: str, class_name: str):
+        """Registers the message type to the message factory without importing the message class.
+           The module module_name is imported when the message type is used for the first time and
+           the message class class_name from the module is registered to the factory if the module did not do it.
+           Registration will fail if the message type has already been registered to the factory.
+        """
+        if message_type_name in cls.__message_types or message_type_name in cls.__lazy_message_types:
+            LOGGER.warning("Type {:s} has already been registered to the message factory".format(message_type_name))
+        else:
+            cls.__lazy_message_types[message_type_name] = (module_name, class_name)
 
     @classmethod
     def get_message_types(cls) -> List[str]:
         """Returns the supported message types as a list of strings."""
-        return list(cls.__message_types)
+        return list(cls.__message_types) + list(cls.__lazy_message_types)
+
+    @classmethod
+    def get_message_class(cls, message_type: str) -> Type[BaseMessage]:
+        """Returns the message class corresponding to the given message type.
+           Imports the message class if the message type has been registered lazily.
+           Raises TypeError if the message type is not supported by the factory.
+        """
+        message_class = cls.__message_types.get(message_type, None)
+        if message_class is not None:
+            return message_class
+
+        if message_type not in cls.__lazy_message_types:
+            raise TypeError("Message type {:s} is not supported by the factory".format(str(message_type)))
+
+        module_name, class_name = cls.__lazy_message_types.pop(message_type)
+        try:
+            message_module = importlib.import_module(module_name)
+            if message_type not in cls.__message_types:
+                cls.register_message_type(getattr(message_module, class_name))
+        except (ImportError, AttributeError) as import_error:
+            LOGGER.error("Could not import the message class for type {:s}: {:s}".format(
+                message_type, str(import_error)))
+
+        if message_type not in cls.__message_types:
+            raise TypeError("Message type {:s} is not supported by the factory".format(str(message_type)))
+        return cls.__message_types[message_type]
 
     @classmethod
     def get_message(cls, message_type: str = None, **kwargs) -> BaseMessage:
@@ -62,7 +105,15 @@ class MessageFactory:
 
         if message_type is None:
             raise TypeError("No message type found")
-        if message_type not in cls.__message_types:
-            raise TypeError("Message type {:s} is not supported by the factory".format(str(message_type)))
 
-        return cls.__message_types[message_type](**kwargs)
+        return cls.get_message_class(message_type)(**kwargs)
+
+
+# The message types defined in the simulation-tools library.
+MessageFactory.register_lazy_message_type("General", "tools.message.general", "GeneralMessage")
+MessageFactory.register_lazy_message_type("Result", "tools.message.general", "ResultMessage")
+MessageFactory.register_lazy_message_type("Epoch", "tools.message.epoch", "EpochMessage")
+MessageFactory.register_lazy_message_type("SimState", "tools.message.simulation_state", "SimulationStateMessage")
+MessageFactory.register_lazy_message_type("Status", "tools.message.status", "StatusMessage")
+MessageFactory.register_lazy_message_type("Example", "tools.message.example", "ExampleMessage")
+MessageFactory.register_lazy_message_type("Batch", "tools.message.batch", "BatchMessage")
@@ -9,135 +9,272 @@
 from __future__ import annotations
 import csv
 import pathlib
-import subprocess
-from typing import Dict, Union
+import re
+import types
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Union
 
 from tools.tools import FullLogger
 
 LOGGER = FullLogger(__name__)
 
+# The resource files are located relative to this file so that the current working directory does not matter.
+RESOURCE_DIRECTORY = pathlib.Path(__file__).resolve().parents[2] / "resources"
+
+
+def read_csv_resource(file_name: str, columns: List[str], separator: str = ";") -> List[Tuple[str, ...]]:
+    """Reads the given columns from a resource file. Returns a list of tuples containing the column values.
+       Any errors while reading the file are logged and an empty list is returned."""
+    resource_file = RESOURCE_DIRECTORY / file_name
+    try:
+        with open(resource_file, mode="r", encoding="UTF-8") as csv_file:
+            csv_reader = csv.DictReader(csv_file, delimiter=separator)
+            return [
+                tuple(csv_row[column] for column in columns)
+                for csv_row in csv_reader
+            ]
+
+    except KeyError as key_error:
+        LOGGER.error("KeyError '{:s}' while trying to read unit codes from file {:s}".format(
+            str(key_error), str(resource_file)))
+
+    except csv.Error as csv_error:
+        LOGGER.error("csv.Error '{:s}' while trying to read unit codes from file {:s}".format(
+            str(csv_error), str(resource_file)))
+
+    except OSError as os_error:
+        LOGGER.error("OSError '{:s}' while trying to read file {:s}".format(
+            str(os_error), str(resource_file)))
+
+    return []
+
 
 class UnitCode:
-    """Class for verifying a string as a valid UCUM (The Unified Code for Units of Measure) code."""
+    """Class for verifying a string as a valid UCUM (The Unified Code for Units of Measure) code.
+
+       The unit codes are first checked against the premade unit code lists. Other codes are validated
+       in-process by parsing them according to the UCUM syntax using the UCUM atoms and prefixes listed
+       in the resource files. The validation results are cached.
+    """
 
     # Parameters related to the premade unit code files.
-    UNIT_CODE_FILE_PATH = "resources"
+    UNIT_CODE_FILE_PATH = str(RESOURCE_DIRECTORY)
     UNIT_CODE_FILE_NAMES = ["unit_codes.csv", "unit_codes_addition.csv"]
     UNIT_CODE_FILE_COLUMN_SEPARATOR = ";"
     UNIT_CODE_FILE_CODE_COLUMN = "Code"
     UNIT_CODE_FILE_DESCRIPTION_COLUMN = "Description"
 
-    # Name of the Javascript UCUM unit code validator.
-    # The use of the validator requires that NodeJS is installed in the system.
-    JAVASCRIPT_VALIDATOR = "validator.js"
-    JAVASCRIPT_SYSTEM_CALL = "nodejs"
-    VALIDATOR_VALID_TEXT = "valid"
-    VALIDATOR_RESULT_SEPARATOR = ";"
+    # Parameters related to the UCUM atom and prefix files used by the unit code parser.
+    UNIT_ATOM_FILE_NAME = "ucum_atoms.csv"
+    UNIT_PREFIX_FILE_NAME = "ucum_prefixes.csv"
+    UNIT_ATOM_FILE_METRIC_COLUMN = "Metric"
+    UNIT_ATOM_METRIC_VALUE = "yes"
+
+    # The maximum number of invalid unit codes that are remembered.
+    INVALID_UNIT_CODE_CACHE_SIZE = 1024
 
-    UNIT_CODE_LIST = {}
+    # The premade unit codes with descriptions (read-only).
+    UNIT_CODE_LIST: Mapping[str, str] = types.MappingProxyType({})
+    # The UCUM atoms (code -> (description, is metric)) and prefixes (code -> description) (read-only).
+    UNIT_ATOMS: Mapping[str, Tuple[str, bool]] = types.MappingProxyType({})
+    UNIT_PREFIXES: Mapping[str, str] = types.MappingProxyType({})
+
+    # The unit codes that have been validated by the parser and the codes that have been found invalid.
+    __validated_codes: Dict[str, str] = {}
+    __invalid_codes: Set[str] = set()
 
     @classmethod
     def is_valid(cls, unit_code: str) -> bool:
         """Returns True if unit_code is a valid UCUM code."""
-        if not cls.UNIT_CODE_LIST:
-            cls.UNIT_CODE_LIST = cls.__return_unit_code_list()
-
-        # Check against the preloaded unit codes.
-        if unit_code in cls.UNIT_CODE_LIST:
-            return True
-
-        # Use Javascript library ucum-lhc to validate the unit code.
-        javascript_validator = cls.__find_resource_filename(cls.UNIT_CODE_FILE_PATH, cls.JAVASCRIPT_VALIDATOR)
-        if javascript_validator is None:
-            # Could not find the JavaScript validator file and the given unit code was not in the premade lists.
-            return False
-        try:
-            validator_result = subprocess.run([cls.JAVASCRIPT_SYSTEM_CALL, javascript_validator, unit_code],
-                                              check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            validator_output = validator_result.stdout.decode("UTF-8").strip()
-
-            # The output from the Javascript validator should be <validator_text>;<unit_description>
-            output_parts = validator_output.split(cls.VALIDATOR_RESULT_SEPARATOR)
-            LOGGER.debug("Result UCUM unit validator: {:s} -> {:s}".format(unit_code, output_parts[0]))
-            if output_parts[0] != cls.VALIDATOR_VALID_TEXT:
-                return False
-
-            unit_description = cls.VALIDATOR_RESULT_SEPARATOR.join(output_parts[1:])
-            cls.UNIT_CODE_LIST[unit_code] = unit_description
-            cls.__add_new_unit_code(unit_code, unit_description)
-            return True
-
-        except subprocess.CalledProcessError as error:
-            LOGGER.warning("CalledProcessError '{}' when trying to validate unit code: {:s}".format(error, unit_code))
-        except OSError as error:
-            LOGGER.warning("OSError '{}' when trying to validate unit code: {:s}".format(error, unit_code))
-
-        # An error occurred while trying to use the JavaScript validator and
-        # the given unit code was not in the premade lists.
-        return False
+        return cls.get_description(unit_code) is not None
 
     @classmethod
     def get_description(cls, unit_code: str) -> Union[str, None]:
         """Returns the description for the given unit code. Return None if the code is not valid."""
-        if not cls.UNIT_CODE_LIST:
-            cls.UNIT_CODE_LIST = cls.__return_unit_code_list()
+        # Check against the preloaded unit codes and the earlier validation results.
+        unit_description = cls.UNIT_CODE_LIST.get(unit_code, None)
+        if unit_description is not None:
+            return unit_description
+        unit_description = cls.__validated_codes.get(unit_code, None)
+        if unit_description is not None:
+            return unit_description
+        if not isinstance(unit_code, str) or unit_code in cls.__invalid_codes:
+            return None
 
-        return cls.UNIT_CODE_LIST.get(unit_code, None)
+        unit_description = _UnitCodeParser(unit_code, cls.UNIT_ATOMS, cls.UNIT_PREFIXES).parse()
+        if unit_description is None:
+            LOGGER.debug("Invalid UCUM unit code: {:s}".format(unit_code))
+            if len(cls.__invalid_codes) >= cls.INVALID_UNIT_CODE_CACHE_SIZE:
+                cls.__invalid_codes.clear()
+            cls.__invalid_codes.add(unit_code)
+        else:
+            cls.__validated_codes[unit_code] = unit_description
 
-    @classmethod
-    def __find_resource_filename(cls, resource_path, resource_file) -> Union[str, None]:
-        """Returns the full path to the resource file or None if the file is not found."""
-        file_list = list(pathlib.Path(".").glob("/".join(["**", resource_path, resource_file])))
-        if file_list:
-            return "/".join(file_list[0].parts)
-        return None
+        return unit_description
 
     @classmethod
-    def __return_unit_code_list(cls) -> Dict[str, str]:
+    def load_unit_codes(cls):
+        """Loads the premade unit codes and the UCUM atoms and prefixes from the resource files."""
         unit_code_dict = {}
-
-        current_path = pathlib.Path(".")
         for unit_code_file_name in cls.UNIT_CODE_FILE_NAMES:
-            # Use glob to find the resource file paths to allow code usage in a submodule.
-            for unit_code_file in current_path.glob("/".join(["**", cls.UNIT_CODE_FILE_PATH, unit_code_file_name])):
-                try:
-                    with open(unit_code_file, mode="r") as csv_file:
-                        csv_reader = csv.DictReader(csv_file, delimiter=cls.UNIT_CODE_FILE_COLUMN_SEPARATOR)
-                        for csv_row in csv_reader:
-                            unit_code = csv_row[cls.UNIT_CODE_FILE_CODE_COLUMN]
-                            unit_description = csv_row[cls.UNIT_CODE_FILE_DESCRIPTION_COLUMN]
+            for unit_code, unit_description in read_csv_resource(
+                    unit_code_file_name,
+                    [cls.UNIT_CODE_FILE_CODE_COLUMN, cls.UNIT_CODE_FILE_DESCRIPTION_COLUMN],
+                    cls.UNIT_CODE_FILE_COLUMN_SEPARATOR):
+                unit_code_dict[unit_code] = unit_description
 
-                            unit_code_dict[unit_code] = unit_description
+        unit_atom_dict = {
+            atom_code: (atom_description, atom_metric == cls.UNIT_ATOM_METRIC_VALUE)
+            for atom_code, atom_description, atom_metric in read_csv_resource(
+                cls.UNIT_ATOM_FILE_NAME,
+                [cls.UNIT_CODE_FILE_CODE_COLUMN, cls.UNIT_CODE_FILE_DESCRIPTION_COLUMN,
+                 cls.UNIT_ATOM_FILE_METRIC_COLUMN],
+                cls.UNIT_CODE_FILE_COLUMN_SEPARATOR)
+        }
+        unit_prefix_dict = dict(read_csv_resource(
+            cls.UNIT_PREFIX_FILE_NAME,
+            [cls.UNIT_CODE_FILE_CODE_COLUMN, cls.UNIT_CODE_FILE_DESCRIPTION_COLUMN],
+            cls.UNIT_CODE_FILE_COLUMN_SEPARATOR))
 
-                except KeyError as key_error:
-                    LOGGER.error("KeyError '{:s}' while trying to read unit codes from file {:s}".format(
-                        str(key_error), unit_code_file))
+        cls.UNIT_CODE_LIST = types.MappingProxyType(unit_code_dict)
+        cls.UNIT_ATOMS = types.MappingProxyType(unit_atom_dict)
+        cls.UNIT_PREFIXES = types.MappingProxyType(unit_prefix_dict)
+        cls.__validated_codes.clear()
+        cls.__invalid_codes.clear()
 
-                except csv.Error as csv_error:
-                    LOGGER.error("csv.Error '{:s}' while trying to read unit codes from file {:s}".format(
-                        str(csv_error), unit_code_file))
 
-                except OSError as os_error:
-                    LOGGER.error("OSError '{:s}' while trying to read file {:s}".format(
-                        str(os_error), unit_code_file
-                    ))
+class _UnitCodeParser:
+    """Parser for the UCUM unit code syntax.
 
-        return unit_code_dict
+       The supported syntax:
+       - unit code:  ["/"] term
+       - term:       component (("." | "/") component)*
+       - component:  simple unit [exponent] [annotation] | annotation | factor [annotation] | "(" term ")"
+       - simple unit: atom or a prefix followed by a metric atom
+    """
+    ANNOTATION_PATTERN = re.compile(r"\{[!-z|~]*\}")
+    EXPONENT_PATTERN = re.compile(r"(.*?)([+-]?[0-9]+)")
+    OPERATORS = "./"
+    SYMBOL_TERMINATORS = "./(){}"
 
-    @classmethod
-    def __add_new_unit_code(cls, unit_code: str, unit_description: str):
-        """Adds a new unit code to the unit code file that is preloaded before the first validator query."""
-
-        # find out the actual path of the unit code file to allow use when included as a submodule
-        unit_code_file_path = next(pathlib.Path(".").glob(
-            "/".join(["**", cls.UNIT_CODE_FILE_PATH, cls.UNIT_CODE_FILE_NAMES[0]])))
-        additional_file = "/".join(list(unit_code_file_path.parts[:-1]) + [cls.UNIT_CODE_FILE_NAMES[-1]])
-
-        try:
-            with open(additional_file, mode="a", encoding="UTF-8") as additional_unit_file:
-                additional_unit_file.write(cls.UNIT_CODE_FILE_COLUMN_SEPARATOR.join(
-                    [unit_code, unit_description]) + "\n")
-        except OSError as os_error:
-            LOGGER.error("OSError '{:s}' while trying to write to file {:s}".format(
-                str(os_error), additional_file
-            ))
+    def __init__(self, unit_code: str, atoms: Mapping[str, Tuple[str, bool]], prefixes: Mapping[str, str]):
+        self.__unit_code = unit_code
+        self.__atoms = atoms
+        self.__prefixes = prefixes
+        self.__position = 0
+
+    def parse(self) -> Optional[str]:
+        """Returns a description for the unit code or None if the unit code is not valid."""
+        if not self.__unit_code:
+            return None
+
+        description = ""
+        if self.__unit_code.startswith("/"):
+            self.__position = 1
+            description = "1 / "
+
+        term_description = self.__parse_term()
+        if term_description is None or self.__position != len(self.__unit_code):
+            return None
+        return description + term_description
+
+    def __parse_term(self) -> Optional[str]:
+        description = self.__parse_component()
+        while description is not None and self.__position < len(self.__unit_code):
+            operator = self.__unit_code[self.__position]
+            if operator not in self.OPERATORS:
+                break
+            self.__position += 1
+            component_description = self.__parse_component()
+            if component_description is None:
+                return None
+            description = "{:s} {:s} {:s}".format(
+                description, "*" if operator == "." else "/", component_description)
+        return description
+
+    def __parse_component(self) -> Optional[str]:
+        if self.__position >= len(self.__unit_code):
+            return None
+
+        if self.__unit_code[self.__position] == "(":
+            self.__position += 1
+            description = self.__parse_term()
+            if description is None or not self.__unit_code.startswith(")", self.__position):
+                return None
+            self.__position += 1
+            return "({:s})".format(description)
+
+        if self.__unit_code[self.__position] == "{":
+            return self.__parse_annotation()
+
+        symbol = self.__read_symbol()
+        if not symbol:
+            return None
+        description = self.__parse_symbol(symbol)
+        if description is None:
+            return None
+
+        if self.__unit_code.startswith("{", self.__position):
+            annotation = self.__parse_annotation()
+            if annotation is None:
+                return None
+            description += annotation
+        return description
+
+    def __parse_annotation(self) -> Optional[str]:
+        match = self.ANNOTATION_PATTERN.match(self.__unit_code, self.__position)
+        if match is None:
+            return None
+        self.__position = match.end()
+        return match.group(0)
+
+    def __read_symbol(self) -> str:
+        """Reads a simple unit symbol with an optional exponent. The square brackets can contain any characters."""
+        start_position = self.__position
+        bracket_depth = 0
+        while self.__position < len(self.__unit_code):
+            character = self.__unit_code[self.__position]
+            if character == "[":
+                bracket_depth += 1
+            elif character == "]":
+                if bracket_depth == 0:
+                    break
+                bracket_depth -= 1
+            elif bracket_depth == 0 and character in self.SYMBOL_TERMINATORS:
+                break
+            self.__position += 1
+
+        if bracket_depth > 0:
+            return ""
+        return self.__unit_code[start_position:self.__position]
+
+    def __parse_symbol(self, symbol: str) -> Optional[str]:
+        """Returns the description for a simple unit with an optional exponent or for a factor."""
+        if symbol.isdigit():
+            # a positive integer factor
+            return symbol
+
+        exponent_match = self.EXPONENT_PATTERN.fullmatch(symbol)
+        if exponent_match is not None and exponent_match.group(1):
+            description = self.__parse_simple_unit(exponent_match.group(1))
+            if description is not None:
+                return "{:s}^{:s}".format(description, exponent_match.group(2))
+
+        return self.__parse_simple_unit(symbol)
+
+    def __parse_simple_unit(self, symbol: str) -> Optional[str]:
+        """Returns the description for an atom or a prefixed metric atom."""
+        atom = self.__atoms.get(symbol, None)
+        if atom is not None:
+            return atom[0]
+
+        for prefix_length in (1, 2):
+            prefix = self.__prefixes.get(symbol[:prefix_length], None)
+            atom = self.__atoms.get(symbol[prefix_length:], None)
+            if prefix is not None and atom is not None and atom[1]:
+                return prefix + atom[0]
+
+        return None
+
+
+# Load the unit code index when the module is first imported.
+UnitCode.load_unit_codes()
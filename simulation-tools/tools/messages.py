@@ -7,20 +7,48 @@
 
 """This module contains a class for creating and holding messages for the RabbitMQ message bus."""
 
-# import these for backwards compatibility
-from tools.message.abstract import BaseMessage, AbstractMessage      # pylint: disable=unused-import
-from tools.message.abstract import AbstractResultMessage, get_json   # pylint: disable=unused-import
-from tools.message.block import QuantityBlock                        # pylint: disable=unused-import
-from tools.message.block import ValueArrayBlock, QuantityArrayBlock  # pylint: disable=unused-import
-from tools.message.block import TimeSeriesBlock                      # pylint: disable=unused-import
-from tools.message.epoch import EpochMessage                         # pylint: disable=unused-import
-from tools.message.factory import MessageFactory                     # pylint: disable=unused-import
-from tools.message.general import GeneralMessage, ResultMessage      # pylint: disable=unused-import
-from tools.message.generator import MessageGenerator                 # pylint: disable=unused-import
-from tools.message.simulation_state import SimulationStateMessage    # pylint: disable=unused-import
-from tools.message.status import StatusMessage                       # pylint: disable=unused-import
-from tools.message.utils import get_next_message_id                  # pylint: disable=unused-import
+import importlib
+from typing import Any, List
 
 from tools.tools import FullLogger
 
 LOGGER = FullLogger(__name__)
+
+# These names are available from this module for backwards compatibility.
+# The corresponding modules are imported only when the names are first accessed.
+LAZY_IMPORTS = {
+    "BaseMessage": "tools.message.abstract",
+    "AbstractMessage": "tools.message.abstract",
+    "AbstractResultMessage": "tools.message.abstract",
+    "get_json": "tools.message.abstract",
+    "QuantityBlock": "tools.message.block",
+    "ValueArrayBlock": "tools.message.block",
+    "QuantityArrayBlock": "tools.message.block",
+    "TimeSeriesBlock": "tools.message.block",
+    "BatchMessage": "tools.message.batch",
+    "EpochMessage": "tools.message.epoch",
+    "MessageFactory": "tools.message.factory",
+    "GeneralMessage": "tools.message.general",
+    "ResultMessage": "tools.message.general",
+    "MessageGenerator": "tools.message.generator",
+    "SimulationStateMessage": "tools.message.simulation_state",
+    "StatusMessage": "tools.message.status",
+    "get_next_message_id": "tools.message.utils",
+}
+
+__all__ = list(LAZY_IMPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Imports the requested message class or function on first access."""
+    module_name = LAZY_IMPORTS.get(name, None)
+    if module_name is None:
+        raise AttributeError("module {:s} has no attribute {:s}".format(__name__, name))
+
+    attribute = getattr(importlib.import_module(module_name), name)
+    globals()[name] = attribute
+    return attribute
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__)
@@ -18,7 +18,7 @@ import pamqp.specification
 
 from tools.callbacks import MessageCallback
 from tools.messages import (
-    BaseMessage, EpochMessage, GeneralMessage, ResultMessage, SimulationStateMessage, StatusMessage)
+    BaseMessage, BatchMessage, EpochMessage, GeneralMessage, ResultMessage, SimulationStateMessage, StatusMessage)
 from tools.tests.messages_abstract import ALTERNATE_JSON, DEFAULT_TIMESTAMP, FULL_JSON, MESSAGE_TYPE_ATTRIBUTE
 
 FAIL_TEST_JSON = {
@@ -224,3 +224,49 @@ class TestMessageCallback(AsyncTestCase):
         await callback_object.callback(
             get_incoming_message(bytes(FAIL_TEST_STR, encoding="UTF-8"), TestMessageCallback.TEST_TOPIC1))
         await self.helper_equality_tester(callback_object, FAIL_TEST_STR, TestMessageCallback.TEST_TOPIC1)
+
+    async def test_batch_message(self):
+        """Unit test for unpacking the received batch messages."""
+        received_messages = []
+
+        async def batch_handler(message_object, message_topic):
+            received_messages.append((message_object, message_topic))
+
+        epoch_message = EpochMessage(**{**TestMessageCallback.GENERAL_JSON, MESSAGE_TYPE_ATTRIBUTE: "Epoch"})
+        status_message = StatusMessage(**{**TestMessageCallback.GENERAL_JSON, MESSAGE_TYPE_ATTRIBUTE: "Status"})
+        batch_message = BatchMessage.from_messages([
+            ("Results.Epoch", epoch_message),
+            ("Results.Status", status_message),
+            ("Results.Fail", FAIL_TEST_JSON),
+            ("Other.Status", status_message)
+        ])
+
+        # without topic names all the contained messages are handled
+        callback_object = MessageCallback(batch_handler)
+        await callback_object.callback(get_incoming_message(batch_message.bytes(), "Results"))
+        await asyncio.sleep(TestMessageCallback.WAIT_TIME)
+        self.assertEqual(received_messages, [
+            (epoch_message, "Results.Epoch"),
+            (status_message, "Results.Status"),
+            (FAIL_TEST_JSON, "Results.Fail"),
+            (status_message, "Other.Status")
+        ])
+        self.assertEqual(callback_object.last_message, status_message)
+        self.assertEqual(callback_object.last_topic, "Other.Status")
+
+        # only the contained messages matching the topic names are handled
+        received_messages.clear()
+        callback_object = MessageCallback(batch_handler, topic_names=["Results.#", "*.Epoch", "Batch.Results"])
+        await callback_object.process(get_incoming_message(batch_message.bytes(), "Batch.Results"))
+        self.assertEqual(received_messages, [
+            (epoch_message, "Results.Epoch"),
+            (status_message, "Results.Status"),
+            (FAIL_TEST_JSON, "Results.Fail")
+        ])
+
+        # an invalid batch message is given as JSON object
+        received_messages.clear()
+        invalid_batch_json = {**batch_message.json(), "Messages": "invalid"}
+        await callback_object.process(
+            get_incoming_message(bytes(json.dumps(invalid_batch_json), encoding="UTF-8"), "Results"))
+        self.assertEqual(received_messages, [(invalid_batch_json, "Results")])
@@ -7,11 +7,14 @@
 """Unit tests for the RabbitmqClient class."""
 
 import asyncio
-from typing import Iterator, Union
+import json
+from typing import Iterator, List, Optional, Union
 
 from aiounittest.case import AsyncTestCase
 
-from tools.clients import RabbitmqClient
+from tools.callbacks import MessageCallback
+from tools.clients import (
+    ListenerQueue, ListenerStatistics, MessageAcknowledger, RabbitmqClient, RabbitmqConnectionPool, RabbitmqExchangeParameters)
 from tools.messages import BaseMessage, EpochMessage, GeneralMessage, StatusMessage, get_next_message_id
 from tools.tests.messages_common import EPOCH_TEST_JSON, ERROR_TEST_JSON, GENERAL_TEST_JSON, STATUS_TEST_JSON
 
@@ -129,3 +132,294 @@ class TestRabbitmqClient(AsyncTestCase):
     async def test_connection_failures(self):
         """Unit tests for failed connections to the message bus."""
         # TODO: implement test_connection_failures
+
+
+class DummyChannel:
+    """Helper class for a channel that records the acknowledgements sent through it."""
+    def __init__(self):
+        self.is_closed = False
+        self.acknowledgements = []
+        self.next_delivery_tag = 1
+
+
+class DummyIncomingMessage:
+    """Helper class for an incoming message that records whether it has been acknowledged."""
+    def __init__(self, body: bytes, routing_key: str, channel: DummyChannel):
+        self.body = body
+        self.routing_key = routing_key
+        self.channel = channel
+        self.delivery_tag = channel.next_delivery_tag
+        channel.next_delivery_tag += 1
+        self.acknowledged = False
+        self.rejected = False
+
+    async def ack(self, multiple: bool = False):
+        """Records the acknowledgement to the channel."""
+        self.acknowledged = True
+        self.channel.acknowledgements.append(("ack", self.delivery_tag, multiple))
+
+    async def reject(self, requeue: bool = False):
+        """Records the rejection to the channel."""
+        self.rejected = True
+        self.channel.acknowledgements.append(("reject", self.delivery_tag, requeue))
+
+
+class TestListenerQueue(AsyncTestCase):
+    """Unit tests for the bounded message processing used by the RabbitmqClient topic listeners."""
+    TEST_TOPIC = "unit_test"
+
+    @staticmethod
+    def get_messages(message_count: int, channel: Optional[DummyChannel] = None) -> List[DummyIncomingMessage]:
+        """Returns a list of incoming messages containing General messages."""
+        if channel is None:
+            channel = DummyChannel()
+        id_generator = get_next_message_id("unit_test")
+        return [
+            DummyIncomingMessage(
+                json.dumps({**GENERAL_TEST_JSON, "MessageId": next(id_generator)}).encode("UTF-8"),
+                TestListenerQueue.TEST_TOPIC, channel)
+            for _ in range(message_count)
+        ]
+
+    async def test_bounded_queue(self):
+        """Unit test for processing the messages in order with a bounded queue."""
+        message_storage = MessageStorage()
+        statistics = ListenerStatistics()
+        listener_queue = ListenerQueue(MessageCallback(message_storage.callback), 3, 1, statistics)
+        incoming_messages = self.get_messages(10)
+
+        # the queue is full after 3 messages when the workers have not been started
+        for incoming_message in incoming_messages[:3]:
+            await listener_queue.put(incoming_message)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(listener_queue.put(incoming_messages[3]), timeout=0.1)
+        self.assertEqual(listener_queue.queue_depth, 3)
+        self.assertEqual(statistics.max_queue_depth, 3)
+
+        listener_queue.start()
+        for incoming_message in incoming_messages[3:]:
+            await listener_queue.put(incoming_message)
+        await listener_queue.join()
+        await listener_queue.stop()
+
+        self.assertEqual(
+            [message_object.json()["MessageId"] for message_object, _ in message_storage.messages],
+            [json.loads(incoming_message.body)["MessageId"] for incoming_message in incoming_messages])
+        self.assertTrue(all(incoming_message.acknowledged for incoming_message in incoming_messages))
+        self.assertEqual(statistics.received_messages, 10)
+        self.assertEqual(statistics.processed_messages, 10)
+        self.assertEqual(statistics.failed_messages, 0)
+        self.assertEqual(statistics.queue_depth, 0)
+        self.assertEqual(statistics.max_queue_depth, 3)
+        self.assertGreater(statistics.max_queue_time, 0.0)
+        self.assertEqual(set(statistics.as_dict()), {
+            "received_messages", "processed_messages", "failed_messages", "acknowledgements",
+            "queue_depth", "max_queue_depth",
+            "mean_queue_time", "max_queue_time", "mean_processing_time", "max_processing_time"})
+
+    async def test_multiple_workers(self):
+        """Unit test for processing the messages concurrently with multiple workers."""
+        active_callbacks = []
+        max_active_callbacks = []
+
+        async def slow_callback(message_object: Union[BaseMessage, dict, str], message_topic: str):
+            # pylint: disable=unused-argument
+            active_callbacks.append(message_object)
+            max_active_callbacks.append(len(active_callbacks))
+            await asyncio.sleep(0.05)
+            active_callbacks.remove(message_object)
+
+        statistics = ListenerStatistics()
+        listener_queue = ListenerQueue(MessageCallback(slow_callback), 10, 4, statistics)
+        listener_queue.start()
+        for incoming_message in self.get_messages(8):
+            await listener_queue.put(incoming_message)
+        await listener_queue.join()
+        await listener_queue.stop()
+
+        self.assertEqual(max(max_active_callbacks), 4)
+        self.assertEqual(statistics.processed_messages, 8)
+        self.assertGreaterEqual(statistics.max_processing_time, 0.05)
+
+    async def test_callback_errors(self):
+        """Unit test for callbacks that raise exceptions."""
+        async def failing_callback(message_object: Union[BaseMessage, dict, str], message_topic: str):
+            # pylint: disable=unused-argument
+            raise ValueError("test error")
+
+        statistics = ListenerStatistics()
+        listener_queue = ListenerQueue(MessageCallback(failing_callback), 2, 1, statistics)
+        listener_queue.start()
+        incoming_messages = self.get_messages(3)
+        for incoming_message in incoming_messages:
+            await listener_queue.put(incoming_message)
+        await listener_queue.join()
+        await listener_queue.stop()
+
+        self.assertTrue(all(incoming_message.rejected for incoming_message in incoming_messages))
+        self.assertEqual(statistics.processed_messages, 0)
+        self.assertEqual(statistics.failed_messages, 3)
+
+    async def test_batched_acknowledgements(self):
+        """Unit test for acknowledging the processed messages in batches."""
+        message_storage = MessageStorage()
+        statistics = ListenerStatistics()
+        channel = DummyChannel()
+        acknowledger = MessageAcknowledger(batch_size=5, batch_interval=50, statistics=statistics)
+        listener_queue = ListenerQueue(MessageCallback(message_storage.callback), 20, 1, statistics, acknowledger)
+        listener_queue.start()
+        for incoming_message in self.get_messages(12, channel):
+            await listener_queue.put(incoming_message)
+        await listener_queue.join()
+
+        self.assertEqual(channel.acknowledgements, [("ack", 5, True), ("ack", 10, True)])
+        self.assertEqual(acknowledger.pending_messages, 2)
+
+        # the remaining messages are acknowledged after the batch interval
+        await asyncio.sleep(0.1)
+        self.assertEqual(channel.acknowledgements, [("ack", 5, True), ("ack", 10, True), ("ack", 12, True)])
+        self.assertEqual(acknowledger.pending_messages, 0)
+        self.assertEqual(statistics.acknowledgements, 3)
+        self.assertEqual(statistics.processed_messages, 12)
+        await listener_queue.stop()
+
+    async def test_out_of_order_acknowledgements(self):
+        """Unit test for batched acknowledgements when the messages are processed out of order."""
+        release_events = {}
+
+        async def blocking_callback(message_object: Union[BaseMessage, dict, str], message_topic: str):
+            # pylint: disable=unused-argument
+            await release_events[message_object.json()["MessageId"]].wait()
+
+        statistics = ListenerStatistics()
+        channel = DummyChannel()
+        acknowledger = MessageAcknowledger(batch_size=2, batch_interval=1000, statistics=statistics)
+        listener_queue = ListenerQueue(MessageCallback(blocking_callback), 10, 4, statistics, acknowledger)
+        incoming_messages = self.get_messages(4, channel)
+        message_ids = [json.loads(incoming_message.body)["MessageId"] for incoming_message in incoming_messages]
+        release_events.update({message_id: asyncio.Event() for message_id in message_ids})
+        listener_queue.start()
+        for incoming_message in incoming_messages:
+            await listener_queue.put(incoming_message)
+
+        # the messages 3 and 4 are processed first, they cannot be acknowledged before the messages 1 and 2
+        for message_id in message_ids[2:]:
+            release_events[message_id].set()
+        await asyncio.sleep(0.05)
+        self.assertEqual(channel.acknowledgements, [])
+        self.assertEqual(acknowledger.pending_messages, 2)
+
+        release_events[message_ids[1]].set()
+        await asyncio.sleep(0.05)
+        self.assertEqual(channel.acknowledgements, [])
+
+        # after the message 1 has been processed, all the messages are covered by a single acknowledgement
+        release_events[message_ids[0]].set()
+        await listener_queue.join()
+        self.assertEqual(channel.acknowledgements, [("ack", 4, True)])
+        self.assertEqual(acknowledger.pending_messages, 0)
+        await acknowledger.flush()
+        self.assertEqual(channel.acknowledgements, [("ack", 4, True)])
+        await listener_queue.stop()
+
+        # the partially processed batch is only acknowledged up to the first unprocessed message
+        release_events.clear()
+        incoming_messages = self.get_messages(4, channel)
+        message_ids = [json.loads(incoming_message.body)["MessageId"] for incoming_message in incoming_messages]
+        release_events.update({message_id: asyncio.Event() for message_id in message_ids})
+        listener_queue = ListenerQueue(MessageCallback(blocking_callback), 10, 4, statistics, acknowledger)
+        listener_queue.start()
+        for incoming_message in incoming_messages:
+            await listener_queue.put(incoming_message)
+        for message_id in [message_ids[0], message_ids[2], message_ids[3]]:
+            release_events[message_id].set()
+        await asyncio.sleep(0.05)
+        self.assertEqual(channel.acknowledgements, [("ack", 4, True), ("ack", 5, True)])
+        self.assertEqual(acknowledger.pending_messages, 2)
+
+        release_events[message_ids[1]].set()
+        await listener_queue.join()
+        self.assertEqual(channel.acknowledgements, [("ack", 4, True), ("ack", 5, True), ("ack", 8, True)])
+        await listener_queue.stop()
+
+    async def test_no_acknowledgements(self):
+        """Unit test for consuming the messages without acknowledgements."""
+        message_storage = MessageStorage()
+        statistics = ListenerStatistics()
+        channel = DummyChannel()
+        acknowledger = MessageAcknowledger(no_ack=True, statistics=statistics)
+        listener_queue = ListenerQueue(MessageCallback(message_storage.callback), 5, 2, statistics, acknowledger)
+        listener_queue.start()
+        for incoming_message in self.get_messages(6, channel):
+            await listener_queue.put(incoming_message)
+        await listener_queue.join()
+        await acknowledger.flush()
+        await listener_queue.stop()
+
+        self.assertEqual(channel.acknowledgements, [])
+        self.assertEqual(statistics.acknowledgements, 0)
+        self.assertEqual(len(message_storage.messages), 6)
+
+
+class TestRabbitmqConnectionPool(AsyncTestCase):
+    """Unit tests for distributing the listeners and the publishers over the pooled connections.
+       The pooled connections are not opened in these tests."""
+    CONNECTION_PARAMETERS = {"host": "localhost", "port": 5672, "login": "", "password": "", "ssl": False}
+    EXCHANGE_PARAMETERS = RabbitmqExchangeParameters("unit_test", True, False)
+
+    def get_pool(self, pool_size: int, publisher_channels: int, publish_strategy: str) -> RabbitmqConnectionPool:
+        """Returns a new connection pool with the given parameters."""
+        return RabbitmqConnectionPool(
+            self.CONNECTION_PARAMETERS, self.EXCHANGE_PARAMETERS, pool_size, publisher_channels, publish_strategy)
+
+    async def test_shared_connections(self):
+        """Unit test for the listeners and publishers sharing the pooled connections."""
+        connection_pool = self.get_pool(2, 3, RabbitmqConnectionPool.PUBLISH_BY_TOPIC)
+        self.assertEqual(connection_pool.pool_size, 2)
+
+        listener_channels = [connection_pool.get_listener_channel() for _ in range(5)]
+        listener_connections = [channel_class.connection_class for channel_class in listener_channels]
+        self.assertEqual(len(set(map(id, listener_connections))), 2)
+        self.assertIs(listener_connections[0], listener_connections[2])
+        self.assertIsNot(listener_connections[0], listener_connections[1])
+        self.assertEqual(len(set(map(id, listener_channels))), 5)
+
+        publisher_connections = {
+            id(channel_class.connection_class) for channel_class in connection_pool.publisher_channels}
+        self.assertEqual(publisher_connections, set(map(id, listener_connections)))
+
+        for listener_channel in listener_channels:
+            await connection_pool.release_listener_channel(listener_channel)
+        await connection_pool.close()
+
+    async def test_dedicated_connections(self):
+        """Unit test for the listeners using dedicated connections when the pool size is 0."""
+        connection_pool = self.get_pool(0, 1, RabbitmqConnectionPool.PUBLISH_BY_TOPIC)
+        self.assertEqual(connection_pool.pool_size, 0)
+
+        listener_channels = [connection_pool.get_listener_channel() for _ in range(3)]
+        connections = [channel_class.connection_class for channel_class in listener_channels] + \
+            [connection_pool.get_publisher_channel("Status.Ready").connection_class]
+        self.assertEqual(len(set(map(id, connections))), 4)
+
+        for listener_channel in listener_channels:
+            await connection_pool.release_listener_channel(listener_channel)
+        await connection_pool.close()
+
+    def test_publisher_channel_selection(self):
+        """Unit test for selecting the publisher channel by topic and by round-robin."""
+        topic_pool = self.get_pool(2, 4, RabbitmqConnectionPool.PUBLISH_BY_TOPIC)
+        topics = ["NetworkState.Voltage.{:d}".format(index) for index in range(20)]
+        first_selection = [topic_pool.get_publisher_channel(topic) for topic in topics]
+        second_selection = [topic_pool.get_publisher_channel(topic) for topic in topics]
+        self.assertEqual(list(map(id, first_selection)), list(map(id, second_selection)))
+        self.assertGreater(len(set(map(id, first_selection))), 1)
+
+        round_robin_pool = self.get_pool(2, 4, RabbitmqConnectionPool.PUBLISH_ROUND_ROBIN)
+        selection = [round_robin_pool.get_publisher_channel("Status.Ready") for _ in range(8)]
+        self.assertEqual(list(map(id, selection[:4])), list(map(id, round_robin_pool.publisher_channels)))
+        self.assertEqual(list(map(id, selection[4:])), list(map(id, selection[:4])))
+
+        invalid_pool = self.get_pool(1, 2, "invalid")
+        self.assertEqual(invalid_pool.publish_strategy, RabbitmqConnectionPool.PUBLISH_BY_TOPIC)
+
@@ -9,7 +9,9 @@
 from datetime import datetime, timedelta, timezone
 import unittest
 
-from tools.datetime_tools import get_utcnow_in_milliseconds, to_iso_format_datetime_string, to_utc_datetime_object
+from tools.datetime_tools import (
+    clear_datetime_caches, get_utcnow_in_milliseconds, isoformat_to_milliseconds,
+    to_iso_format_datetime_string, to_utc_datetime_object)
 
 
 class TestDatetimeTools(unittest.TestCase):
@@ -65,6 +67,56 @@ class TestDatetimeTools(unittest.TestCase):
         self.assertRaises(ValueError, to_utc_datetime_object, input_string_invalid1)
         self.assertRaises(ValueError, to_utc_datetime_object, input_string_invalid2)
 
+    def test_canonical_format(self):
+        """Unit test for the datetime strings that are already in the canonical format."""
+        canonical_strings = [
+            "2020-05-25T15:24:59.987Z",
+            "2020-02-29T00:00:00.000Z",
+            "2000-02-29T23:59:59.999Z",
+            "0001-01-01T00:00:00.000Z"
+        ]
+        for canonical_string in canonical_strings:
+            with self.subTest(canonical_string=canonical_string):
+                self.assertEqual(to_iso_format_datetime_string(canonical_string), canonical_string)
+                self.assertEqual(
+                    to_utc_datetime_object(canonical_string),
+                    datetime.fromisoformat(canonical_string.replace("Z", "+00:00")))
+
+        invalid_strings = [
+            "2021-02-29T00:00:00.000Z",
+            "1900-02-29T00:00:00.000Z",
+            "2020-04-31T00:00:00.000Z",
+            "2020-00-10T00:00:00.000Z",
+            "2020-01-01T23:60:00.000Z",
+            "2020-01-01T23:00:60.000Z",
+            "0000-01-01T00:00:00.000Z"
+        ]
+        for invalid_string in invalid_strings:
+            with self.subTest(invalid_string=invalid_string):
+                self.assertRaises(ValueError, to_iso_format_datetime_string, invalid_string)
+                self.assertRaises(ValueError, to_utc_datetime_object, invalid_string)
+
+    def test_cached_conversions(self):
+        """Unit test for checking that the repeated conversions give the same results."""
+        clear_datetime_caches()
+        test_strings = [
+            ("2020-05-25T15:24:59Z", "2020-05-25T15:24:59.000Z"),
+            ("2020-05-25T15:24:59.5Z", "2020-05-25T15:24:59.500Z"),
+            ("2020-05-25T18:24:59.987654+03:00", "2020-05-25T15:24:59.987Z"),
+            ("2020-05-25T10:24:59.987-05:00", "2020-05-25T15:24:59.987Z")
+        ]
+        for _ in range(3):
+            for test_string, expected_string in test_strings:
+                with self.subTest(test_string=test_string):
+                    self.assertEqual(to_iso_format_datetime_string(test_string), expected_string)
+                    self.assertEqual(
+                        to_iso_format_datetime_string(to_utc_datetime_object(test_string)),
+                        expected_string)
+
+        self.assertEqual(isoformat_to_milliseconds("2020-05-25T15:24:59.987654"), "2020-05-25T15:24:59.987")
+        self.assertEqual(isoformat_to_milliseconds("2020-05-25T15:24:59+00:00"), "2020-05-25T15:24:59.000")
+        self.assertIsNone(isoformat_to_milliseconds("2020-05-25"))
+
 
 if __name__ == '__main__':
     unittest.main()
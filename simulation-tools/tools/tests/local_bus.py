@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Unit tests for the in-process message bus."""
+
+import asyncio
+import unittest
+
+from aiounittest.case import AsyncTestCase
+
+from tools.local_bus import LocalClient
+from tools.messages import EpochMessage, GeneralMessage, get_next_message_id
+from tools.tests.clients import MessageStorage
+from tools.tests.messages_common import EPOCH_TEST_JSON, GENERAL_TEST_JSON
+from tools.topics import TopicTrie
+
+
+class TestTopicTrie(unittest.TestCase):
+    """Unit tests for the TopicTrie class."""
+    PATTERN_MATCHES = {
+        "Epoch": (["Epoch"], ["Epoch.1", "Status", ""]),
+        "Status.*": (["Status.Ready", "Status.Error"], ["Status", "Status.Ready.1"]),
+        "*.Ready": (["Status.Ready"], ["Ready", "Status.Error.Ready"]),
+        "Result.#": (["Result", "Result.A", "Result.A.B"], ["Results", "Status.Result"]),
+        "#.Voltage": (["Voltage", "NetworkState.Voltage", "A.B.Voltage"], ["NetworkState.Current"]),
+        "A.#.B": (["A.B", "A.x.B", "A.x.y.B"], ["A", "A.x", "B"]),
+        "#": (["Epoch", "Status.Ready", "A.B.C"], []),
+        "*.*.#": (["A.B", "A.B.C"], ["A"]),
+    }
+
+    def test_matching(self):
+        """Unit test for matching the routing keys against single patterns."""
+        for pattern, (matching_keys, other_keys) in TestTopicTrie.PATTERN_MATCHES.items():
+            topic_trie = TopicTrie()
+            topic_trie.add(pattern, pattern)
+            for routing_key in matching_keys:
+                with self.subTest(pattern=pattern, routing_key=routing_key):
+                    self.assertEqual(topic_trie.match(routing_key), frozenset([pattern]))
+            for routing_key in other_keys:
+                with self.subTest(pattern=pattern, routing_key=routing_key):
+                    self.assertFalse(topic_trie.matches(routing_key))
+
+    def test_multiple_patterns(self):
+        """Unit test for matching against several patterns and removing the patterns."""
+        topic_trie = TopicTrie()
+        for pattern in TestTopicTrie.PATTERN_MATCHES:
+            topic_trie.add(pattern, pattern)
+        topic_trie.add("Status.*", "second")
+        self.assertEqual(topic_trie.match("Status.Ready"), frozenset(["Status.*", "*.Ready", "#", "*.*.#", "second"]))
+
+        topic_trie.remove("#", "#")
+        topic_trie.remove("Status.*", "Status.*")
+        topic_trie.remove("Status.*", "unknown")
+        topic_trie.remove("Unknown.pattern", "#")
+        self.assertEqual(topic_trie.match("Status.Ready"), frozenset(["*.Ready", "*.*.#", "second"]))
+        self.assertIn("Status.*", topic_trie.patterns)
+        self.assertNotIn("#", topic_trie.patterns)
+
+        for pattern in TestTopicTrie.PATTERN_MATCHES:
+            topic_trie.remove(pattern, pattern)
+        topic_trie.remove("Status.*", "second")
+        self.assertEqual(topic_trie.patterns, [])
+        self.assertFalse(topic_trie.matches("Status.Ready"))
+
+
+
+class TestLocalClient(AsyncTestCase):
+    """Unit tests for sending and receiving messages using LocalClient objects."""
+    WAIT_TIME = 0.1
+
+    async def test_message_sending_and_receiving(self):
+        """Unit test for routing the messages between the clients."""
+        id_generator = get_next_message_id("local_test")
+        epoch_message = EpochMessage(**{**EPOCH_TEST_JSON, "MessageId": next(id_generator)})
+        general_message = GeneralMessage(**{**GENERAL_TEST_JSON, "MessageId": next(id_generator)})
+
+        sender = LocalClient(exchange="local_test")
+        receiver = LocalClient(exchange="local_test")
+        other_exchange = LocalClient(exchange="other_exchange")
+        epoch_storage = MessageStorage()
+        result_storage = MessageStorage()
+        other_storage = MessageStorage()
+        receiver.add_listener("Epoch", epoch_storage.callback)
+        receiver.add_listener(["Result.#", "*.Info"], result_storage.callback)
+        other_exchange.add_listener("#", other_storage.callback)
+        self.assertEqual(set(receiver.listened_topics), {"Epoch", "Result.#", "*.Info"})
+
+        await sender.send_message("Epoch", epoch_message.bytes())
+        await sender.send_message("Result", general_message.bytes())
+        await sender.send_message("Result.Extra.Info", general_message.bytes())
+        await sender.send_message("Status.Ready", general_message.bytes())
+        await sender.message_bus.join()
+        await asyncio.sleep(TestLocalClient.WAIT_TIME)
+
+        self.assertEqual(epoch_storage.messages, [(epoch_message, "Epoch")])
+        self.assertEqual(result_storage.messages, [(general_message, "Result"), (general_message, "Result.Extra.Info")])
+        self.assertEqual(other_storage.messages, [])
+
+        await receiver.close()
+        self.assertTrue(receiver.is_closed)
+        self.assertEqual(receiver.listened_topics, [])
+        await sender.send_message("Epoch", epoch_message.bytes())
+        await asyncio.sleep(TestLocalClient.WAIT_TIME)
+        self.assertEqual(len(epoch_storage.messages), 1)
+
+        await sender.close()
+        await other_exchange.close()
+
+    async def test_batch_messages(self):
+        """Unit test for sending the messages as a batch."""
+        id_generator = get_next_message_id("batch_test")
+        messages = [
+            (
+                "Result.Voltage.{:d}".format(index),
+                GeneralMessage(**{**GENERAL_TEST_JSON, "MessageId": next(id_generator)})
+            )
+            for index in range(5)
+        ]
+
+        sender = LocalClient(exchange="batch_test")
+        receiver = LocalClient(exchange="batch_test")
+        all_storage = MessageStorage()
+        single_storage = MessageStorage()
+        plain_storage = MessageStorage()
+        receiver.add_listener(["Result.#", "Batch.Result"], all_storage.callback)
+        receiver.add_listener(["Result.Voltage", "Result.Voltage.2", "Batch.#"], single_storage.callback)
+        receiver.add_listener("Result.Voltage.*", plain_storage.callback)
+
+        await sender.send_messages_as_batch(messages, "Result")
+        await sender.message_bus.join()
+        await asyncio.sleep(TestLocalClient.WAIT_TIME)
+
+        self.assertEqual(all_storage.messages, [(message, topic_name) for topic_name, message in messages])
+        self.assertEqual(single_storage.messages, [(messages[2][1], messages[2][0])])
+        # the batch is not routed to the listeners that do not listen to the batch topic
+        self.assertEqual(plain_storage.messages, [])
+
+        # without a batch name, the messages are sent separately
+        await sender.send_messages_as_batch([("Result.Voltage.1", messages[0][1]), ("Other", messages[1][1])], "")
+        await sender.message_bus.join()
+        await asyncio.sleep(TestLocalClient.WAIT_TIME)
+        self.assertEqual(all_storage.messages[-1], (messages[0][1], "Result.Voltage.1"))
+        self.assertEqual(len(all_storage.messages), len(messages) + 1)
+        self.assertEqual(plain_storage.messages, [(messages[0][1], "Result.Voltage.1")])
+
+        await sender.close()
+        await receiver.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
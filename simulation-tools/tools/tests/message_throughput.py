@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Unit tests for the message throughput micro-benchmark in benchmarks/message_throughput.py."""
+
+import pathlib
+import sys
+import unittest
+from unittest import mock
+
+from tools.message.epoch import EpochMessage
+
+BENCHMARK_DIRECTORY = pathlib.Path(__file__).resolve().parents[2] / "benchmarks"
+if str(BENCHMARK_DIRECTORY) not in sys.path:
+    sys.path.append(str(BENCHMARK_DIRECTORY))
+
+# pylint: disable=wrong-import-position
+import message_throughput  # noqa: E402
+
+
+class TestMessageThroughput(unittest.TestCase):
+    """Unit tests for the message throughput micro-benchmark."""
+
+    def test_measure(self):
+        """Unit test for the number of operations and the time per operation."""
+        counts = []
+
+        def run_function(count: int) -> float:
+            counts.append(count)
+            return count * 0.002
+
+        # the count is increased until a round takes at least the minimum time and then repeated
+        results = message_throughput.measure(run_function, 0.01, 3)
+        self.assertEqual(counts, [1, 2, 4, 8, 8, 8])
+        self.assertEqual(results["operations"], 8)
+        self.assertAlmostEqual(results["us_per_op"], 2000.0)
+        self.assertAlmostEqual(results["ops_per_s"], 500.0)
+
+        # the count is multiplied by 10 while a round takes less than a tenth of the minimum time
+        counts.clear()
+        message_throughput.measure(lambda count: counts.append(count) or count * 0.00003, 0.01, 1)
+        self.assertEqual(counts, [1, 10, 100, 200, 400])
+
+    def test_measure_operation_errors(self):
+        """Unit test for an operation that fails."""
+        def failing_function(count: int) -> float:
+            raise ValueError("invalid count {:d}".format(count))
+
+        self.assertEqual(
+            message_throughput.measure_operation(failing_function, 0.01, 3),
+            {"error": "ValueError: invalid count 1"})
+
+    def test_benchmark_message(self):
+        """Unit test for the results of all the operations for one message class."""
+        attributes = message_throughput.get_epoch_attributes(4)
+        results = message_throughput.benchmark_message(EpochMessage, attributes, "Epoch", 0.001, 1)
+
+        self.assertTrue(set(message_throughput.OPERATIONS) <= set(results))
+        for operation in message_throughput.OPERATIONS:
+            self.assertGreater(results[operation]["us_per_op"], 0.0)
+            self.assertGreaterEqual(results[operation]["operations"], 1)
+        self.assertEqual(results["decoded_class"], "EpochMessage")
+        self.assertEqual(results["bytes_size"], len(
+            EpochMessage(**{**attributes, "Type": "Epoch", "SimulationId": message_throughput.SIMULATION_ID,
+                            "SourceProcessId": message_throughput.SOURCE_PROCESS_ID, "MessageId": "benchmark-1",
+                            "Timestamp": "2020-01-01T00:00:00.000Z"}).bytes()))
+
+    def test_run_benchmarks(self):
+        """Unit test for running the benchmarks with the message classes that are not available."""
+        message_cases = {
+            "Epoch": message_throughput.MESSAGE_CASES["Epoch"],
+            "Missing": ("unknown_package.unknown_module", "UnknownMessage", message_throughput.get_epoch_attributes)
+        }
+        with mock.patch.object(message_throughput, "MESSAGE_CASES", message_cases):
+            results = message_throughput.run_benchmarks(2, 20, 0.001, 1)
+
+        self.assertEqual(set(results), {"Epoch", "Missing"})
+        self.assertIn("skipped", results["Missing"])
+        self.assertEqual(results["Epoch"]["small"]["size"], 2)
+        self.assertEqual(results["Epoch"]["large"]["size"], 20)
+        # the large payload has a longer list of triggering message ids
+        self.assertGreater(results["Epoch"]["large"]["bytes_size"], results["Epoch"]["small"]["bytes_size"])
+
+
+if __name__ == '__main__':
+    unittest.main()
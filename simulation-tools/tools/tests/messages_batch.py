@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""Unit test for the BatchMessage class."""
+
+import json
+import unittest
+
+import tools.exceptions.messages
+import tools.messages
+from tools.clients import create_batch_message
+from tools.tests.messages_common import DEFAULT_SIMULATION_ID, DEFAULT_TIMESTAMP, FULL_JSON, ALTERNATE_JSON
+
+DEFAULT_TYPE = "Batch"
+STATUS_JSON = {**FULL_JSON, "Type": "Status"}
+EPOCH_JSON = {**ALTERNATE_JSON, "Type": "Epoch"}
+BATCH_JSON = {
+    "Type": DEFAULT_TYPE,
+    "SimulationId": DEFAULT_SIMULATION_ID,
+    "Timestamp": DEFAULT_TIMESTAMP,
+    "Messages": [
+        {"Topic": "Status.Ready", "Message": STATUS_JSON},
+        {"Topic": "Epoch", "Message": EPOCH_JSON}
+    ]
+}
+
+
+class TestBatchMessage(unittest.TestCase):
+    """Unit tests for the BatchMessage class."""
+
+    def test_message_type(self):
+        """Unit test for the BatchMessage type."""
+        self.assertEqual(tools.messages.BatchMessage.CLASS_MESSAGE_TYPE, DEFAULT_TYPE)
+        self.assertEqual(tools.messages.BatchMessage.MESSAGE_TYPE_CHECK, True)
+        self.assertIn(DEFAULT_TYPE, tools.messages.MessageFactory.get_message_types())
+
+    def test_message_creation(self):
+        """Unit test for creating instances of BatchMessage class."""
+        message_full = tools.messages.BatchMessage(**BATCH_JSON)
+        self.assertEqual(message_full.message_type, DEFAULT_TYPE)
+        self.assertEqual(message_full.simulation_id, DEFAULT_SIMULATION_ID)
+        self.assertEqual(message_full.timestamp, DEFAULT_TIMESTAMP)
+        self.assertEqual(message_full.messages, BATCH_JSON["Messages"])
+        self.assertEqual(len(message_full), 2)
+        self.assertEqual(message_full.get_messages(), [("Status.Ready", STATUS_JSON), ("Epoch", EPOCH_JSON)])
+
+        self.assertEqual(message_full.json(), BATCH_JSON)
+        self.assertEqual(json.loads(message_full.bytes().decode("UTF-8")), BATCH_JSON)
+        self.assertEqual(tools.messages.MessageFactory.get_message(**BATCH_JSON), message_full)
+        self.assertEqual(tools.messages.BatchMessage.from_json(BATCH_JSON), message_full)
+
+        # the contained messages can also be given as message objects
+        status_message = tools.messages.StatusMessage(**STATUS_JSON)
+        epoch_message = tools.messages.EpochMessage(**EPOCH_JSON)
+        message_from_objects = tools.messages.BatchMessage.from_messages(
+            [("Status.Ready", status_message), ("Epoch", epoch_message)], Timestamp=DEFAULT_TIMESTAMP)
+        self.assertEqual(message_from_objects.simulation_id, DEFAULT_SIMULATION_ID)
+        self.assertEqual(message_from_objects.timestamp, DEFAULT_TIMESTAMP)
+        self.assertEqual(message_from_objects.messages, [
+            {"Topic": "Status.Ready", "Message": status_message.json()},
+            {"Topic": "Epoch", "Message": epoch_message.json()}
+        ])
+        self.assertEqual(
+            tools.messages.MessageFactory.get_message(**message_from_objects.get_messages()[0][1]), status_message)
+
+        empty_message = tools.messages.BatchMessage.from_messages([], SimulationId=DEFAULT_SIMULATION_ID)
+        self.assertEqual(empty_message.messages, [])
+
+    def test_invalid_values(self):
+        """Unit tests for testing that invalid attribute values are recognized."""
+        invalid_messages = [
+            None,
+            {"Topic": "Epoch", "Message": EPOCH_JSON},
+            [{"Topic": "Epoch"}],
+            [{"Message": EPOCH_JSON}],
+            [{"Topic": "", "Message": EPOCH_JSON}],
+            [{"Topic": "Epoch", "Message": "Epoch message"}],
+            ["Epoch"]
+        ]
+        for invalid_value in invalid_messages:
+            with self.subTest(messages=invalid_value):
+                with self.assertRaises(tools.exceptions.messages.MessageValueError):
+                    tools.messages.BatchMessage(**{**BATCH_JSON, "Messages": invalid_value})
+                self.assertIsNone(tools.messages.BatchMessage.from_json({**BATCH_JSON, "Messages": invalid_value}))
+
+        with self.assertRaises(tools.exceptions.messages.MessageTypeError):
+            tools.messages.BatchMessage(**{**BATCH_JSON, "Type": "Status"})
+
+    def test_create_batch_message(self):
+        """Unit test for creating batch messages for publishing."""
+        status_message = tools.messages.StatusMessage(**STATUS_JSON)
+        voltage_topics = ["NetworkState.Grid.Voltage.1", "NetworkState.Grid.Voltage.2"]
+
+        topic_name, batch_bytes = create_batch_message([
+            (voltage_topics[0], status_message),
+            (voltage_topics[1], status_message.bytes()),
+            ("NetworkState.Grid.Voltage.3", b"not JSON")
+        ], "Grid")
+        self.assertEqual(topic_name, "Batch.Grid")
+        batch_message = tools.messages.BatchMessage(**json.loads(batch_bytes.decode("UTF-8")))
+        self.assertEqual(batch_message.simulation_id, status_message.simulation_id)
+        self.assertEqual(batch_message.get_messages(), [
+            (voltage_topic, status_message.json()) for voltage_topic in voltage_topics])
+
+        topic_name, _ = create_batch_message([(voltage_topics[0], status_message)], "Batch.Grid.Voltage")
+        self.assertEqual(topic_name, "Batch.Grid.Voltage")
+
+        # no batch name or no valid messages
+        self.assertEqual(create_batch_message([("Epoch", status_message)], ""), (None, None))
+        self.assertEqual(create_batch_message([("Epoch", b"not JSON")], "Grid"), (None, None))
+        self.assertEqual(create_batch_message([], "Grid"), (None, None))
+
+    def test_batch_topics(self):
+        """Unit test for the batch topic names."""
+        self.assertEqual(tools.messages.BatchMessage.get_topic_name("Grid"), "Batch.Grid")
+        self.assertEqual(tools.messages.BatchMessage.get_topic_name("Batch.Grid"), "Batch.Grid")
+        self.assertTrue(tools.messages.BatchMessage.is_batch_topic("Batch.#"))
+        self.assertFalse(tools.messages.BatchMessage.is_batch_topic("Batch"))
+        self.assertFalse(tools.messages.BatchMessage.is_batch_topic("NetworkState.Batch.Grid"))
+
+if __name__ == '__main__':
+    unittest.main()
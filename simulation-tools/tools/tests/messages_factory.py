@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+# Author(s): Ville Heikkilä <ville.heikkila@tuni.fi>
+
+"""Unit test for the MessageFactory class."""
+
+import unittest
+
+import tools.messages
+from tools.message.factory import MessageFactory
+
+from tools.tests.messages_common import FULL_JSON
+
+
+class TestMessageFactory(unittest.TestCase):
+    """Unit tests for the MessageFactory class."""
+
+    def test_lazy_message_types(self):
+        """Unit test for the lazily registered message types."""
+        for message_type in ["General", "Result", "Epoch", "SimState", "Status", "Example"]:
+            with self.subTest(message_type=message_type):
+                self.assertIn(message_type, MessageFactory.get_message_types())
+                message_class = MessageFactory.get_message_class(message_type)
+                self.assertEqual(message_class.CLASS_MESSAGE_TYPE, message_type)
+                self.assertIs(MessageFactory.get_message_class(message_type), message_class)
+
+        status_message = MessageFactory.get_message(**{**FULL_JSON, "Type": "Status"})
+        self.assertIsInstance(status_message, tools.messages.StatusMessage)
+
+    def test_invalid_lazy_message_types(self):
+        """Unit test for the lazily registered message types that cannot be imported."""
+        MessageFactory.register_lazy_message_type("MissingModule", "tools.message.missing", "MissingMessage")
+        MessageFactory.register_lazy_message_type("MissingClass", "tools.message.status", "MissingMessage")
+        for message_type in ["MissingModule", "MissingClass", "Unknown"]:
+            with self.subTest(message_type=message_type):
+                with self.assertRaises(TypeError):
+                    MessageFactory.get_message_class(message_type)
+                self.assertNotIn(message_type, MessageFactory.get_message_types())
+
+        # registering an already registered message type should be ignored
+        MessageFactory.register_lazy_message_type("Epoch", "tools.message.status", "StatusMessage")
+        self.assertIs(MessageFactory.get_message_class("Epoch"), tools.messages.EpochMessage)
+
+    def test_lazy_module_attributes(self):
+        """Unit test for the lazily imported names in the tools.messages module."""
+        for attribute_name in tools.messages.__all__:
+            with self.subTest(attribute_name=attribute_name):
+                self.assertTrue(hasattr(tools.messages, attribute_name))
+        self.assertFalse(hasattr(tools.messages, "UnknownMessage"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,15 +8,23 @@
 
 import datetime
 import json
+import os
 import random
 import string
+import subprocess
+import sys
 from typing import Dict, Generator, List, Union, cast
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from tools.datetime_tools import to_iso_format_datetime_string
 from tools.exceptions.messages import MessageDateError, MessageValueError, MessageUnitValueError
 from tools.message.unit import UnitCode
-from tools.message.block import ValueArrayBlock, TimeSeriesBlock
+from tools.message.block import QuantityArrayBlock, ValueArrayBlock, TimeSeriesBlock
 
 
 def get_unit_code() -> Generator[str, None, None]:
@@ -90,6 +98,33 @@ class TestUnitCode(unittest.TestCase):
             with self.subTest(invalid_code=invalid_code):
                 self.assertFalse(UnitCode.is_valid(invalid_code))
 
+    def test_parsed_codes(self):
+        """Unit test for the unit codes that are not in the premade unit code lists."""
+        valid_codes = ["kW.h/m2", "mW.h/(m2.d)", "[ft_i]2", "10*-3.m", "(kg.m)/s2", "{count}/min", "GW{peak}", "uV2"]
+        invalid_codes = ["k", "kk", "m[Hg", "m/", "(m.s", "m{r", "[pi]x", "kcm-", "Wm2"]
+
+        for valid_code in valid_codes:
+            with self.subTest(valid_code=valid_code):
+                self.assertFalse(valid_code in UnitCode.UNIT_CODE_LIST)
+                self.assertTrue(UnitCode.is_valid(valid_code))
+        for invalid_code in invalid_codes:
+            with self.subTest(invalid_code=invalid_code):
+                self.assertFalse(UnitCode.is_valid(invalid_code))
+                # the second check uses the cached result
+                self.assertFalse(UnitCode.is_valid(invalid_code))
+
+    def test_get_description(self):
+        """Unit test for the unit code descriptions."""
+        self.assertEqual(UnitCode.get_description("kW.h/m2"), "kilowatt * hour / meter^2")
+        self.assertEqual(UnitCode.get_description("GW{peak}"), "gigawatt{peak}")
+        self.assertIsNone(UnitCode.get_description("invalid"))
+
+    def test_unit_code_list(self):
+        """Unit test for checking that the premade unit code list is loaded and read-only."""
+        self.assertIn("mm[Hg]", UnitCode.UNIT_CODE_LIST)
+        with self.assertRaises(TypeError):
+            UnitCode.UNIT_CODE_LIST["invalid"] = "invalid"  # type: ignore
+
 
 class TestValueArrayBlock(unittest.TestCase):
     """Unit tests for the ValueArrayBlock class."""
@@ -154,6 +189,105 @@ class TestValueArrayBlock(unittest.TestCase):
         self.assertRaises(MessageUnitValueError, ValueArrayBlock, **attribute_invalid_unit)
         ValueArrayBlock.UNIT_CODE_VALIDATION = False
 
+    @unittest.skipIf(numpy is None, "NumPy is not available")
+    def test_array_values(self):
+        """Unit test for creating ValueArrayBlock and QuantityArrayBlock objects with NumPy arrays."""
+        float_array = numpy.array([1.5, 2.5, 3.5])
+        attribute_object = QuantityArrayBlock(Values=float_array, UnitOfMeasure="kW")
+        self.assertIs(attribute_object.values, float_array)
+        self.assertEqual(attribute_object.json(), {"UnitOfMeasure": "kW", "Values": [1.5, 2.5, 3.5]})
+        self.assertEqual(json.loads(str(attribute_object)), attribute_object.json())
+        self.assertEqual(attribute_object, QuantityArrayBlock(Values=[1.5, 2.5, 3.5], UnitOfMeasure="kW"))
+        self.assertNotEqual(attribute_object, QuantityArrayBlock(Values=[1.5, 2.5], UnitOfMeasure="kW"))
+
+        # the array property should give a read-only view without copying the values
+        array_view = attribute_object.array
+        self.assertTrue(numpy.shares_memory(array_view, float_array))
+        self.assertFalse(array_view.flags.writeable)
+        self.assertTrue(float_array.flags.writeable)
+        list_object = QuantityArrayBlock(Values=[1, 2, 3], UnitOfMeasure="kW")
+        self.assertEqual(list_object.array.tolist(), [1, 2, 3])
+
+        self.assertIsInstance(ValueArrayBlock(Values=numpy.array([True, False]), UnitOfMeasure="m"), ValueArrayBlock)
+        self.assertIsInstance(ValueArrayBlock(Values=numpy.array(["a", "b"]), UnitOfMeasure="m"), ValueArrayBlock)
+        self.assertIsInstance(QuantityArrayBlock(Values=numpy.array([], dtype=float), UnitOfMeasure="m"),
+                              QuantityArrayBlock)
+
+        invalid_arrays = [
+            numpy.array([1.0, numpy.nan]),
+            numpy.array([1.0, numpy.inf]),
+            numpy.array([[1.0, 2.0], [3.0, 4.0]]),
+            numpy.array([True, False]),
+            numpy.array(["a", "b"]),
+            numpy.array([1.0 + 1j])
+        ]
+        for invalid_array in invalid_arrays:
+            with self.subTest(invalid_array=invalid_array):
+                self.assertRaises(MessageValueError, QuantityArrayBlock, Values=invalid_array, UnitOfMeasure="m")
+
+    @unittest.skipIf(numpy is None, "NumPy is not available")
+    def test_numpy_storage(self):
+        """Unit test for converting the number value lists to NumPy arrays with NUMPY_STORAGE setting."""
+        self.assertFalse(QuantityArrayBlock.NUMPY_STORAGE)
+        self.assertIsInstance(QuantityArrayBlock(Values=[1.0, 2.0], UnitOfMeasure="m").values, list)
+
+        QuantityArrayBlock.NUMPY_STORAGE = True  # type: ignore
+        try:
+            attribute_object = QuantityArrayBlock(Values=[1.0, 2.0, 3.0], UnitOfMeasure="m")
+            self.assertIsInstance(attribute_object.values, numpy.ndarray)
+            self.assertEqual(attribute_object.json(), {"UnitOfMeasure": "m", "Values": [1.0, 2.0, 3.0]})
+            self.assertTrue(numpy.shares_memory(attribute_object.array, attribute_object.values))
+
+            self.assertRaises(MessageValueError, QuantityArrayBlock, Values=[1.0, "2"], UnitOfMeasure="m")
+            self.assertRaises(MessageValueError, QuantityArrayBlock, Values=[True, False], UnitOfMeasure="m")
+            self.assertRaises(MessageValueError, QuantityArrayBlock, Values=[1.0, None], UnitOfMeasure="m")
+        finally:
+            QuantityArrayBlock.NUMPY_STORAGE = False
+
+    @unittest.skipIf(numpy is None, "NumPy is not available")
+    def test_numpy_storage_json(self):
+        """Unit test for the JSON format being the same with and without the NUMPY_STORAGE setting."""
+        value_lists = [[1, 2.5], [2.5, 1], [1, 2, 3], [1.0, 2.0, 3.0], [-4, 0.0], [7]]
+        expected_json = [
+            QuantityArrayBlock(Values=list(values), UnitOfMeasure="kW").json()
+            for values in value_lists
+        ]
+
+        QuantityArrayBlock.NUMPY_STORAGE = True  # type: ignore
+        try:
+            for values, block_json in zip(value_lists, expected_json):
+                with self.subTest(values=values):
+                    attribute_object = QuantityArrayBlock(Values=list(values), UnitOfMeasure="kW")
+                    self.assertEqual(json.dumps(attribute_object.json()), json.dumps(block_json))
+                    self.assertEqual(json.dumps(QuantityArrayBlock(**attribute_object.json()).json()),
+                                     json.dumps(block_json))
+
+            # the lists with both int and float values are kept as lists
+            self.assertIsInstance(QuantityArrayBlock(Values=[1, 2.5], UnitOfMeasure="kW").values, list)
+            self.assertIsInstance(QuantityArrayBlock(Values=[1, 2], UnitOfMeasure="kW").values, numpy.ndarray)
+        finally:
+            QuantityArrayBlock.NUMPY_STORAGE = False
+
+    @unittest.skipIf(numpy is None, "NumPy is not available")
+    def test_numpy_storage_environment(self):
+        """Unit test for enabling the NumPy array storage with the SIMULATION_NUMPY_STORAGE environment variable."""
+        check_script = "; ".join([
+            "from tools.message.block import QuantityArrayBlock",
+            "print(type(QuantityArrayBlock(Values=[1.0, 2.0], UnitOfMeasure='m').values).__name__)"
+        ])
+        for environment_value, expected_type in [("true", "ndarray"), ("false", "list"), (None, "list")]:
+            with self.subTest(environment_value=environment_value):
+                environment = {
+                    name: value for name, value in os.environ.items() if name != "SIMULATION_NUMPY_STORAGE"
+                }
+                if environment_value is not None:
+                    environment["SIMULATION_NUMPY_STORAGE"] = environment_value
+                environment["SIMULATION_LOG_FILE"] = os.devnull
+                process = subprocess.run(
+                    [sys.executable, "-c", check_script], env=environment, check=True,
+                    stdout=subprocess.PIPE, universal_newlines=True)
+                self.assertEqual(process.stdout.strip().splitlines()[-1], expected_type)
+
 
 class TestTimeSeriesBlock(unittest.TestCase):
     """Unit tests for the TimeSeriesBlock class."""
@@ -250,6 +384,109 @@ class TestTimeSeriesBlock(unittest.TestCase):
         self.assertRaises(MessageValueError, valid_object_4.add_series,
                           "Z", ValueArrayBlock(**attribute_valid_3))
 
+        invalid_dates = [
+            ["2020-02-30T00:00:00.000Z"],
+            ["2020-01-01T24:00:00.000Z"],
+            ["2020-01-01T00:00:60Z"],
+            ["2020-13-01T00:00:00Z"]
+        ]
+        for invalid_date in invalid_dates:
+            with self.subTest(invalid_date=invalid_date):
+                self.assertRaises(MessageDateError, TimeSeriesBlock,
+                                  TimeIndex=invalid_date, Series={"X": {"UnitOfMeasure": "m", "Values": [1]}})
+
+    def test_time_index_normalization(self):
+        """Unit test for checking that the time index values are normalized to the ISO 8601 format in UTC."""
+        time_index = [
+            "2020-01-01T00:00:00Z",
+            "2020-01-01T00:15:00.5Z",
+            "2020-01-01T00:30:00.123456Z",
+            "2020-01-01T00:45:00.999Z",
+            "2020-01-01T03:00:00+02:00",
+            datetime.datetime(2020, 1, 1, 1, 15, 0, 100, tzinfo=datetime.timezone.utc)
+        ]
+        series = {"X": {"UnitOfMeasure": "m", "Values": [1.0] * len(time_index)}}
+        expected_time_index = [
+            "2020-01-01T00:00:00.000Z",
+            "2020-01-01T00:15:00.500Z",
+            "2020-01-01T00:30:00.123Z",
+            "2020-01-01T00:45:00.999Z",
+            "2020-01-01T01:00:00.000Z",
+            "2020-01-01T01:15:00.000Z"
+        ]
+
+        # the UTC only index and the mixed index should give the same results
+        for test_index, expected_index in [(time_index[:4], expected_time_index[:4]),
+                                           (time_index, expected_time_index)]:
+            with self.subTest(test_index=test_index):
+                test_series = {"X": {"UnitOfMeasure": "m", "Values": [1.0] * len(test_index)}}
+                time_series_block = TimeSeriesBlock(TimeIndex=test_index, Series=test_series)
+                self.assertEqual(time_series_block.time_index, expected_index)
+                self.assertEqual(len(time_series_block), len(expected_index))
+                self.assertEqual(
+                    time_series_block.time_index,
+                    [to_iso_format_datetime_string(datetime_value) for datetime_value in test_index])
+
+        self.assertEqual(
+            TimeSeriesBlock(TimeIndex=time_index, Series=series),
+            TimeSeriesBlock(TimeIndex=expected_time_index, Series=series))
+
+    @unittest.skipIf(numpy is None, "NumPy is not available")
+    def test_time_index_array(self):
+        """Unit test for the datetime64 time index of the TimeSeriesBlock."""
+        time_index = ["2020-01-01T00:00:00.000Z", "2020-01-01T01:00:00.000Z", "2020-01-01T02:00:00.000Z"]
+        time_series_block = TimeSeriesBlock(
+            TimeIndex=time_index,
+            Series={"X": {"UnitOfMeasure": "m", "Values": [1, 2, 3]}})
+
+        time_array = time_series_block.time_index_array
+        self.assertEqual(time_array.dtype, numpy.dtype("datetime64[ms]"))
+        self.assertFalse(time_array.flags.writeable)
+        self.assertEqual(time_array.tolist(), [
+            datetime.datetime(2020, 1, 1, hour, 0, 0) for hour in range(3)
+        ])
+        self.assertEqual(time_series_block.json()["TimeIndex"], time_index)
+
+    @unittest.skipIf(numpy is None, "NumPy is not available")
+    def test_slice_and_resample(self):
+        """Unit test for the slice and resample methods of the TimeSeriesBlock."""
+        time_series_block = TimeSeriesBlock(
+            TimeIndex=["2020-01-01T00:00:00Z", "2020-01-01T01:00:00Z",
+                       "2020-01-01T02:00:00Z", "2020-01-01T03:00:00Z"],
+            Series={
+                "X": {"UnitOfMeasure": "m", "Values": [1.0, 2.0, 3.0, 4.0]},
+                "Y": {"UnitOfMeasure": "s", "Values": ["a", "b", "c", "d"]},
+                "Z": ValueArrayBlock(Values=numpy.array([10, 20, 30, 40]), UnitOfMeasure="A")
+            })
+
+        sliced_block = time_series_block.slice("2020-01-01T01:00:00Z", "2020-01-01T03:00:00.000Z")
+        self.assertEqual(sliced_block.time_index, ["2020-01-01T01:00:00.000Z", "2020-01-01T02:00:00.000Z"])
+        self.assertEqual(sliced_block.series["X"].values, [2.0, 3.0])
+        self.assertEqual(sliced_block.series["Y"].values, ["b", "c"])
+        self.assertEqual(sliced_block.series["Z"].values.tolist(), [20, 30])
+        self.assertEqual(sliced_block.series["Z"].unit_of_measure, "A")
+        self.assertEqual(time_series_block.slice(end_time="2020-01-01T01:00:00Z").time_index,
+                         ["2020-01-01T00:00:00.000Z"])
+        self.assertEqual(time_series_block.slice(), time_series_block)
+        self.assertRaises(MessageDateError, time_series_block.slice, "2020-01-02T00:00:00Z")
+        self.assertRaises(MessageDateError, time_series_block.slice, "invalid")
+
+        new_time_index = ["2020-01-01T00:00:00Z", "2020-01-01T00:30:00Z", "2020-01-01T01:00:00Z",
+                          "2020-01-01T02:59:59.999Z", "2020-01-01T05:00:00Z"]
+        resampled_block = time_series_block.resample(new_time_index)
+        self.assertEqual(resampled_block.time_index, [
+            "2020-01-01T00:00:00.000Z", "2020-01-01T00:30:00.000Z", "2020-01-01T01:00:00.000Z",
+            "2020-01-01T02:59:59.999Z", "2020-01-01T05:00:00.000Z"])
+        self.assertEqual(resampled_block.series["X"].values, [1.0, 1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(resampled_block.series["Y"].values, ["a", "a", "b", "c", "d"])
+        self.assertEqual(resampled_block.series["Z"].values.tolist(), [10, 10, 20, 30, 40])
+        self.assertEqual(
+            time_series_block.resample(numpy.array(new_time_index[:2], dtype="datetime64[ms]")).time_index,
+            resampled_block.time_index[:2])
+
+        self.assertRaises(MessageDateError, time_series_block.resample, ["2019-12-31T23:00:00Z"])
+        self.assertRaises(MessageDateError, time_series_block.resample, [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -7,9 +7,13 @@
 """Unit tests for the functions in tools.py."""
 
 import logging
+import os
+import time
 import unittest
 
-from tools.tools import FullLogger, load_environmental_variables
+from tools.tools import (
+    COMMON_ENV_VARIABLES, SIMULATION_LOG_FILE, BackgroundLogWriter, FullLogger, LogQueueHandler,
+    load_environmental_variables)
 
 
 def add_log_message(logger: FullLogger, check_list: list, log_level: int, log_message: str):
@@ -109,6 +113,81 @@ class TestTools(unittest.TestCase):
             add_log_message(logger, check_logs, logging.CRITICAL, "Critical test")
         self.assertEqual(test_logger.output, check_logs)
 
+    def test_lazy_arguments(self):
+        """Tests that the %-style arguments are only formatted when the message is written."""
+        class FormatCounter:
+            """Counts how many times the object has been converted to a string."""
+            def __init__(self):
+                self.count = 0
+
+            def __str__(self):
+                self.count += 1
+                return "counter"
+
+        logger = FullLogger("test_lazy_logger", logger_level=logging.INFO, stdout_output=False)
+        format_counter = FormatCounter()
+        self.assertFalse(logger.is_enabled_for(logging.DEBUG))
+        self.assertTrue(logger.is_enabled_for(logging.INFO))
+
+        with self.assertLogs(logger.logger, logging.INFO) as test_logger:
+            logger.debug("Debug %s", format_counter)
+            logger.info("Info %s", format_counter)
+        self.assertEqual(test_logger.output, ["INFO:test_lazy_logger:Info counter"])
+        self.assertEqual(format_counter.count, 1)
+
+    def test_log_rate_limited(self):
+        """Tests for the rate-limited logging."""
+        logger = FullLogger("test_rate_limited_logger", logger_level=logging.INFO, stdout_output=False)
+        with self.assertLogs(logger.logger, logging.INFO) as test_logger:
+            self.assertTrue(logger.log_rate_limited(logging.INFO, 0.05, "Message %d", 1))
+            self.assertFalse(logger.log_rate_limited(logging.INFO, 0.05, "Message %d", 2))
+            self.assertFalse(logger.log_rate_limited(logging.INFO, 0.05, "Message %d", 3))
+            # a different key is not limited by the other messages
+            self.assertTrue(logger.log_rate_limited(logging.INFO, 0.05, "Other message"))
+            time.sleep(0.06)
+            self.assertTrue(logger.log_rate_limited(logging.INFO, 0.05, "Message %d", 4))
+            self.assertFalse(logger.log_rate_limited(logging.DEBUG, 0.05, "Debug message"))
+
+        self.assertEqual(test_logger.output, [
+            "INFO:test_rate_limited_logger:Message 1",
+            "INFO:test_rate_limited_logger:Other message",
+            "INFO:test_rate_limited_logger:Message 4 (2 similar messages suppressed)"
+        ])
+
+    def test_log_sampled(self):
+        """Tests for the sampled logging."""
+        logger = FullLogger("test_sampled_logger", logger_level=logging.INFO, stdout_output=False)
+        with self.assertLogs(logger.logger, logging.INFO) as test_logger:
+            written = [logger.log_sampled(logging.INFO, 3, "Sample %d", index) for index in range(1, 8)]
+            self.assertTrue(logger.log_sampled(logging.INFO, 1, "Every message"))
+
+        self.assertEqual(written, [True, False, False, True, False, False, True])
+        self.assertEqual(test_logger.output, [
+            "INFO:test_sampled_logger:Sample 1 (occurrence 1, logging every 3)",
+            "INFO:test_sampled_logger:Sample 4 (occurrence 4, logging every 3)",
+            "INFO:test_sampled_logger:Sample 7 (occurrence 7, logging every 3)",
+            "INFO:test_sampled_logger:Every message"
+        ])
+
+    def test_background_writer(self):
+        """Tests that the background writer writes the queued log messages to the log file."""
+        log_file_name = COMMON_ENV_VARIABLES[SIMULATION_LOG_FILE]
+        if not isinstance(log_file_name, str) or log_file_name == os.devnull:
+            self.skipTest("No log file available")
+
+        logger = FullLogger("test_background_logger", logger_level=logging.DEBUG, stdout_output=False,
+                            background_writer=True)
+        self.assertTrue(BackgroundLogWriter.is_running())
+        self.assertTrue(any(isinstance(handler, LogQueueHandler) for handler in logger.logger.handlers))
+
+        test_message = "Background writer test {:f}".format(time.time())
+        logger.info("%s", test_message)
+        BackgroundLogWriter.stop()
+        self.assertFalse(BackgroundLogWriter.is_running())
+
+        with open(log_file_name, mode="r", encoding="UTF-8") as log_file:
+            self.assertIn(test_message, log_file.read())
+
 
 if __name__ == '__main__':
     unittest.main()
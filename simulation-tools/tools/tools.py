@@ -7,16 +7,21 @@
 """Module containing common tools for the use of simulation platform components."""
 
 import asyncio
+import atexit
 import functools
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import time
 from types import TracebackType
 from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union, cast
 
 SIMULATION_LOG_LEVEL = "SIMULATION_LOG_LEVEL"
 SIMULATION_LOG_FILE = "SIMULATION_LOG_FILE"
 SIMULATION_LOG_FORMAT = "SIMULATION_LOG_FORMAT"
+SIMULATION_LOG_ASYNC = "SIMULATION_LOG_ASYNC"
 
 EnvironmentVariableValue = Union[bool, int, float, str]
 EnvironmentVariableType = Union[Type[bool], Type[int], Type[float], Type[str]]
@@ -142,9 +147,78 @@ LOGGING_MSEC_FORMAT = "%s.%03d"
 COMMON_ENV_VARIABLES = load_environmental_variables(
     (SIMULATION_LOG_LEVEL, int, logging.DEBUG),
     (SIMULATION_LOG_FILE, str, DEFAULT_LOGFILE_NAME),
-    (SIMULATION_LOG_FORMAT, str, DEFAULT_LOGFILE_FORMAT)
+    (SIMULATION_LOG_FORMAT, str, DEFAULT_LOGFILE_FORMAT),
+    (SIMULATION_LOG_ASYNC, bool, False)
 )
 
+# the attribute that tells the background log writer whether a log record should be written to stdout
+STDOUT_OUTPUT_ATTRIBUTE = "stdout_output"
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that marks whether the log records should also be written to the stdout device."""
+    def __init__(self, log_queue: queue.Queue, stdout_output: bool):
+        super().__init__(log_queue)
+        self.__stdout_output = stdout_output
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Formats the message in the calling thread and adds the stdout output attribute to the record."""
+        prepared_record = super().prepare(record)
+        setattr(prepared_record, STDOUT_OUTPUT_ATTRIBUTE, self.__stdout_output)
+        return prepared_record
+
+
+class BackgroundLogWriter:
+    """Writes the log records from all the loggers that use the shared log queue in a background thread.
+       The log file and the stdout device are written only from the background thread, so that the logging calls
+       in the components only need to put the log record to the queue."""
+    __log_queue: Optional[queue.Queue] = None
+    __listener: Optional[logging.handlers.QueueListener] = None
+
+    @classmethod
+    def get_log_queue(cls) -> queue.Queue:
+        """Returns the shared log queue. Starts the background writer on the first call."""
+        if cls.__log_queue is None:
+            cls.__log_queue = queue.Queue()
+            cls.__listener = logging.handlers.QueueListener(
+                cls.__log_queue, *cls.__get_handlers(), respect_handler_level=True)
+            cls.__listener.start()
+            atexit.register(cls.stop)
+        return cls.__log_queue
+
+    @classmethod
+    def is_running(cls) -> bool:
+        """Returns True if the background writer has been started and not yet stopped."""
+        return cls.__listener is not None
+
+    @classmethod
+    def stop(cls) -> None:
+        """Writes all the remaining log records in the queue and stops the background writer."""
+        if cls.__listener is not None:
+            cls.__listener.stop()
+            for handler in cls.__listener.handlers:
+                handler.close()
+            cls.__listener = None
+            cls.__log_queue = None
+
+    @classmethod
+    def __get_handlers(cls) -> List[logging.Handler]:
+        log_formatter = get_log_formatter()
+        handlers: List[logging.Handler] = []
+
+        log_file_name = COMMON_ENV_VARIABLES[SIMULATION_LOG_FILE]
+        if isinstance(log_file_name, str):
+            log_file_handler = logging.FileHandler(log_file_name)
+            log_file_handler.setFormatter(log_formatter)
+            handlers.append(log_file_handler)
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(log_formatter)
+        console_handler.addFilter(lambda record: getattr(record, STDOUT_OUTPUT_ATTRIBUTE, True))
+        handlers.append(console_handler)
+
+        return handlers
+
 
 class FullLogger:
     """Logger object that also prints all the output."""
@@ -156,12 +230,37 @@ class FullLogger:
         logging.CRITICAL: "CRITICAL"
     }
 
-    def __init__(self, logger_name: str, logger_level: Optional[int] = None, stdout_output: bool = True):
+    SUPPRESSED_MESSAGE_SUFFIX = " (%d similar messages suppressed)"
+    SAMPLED_MESSAGE_SUFFIX = " (occurrence %d, logging every %d)"
+
+    def __init__(self, logger_name: str, logger_level: Optional[int] = None, stdout_output: bool = True,
+                 background_writer: Optional[bool] = None):
         """Creates a logger object with the given name and log level and that writes the logs to a file.
            The log filename is determined by the environment variable SIMULATION_LOG_FILE. If argument
            logger_level is None, the logging level is determined by the environment variable SIMULATION_LOG_LEVEL.
            If stdout_output is True, then the log messages are also printed on the stdout device.
+
+           If background_writer is True, the log messages are only put to a queue and a shared background thread
+           writes them to the log file and to the stdout device. If background_writer is None, the value
+           is determined by the environment variable SIMULATION_LOG_ASYNC.
+
+           The log messages can use lazy %-style arguments, e.g. logger.info("Received %d messages", count),
+           so that the message is only formatted if it is actually written.
         """
+        # log key -> (time of the latest written message, number of suppressed messages)
+        self.__rate_limited_messages: Dict[str, Tuple[float, int]] = {}
+        # log key -> number of occurrences
+        self.__sampled_messages: Dict[str, int] = {}
+
+        if background_writer is None:
+            background_writer = bool(COMMON_ENV_VARIABLES[SIMULATION_LOG_ASYNC])
+        if background_writer:
+            self.__logger = logging.getLogger(logger_name)
+            self.__logger.setLevel(cast(int, COMMON_ENV_VARIABLES[SIMULATION_LOG_LEVEL])
+                                   if logger_level is None else logger_level)
+            self.__logger.addHandler(LogQueueHandler(BackgroundLogWriter.get_log_queue(), stdout_output))
+            return
+
         self.__logger = get_logger(logger_name, log_level=logger_level)
 
         if stdout_output:
@@ -183,13 +282,64 @@ class FullLogger:
         """Writes log message with WARNING logging level."""
         self.__logger.warning(message, *args, **kwargs)
 
-    def error(self, message: str, *args):
+    def error(self, message: str, *args, **kwargs):
         """Writes log message with ERROR logging level."""
-        self.__logger.error(message, *args)
+        self.__logger.error(message, *args, **kwargs)
 
-    def critical(self, message: str, *args):
+    def critical(self, message: str, *args, **kwargs):
         """Writes log message with CRITICAL logging level."""
-        self.__logger.critical(message, *args)
+        self.__logger.critical(message, *args, **kwargs)
+
+    def is_enabled_for(self, log_level: int) -> bool:
+        """Returns True if a message with the given logging level would be written.
+           Can be used to avoid building expensive log arguments in hot code paths."""
+        return self.__logger.isEnabledFor(log_level)
+
+    def log_rate_limited(self, log_level: int, interval: float, message: str, *args,
+                         key: Optional[str] = None, **kwargs) -> bool:
+        """Writes the log message with the given logging level at most once in the given interval (in seconds).
+           The messages are grouped by the given key or by the message format string if key is None.
+           When a message is written, the number of suppressed messages since the previous one is added to it.
+           Returns True if the message was written."""
+        if not self.__logger.isEnabledFor(log_level):
+            return False
+
+        log_key = message if key is None else key
+        current_time = time.monotonic()
+        previous_time, suppressed_messages = self.__rate_limited_messages.get(log_key, (None, 0))
+        if previous_time is not None and current_time - previous_time < interval:
+            self.__rate_limited_messages[log_key] = (previous_time, suppressed_messages + 1)
+            return False
+
+        self.__rate_limited_messages[log_key] = (current_time, 0)
+        if suppressed_messages > 0:
+            self.__logger.log(
+                log_level, message + self.__class__.SUPPRESSED_MESSAGE_SUFFIX, *args, suppressed_messages, **kwargs)
+        else:
+            self.__logger.log(log_level, message, *args, **kwargs)
+        return True
+
+    def log_sampled(self, log_level: int, sample_interval: int, message: str, *args,
+                    key: Optional[str] = None, **kwargs) -> bool:
+        """Writes only every sample_interval:th occurrence of the log message with the given logging level,
+           starting from the first occurrence. The messages are grouped by the given key or by the message
+           format string if key is None. Returns True if the message was written."""
+        if not self.__logger.isEnabledFor(log_level):
+            return False
+
+        log_key = message if key is None else key
+        occurrence = self.__sampled_messages.get(log_key, 0) + 1
+        self.__sampled_messages[log_key] = occurrence
+        if sample_interval > 1 and (occurrence - 1) % sample_interval != 0:
+            return False
+
+        if sample_interval > 1:
+            self.__logger.log(
+                log_level, message + self.__class__.SAMPLED_MESSAGE_SUFFIX, *args, occurrence, sample_interval,
+                **kwargs)
+        else:
+            self.__logger.log(log_level, message, *args, **kwargs)
+        return True
 
     @property
     def level(self) -> int:
@@ -226,17 +376,21 @@ def get_logger(logger_name: str, log_level: Optional[int] = None) -> logging.Log
 
     log_file_name = COMMON_ENV_VARIABLES[SIMULATION_LOG_FILE]
     if isinstance(log_file_name, str):
-        log_formatter = logging.Formatter(cast(str, COMMON_ENV_VARIABLES[SIMULATION_LOG_FORMAT]))
-        log_formatter.default_time_format = LOGGING_DATE_FORMAT
-        log_formatter.default_msec_format = LOGGING_MSEC_FORMAT
-
         log_file_handler = logging.FileHandler(log_file_name)
-        log_file_handler.setFormatter(log_formatter)
+        log_file_handler.setFormatter(get_log_formatter())
         new_logger.addHandler(log_file_handler)
 
     return new_logger
 
 
+def get_log_formatter() -> logging.Formatter:
+    """Returns a log formatter that uses the format given by the environment variable SIMULATION_LOG_FORMAT."""
+    log_formatter = logging.Formatter(cast(str, COMMON_ENV_VARIABLES[SIMULATION_LOG_FORMAT]))
+    log_formatter.default_time_format = LOGGING_DATE_FORMAT
+    log_formatter.default_msec_format = LOGGING_MSEC_FORMAT
+    return log_formatter
+
+
 LOGGER = FullLogger(__name__)
 
 
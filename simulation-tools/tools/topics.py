@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 Tampere University and VTT Technical Research Centre of Finland
+# This software was developed as a part of the ProCemPlus project: https://www.senecc.fi/projects/procemplus
+# This source code is licensed under the MIT license. See LICENSE in the repository root directory.
+
+"""This module contains tools for matching message bus topics against AMQP topic patterns."""
+
+from typing import Dict, Hashable, List, Set
+
+
+class TopicTrie:
+    """Trie for matching routing keys against AMQP topic patterns.
+
+       The patterns and the routing keys consist of words separated by dots. In the patterns,
+       "*" matches exactly one word and "#" matches zero or more words.
+       The matching results are cached until the trie is modified.
+    """
+    WORD_SEPARATOR = "."
+    SINGLE_WORD = "*"
+    MULTIPLE_WORDS = "#"
+    MATCH_CACHE_SIZE = 4096
+
+    class Node:
+        """A node in the topic trie."""
+        __slots__ = ["children", "values"]
+
+        def __init__(self):
+            self.children: Dict[str, TopicTrie.Node] = {}
+            self.values: Set[Hashable] = set()
+
+    def __init__(self):
+        self.__root = TopicTrie.Node()
+        self.__patterns: Dict[str, int] = {}
+        self.__match_cache: Dict[str, frozenset] = {}
+
+    @property
+    def patterns(self) -> List[str]:
+        """Returns the list of the patterns that have at least one value."""
+        return list(self.__patterns)
+
+    def add(self, pattern: str, value: Hashable) -> None:
+        """Adds the value for the given topic pattern."""
+        node = self.__root
+        for word in pattern.split(TopicTrie.WORD_SEPARATOR):
+            node = node.children.setdefault(word, TopicTrie.Node())
+
+        if value not in node.values:
+            node.values.add(value)
+            self.__patterns[pattern] = self.__patterns.get(pattern, 0) + 1
+            self.__match_cache.clear()
+
+    def remove(self, pattern: str, value: Hashable) -> None:
+        """Removes the value from the given topic pattern. Unused nodes are removed from the trie."""
+        path = [self.__root]
+        for word in pattern.split(TopicTrie.WORD_SEPARATOR):
+            node = path[-1].children.get(word, None)
+            if node is None:
+                return
+            path.append(node)
+
+        if value not in path[-1].values:
+            return
+        path[-1].values.remove(value)
+        self.__patterns[pattern] -= 1
+        if self.__patterns[pattern] == 0:
+            del self.__patterns[pattern]
+        self.__match_cache.clear()
+
+        words = pattern.split(TopicTrie.WORD_SEPARATOR)
+        for word, parent, node in zip(reversed(words), reversed(path[:-1]), reversed(path[1:])):
+            if node.children or node.values:
+                break
+            del parent.children[word]
+
+    def match(self, routing_key: str) -> frozenset:
+        """Returns the set of values for all the patterns that match the given routing key."""
+        values = self.__match_cache.get(routing_key, None)
+        if values is None:
+            matched_values = set()
+            TopicTrie.__match_node(self.__root, routing_key.split(TopicTrie.WORD_SEPARATOR), 0, matched_values)
+            values = frozenset(matched_values)
+            if len(self.__match_cache) >= TopicTrie.MATCH_CACHE_SIZE:
+                self.__match_cache.clear()
+            self.__match_cache[routing_key] = values
+
+        return values
+
+    def matches(self, routing_key: str) -> bool:
+        """Returns True if any pattern in the trie matches the given routing key."""
+        return bool(self.match(routing_key))
+
+    @staticmethod
+    def __match_node(node: "TopicTrie.Node", words: List[str], word_index: int, matched_values: Set[Hashable]):
+        multiple_words_node = node.children.get(TopicTrie.MULTIPLE_WORDS, None)
+        if multiple_words_node is not None:
+            # "#" can match any number of the remaining words, including zero words
+            for next_word_index in range(word_index, len(words) + 1):
+                TopicTrie.__match_node(multiple_words_node, words, next_word_index, matched_values)
+
+        if word_index == len(words):
+            matched_values.update(node.values)
+            return
+
+        word_node = node.children.get(words[word_index], None)
+        if word_node is not None:
+            TopicTrie.__match_node(word_node, words, word_index + 1, matched_values)
+        single_word_node = node.children.get(TopicTrie.SINGLE_WORD, None)
+        if single_word_node is not None:
+            TopicTrie.__match_node(single_word_node, words, word_index + 1, matched_values)